@@ -0,0 +1,330 @@
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from PyQt5.QtCore import QCoreApplication
+from PyQt5.QtWidgets import QApplication
+
+import config
+from benchmarks.http_server import LocalFileServer, ProcessFileServer, file_sha256, served_file
+
+
+ENGINES = ("threads", "asyncio")
+DRIVERS = ("worker", "tui", "window")
+MAX_WORKER_ATTEMPTS = 5
+WAIT_TIMEOUT_SECONDS = 600
+
+# A collected application takes the global QThreadPool down with it.
+_APP = []
+
+
+def ensure_app():
+    if QCoreApplication.instance() is None:
+        _APP.append(QApplication([]))
+    return QCoreApplication.instance()
+
+
+def sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(4 * 1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def isolated_state(folder, engine="threads", max_parallel=4):
+    # Config and session files go to a temporary folder so a benchmark never
+    # touches (or resumes) the user's real download session.
+    from download_manager import tui, window
+
+    saved = (config.CONFIG_PATH, window.SESSION_PATH, tui.SESSION_PATH)
+    state_dir = os.path.join(folder, ".state")
+    os.makedirs(state_dir, exist_ok=True)
+    config.CONFIG_PATH = os.path.join(state_dir, "config.json")
+    window.SESSION_PATH = tui.SESSION_PATH = os.path.join(state_dir, "download_state.json")
+    config.save_config(dict(
+        config.DEFAULT_CONFIG,
+        folder_path=folder,
+        max_parallel_downloads=max_parallel,
+        download_engine=engine,
+        auto_extract_archives=False,
+        on_all_downloads_complete="none",
+    ))
+    try:
+        yield
+    finally:
+        config.CONFIG_PATH, window.SESSION_PATH, tui.SESSION_PATH = saved
+
+
+class EventPump:
+    # Runs the Qt event loop of the calling (GUI) thread and counts how long
+    # it was busy handling events, as opposed to idle between them.
+    def __init__(self, app):
+        self.app = app
+        self.busy_seconds = 0.0
+
+    def run_until(self, condition, timeout=WAIT_TIMEOUT_SECONDS, idle_sleep=0.005):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise TimeoutError("La descarga de prueba no terminó a tiempo")
+            started = time.perf_counter()
+            self.app.processEvents()
+            self.busy_seconds += time.perf_counter() - started
+            time.sleep(idle_sleep)
+
+
+class Measurement:
+    def __init__(self, driver, engine, specs):
+        self.driver = driver
+        self.engine = engine
+        self.specs = specs
+
+    def __enter__(self):
+        self.wall_started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        return self
+
+    def __exit__(self, *args):
+        self.wall_seconds = time.perf_counter() - self.wall_started
+        self.cpu_seconds = time.process_time() - self.cpu_started
+        return False
+
+    def report(self, paths, ui_busy_seconds=None, requests=None):
+        total_bytes = sum(spec["size"] for spec in self.specs)
+        resume_ok = all(
+            os.path.exists(paths[spec["name"]]) and sha256_of(paths[spec["name"]]) == file_sha256(spec)
+            for spec in self.specs
+        )
+        gib = total_bytes / float(1024 ** 3) or 1.0
+        return {
+            "driver": self.driver,
+            "engine": self.engine,
+            "files": len(self.specs),
+            "bytes": total_bytes,
+            "wall_s": round(self.wall_seconds, 3),
+            "mb_s": round(total_bytes / 1e6 / max(self.wall_seconds, 1e-9), 2),
+            "cpu_s_per_gib": round(self.cpu_seconds / gib, 3),
+            "ui_busy_s": None if ui_busy_seconds is None else round(ui_busy_seconds, 3),
+            "requests": requests,
+            "resume_ok": resume_ok,
+        }
+
+
+def run_worker_driver(server, specs, folder, engine="threads", max_parallel=4):
+    # FileDownloader / AsyncDownloadJob on their own; failed attempts are
+    # resumed from the last checkpoint the way the window does it.
+    from PyQt5.QtCore import QThreadPool
+    from download_manager.async_engine import AsyncDownloadEngine, AsyncDownloadJob
+    from download_manager.workers import DownloadSignals, FileDownloader
+
+    app = ensure_app()
+    pump = EventPump(app)
+    paths = {spec["name"]: os.path.join(folder, spec["name"]) for spec in specs}
+    links = {index: {"validators": None, "downloaded": 0, "preallocated": False, "done": None, "attempts": 0}
+             for index in range(len(specs))}
+    async_engine = AsyncDownloadEngine() if engine == "asyncio" else None
+    requests_made = [0]
+    QThreadPool.globalInstance().setMaxThreadCount(max_parallel)
+
+    def on_validated(index, validators):
+        links[index]["validators"] = validators
+
+    def on_checkpoint(index, data):
+        links[index].update(data)
+
+    def on_finished(index, ok):
+        link = links[index]
+        if ok or link["attempts"] >= MAX_WORKER_ATTEMPTS:
+            link["done"] = ok
+        else:
+            start(index)
+
+    signals = DownloadSignals()
+    signals.validated.connect(on_validated)
+    signals.checkpoint.connect(on_checkpoint)
+    signals.finished.connect(on_finished)
+
+    def start(index):
+        link = links[index]
+        link["attempts"] += 1
+        requests_made[0] += 1
+        downloader_class = AsyncDownloadJob if async_engine else FileDownloader
+        job = downloader_class(
+            server.url(specs[index]["name"]),
+            paths[specs[index]["name"]],
+            index,
+            signals,
+            validators=link["validators"],
+            resume_offset=link["downloaded"] if link["preallocated"] else None,
+        )
+        if async_engine:
+            async_engine.submit(job)
+        else:
+            QThreadPool.globalInstance().start(job)
+
+    with isolated_state(folder, engine, max_parallel), Measurement("worker", engine, specs) as measurement:
+        pending = list(range(len(specs)))
+
+        def schedule():
+            active = sum(1 for link in links.values() if link["attempts"] and link["done"] is None)
+            while pending and active < max_parallel:
+                start(pending.pop(0))
+                active += 1
+            return not pending and all(link["done"] is not None for link in links.values())
+
+        try:
+            pump.run_until(schedule)
+        finally:
+            if async_engine:
+                async_engine.shutdown()
+    return measurement.report(paths, pump.busy_seconds, requests_made[0])
+
+
+def run_tui_driver(server, specs, folder, engine="threads", max_parallel=4):
+    from download_manager.tui import TuiDownloadManager
+
+    app = ensure_app()
+    paths = {spec["name"]: os.path.join(folder, spec["name"]) for spec in specs}
+    with isolated_state(folder, engine, max_parallel):
+        manager = TuiDownloadManager(app, [{
+            "title": spec["name"],
+            "url": server.url(spec["name"]),
+            "path": folder,
+            "download_type": "regular",
+            "direct_links": [{"path": paths[spec["name"]], "url": server.url(spec["name"]), "size": spec["size"]}],
+        } for spec in specs])
+        with Measurement("tui", "threads", specs) as measurement:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+                manager.run_pipeline(manager.entries)
+    return measurement.report(paths)
+
+
+def run_window_driver(server, specs, folder, engine="threads", max_parallel=4):
+    from download_manager.window import DownloadWindow
+
+    app = ensure_app()
+    pump = EventPump(app)
+    paths = {spec["name"]: os.path.join(folder, spec["name"]) for spec in specs}
+    with isolated_state(folder, engine, max_parallel):
+        window = DownloadWindow([])
+        try:
+            with Measurement("window", engine, specs) as measurement:
+                window.load_entries([{
+                    "title": spec["name"],
+                    "url": server.url(spec["name"]),
+                    "path": folder,
+                    "download_type": "regular",
+                    "direct_links": [{"path": paths[spec["name"]], "url": server.url(spec["name"]), "size": spec["size"]}],
+                } for spec in specs])
+                pump.run_until(lambda: all(
+                    entry["status"] in {"finished", "error", "cancelled"} for entry in window.entries.values()
+                ))
+            return measurement.report(paths, pump.busy_seconds)
+        finally:
+            window.shutdown_app()
+            window.deleteLater()
+
+
+DRIVER_FUNCTIONS = {"worker": run_worker_driver, "tui": run_tui_driver, "window": run_window_driver}
+
+
+def build_specs(count, size, latency=0.0, bandwidth=0, flaky=0):
+    return [
+        served_file(
+            f"bench-{index:03d}.bin",
+            size,
+            latency=latency,
+            bandwidth=bandwidth,
+            disconnects=1 if index < flaky else 0,
+            disconnect_after=size // 3,
+        )
+        for index in range(count)
+    ]
+
+
+def run_benchmark(specs, drivers=DRIVERS, engines=ENGINES, max_parallel=4, separate_process=True):
+    results = []
+    for driver in drivers:
+        for engine in engines:
+            if driver == "tui" and engine != "threads":
+                continue
+            fresh_specs = [dict(spec, fail_statuses=list(spec["fail_statuses"])) for spec in specs]
+            server = ProcessFileServer(fresh_specs) if separate_process else LocalFileServer(fresh_specs)
+            with server, tempfile.TemporaryDirectory(prefix="dm-bench-") as folder:
+                results.append(DRIVER_FUNCTIONS[driver](server, fresh_specs, folder, engine, max_parallel))
+    return results
+
+
+def format_results(results):
+    header = f"{'driver':<8} {'engine':<8} {'files':>5} {'MB/s':>9} {'CPU s/GiB':>10} {'UI s':>7} {'resume':>7}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        ui_busy = "-" if result["ui_busy_s"] is None else f"{result['ui_busy_s']:.3f}"
+        lines.append(
+            f"{result['driver']:<8} {result['engine']:<8} {result['files']:>5} {result['mb_s']:>9.2f} "
+            f"{result['cpu_s_per_gib']:>10.3f} {ui_busy:>7} {'ok' if result['resume_ok'] else 'FALLO':>7}"
+        )
+    return "\n".join(lines)
+
+
+def regressions(results, min_mb_s=0.0, max_cpu_s_per_gib=0.0, max_ui_busy_s=0.0):
+    problems = []
+    for result in results:
+        label = f"{result['driver']}/{result['engine']}"
+        if not result["resume_ok"]:
+            problems.append(f"{label}: archivos incorrectos tras reanudar")
+        if min_mb_s and result["mb_s"] < min_mb_s:
+            problems.append(f"{label}: {result['mb_s']} MB/s < {min_mb_s}")
+        if max_cpu_s_per_gib and result["cpu_s_per_gib"] > max_cpu_s_per_gib:
+            problems.append(f"{label}: {result['cpu_s_per_gib']} CPU s/GiB > {max_cpu_s_per_gib}")
+        if max_ui_busy_s and (result["ui_busy_s"] or 0) > max_ui_busy_s:
+            problems.append(f"{label}: {result['ui_busy_s']} s de UI > {max_ui_busy_s}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de descargas contra un servidor HTTP local")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=32)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth-mb", type=float, default=0.0, help="límite por conexión en MB/s (0 = sin límite)")
+    parser.add_argument("--flaky", type=int, default=1, help="archivos que cortan la conexión una vez")
+    parser.add_argument("--drivers", default=",".join(DRIVERS))
+    parser.add_argument("--engines", default=",".join(ENGINES))
+    parser.add_argument("--min-mbps", type=float, default=0.0)
+    parser.add_argument("--max-cpu-per-gib", type=float, default=0.0)
+    parser.add_argument("--max-ui-busy", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    specs = build_specs(
+        args.files,
+        int(args.size_mb * 1024 * 1024),
+        latency=args.latency,
+        bandwidth=int(args.bandwidth_mb * 1e6),
+        flaky=args.flaky,
+    )
+    ensure_app()
+    results = run_benchmark(
+        specs,
+        drivers=[driver for driver in args.drivers.split(",") if driver in DRIVERS],
+        engines=[engine for engine in args.engines.split(",") if engine in ENGINES],
+        max_parallel=args.parallel,
+    )
+    print(json.dumps(results, indent=2) if args.json else format_results(results))
+    problems = regressions(results, args.min_mbps, args.max_cpu_per_gib, args.max_ui_busy)
+    for problem in problems:
+        print(f"❌ {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+import hashlib
+import multiprocessing
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PATTERN_SIZE = 1024 * 1024 + 7
+WRITE_CHUNK_SIZE = 64 * 1024
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+_PATTERNS = {}
+_PATTERNS_LOCK = threading.Lock()
+
+
+def served_file(name, size, **options):
+    # latency: seconds before the headers; bandwidth: bytes/s per request
+    # (0 = unlimited); disconnects: how many requests drop the connection
+    # after disconnect_after bytes; fail_statuses: statuses answered first.
+    spec = {
+        "name": name,
+        "size": int(size),
+        "latency": 0.0,
+        "bandwidth": 0,
+        "ranges": True,
+        "disconnect_after": 0,
+        "disconnects": 0,
+        "content_disposition": "",
+        "fail_statuses": [],
+        "retry_after": "",
+        "version": 1,
+    }
+    spec.update(options)
+    return spec
+
+
+def _pattern(name, version):
+    key = (name, version)
+    with _PATTERNS_LOCK:
+        if key not in _PATTERNS:
+            _PATTERNS[key] = random.Random(f"{name}:{version}").randbytes(PATTERN_SIZE)
+        return _PATTERNS[key]
+
+
+def file_chunks(spec, start=0, end=None, chunk_size=WRITE_CHUNK_SIZE):
+    pattern = _pattern(spec["name"], spec["version"])
+    end = spec["size"] if end is None else end
+    position = start
+    while position < end:
+        offset = position % PATTERN_SIZE
+        length = min(chunk_size, end - position, PATTERN_SIZE - offset)
+        yield pattern[offset:offset + length]
+        position += length
+
+
+def file_bytes(spec, start=0, end=None):
+    return b"".join(file_chunks(spec, start, end))
+
+
+def file_sha256(spec):
+    digest = hashlib.sha256()
+    for chunk in file_chunks(spec, chunk_size=4 * 1024 * 1024):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_etag(spec):
+    return f'"{spec["name"]}-v{spec["version"]}"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def serve(self, send_body):
+        server = self.server
+        name = self.path.split("?", 1)[0].lstrip("/")
+        with server.lock:
+            spec = server.files.get(name)
+            server.requests.append({
+                "method": self.command,
+                "name": name,
+                "range": self.headers.get("Range") or "",
+                "if_range": self.headers.get("If-Range") or "",
+            })
+            fail_status = spec["fail_statuses"].pop(0) if spec and spec["fail_statuses"] else None
+        if spec is None:
+            self.send_empty(404)
+            return
+        if spec["latency"]:
+            time.sleep(spec["latency"])
+        if fail_status:
+            self.send_empty(fail_status, {"Retry-After": spec["retry_after"]} if spec["retry_after"] else None)
+            return
+
+        size = spec["size"]
+        start = 0
+        range_header = self.headers.get("Range") or ""
+        if_range = self.headers.get("If-Range") or ""
+        use_range = (
+            spec["ranges"]
+            and range_header.startswith("bytes=")
+            and (not if_range or if_range in {file_etag(spec), LAST_MODIFIED})
+        )
+        end = size
+        if use_range:
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first or 0)
+            if last:
+                end = min(size, int(last) + 1)
+            if start >= size:
+                self.send_empty(416, {"Content-Range": f"bytes */{size}"})
+                return
+
+        self.send_response(206 if use_range else 200)
+        if use_range:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+        self.send_header("Content-Length", str(end - start))
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("ETag", file_etag(spec))
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        if spec["ranges"]:
+            self.send_header("Accept-Ranges", "bytes")
+        if spec["content_disposition"]:
+            self.send_header("Content-Disposition", f'attachment; filename="{spec["content_disposition"]}"')
+        self.end_headers()
+        if send_body:
+            self.send_body(spec, start, end)
+
+    def send_empty(self, status, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_body(self, spec, start, end):
+        with self.server.lock:
+            drop_after = None
+            if spec["disconnects"] > 0:
+                spec["disconnects"] -= 1
+                drop_after = spec["disconnect_after"]
+            self.server.active_streams += 1
+            self.server.peak_streams = max(self.server.peak_streams, self.server.active_streams)
+        sent = 0
+        started = time.monotonic()
+        try:
+            for chunk in file_chunks(spec, start, end):
+                if drop_after is not None and sent + len(chunk) > drop_after:
+                    self.wfile.write(chunk[:max(0, drop_after - sent)])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if spec["bandwidth"]:
+                    ahead = sent / spec["bandwidth"] - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        finally:
+            with self.server.lock:
+                self.server.active_streams -= 1
+                self.server.bytes_sent += sent
+
+
+class LocalFileServer:
+    def __init__(self, files=(), host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.files = {spec["name"]: spec for spec in files}
+        self.httpd.requests = []
+        self.httpd.bytes_sent = 0
+        self.httpd.active_streams = 0
+        self.httpd.peak_streams = 0
+        self._thread = None
+
+    @property
+    def files(self):
+        return self.httpd.files
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def peak_streams(self):
+        return self.httpd.peak_streams
+
+    def add(self, spec):
+        with self.httpd.lock:
+            self.httpd.files[spec["name"]] = spec
+        return self.url(spec["name"])
+
+    def change(self, name):
+        # New content and ETag under the same URL, like a re-uploaded file.
+        with self.httpd.lock:
+            self.httpd.files[name]["version"] += 1
+
+    def url(self, name):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/{name}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="local-file-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+        return False
+
+
+def _serve_process(files, port_queue, stop_event):
+    server = LocalFileServer(files).start()
+    port_queue.put(server.httpd.server_address[1])
+    stop_event.wait()
+    server.stop()
+
+
+class ProcessFileServer:
+    # Same server in a child process, so benchmark CPU time only counts the
+    # client side.
+    def __init__(self, files=()):
+        self.files = {spec["name"]: spec for spec in files}
+        context = multiprocessing.get_context("spawn")
+        self._port_queue = context.Queue()
+        self._stop_event = context.Event()
+        self._process = context.Process(
+            target=_serve_process,
+            args=(list(self.files.values()), self._port_queue, self._stop_event),
+            daemon=True,
+        )
+        self.port = 0
+
+    def url(self, name):
+        return f"http://127.0.0.1:{self.port}/{name}"
+
+    def start(self):
+        self._process.start()
+        self.port = self._port_queue.get(timeout=30)
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._process.join(10)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+        return False
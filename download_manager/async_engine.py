@@ -0,0 +1,330 @@
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from download_manager.disk import clear_preallocated, discard_unknown_preallocation, mark_preallocated, preallocate_file
+from download_manager.hashing import StreamHasher, hash_algorithms_for
+from download_manager.retry import TRANSIENT, DownloadError, as_download_error, error_for_response
+from download_manager.workers import (
+    MAX_CLEAN_RESTARTS,
+    close_response,
+    content_range_total,
+    failure_payload,
+    range_was_ignored,
+    response_total_length,
+    response_validators,
+    resume_headers,
+    validators_changed,
+)
+
+
+ENGINE_THREADS = "threads"
+ENGINE_ASYNCIO = "asyncio"
+DOWNLOAD_ENGINES = (ENGINE_THREADS, ENGINE_ASYNCIO)
+ASYNC_CHUNK_SIZE = 256 * 1024
+ASYNC_CONNECT_TIMEOUT = 15
+ASYNC_READ_TIMEOUT = 60
+ASYNC_LIMIT_PER_HOST = 16
+
+
+def available_async_backend():
+    if aiohttp is not None:
+        return "aiohttp"
+    if httpx is not None:
+        return "httpx"
+    return ""
+
+
+def cookie_header(cookies):
+    return "; ".join(f"{name}={value}" for name, value in (cookies or {}).items())
+
+
+class _StreamResponse:
+    # Just enough of a requests.Response for the helpers shared with the
+    # thread engine (status_code, case-insensitive headers).
+    def __init__(self, status_code, headers, chunks):
+        self.status_code = status_code
+        self.headers = headers
+        self.chunks = chunks
+
+
+class AsyncDownloadJob:
+    def __init__(self, url, filename, index, signals, headers=None, cookies=None, response=None,
+                 expected_hashes=None, validators=None, resume_offset=None):
+        self.url = url
+        self.filename = filename
+        self.index = index
+        self.signals = signals
+        self.headers = headers or {}
+        self.cookies = cookies or {}
+        self.hasher = StreamHasher(hash_algorithms_for(expected_hashes))
+        self.validators = dict(validators or {})
+        self.resume_offset = resume_offset
+        self.engine = None
+        self._task = None
+        self._cancelled = False
+        # A response prepared by the resolver belongs to requests; the loop
+        # opens its own stream instead.
+        close_response(response)
+
+    def cancel(self):
+        self._cancelled = True
+        if self.engine is not None and self.engine.loop is not None:
+            self.engine.loop.call_soon_threadsafe(self._cancel_task)
+
+    def _cancel_task(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def _task_done(self, task):
+        if task.cancelled():
+            self.signals.cancelled.emit(self.index)
+
+    def emit_checkpoint(self, downloaded):
+        self.signals.checkpoint.emit(self.index, {
+            "downloaded": downloaded,
+            "preallocated": self.resume_offset is not None,
+        })
+
+
+class AsyncDownloadEngine:
+    # Runs every download of the window as a task on a single asyncio loop
+    # thread. Signals emitted from that thread reach the Qt slots as queued
+    # calls, so the window code is the same as with the thread engine.
+    def __init__(self, backend=None):
+        self.backend = backend or available_async_backend()
+        self.loop = None
+        self._client = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            if not self.backend:
+                raise RuntimeError("aiohttp o httpx no están instalados")
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,), name="async-downloads", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def submit(self, job):
+        self.start()
+        job.engine = self
+        self.loop.call_soon_threadsafe(self._start_job, job)
+        return job
+
+    def _start_job(self, job):
+        if job._cancelled:
+            job.signals.cancelled.emit(job.index)
+            return
+        job._task = self.loop.create_task(self._run_job(job))
+        job._task.add_done_callback(job._task_done)
+
+    def shutdown(self, timeout=5):
+        with self._lock:
+            if self._thread is None:
+                return
+            future = asyncio.run_coroutine_threadsafe(self._close(), self.loop)
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def _close(self):
+        tasks = [task for task in asyncio.all_tasks(self.loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._client is not None:
+            if self.backend == "aiohttp":
+                await self._client.close()
+            else:
+                await self._client.aclose()
+            self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            if self.backend == "aiohttp":
+                self._client = aiohttp.ClientSession(
+                    timeout=aiohttp.ClientTimeout(sock_connect=ASYNC_CONNECT_TIMEOUT, sock_read=ASYNC_READ_TIMEOUT),
+                    connector=aiohttp.TCPConnector(limit=0, limit_per_host=ASYNC_LIMIT_PER_HOST),
+                )
+            else:
+                self._client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(ASYNC_READ_TIMEOUT, connect=ASYNC_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(max_connections=None, max_keepalive_connections=ASYNC_LIMIT_PER_HOST),
+                    follow_redirects=True,
+                )
+        return self._client
+
+    @asynccontextmanager
+    async def _open_stream(self, url, headers):
+        client = self._get_client()
+        if self.backend == "aiohttp":
+            async with client.get(url, headers=headers, allow_redirects=True) as response:
+                yield _StreamResponse(response.status, response.headers, response.content.iter_chunked(ASYNC_CHUNK_SIZE))
+        else:
+            async with client.stream("GET", url, headers=headers) as response:
+                yield _StreamResponse(response.status_code, response.headers, response.aiter_bytes(ASYNC_CHUNK_SIZE))
+
+    async def _run_job(self, job):
+        # Same contract as FileDownloader.run: one attempt, a classified
+        # failure on errors, and a loop only for clean restarts.
+        for _ in range(MAX_CLEAN_RESTARTS):
+            try:
+                if await self._attempt(job):
+                    return
+            except asyncio.CancelledError:
+                if job.resume_offset is not None:
+                    job.emit_checkpoint(job.resume_offset)
+                raise
+            except Exception as exc:
+                error = as_download_error(exc)
+                print(f"[{job.index}] Error ({error.kind}): {error}")
+                if job.resume_offset is not None:
+                    job.emit_checkpoint(job.resume_offset)
+                job.signals.failed.emit(job.index, failure_payload(error))
+                job.signals.finished.emit(job.index, False)
+                return
+        job.signals.failed.emit(job.index, failure_payload(DownloadError(TRANSIENT, "Demasiados reinicios")))
+        job.signals.finished.emit(job.index, False)
+
+    async def _finish_existing_file(self, job):
+        job.hasher.reset()
+        await asyncio.get_running_loop().run_in_executor(None, job.hasher.update_from_file, job.filename)
+        job.signals.progress.emit(job.index, 100)
+        job.signals.hashed.emit(job.index, job.hasher.hexdigests())
+        job.signals.finished.emit(job.index, True)
+
+    async def _attempt(self, job):
+        loop = asyncio.get_running_loop()
+        downloaded = 0
+        mode = "wb"
+        job.hasher.reset()
+        headers = dict(job.headers)
+        if job.cookies:
+            headers["Cookie"] = cookie_header(job.cookies)
+
+        if discard_unknown_preallocation(job.filename, job.resume_offset):
+            print(f"[{job.index}] Archivo preasignado sin punto de control, reiniciando {os.path.basename(job.filename)}")
+
+        if os.path.exists(job.filename):
+            downloaded = os.path.getsize(job.filename)
+            if job.resume_offset is not None:
+                downloaded = min(downloaded, job.resume_offset)
+            remote_size = int(job.validators.get("size") or 0)
+            if remote_size and downloaded == remote_size:
+                await self._finish_existing_file(job)
+                return True
+            headers.update(resume_headers(job.validators, downloaded))
+            mode = "ab" if job.resume_offset is None else "r+b"
+        else:
+            job.resume_offset = None
+
+        async with self._open_stream(job.url, headers) as response:
+            if downloaded and response.status_code == 416:
+                if content_range_total(response) == downloaded:
+                    await self._finish_existing_file(job)
+                    return True
+                print(f"[{job.index}] Rango inválido, reiniciando {os.path.basename(job.filename)}")
+                os.remove(job.filename)
+                job.resume_offset = None
+                return False
+            if response.status_code >= 400:
+                raise error_for_response(response)
+            if range_was_ignored(response, downloaded):
+                print(f"[{job.index}] El servidor ignoró el Range, reiniciando {os.path.basename(job.filename)}")
+                downloaded = 0
+                mode = "wb"
+
+            total_length = response_total_length(response, downloaded)
+            validators = response_validators(response, total_length)
+            if downloaded and validators_changed(job.validators, validators):
+                print(f"[{job.index}] El archivo remoto cambió, reiniciando {os.path.basename(job.filename)}")
+                os.remove(job.filename)
+                job.resume_offset = None
+                return False
+            job.validators = validators
+            job.signals.validated.emit(job.index, validators)
+            if downloaded:
+                # Hashing a large prefix would stall every other stream on the loop.
+                await loop.run_in_executor(None, job.hasher.update_from_file, job.filename, downloaded)
+
+            dir_path = os.path.dirname(job.filename)
+            if dir_path:
+                os.makedirs(dir_path, exist_ok=True)
+
+            with open(job.filename, mode) as f:
+                if mode == "wb" and total_length:
+                    mark_preallocated(job.filename)
+                    await loop.run_in_executor(None, preallocate_file, f, total_length)
+                    job.resume_offset = 0
+                    job.emit_checkpoint(0)
+                elif mode == "r+b":
+                    f.seek(downloaded)
+
+                last_percent = -1
+                async for chunk in response.chunks:
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    job.hasher.update(chunk)
+                    downloaded += len(chunk)
+                    if job.resume_offset is not None:
+                        job.resume_offset = downloaded
+                    if total_length:
+                        percent = int((downloaded / total_length) * 100)
+                        if percent != last_percent:
+                            # Only percent changes cross into Qt: hundreds of
+                            # streams must not flood the GUI event queue.
+                            last_percent = percent
+                            job.signals.progress.emit(job.index, percent)
+                            job.emit_checkpoint(downloaded)
+
+                if job.resume_offset is not None:
+                    f.truncate(downloaded)
+                    job.resume_offset = None
+                    job.emit_checkpoint(downloaded)
+                    clear_preallocated(job.filename)
+
+        job.signals.hashed.emit(job.index, job.hasher.hexdigests())
+        job.signals.finished.emit(job.index, True)
+        return True
+
+
+_ASYNC_ENGINE = None
+
+
+def get_async_engine():
+    global _ASYNC_ENGINE
+    if _ASYNC_ENGINE is None:
+        _ASYNC_ENGINE = AsyncDownloadEngine()
+    return _ASYNC_ENGINE
+
+
+def shutdown_async_engine():
+    if _ASYNC_ENGINE is not None:
+        _ASYNC_ENGINE.shutdown()
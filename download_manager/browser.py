@@ -3,16 +3,23 @@ from urllib.parse import parse_qs, unquote, urlparse
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile
 from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QUrl, QTimer, pyqtSignal, Qt
 from bs4 import BeautifulSoup
+from download_manager.direct_file import (
+    DIRECT_RESOLVE_THREAD_POOL, DirectFileResolveWorker, build_download_path,
+    extract_filename_from_headers, resolve_direct_filename,
+)
+from download_manager.filecrypt_handler import (
+    FILECRYPT_HOSTS, build_filecrypt_session, extract_external_url_from_html, is_filecrypt_link_url,
+    is_filecrypt_url, is_meaningful_external_url, load_cached_filecrypt_links, resolve_filecrypt_links,
+    store_cached_filecrypt_links,
+)
 from download_manager.gdrive_handler import (
-    parse_gdrive_folder_id, parse_gdrive_file_id, resolve_gdrive_file,
+    crawl_gdrive_folder, parse_gdrive_folder_id, parse_gdrive_file_id, resolve_gdrive_file,
+)
+from download_manager.mediafire_handler import (
+    build_mediafire_file_url, build_mediafire_folder_url, crawl_mediafire_folder, fetch_mediafire_direct_links,
+    is_mediafire_url, parse_mediafire_filename, parse_mediafire_folder_key, parse_mediafire_folder_name,
+    parse_mediafire_quickkey,
 )
-
-FILECRYPT_HOSTS = {
-    "filecrypt.cc",
-    "www.filecrypt.cc",
-    "filecrypt.to",
-    "www.filecrypt.to",
-}
 
 INTERACTIVE_DOWNLOAD_HOSTS = {
     "rapidgator.net",
@@ -53,51 +60,11 @@ AUTO_INTERACTIVE_DOWNLOAD_HOSTS = {
 # host remains disabled until the rendering/navigation issue is debugged.
 
 
-def build_download_path(base_path, *parts):
-    segments = [segment for segment in (base_path, *parts) if segment]
-    if not segments:
-        return ""
-    return os.path.normpath(os.path.join(*segments))
-
-
-def is_meaningful_external_url(url):
-    if not url:
-        return False
-    parsed = urlparse(url)
-    host = (parsed.hostname or "").lower()
-    if not host or host in FILECRYPT_HOSTS:
-        return False
-    if parsed.path and parsed.path not in {"", "/"}:
-        return True
-    if parsed.query or parsed.fragment:
-        return True
-    return False
-
-
 def is_interactive_download_host(url):
     host = (urlparse(url).hostname or "").lower()
     return host in INTERACTIVE_DOWNLOAD_HOSTS
 
 
-def extract_filename_from_headers(headers):
-    content_disposition = headers.get("Content-Disposition") or headers.get("content-disposition") or ""
-    if not content_disposition:
-        return None
-
-    filename = None
-    filename_star = re.search(r"filename\*=(?:UTF-8''|)([^;]+)", content_disposition, re.IGNORECASE)
-    if filename_star:
-        filename = filename_star.group(1).strip().strip('"').strip("'")
-    else:
-        filename_match = re.search(r'filename="?([^";]+)"?', content_disposition, re.IGNORECASE)
-        if filename_match:
-            filename = filename_match.group(1).strip()
-
-    if filename:
-        filename = os.path.basename(filename)
-    return filename or None
-
-
 def extract_fuckingfast_download_url(html):
     if not html:
         return ""
@@ -155,73 +122,57 @@ def extract_filename_from_url_candidate(url):
     return ""
 
 
-def resolve_direct_filename(url):
-    headers = {"User-Agent": "Mozilla/5.0"}
-    final_url = url
-    filename = None
-
-    try:
-        response = requests.head(url, allow_redirects=True, timeout=15, headers=headers)
-        final_url = response.url or url
-        filename = extract_filename_from_headers(response.headers)
-    except Exception:
-        pass
-
-    if not filename:
-        try:
-            response = requests.get(url, stream=True, allow_redirects=True, timeout=15, headers=headers)
-            final_url = response.url or final_url
-            filename = extract_filename_from_headers(response.headers)
-            response.close()
-        except Exception:
-            pass
-
-    if not filename:
-        filename = os.path.basename(urlparse(final_url).path)
-
-    if not filename:
-        filename = "archivo_descargado"
-
-    return filename
-
-
-class DirectFileResolveSignals(QObject):
-    finished = pyqtSignal(int, str, str, str)
+class HostResolveSignals(QObject):
+    finished = pyqtSignal(object, object)
+    error = pyqtSignal(object, str)
 
 
-class DirectFileResolveWorker(QRunnable):
-    def __init__(self, index, url, current_path):
+class GDriveResolveWorker(QRunnable):
+    def __init__(self, request_id, url, keep_response=False):
         super().__init__()
-        self.index = index
+        self.request_id = request_id
         self.url = url
-        self.current_path = current_path
-        self.signals = DirectFileResolveSignals()
+        self.keep_response = keep_response
+        self.signals = HostResolveSignals()
 
     def run(self):
-        filename = resolve_direct_filename(self.url)
-        self.signals.finished.emit(self.index, self.url, self.current_path, filename)
-
+        try:
+            resolved = resolve_gdrive_file(self.url, keep_response=self.keep_response)
+            self.signals.finished.emit(self.request_id, resolved)
+        except Exception:
+            self.signals.error.emit(self.request_id, traceback.format_exc())
 
-DIRECT_RESOLVE_THREAD_POOL = QThreadPool()
-DIRECT_RESOLVE_THREAD_POOL.setMaxThreadCount(4)
 
+class GDriveFolderResolveWorker(QRunnable):
+    def __init__(self, request_id, folder_id):
+        super().__init__()
+        self.request_id = request_id
+        self.folder_id = folder_id
+        self.signals = HostResolveSignals()
 
-class HostResolveSignals(QObject):
-    finished = pyqtSignal(object, object)
-    error = pyqtSignal(object, str)
+    def run(self):
+        try:
+            result = crawl_gdrive_folder(self.folder_id)
+            self.signals.finished.emit(self.request_id, dict(result, ok=True))
+        except Exception:
+            self.signals.error.emit(self.request_id, traceback.format_exc())
 
 
-class GDriveResolveWorker(QRunnable):
-    def __init__(self, request_id, url):
+class FileCryptResolveWorker(QRunnable):
+    def __init__(self, request_id, link_urls, cookies, user_agent, referer):
         super().__init__()
         self.request_id = request_id
-        self.url = url
+        self.link_urls = link_urls
+        self.cookies = cookies
+        self.user_agent = user_agent
+        self.referer = referer
         self.signals = HostResolveSignals()
 
     def run(self):
         try:
-            resolved = resolve_gdrive_file(self.url)
-            self.signals.finished.emit(self.request_id, resolved)
+            session = build_filecrypt_session(self.cookies, self.user_agent)
+            targets = resolve_filecrypt_links(self.link_urls, session, referer=self.referer)
+            self.signals.finished.emit(self.request_id, targets)
         except Exception:
             self.signals.error.emit(self.request_id, traceback.format_exc())
 
@@ -245,58 +196,34 @@ class MediaFireResolveWorker(QRunnable):
             self.signals.error.emit(self.request_id, traceback.format_exc())
 
     def resolve_folder(self, url):
-        folder_key = self.extract_mediafire_folder_key(url)
+        folder_key = parse_mediafire_folder_key(url)
         if not folder_key:
             return {"ok": False, "reason": "missing-folder-key"}
 
-        all_links = []
-        all_folders = []
-        files = self.fetch_mediafire_folder_items(folder_key, "files")
-        folders = self.fetch_mediafire_folder_items(folder_key, "folders")
-
-        for file_item in files:
-            quickkey = file_item.get("quickkey")
-            filename = file_item.get("filename") or "archivo"
-            if quickkey:
-                all_links.append(self.build_mediafire_file_url(quickkey, filename))
-
-        for folder_item in folders:
-            sub_key = folder_item.get("folderkey")
-            name = (folder_item.get("name") or "Subcarpeta").replace(" ", "_")
-            if sub_key:
-                all_folders.append(self.build_mediafire_folder_url(sub_key, name))
-
+        files = crawl_mediafire_folder(folder_key)
         return {
             "ok": True,
-            "folder_name": self.extract_mediafire_folder_name(url),
-            "links": all_links,
-            "folders": all_folders,
+            "folder_name": parse_mediafire_folder_name(url),
+            "files": [item for item in files if item["direct_link"]],
+            "links": [
+                (build_mediafire_file_url(item["quickkey"], item["filename"]), item["relative_path"])
+                for item in files
+                if not item["direct_link"]
+            ],
         }
 
     def resolve_file(self, url):
-        quickkey = self.extract_mediafire_quickkey(url)
+        quickkey = parse_mediafire_quickkey(url)
         if not quickkey:
             return {"ok": False, "reason": "missing-quickkey"}
 
-        headers = {"User-Agent": "Mozilla/5.0"}
-        params = {"quick_key": quickkey, "response_format": "json"}
-
         try:
-            response = requests.get(
-                "https://www.mediafire.com/api/1.5/file/get_links.php",
-                params=params,
-                timeout=30,
-                headers=headers,
-            )
-            response.raise_for_status()
-            data = response.json()
-            links = data.get("response", {}).get("links", {})
-            direct_link = links.get("normal_download") or links.get("direct_download")
+            direct_link = fetch_mediafire_direct_links([quickkey]).get(quickkey)
             if direct_link:
                 return {
                     "ok": True,
                     "direct_link": direct_link,
-                    "filename": self.extract_mediafire_filename(url) or os.path.basename(direct_link),
+                    "filename": parse_mediafire_filename(url) or os.path.basename(direct_link),
                 }
         except Exception:
             pass
@@ -315,77 +242,6 @@ class MediaFireResolveWorker(QRunnable):
 
         return {"ok": False, "reason": "download-link-not-found"}
 
-    def extract_mediafire_folder_key(self, url):
-        match = re.search(r"/folder/([^/]+)", url)
-        return match.group(1) if match else None
-
-    def extract_mediafire_folder_name(self, url):
-        match = re.search(r"/folder/[^/]+/([^/]+)", url)
-        if match:
-            return match.group(1).replace("_", " ")
-        return "Subcarpeta"
-
-    def extract_mediafire_quickkey(self, url):
-        match = re.search(r"/file/([^/]+)", url)
-        if match:
-            return match.group(1)
-        match = re.search(r"/download/([^/]+)", url)
-        return match.group(1) if match else None
-
-    def extract_mediafire_filename(self, url):
-        match = re.search(r"/file/[^/]+/([^/]+)/", url)
-        return match.group(1) if match else None
-
-    def build_mediafire_file_url(self, quickkey, filename):
-        safe_name = filename.replace(" ", "_")
-        return f"https://www.mediafire.com/file/{quickkey}/{safe_name}/file"
-
-    def build_mediafire_folder_url(self, folder_key, folder_name):
-        safe_name = folder_name.replace(" ", "_")
-        return f"https://www.mediafire.com/folder/{folder_key}/{safe_name}"
-
-    def normalize_mediafire_items(self, value, key):
-        if isinstance(value, list):
-            return value
-        if isinstance(value, dict):
-            nested = value.get(key)
-            if isinstance(nested, list):
-                return nested
-            if isinstance(nested, dict):
-                return [nested]
-        return []
-
-    def fetch_mediafire_folder_items(self, folder_key, content_type):
-        headers = {"User-Agent": "Mozilla/5.0"}
-        items = []
-        chunk = 1
-        more_chunks = True
-        while more_chunks:
-            params = {
-                "folder_key": folder_key,
-                "content_type": content_type,
-                "filter": "all",
-                "response_format": "json",
-                "chunk": chunk,
-            }
-            response = requests.get(
-                "https://www.mediafire.com/api/1.5/folder/get_content.php",
-                params=params,
-                timeout=30,
-                headers=headers,
-            )
-            response.raise_for_status()
-            data = response.json()
-            content = data.get("response", {}).get("folder_content", {})
-            raw = content.get(content_type)
-            if content_type == "files":
-                items.extend(self.normalize_mediafire_items(raw, "file"))
-            else:
-                items.extend(self.normalize_mediafire_items(raw, "folder"))
-            more_chunks = str(content.get("more_chunks", "")).lower() == "yes"
-            chunk += 1
-        return items
-
     def fetch_mediafire_html(self, url):
         headers = {"User-Agent": "Mozilla/5.0"}
         response = requests.get(url, timeout=30, headers=headers)
@@ -583,8 +439,14 @@ class UniversalDownloader(QWebEngineView):
         if self.is_direct_file_url(url):
             self.handle_direct_file(url, path)
             return
+        if self.is_filecrypt_url(url) and not self.is_filecrypt_link_url(url):
+            cached_links = load_cached_filecrypt_links(url)
+            if cached_links:
+                print(f"✅ Filecrypt desde caché: {len(cached_links)} enlaces.")
+                self.resolve_filecrypt_batch(path, [{"link_url": link} for link in cached_links], cached_links)
+                return
         # Evitar cargar páginas de archivos MediaFire con WebEngine (causan crash)
-        if "mediafire.com" in url and ("/file/" in url or "/download/" in url):
+        if is_mediafire_url(url) and ("/file/" in url or "/download/" in url):
             self.handle_mediafire_file_requests(url, path)
             return
         self.show()
@@ -597,7 +459,7 @@ class UniversalDownloader(QWebEngineView):
             if self.current_index >= len(self.urls):
                 return
             url, path = self.urls[self.current_index]
-            if "mediafire.com" in url:
+            if is_mediafire_url(url):
                 self.handle_mediafire(url, path)
             elif self.is_filecrypt_url(url):
                 self.handle_filecrypt(url, path)
@@ -625,11 +487,10 @@ class UniversalDownloader(QWebEngineView):
         self.route_url_handling()
 
     def is_filecrypt_url(self, url):
-        return (urlparse(url).hostname or "").lower() in FILECRYPT_HOSTS
+        return is_filecrypt_url(url)
 
     def is_filecrypt_link_url(self, url):
-        parsed = urlparse(url)
-        return self.is_filecrypt_url(url) and parsed.path.lower().startswith("/link/")
+        return is_filecrypt_link_url(url)
 
     def handle_filecrypt(self, url, current_path):
         if self.is_filecrypt_link_url(url):
@@ -675,7 +536,7 @@ class UniversalDownloader(QWebEngineView):
             if source_url in self._filecrypt_pending_batches:
                 return
             print(f"✅ Filecrypt resuelto: {len(rows)} enlaces encontrados.")
-            self.resolve_filecrypt_batch(source_url, current_path, rows)
+            self.resolve_filecrypt_links_async(source_url, current_path, rows)
             return
 
         self._filecrypt_wait_attempts += 1
@@ -684,17 +545,65 @@ class UniversalDownloader(QWebEngineView):
             print("⏳ Esperando resolución manual del captcha de Filecrypt...")
         QTimer.singleShot(1500, self.route_url_handling)
 
-    def resolve_filecrypt_batch(self, source_url, current_path, rows):
-        batch = {
+    def resolve_filecrypt_links_async(self, source_url, current_path, rows):
+        # Once the captcha is solved the container cookies are enough to
+        # follow every /Link/ redirect over HTTP, without a page load each.
+        request_id = (self.current_index, source_url, current_path)
+        self._filecrypt_pending_batches[source_url] = {
             "rows": rows,
             "resolved_urls": [],
             "source_url": source_url,
             "path": current_path,
         }
-        self._filecrypt_pending_batches[source_url] = batch
+        worker = FileCryptResolveWorker(
+            request_id,
+            [row["link_url"] for row in rows],
+            self.cookies_for_url(source_url),
+            self.profile.httpUserAgent(),
+            source_url,
+        )
+        worker.signals.finished.connect(self.on_filecrypt_links_resolved)
+        worker.signals.error.connect(self.on_filecrypt_links_resolution_error)
+        self._filecrypt_active_workers.append(worker)
+        HOST_RESOLVE_THREAD_POOL.start(worker)
+
+    def on_filecrypt_links_resolved(self, request_id, targets):
+        self._filecrypt_active_workers = [
+            worker for worker in self._filecrypt_active_workers if worker.request_id != request_id
+        ]
+        index, source_url, current_path = request_id
+        batch = self._filecrypt_pending_batches.get(source_url)
+        if not batch or index != self.current_index:
+            return
+
+        resolved_urls = [targets.get(row["link_url"], "") for row in batch["rows"]]
+        batch["resolved_urls"] = [url for url in resolved_urls if url]
+        print(f"✅ Filecrypt: {len(batch['resolved_urls'])}/{len(resolved_urls)} enlaces resueltos por HTTP.")
+        if resolved_urls and all(resolved_urls):
+            try:
+                store_cached_filecrypt_links(source_url, resolved_urls)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar la caché de Filecrypt: {e}")
+        self.resolve_filecrypt_batch(current_path, batch["rows"], resolved_urls)
+
+    def on_filecrypt_links_resolution_error(self, request_id, error_text):
+        self._filecrypt_active_workers = [
+            worker for worker in self._filecrypt_active_workers if worker.request_id != request_id
+        ]
+        index, source_url, current_path = request_id
+        batch = self._filecrypt_pending_batches.get(source_url)
+        if not batch or index != self.current_index:
+            return
+
+        print("❌ Error resolviendo enlaces de Filecrypt por HTTP:")
+        print(error_text)
+        self.resolve_filecrypt_batch(current_path, batch["rows"], [""] * len(batch["rows"]))
+
+    def resolve_filecrypt_batch(self, current_path, rows, resolved_urls):
+        # Links that could not be followed over HTTP fall back to a page load.
         insert_position = self.current_index + 1
-        for row in reversed(rows):
-            self.urls.insert(insert_position, (row["link_url"], current_path))
+        for row, resolved_url in reversed(list(zip(rows, resolved_urls))):
+            self.urls.insert(insert_position, (resolved_url or row["link_url"], current_path))
         self.proceed_to_next()
 
     def handle_filecrypt_link_url(self, url, current_path):
@@ -730,38 +639,7 @@ class UniversalDownloader(QWebEngineView):
         QTimer.singleShot(1000, self.route_url_handling)
 
     def extract_external_url_from_html(self, html):
-        if not html:
-            return ""
-
-        specific_patterns = [
-            r"""location(?:\.href)?\s*=\s*['"](https?://[^'"]+)['"]""",
-            r"""window\.open\(['"](https?://[^'"]+)['"]""",
-            r"""content=['"][^'"]*url=(https?://[^'">]+)""",
-        ]
-
-        for pattern in specific_patterns:
-            match = re.search(pattern, html, re.IGNORECASE)
-            if not match:
-                continue
-            candidate = match.group(1)
-            if is_meaningful_external_url(candidate):
-                return candidate
-
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup.find_all(["a", "form", "iframe", "meta"]):
-            candidate = (
-                tag.get("href")
-                or tag.get("action")
-                or tag.get("src")
-                or tag.get("content")
-                or ""
-            )
-            if "url=" in candidate.lower():
-                parts = re.split(r"url=", candidate, flags=re.IGNORECASE)
-                candidate = parts[-1] if parts else candidate
-            if is_meaningful_external_url(candidate):
-                return candidate
-        return ""
+        return extract_external_url_from_html(html)
 
     def handle_interactive_download_host(self, url, current_path):
         self._interactive_download_path = current_path
@@ -1068,17 +946,20 @@ class UniversalDownloader(QWebEngineView):
 
             if folder_id:
                 print(f"📁 Google Drive folder detectada: {url}")
-                self._gdrive_click_attempts = 0
-                self._gdrive_waiting_download = True
-                self._gdrive_folder_id = folder_id
-                self._gdrive_folder_path = current_path
-                QTimer.singleShot(3000, self.try_click_gdrive_download_all)
+                request_id = (self.current_index, url, current_path)
+                self._pending_gdrive_resolution = request_id
+                worker = GDriveFolderResolveWorker(request_id, folder_id)
+                worker.signals.finished.connect(self.on_gdrive_folder_resolved)
+                worker.signals.error.connect(self.on_gdrive_folder_resolution_error)
+                HOST_RESOLVE_THREAD_POOL.start(worker)
                 return
 
             if file_id:
                 request_id = (self.current_index, url, current_path)
                 self._pending_gdrive_resolution = request_id
-                worker = GDriveResolveWorker(request_id, url)
+                # Only a single-link resolution hands its open stream to the
+                # downloader; batches would keep idle connections around.
+                worker = GDriveResolveWorker(request_id, url, keep_response=len(self.urls) == 1)
                 worker.signals.finished.connect(self.on_gdrive_resolved)
                 worker.signals.error.connect(self.on_gdrive_resolution_error)
                 HOST_RESOLVE_THREAD_POOL.start(worker)
@@ -1093,6 +974,60 @@ class UniversalDownloader(QWebEngineView):
             self.results.append((None, None))
             self.proceed_to_next()
 
+    def start_gdrive_download_all(self, url, current_path):
+        print("📦 Probando 'Descargar todo' de Google Drive...")
+        self._gdrive_click_attempts = 0
+        self._gdrive_waiting_download = True
+        self._gdrive_folder_id = parse_gdrive_folder_id(url)
+        self._gdrive_folder_path = current_path
+        QTimer.singleShot(3000, self.try_click_gdrive_download_all)
+
+    def on_gdrive_folder_resolved(self, request_id, result):
+        if self._pending_gdrive_resolution != request_id:
+            return
+
+        self._pending_gdrive_resolution = None
+        _, url, current_path = request_id
+        files = result.get("files", []) if result else []
+        failed = result.get("failed", []) if result else []
+        if result and result.get("truncated"):
+            print("⚠️ El listado de la carpeta de Google Drive está incompleto, se descarga la carpeta completa.")
+            self.start_gdrive_download_all(url, current_path)
+            return
+        if not files and not failed:
+            print("⚠️ No se pudo listar la carpeta de Google Drive.")
+            self.start_gdrive_download_all(url, current_path)
+            return
+
+        folder_name = result.get("folder_name") or parse_gdrive_folder_id(url)
+        subfolder_path = build_download_path(current_path, folder_name)
+        print(f"📁 {len(files) + len(failed)} archivos encontrados en carpeta '{folder_name}'.")
+        for item in files:
+            self.results.append({
+                "type": "direct",
+                "path": build_download_path(subfolder_path, item["relative_path"], item["filename"]),
+                "url": item["download_url"],
+                "headers": item["headers"],
+                "cookies": item["cookies"],
+            })
+        # Files that could not be resolved over HTTP go through the regular
+        # single-file flow so they get their own retry.
+        insert_position = self.current_index + 1
+        for item in reversed(failed):
+            file_url = f"https://drive.google.com/file/d/{item['id']}/view"
+            self.urls.insert(insert_position, (file_url, build_download_path(subfolder_path, item["relative_path"])))
+        self.proceed_to_next()
+
+    def on_gdrive_folder_resolution_error(self, request_id, error_text):
+        if self._pending_gdrive_resolution != request_id:
+            return
+
+        self._pending_gdrive_resolution = None
+        _, url, current_path = request_id
+        print("❌ Error listando carpeta de Google Drive:")
+        print(error_text)
+        self.start_gdrive_download_all(url, current_path)
+
     def try_click_gdrive_download_all(self):
         if not self._gdrive_waiting_download:
             return
@@ -1139,6 +1074,8 @@ class UniversalDownloader(QWebEngineView):
 
     def on_gdrive_resolved(self, request_id, resolved):
         if self._pending_gdrive_resolution != request_id:
+            if resolved and resolved.get("response") is not None:
+                resolved["response"].close()
             return
 
         self._pending_gdrive_resolution = None
@@ -1147,13 +1084,16 @@ class UniversalDownloader(QWebEngineView):
             full_path = build_download_path(current_path, resolved["filename"])
             print(f"✅ Enlace directo (Google Drive): {resolved['download_url']}")
             print(f"💾 Guardar como: {full_path}")
-            self.results.append({
+            result = {
                 "type": "direct",
                 "path": full_path,
                 "url": resolved["download_url"],
                 "headers": resolved["headers"],
                 "cookies": resolved["cookies"],
-            })
+            }
+            if resolved.get("response") is not None:
+                result["response"] = resolved["response"]
+            self.results.append(result)
         else:
             print("❌ No se pudo resolver el archivo de Google Drive.")
             self.results.append((None, None))
@@ -1282,44 +1222,6 @@ class UniversalDownloader(QWebEngineView):
             self.results.append((None, None))
             self.proceed_to_next()
 
-    def handle_mediafire_folder_api(self, url, base_path):
-        folder_key = self.extract_mediafire_folder_key(url)
-        if not folder_key:
-            print("❌ No se pudo extraer el folder_key de MediaFire.")
-            self.results.append((None, None))
-            self.proceed_to_next()
-            return
-        try:
-            all_links = []
-            all_folders = []
-            files = self.fetch_mediafire_folder_items(folder_key, "files")
-            folders = self.fetch_mediafire_folder_items(folder_key, "folders")
-            for f in files:
-                quickkey = f.get("quickkey")
-                filename = f.get("filename") or "archivo"
-                if quickkey:
-                    all_links.append(self.build_mediafire_file_url(quickkey, filename))
-            for f in folders:
-                sub_key = f.get("folderkey")
-                name = (f.get("name") or "Subcarpeta").replace(" ", "_")
-                if sub_key:
-                    all_folders.append(self.build_mediafire_folder_url(sub_key, name))
-            if all_links or all_folders:
-                folder_name = self.extract_mediafire_folder_name(url)
-                subfolder_path = build_download_path(base_path, folder_name)
-                print(f"📁 {len(all_links)} archivos encontrados en carpeta '{folder_name}'.")
-                insert_position = self.current_index + 1
-                for link in reversed(all_links + all_folders):
-                    self.urls.insert(insert_position, (link, subfolder_path))
-                self.proceed_to_next()
-            else:
-                print("❌ No se encontraron archivos en la carpeta (API). Probando HTML...")
-                self.page().toHtml(lambda html: self.safe_handle_mediafire_folder(html, url, base_path))
-        except Exception as e:
-            print(f"❌ Error procesando carpeta MediaFire (API): {e}")
-            self.results.append((None, None))
-            self.proceed_to_next()
-
     def resolve_mediafire_folder_async(self, url, base_path):
         request_id = (self.current_index, "folder", url, base_path)
         self._pending_mediafire_resolution = request_id
@@ -1356,15 +1258,18 @@ class UniversalDownloader(QWebEngineView):
                 self.proceed_to_next()
                 return
 
-            all_links = result.get("links", [])
-            all_folders = result.get("folders", [])
-            if all_links or all_folders:
-                folder_name = result.get("folder_name") or self.extract_mediafire_folder_name(url)
+            files = result.get("files", [])
+            pending_links = result.get("links", [])
+            if files or pending_links:
+                folder_name = result.get("folder_name") or parse_mediafire_folder_name(url)
                 subfolder_path = build_download_path(current_path, folder_name)
-                print(f"📁 {len(all_links)} archivos encontrados en carpeta '{folder_name}'.")
+                print(f"📁 {len(files) + len(pending_links)} archivos encontrados en carpeta '{folder_name}'.")
+                for item in files:
+                    full_path = build_download_path(subfolder_path, item["relative_path"], item["filename"])
+                    self.results.append((full_path, item["direct_link"]))
                 insert_position = self.current_index + 1
-                for link in reversed(all_links + all_folders):
-                    self.urls.insert(insert_position, (link, subfolder_path))
+                for link, relative_path in reversed(pending_links):
+                    self.urls.insert(insert_position, (link, build_download_path(subfolder_path, relative_path)))
                 self.proceed_to_next()
                 return
 
@@ -1404,45 +1309,6 @@ class UniversalDownloader(QWebEngineView):
         self.results.append((None, None))
         self.proceed_to_next()
 
-    def handle_mediafire_file_api(self, url, current_path):
-        quickkey = self.extract_mediafire_quickkey(url)
-        if not quickkey:
-            print("❌ No se pudo extraer el quickkey de MediaFire.")
-            self.results.append((None, None))
-            self.proceed_to_next()
-            return
-        try:
-            import requests
-            headers = {"User-Agent": "Mozilla/5.0"}
-            params = {"quick_key": quickkey, "response_format": "json"}
-            response = requests.get(
-                "https://www.mediafire.com/api/1.5/file/get_links.php",
-                params=params,
-                timeout=30,
-                headers=headers,
-            )
-            response.raise_for_status()
-            data = response.json()
-            links = data.get("response", {}).get("links", {})
-            direct_link = links.get("normal_download") or links.get("direct_download")
-            if direct_link:
-                filename = self.extract_mediafire_filename(url) or os.path.basename(direct_link)
-                full_path = build_download_path(current_path, filename)
-                print(f"✅ Enlace directo: {direct_link}")
-                print(f"💾 Guardar como: {full_path}")
-                self.results.append((full_path, direct_link))
-            else:
-                print("❌ No se encontró el enlace de descarga (API). Probando HTML...")
-                if self.try_mediafire_file_html(url, current_path):
-                    return
-                print("❌ No se encontró el enlace de descarga (HTML).")
-                self.results.append((None, None))
-            self.proceed_to_next()
-        except Exception as e:
-            print(f"❌ Error procesando archivo MediaFire (API): {e}")
-            self.results.append((None, None))
-            self.proceed_to_next()
-
     def handle_mediafire_folder(self, html, base_path):
         soup = BeautifulSoup(html, "html.parser")
         aux = []
@@ -1458,9 +1324,7 @@ class UniversalDownloader(QWebEngineView):
                 folder_id = href.lstrip("#")
                 span = a.find("span", class_="item-name")
                 if span:
-                    span_name = span.text.strip().replace(" ", "_")
-                    full_url = f"https://www.mediafire.com/folder/{folder_id}/{span_name}"
-                    aux.append(full_url)
+                    aux.append(build_mediafire_folder_url(folder_id, span.text.strip()))
 
         file_links = list(set(aux))
         if file_links:
@@ -1472,22 +1336,6 @@ class UniversalDownloader(QWebEngineView):
             print("❌ No se encontraron archivos en la carpeta.")
         self.proceed_to_next()
 
-    def handle_mediafire_file(self, html, current_path):
-        soup = BeautifulSoup(html, "html.parser")
-        button = soup.find("a", {"id": "downloadButton"})
-        filename_tag = soup.find("div", class_="filename")
-        if button and button.has_attr("href"):
-            direct_link = button["href"]
-            filename = filename_tag.text.strip() if filename_tag else os.path.basename(direct_link)
-            full_path = build_download_path(current_path, filename)
-            print(f"✅ Enlace directo: {direct_link}")
-            print(f"💾 Guardar como: {full_path}")
-            self.results.append((full_path, direct_link))
-        else:
-            print("❌ No se encontró el enlace de descarga.")
-            self.results.append((None, None))
-        self.proceed_to_next()
-
     def proceed_to_next(self):
         self.current_index += 1
         if self.current_index < len(self.urls):
@@ -1496,111 +1344,6 @@ class UniversalDownloader(QWebEngineView):
             self.direct_links_ready.emit(self.results)
             self.close()
 
-    def extract_mediafire_folder_key(self, url):
-        match = re.search(r"/folder/([^/]+)", url)
-        return match.group(1) if match else None
-
-    def extract_mediafire_folder_name(self, url):
-        match = re.search(r"/folder/[^/]+/([^/]+)", url)
-        if match:
-            return match.group(1).replace("_", " ")
-        return "Subcarpeta"
-
-    def extract_mediafire_quickkey(self, url):
-        match = re.search(r"/file/([^/]+)", url)
-        if match:
-            return match.group(1)
-        match = re.search(r"/download/([^/]+)", url)
-        return match.group(1) if match else None
-
-    def extract_mediafire_filename(self, url):
-        match = re.search(r"/file/[^/]+/([^/]+)/", url)
-        return match.group(1) if match else None
-
-    def build_mediafire_file_url(self, quickkey, filename):
-        safe_name = filename.replace(" ", "_")
-        return f"https://www.mediafire.com/file/{quickkey}/{safe_name}/file"
-
-    def build_mediafire_folder_url(self, folder_key, folder_name):
-        safe_name = folder_name.replace(" ", "_")
-        return f"https://www.mediafire.com/folder/{folder_key}/{safe_name}"
-
-    def normalize_mediafire_items(self, value, key):
-        if isinstance(value, list):
-            return value
-        if isinstance(value, dict):
-            nested = value.get(key)
-            if isinstance(nested, list):
-                return nested
-            if isinstance(nested, dict):
-                return [nested]
-        return []
-
-    def fetch_mediafire_folder_items(self, folder_key, content_type):
-        import requests
-        headers = {"User-Agent": "Mozilla/5.0"}
-        items = []
-        chunk = 1
-        more_chunks = True
-        while more_chunks:
-            params = {
-                "folder_key": folder_key,
-                "content_type": content_type,
-                "filter": "all",
-                "response_format": "json",
-                "chunk": chunk,
-            }
-            response = requests.get(
-                "https://www.mediafire.com/api/1.5/folder/get_content.php",
-                params=params,
-                timeout=30,
-                headers=headers,
-            )
-            response.raise_for_status()
-            data = response.json()
-            content = data.get("response", {}).get("folder_content", {})
-            raw = content.get(content_type)
-            if content_type == "files":
-                items.extend(self.normalize_mediafire_items(raw, "file"))
-            else:
-                items.extend(self.normalize_mediafire_items(raw, "folder"))
-            more_chunks = str(content.get("more_chunks", "")).lower() == "yes"
-            chunk += 1
-        return items
-
-    def try_mediafire_folder_html(self, url, base_path):
-        html = self.fetch_mediafire_html(url)
-        if not html:
-            return False
-        try:
-            self.handle_mediafire_folder(html, base_path)
-            return True
-        except Exception as e:
-            print(f"❌ Error procesando carpeta MediaFire (HTML): {e}")
-            return False
-
-    def try_mediafire_file_html(self, url, current_path):
-        html = self.fetch_mediafire_html(url)
-        if not html:
-            return False
-        try:
-            self.handle_mediafire_file(html, current_path)
-            return True
-        except Exception as e:
-            print(f"❌ Error procesando archivo MediaFire (HTML): {e}")
-            return False
-
-    def fetch_mediafire_html(self, url):
-        try:
-            import requests
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, timeout=30, headers=headers)
-            response.raise_for_status()
-            return response.text
-        except Exception as e:
-            print(f"❌ Error obteniendo HTML de MediaFire: {e}")
-            return None
-
     def handle_mediafire_file_requests(self, url, current_path):
         self.resolve_mediafire_file_async(url, current_path)
 
@@ -1619,21 +1362,38 @@ class UniversalDownloader(QWebEngineView):
     def handle_direct_file(self, url, current_path):
         request = (self.current_index, url, current_path)
         self._pending_direct_resolution = request
-        worker = DirectFileResolveWorker(*request)
+        # Probe the remaining direct links of the queue in the same batch so
+        # they are answered from the cache when their turn comes.
+        prefetch_urls = [
+            queued_url
+            for queued_url, _ in self.urls[self.current_index + 1:]
+            if self.is_direct_file_url(queued_url)
+        ]
+        worker = DirectFileResolveWorker(*request, prefetch_urls=prefetch_urls)
         worker.signals.finished.connect(self.on_direct_file_resolved)
         self._active_direct_worker = worker
         DIRECT_RESOLVE_THREAD_POOL.start(worker)
 
-    def on_direct_file_resolved(self, index, url, current_path, filename):
+    def on_direct_file_resolved(self, index, url, current_path, probe):
         if self._pending_direct_resolution != (index, url, current_path):
             return
 
         self._pending_direct_resolution = None
         self._active_direct_worker = None
-        full_path = build_download_path(current_path, filename)
+        full_path = build_download_path(current_path, probe["filename"])
         print(f"✅ Enlace directo detectado: {url}")
         print(f"💾 Guardar como: {full_path}")
-        self.results.append((full_path, url))
+        self.results.append({
+            "type": "direct",
+            "path": full_path,
+            "url": url,
+            "headers": {},
+            "cookies": {},
+            "size": probe["size"],
+            "accept_ranges": probe["accept_ranges"],
+            "etag": probe.get("etag", ""),
+            "last_modified": probe.get("last_modified", ""),
+        })
         self.proceed_to_next()
 
     def resolve_direct_filename(self, url):
@@ -84,6 +84,17 @@ class SettingsDialog(QDialog):
         mode_layout.addWidget(self.default_mode_combo)
         layout.addLayout(mode_layout)
 
+        engine_layout = QHBoxLayout()
+        engine_layout.addWidget(QLabel("Motor de descargas:"))
+        self.download_engine_combo = QComboBox()
+        self.download_engine_combo.addItem("Hilos", "threads")
+        self.download_engine_combo.addItem("asyncio (aiohttp/httpx)", "asyncio")
+        saved_engine = self.config.get("download_engine", DEFAULT_CONFIG["download_engine"])
+        engine_index = self.download_engine_combo.findData(saved_engine)
+        self.download_engine_combo.setCurrentIndex(engine_index if engine_index >= 0 else 0)
+        engine_layout.addWidget(self.download_engine_combo)
+        layout.addLayout(engine_layout)
+
         btn_layout = QHBoxLayout()
         save_btn = QPushButton("Guardar")
         cancel_btn = QPushButton("Cancelar")
@@ -134,6 +145,7 @@ class SettingsDialog(QDialog):
         )
         self.config["max_parallel_downloads"] = self.max_downloads_spin.value()
         self.config["download_manager_mode"] = self.default_mode_combo.currentData()
+        self.config["download_engine"] = self.download_engine_combo.currentData()
         save_config(self.config)
         self.accept()
 
@@ -249,6 +261,7 @@ def apply_settings():
     delete_archive_after_extract = config.get("delete_archive_after_extract")
     max_parallel_downloads = config.get("max_parallel_downloads")
     download_manager_mode = config.get("download_manager_mode")
+    download_engine = config.get("download_engine")
     print(f"Configuración actualizada: {config}")
     return (
         folder_path,
@@ -258,4 +271,5 @@ def apply_settings():
         delete_archive_after_extract,
         max_parallel_downloads,
         download_manager_mode,
+        download_engine,
     )
@@ -1,8 +1,19 @@
-import os, re, requests
-from urllib.parse import urlparse
+import os, re, requests, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+from requests.adapters import HTTPAdapter
 from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
 
 
+USER_AGENT = "Mozilla/5.0"
+DIRECT_PROBE_WORKERS = 8
+DIRECT_PROBE_CACHE_TTL_SECONDS = 10 * 60
+DIRECT_PROBE_CACHE_MAX_ENTRIES = 1024
+
+_PROBE_CACHE = {}
+_PROBE_CACHE_LOCK = threading.Lock()
+
+
 def build_download_path(base_path, *parts):
     segments = [segment for segment in (base_path, *parts) if segment]
     if not segments:
@@ -29,51 +40,159 @@ def extract_filename_from_headers(headers):
     return filename or None
 
 
-def resolve_direct_filename(url):
-    headers = {"User-Agent": "Mozilla/5.0"}
-    final_url = url
-    filename = None
+def build_probe_session(pool_size=DIRECT_PROBE_WORKERS):
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _probe_from_response(response, url):
+    final_url = response.url or url
+    size = 0
+    content_range = response.headers.get("Content-Range") or ""
+    match = re.search(r"/(\d+)$", content_range)
+    if match:
+        size = int(match.group(1))
+    elif response.status_code == 200:
+        try:
+            size = int(response.headers.get("Content-Length") or 0)
+        except ValueError:
+            size = 0
+    accept_ranges = (
+        response.status_code == 206
+        or "bytes" in (response.headers.get("Accept-Ranges") or "").lower()
+    )
+    return {
+        "final_url": final_url,
+        "filename": extract_filename_from_headers(response.headers),
+        "size": size,
+        "accept_ranges": accept_ranges,
+        "etag": response.headers.get("ETag") or "",
+        "last_modified": response.headers.get("Last-Modified") or "",
+    }
+
+
+def _probe_direct_file(url, session=None):
+    # Returns (probe, answered): answered is False when neither request got a
+    # usable response, such probes are only guesses from the URL.
+    client = session or requests
+    answered = False
+    headers = {"User-Agent": USER_AGENT}
+    probe = {"final_url": url, "filename": None, "size": 0, "accept_ranges": False, "etag": "", "last_modified": ""}
 
     try:
-        response = requests.head(url, allow_redirects=True, timeout=15, headers=headers)
-        final_url = response.url or url
-        filename = extract_filename_from_headers(response.headers)
+        response = client.head(url, allow_redirects=True, timeout=15, headers=headers)
+        if response.status_code < 400:
+            probe = _probe_from_response(response, url)
+            answered = True
+        response.close()
     except Exception:
         pass
 
-    if not filename:
+    # Some hosts reject HEAD or omit the headers there; a one byte ranged GET
+    # answers filename, total size and range support in a single round trip.
+    if not probe["filename"] or not probe["size"]:
         try:
-            response = requests.get(url, stream=True, allow_redirects=True, timeout=15, headers=headers)
-            final_url = response.url or final_url
-            filename = extract_filename_from_headers(response.headers)
+            response = client.get(
+                url,
+                stream=True,
+                allow_redirects=True,
+                timeout=15,
+                headers=dict(headers, Range="bytes=0-0"),
+            )
+            if response.status_code < 400:
+                fallback = _probe_from_response(response, url)
+                probe = {
+                    "final_url": fallback["final_url"],
+                    "filename": probe["filename"] or fallback["filename"],
+                    "size": probe["size"] or fallback["size"],
+                    "accept_ranges": probe["accept_ranges"] or fallback["accept_ranges"],
+                    "etag": probe["etag"] or fallback["etag"],
+                    "last_modified": probe["last_modified"] or fallback["last_modified"],
+                }
+                answered = True
             response.close()
         except Exception:
             pass
 
-    if not filename:
-        filename = os.path.basename(urlparse(final_url).path)
+    if not probe["filename"]:
+        probe["filename"] = os.path.basename(unquote(urlparse(probe["final_url"]).path)) or "archivo_descargado"
+    return probe, answered
 
-    if not filename:
-        filename = "archivo_descargado"
 
-    return filename
+def probe_direct_file(url, session=None):
+    return _probe_direct_file(url, session)[0]
+
+
+def _cached_probe(url, now):
+    stored = _PROBE_CACHE.get(url)
+    if stored is None:
+        return None
+    if now - stored[0] > DIRECT_PROBE_CACHE_TTL_SECONDS:
+        del _PROBE_CACHE[url]
+        return None
+    return dict(stored[1])
+
+
+def _store_probe(url, probe, now):
+    _PROBE_CACHE.pop(url, None)
+    _PROBE_CACHE[url] = (now, dict(probe))
+    while len(_PROBE_CACHE) > DIRECT_PROBE_CACHE_MAX_ENTRIES:
+        del _PROBE_CACHE[next(iter(_PROBE_CACHE))]
+
+
+def probe_direct_files(urls, max_workers=DIRECT_PROBE_WORKERS, session=None):
+    results = {}
+    pending = []
+    now = time.monotonic()
+    with _PROBE_CACHE_LOCK:
+        for url in urls:
+            if url in results or url in pending:
+                continue
+            cached = _cached_probe(url, now)
+            if cached is not None:
+                results[url] = cached
+            else:
+                pending.append(url)
+
+    if pending:
+        session = session or build_probe_session(min(max(1, max_workers), len(pending)))
+        with ThreadPoolExecutor(max_workers=min(max(1, max_workers), len(pending))) as executor:
+            futures = {url: executor.submit(_probe_direct_file, url, session) for url in pending}
+            for url, future in futures.items():
+                probe, answered = future.result()
+                results[url] = probe
+                if not answered:
+                    # A transient failure must not stick for the whole session.
+                    continue
+                with _PROBE_CACHE_LOCK:
+                    _store_probe(url, probe, time.monotonic())
+    return results
+
+
+def resolve_direct_filename(url):
+    return probe_direct_files([url])[url]["filename"]
 
 
 class DirectFileResolveSignals(QObject):
-    finished = pyqtSignal(int, str, str, str)
+    finished = pyqtSignal(int, str, str, object)
 
 
 class DirectFileResolveWorker(QRunnable):
-    def __init__(self, index, url, current_path):
+    def __init__(self, index, url, current_path, prefetch_urls=None):
         super().__init__()
         self.index = index
         self.url = url
         self.current_path = current_path
+        self.prefetch_urls = list(prefetch_urls or [])
         self.signals = DirectFileResolveSignals()
 
     def run(self):
-        filename = resolve_direct_filename(self.url)
-        self.signals.finished.emit(self.index, self.url, self.current_path, filename)
+        probes = probe_direct_files([self.url, *self.prefetch_urls])
+        self.signals.finished.emit(self.index, self.url, self.current_path, probes[self.url])
 
 
 DIRECT_RESOLVE_THREAD_POOL = QThreadPool()
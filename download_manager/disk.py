@@ -0,0 +1,103 @@
+import errno
+import os
+import shutil
+
+
+DISK_FREE_MARGIN_BYTES = 512 * 1024 * 1024
+DISK_WAIT_POLL_SECONDS = 30
+PREALLOCATION_MARKER_SUFFIX = ".prealloc"
+
+
+def existing_parent(path):
+    current = os.path.abspath(path or ".")
+    while not os.path.exists(current):
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    return current
+
+
+def volume_key(path):
+    try:
+        return os.stat(existing_parent(path)).st_dev
+    except OSError:
+        return None
+
+
+def free_space(path):
+    return shutil.disk_usage(existing_parent(path)).free
+
+
+def format_size(value):
+    units = ["B", "KB", "MB", "GB", "TB"]
+    value = float(value or 0)
+    unit_index = 0
+    while value >= 1024 and unit_index < len(units) - 1:
+        value /= 1024.0
+        unit_index += 1
+    return f"{value:.1f} {units[unit_index]}"
+
+
+def remaining_bytes(link, full_path):
+    # Bytes the link still needs to take from the volume. Preallocated files
+    # already hold their full size, and unknown sizes cannot be accounted.
+    size = int(link.get("size", 0) or 0)
+    if not size or link.get("preallocated"):
+        return 0
+    on_disk = os.path.getsize(full_path) if full_path and os.path.exists(full_path) else 0
+    return max(0, size - on_disk)
+
+
+def disk_shortfall(path, needed, reserved=0, margin=DISK_FREE_MARGIN_BYTES):
+    if not needed:
+        return 0
+    try:
+        free = free_space(path)
+    except OSError:
+        return 0
+    return max(0, needed + reserved + margin - free)
+
+
+def preallocate_file(fh, size):
+    # Reserves the blocks up front so large parts are not fragmented and a full
+    # disk fails at the start instead of halfway; sparse size as a fallback.
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fh.fileno(), 0, size)
+            return
+        except OSError as exc:
+            if exc.errno not in {errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP}:
+                raise
+    fh.truncate(size)
+
+
+def preallocation_marker_path(path):
+    return f"{path}{PREALLOCATION_MARKER_SUFFIX}"
+
+
+def mark_preallocated(path):
+    # Synced before the file is grown: after a crash the marker still says the
+    # size on disk is not the downloaded size, even if the session checkpoint
+    # that records the offset was never written.
+    with open(preallocation_marker_path(path), "wb") as fh:
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def clear_preallocated(path):
+    try:
+        os.remove(preallocation_marker_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def discard_unknown_preallocation(path, resume_offset):
+    # A marked file without a checkpointed offset cannot be trusted, zeros
+    # included it already has the full size. Start it over.
+    if resume_offset is not None or not os.path.exists(preallocation_marker_path(path)):
+        return False
+    if os.path.exists(path):
+        os.remove(path)
+    clear_preallocated(path)
+    return True
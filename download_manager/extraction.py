@@ -0,0 +1,512 @@
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import zipfile
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+try:
+    import py7zr
+    from py7zr.callbacks import ExtractCallback
+except ImportError:
+    py7zr = None
+    ExtractCallback = object
+
+
+ARCHIVE_EXTENSIONS = {".zip", ".rar", ".7z"}
+EXTRACT_STALL_TIMEOUT_SECONDS = 30 * 60
+EXTRACT_COPY_BUFFER_SIZE = 4 * 1024 * 1024
+EXTRACT_MEMORY_BUDGET_BYTES = 512 * 1024 * 1024
+# Rough peak memory per running extraction, used to admit workers.
+EXTRACT_MEMORY_COSTS = {
+    "zip": EXTRACT_COPY_BUFFER_SIZE,
+    "7z": 256 * 1024 * 1024,
+    "external": 128 * 1024 * 1024,
+}
+PASSWORD_HINTS_FILENAME = "__passwords__.txt"
+RAR_SIGNATURES = (b"Rar!\x1a\x07\x00", b"Rar!\x1a\x07\x01\x00")
+SEVEN_ZIP_SIGNATURES = (b"7z\xbc\xaf\x27\x1c",)
+ZIP_SIGNATURES = (b"PK\x03\x04", b"PK\x05\x06", b"PK\x07\x08")
+VOLUME_PATTERNS = (
+    (re.compile(r"^(?P<stem>.+)\.part(?P<number>\d+)\.(?P<ext>rar|7z|zip)$"), "{stem}.part.{ext}", 0),
+    (re.compile(r"^(?P<stem>.+\.(?:7z|zip))\.(?P<number>\d{3})$"), "{stem}", 0),
+    (re.compile(r"^(?P<stem>.+)\.r(?P<number>\d{2})$"), "{stem}.rar", 2),
+    (re.compile(r"^(?P<stem>.+)\.z(?P<number>\d{2})$"), "{stem}.zip", 1),
+)
+
+
+def extract_pool_size():
+    # Unpacking is mostly disk bound; leave room for the download workers.
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+EXTRACT_THREAD_POOL = QThreadPool()
+EXTRACT_THREAD_POOL.setMaxThreadCount(extract_pool_size())
+
+
+def find_7z_executable():
+    candidates = [
+        shutil.which("7z"),
+        shutil.which("7z.exe"),
+        r"C:\Program Files\WinRAR\WinRAR.exe",
+        r"C:\Program Files\WinRAR\Rar.exe",
+        r"C:\Program Files\7-Zip\7z.exe",
+        r"C:\Program Files (x86)\7-Zip\7z.exe",
+    ]
+    for candidate in candidates:
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return ""
+
+
+def archive_volume_info(path):
+    directory, name = os.path.split(path or "")
+    lower_name = name.lower()
+    for pattern, key_template, offset in VOLUME_PATTERNS:
+        match = pattern.match(lower_name)
+        if match:
+            key = key_template.format(**match.groupdict())
+            return os.path.join(directory, key), int(match.group("number")) + offset
+    if os.path.splitext(lower_name)[1] in ARCHIVE_EXTENSIONS:
+        return os.path.join(directory, lower_name), 1
+    return None
+
+
+def group_archive_sets(items):
+    # items: iterable of (path, ready). Volumes of the same archive share a
+    # set; a set is ready once every one of its known volumes is ready.
+    sets = {}
+    for path, ready in items:
+        info = archive_volume_info(path)
+        if not info:
+            continue
+        key, number = info
+        archive_set = sets.setdefault(key, {"key": key, "volumes": [], "ready": True})
+        archive_set["volumes"].append((number, path))
+        archive_set["ready"] = archive_set["ready"] and bool(ready)
+
+    ordered = []
+    for archive_set in sets.values():
+        archive_set["volumes"].sort(key=lambda volume: volume[0])
+        first_number, first_path = archive_set["volumes"][0]
+        archive_set["first"] = first_path
+        archive_set["ready"] = archive_set["ready"] and first_number <= 1
+        archive_set["volumes"] = [path for _, path in archive_set["volumes"]]
+        ordered.append(archive_set)
+    return ordered
+
+
+def volume_download_order(paths):
+    # Finish archive sets one after another, lowest volume first, so each
+    # set becomes extractable as early as possible.
+    set_order = {}
+    keys = []
+    for index, path in enumerate(paths):
+        info = archive_volume_info(path)
+        if info:
+            set_index = set_order.setdefault(info[0], len(set_order))
+            keys.append((set_index, info[1], index))
+        else:
+            keys.append((len(paths), 0, index))
+    return [key[2] for key in sorted(keys)]
+
+
+class NativeExtractUnsupported(Exception):
+    pass
+
+
+class ArchivePasswordError(Exception):
+    pass
+
+
+class ExtractionMemoryBudget:
+    def __init__(self, total_bytes):
+        self.total_bytes = total_bytes
+        self.available = total_bytes
+        self._condition = threading.Condition()
+
+    def acquire(self, cost):
+        cost = min(cost, self.total_bytes)
+        with self._condition:
+            while self.available < cost:
+                self._condition.wait()
+            self.available -= cost
+        return cost
+
+    def release(self, cost):
+        with self._condition:
+            self.available = min(self.total_bytes, self.available + cost)
+            self._condition.notify_all()
+
+
+EXTRACT_MEMORY_BUDGET = ExtractionMemoryBudget(EXTRACT_MEMORY_BUDGET_BYTES)
+
+
+def native_backend_for(archive_path):
+    lower_name = os.path.basename(archive_path or "").lower()
+    if re.search(r"\.part\d+\.(rar|7z|zip)$", lower_name):
+        return ""
+    if lower_name.endswith(".zip"):
+        # Split zips (.z01, ...) are left to the external tool.
+        if os.path.exists(os.path.splitext(archive_path)[0] + ".z01"):
+            return ""
+        return "zip"
+    if lower_name.endswith(".7z") and py7zr is not None:
+        return "7z"
+    return ""
+
+
+def password_candidates(password, archive_dir):
+    candidates = [password.strip()] if (password or "").strip() else []
+    hints_path = os.path.join(archive_dir or "", PASSWORD_HINTS_FILENAME)
+    if os.path.exists(hints_path):
+        try:
+            with open(hints_path, "r", encoding="utf-8", errors="ignore") as fh:
+                for line in fh:
+                    value = line.strip()
+                    if value and not (value.startswith("[") and value.endswith("]")):
+                        candidates.append(value)
+        except OSError:
+            pass
+    return list(dict.fromkeys(candidates))
+
+
+def _safe_member_path(output_dir, member_name):
+    root = os.path.abspath(output_dir)
+    target = os.path.abspath(os.path.join(root, member_name))
+    if os.path.commonpath([root, target]) != root:
+        raise ValueError(f"Ruta inválida dentro del comprimido: {member_name}")
+    return target
+
+
+def _open_zip_member(archive, member, passwords):
+    if not member.flag_bits & 0x1:
+        return archive.open(member)
+    for password in passwords:
+        try:
+            return archive.open(member, pwd=password.encode("utf-8"))
+        except RuntimeError:
+            continue
+    raise ArchivePasswordError("Contraseña incorrecta o ausente")
+
+
+def extract_zip_native(archive_path, output_dir, passwords=(), progress_callback=None):
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile as exc:
+        raise ValueError(f"not a valid archive: {exc}") from exc
+
+    with archive:
+        members = archive.infolist()
+        for member in members:
+            # Deflate64, AES (method 99) and friends are left to the external tool.
+            if member.compress_type not in {zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA}:
+                raise NativeExtractUnsupported(f"método de compresión {member.compress_type}")
+
+        total_bytes = sum(member.file_size for member in members) or 1
+        done_bytes = 0
+        last_percent = -1
+        for member in members:
+            target = _safe_member_path(output_dir, member.filename)
+            if member.is_dir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with _open_zip_member(archive, member, passwords) as source, open(target, "wb") as destination:
+                while True:
+                    chunk = source.read(EXTRACT_COPY_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    destination.write(chunk)
+                    done_bytes += len(chunk)
+                    percent = min(100, int(done_bytes * 100 / total_bytes))
+                    if progress_callback and percent != last_percent:
+                        last_percent = percent
+                        progress_callback(percent)
+
+
+class _Py7zrProgress(ExtractCallback):
+    def __init__(self, total_bytes, progress_callback):
+        self.total_bytes = total_bytes or 1
+        self.done_bytes = 0
+        self.progress_callback = progress_callback
+
+    def report_start_preparation(self):
+        pass
+
+    def report_start(self, processing_file_path, processing_bytes):
+        pass
+
+    def report_update(self, decompressed_bytes):
+        pass
+
+    def report_end(self, processing_file_path, wrote_bytes):
+        self.done_bytes += int(wrote_bytes or 0)
+        if self.progress_callback:
+            self.progress_callback(min(100, int(self.done_bytes * 100 / self.total_bytes)))
+
+    def report_postprocess(self):
+        pass
+
+    def report_warning(self, message):
+        pass
+
+
+def _extract_7z_with_password(archive_path, output_dir, password, progress_callback):
+    with py7zr.SevenZipFile(archive_path, mode="r", password=password) as archive:
+        for name in archive.getnames():
+            _safe_member_path(output_dir, name)
+        total_bytes = archive.archiveinfo().uncompressed
+        archive.extractall(path=output_dir, callback=_Py7zrProgress(total_bytes, progress_callback))
+
+
+def extract_7z_native(archive_path, output_dir, passwords=(), progress_callback=None):
+    if py7zr is None:
+        raise NativeExtractUnsupported("py7zr no está instalado")
+
+    try:
+        _extract_7z_with_password(archive_path, output_dir, None, progress_callback)
+        return
+    except py7zr.exceptions.PasswordRequired:
+        pass
+    except py7zr.exceptions.Bad7zFile as exc:
+        raise ValueError(f"not a valid archive: {exc}") from exc
+    except py7zr.exceptions.UnsupportedCompressionMethodError as exc:
+        raise NativeExtractUnsupported(str(exc)) from exc
+
+    # A wrong password surfaces as assorted decoder errors, so every hint is
+    # simply tried in turn.
+    for password in passwords:
+        try:
+            _extract_7z_with_password(archive_path, output_dir, password, progress_callback)
+            return
+        except py7zr.exceptions.UnsupportedCompressionMethodError as exc:
+            raise NativeExtractUnsupported(str(exc)) from exc
+        except Exception:
+            continue
+    raise ArchivePasswordError("Contraseña incorrecta o ausente")
+
+
+def expected_archive_signatures(path):
+    # Only volumes that must start with an archive header are returned;
+    # continuation volumes of 7z/zip splits are raw data.
+    lower_name = os.path.basename(path or "").lower()
+    match = re.search(r"\.part(\d+)\.(rar|7z|zip)$", lower_name)
+    if match:
+        if match.group(2) == "rar":
+            return RAR_SIGNATURES
+        if int(match.group(1)) > 1:
+            return ()
+        return SEVEN_ZIP_SIGNATURES if match.group(2) == "7z" else ZIP_SIGNATURES
+    if lower_name.endswith(".rar") or re.search(r"\.r\d{2}$", lower_name):
+        return RAR_SIGNATURES
+    if lower_name.endswith(".7z") or lower_name.endswith(".7z.001"):
+        return SEVEN_ZIP_SIGNATURES
+    if lower_name.endswith(".zip.001") or lower_name.endswith(".z01"):
+        return ZIP_SIGNATURES
+    if lower_name.endswith(".zip"):
+        if os.path.exists(os.path.splitext(path)[0] + ".z01"):
+            return ()
+        return ZIP_SIGNATURES
+    return ()
+
+
+def _test_with_7z(path, password):
+    exe_path = find_7z_executable()
+    if not exe_path or os.path.basename(exe_path).lower() in {"winrar.exe", "rar.exe"}:
+        return ""
+    command = [exe_path, "t", path, "-bso0", "-bsp0", f"-p{password or ''}"]
+    result = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        errors="ignore",
+        stdin=subprocess.DEVNULL,
+        timeout=EXTRACT_STALL_TIMEOUT_SECONDS,
+    )
+    if result.returncode == 0:
+        return ""
+    output = (result.stderr or result.stdout or "").strip()
+    if "wrong password" in output.lower():
+        return ""
+    return output or "7z t falló"
+
+
+def check_archive_volume(path, password="", deep=True):
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return "el archivo no existe"
+    if size == 0:
+        return "el archivo está vacío"
+
+    with open(path, "rb") as fh:
+        head = fh.read(64)
+    if head.lstrip().lower().startswith((b"<!doctype", b"<html")):
+        return "se descargó una página HTML en lugar del archivo"
+
+    signatures = expected_archive_signatures(path)
+    if signatures and not head.startswith(signatures):
+        return "cabecera de comprimido inválida"
+
+    lower_name = os.path.basename(path).lower()
+    if native_backend_for(path) == "zip":
+        try:
+            with zipfile.ZipFile(path) as archive:
+                if deep:
+                    bad_member = archive.testzip()
+                    if bad_member:
+                        return f"CRC inválido en {bad_member}"
+        except zipfile.BadZipFile as exc:
+            return f"directorio central dañado: {exc}"
+        except (RuntimeError, NotImplementedError):
+            # Encrypted or unsupported members cannot be verified here.
+            pass
+        return ""
+
+    if deep and (lower_name.endswith(".rar") or lower_name.endswith(".7z")) and not re.search(r"\.part\d+\.", lower_name):
+        return _test_with_7z(path, password)
+    return ""
+
+
+def parse_7z_progress(text):
+    matches = re.findall(r"(\d{1,3})%", text or "")
+    if not matches:
+        return None
+    return min(100, int(matches[-1]))
+
+
+class ArchiveExtractSignals(QObject):
+    progress = pyqtSignal(str, str, int)
+    finished = pyqtSignal(str, str, bool, str)
+
+
+class ArchiveExtractWorker(QRunnable):
+    def __init__(self, entry_id, archive_path, output_dir, password=""):
+        super().__init__()
+        self.entry_id = entry_id
+        self.archive_path = archive_path
+        self.output_dir = output_dir
+        self.password = password or ""
+        self.signals = ArchiveExtractSignals()
+
+    def build_command(self, exe_path):
+        exe_name = os.path.basename(exe_path).lower()
+        if exe_name in {"winrar.exe", "rar.exe"}:
+            output_target = self.output_dir
+            if not output_target.endswith(os.sep):
+                output_target += os.sep
+            command = [exe_path, "x", self.archive_path, output_target, "-y"]
+            command.append(f"-p{self.password}" if self.password else "-p-")
+            return command
+
+        command = [exe_path, "x", self.archive_path, f"-o{self.output_dir}", "-y", "-bsp1", "-bse1"]
+        if self.password:
+            command.append(f"-p{self.password}")
+        return command
+
+    def run(self):
+        native_error = ""
+        backend = native_backend_for(self.archive_path)
+        if backend:
+            try:
+                self.run_native(backend)
+                self.signals.progress.emit(self.entry_id, self.archive_path, 100)
+                self.signals.finished.emit(self.entry_id, self.archive_path, True, "")
+                return
+            except NativeExtractUnsupported as exc:
+                print(f"ℹ️ Extracción nativa no disponible para {os.path.basename(self.archive_path)}: {exc}")
+            except Exception as exc:
+                native_error = str(exc)
+
+        exe_path = find_7z_executable()
+        if not exe_path:
+            self.signals.finished.emit(self.entry_id, self.archive_path, False, native_error or "No se encontró 7z.exe")
+            return
+
+        cost = EXTRACT_MEMORY_BUDGET.acquire(EXTRACT_MEMORY_COSTS["external"])
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            returncode, output = self.run_streaming(self.build_command(exe_path))
+            if returncode != 0:
+                error_text = output.strip() or "Error extrayendo archivo"
+                self.signals.finished.emit(self.entry_id, self.archive_path, False, error_text)
+                return
+            self.signals.progress.emit(self.entry_id, self.archive_path, 100)
+            self.signals.finished.emit(self.entry_id, self.archive_path, True, "")
+        except Exception as exc:
+            self.signals.finished.emit(self.entry_id, self.archive_path, False, str(exc))
+        finally:
+            EXTRACT_MEMORY_BUDGET.release(cost)
+
+    def run_native(self, backend):
+        os.makedirs(self.output_dir, exist_ok=True)
+        passwords = password_candidates(self.password, os.path.dirname(self.archive_path))
+
+        def _progress(percent):
+            self.signals.progress.emit(self.entry_id, self.archive_path, percent)
+
+        cost = EXTRACT_MEMORY_BUDGET.acquire(EXTRACT_MEMORY_COSTS[backend])
+        try:
+            if backend == "zip":
+                extract_zip_native(self.archive_path, self.output_dir, passwords, _progress)
+            else:
+                extract_7z_native(self.archive_path, self.output_dir, passwords, _progress)
+        finally:
+            EXTRACT_MEMORY_BUDGET.release(cost)
+
+    def run_streaming(self, command):
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+        last_activity = [time.time()]
+
+        def _watchdog():
+            while process.poll() is None:
+                if time.time() - last_activity[0] > EXTRACT_STALL_TIMEOUT_SECONDS:
+                    process.kill()
+                    return
+                time.sleep(5)
+
+        threading.Thread(target=_watchdog, daemon=True).start()
+        last_percent = -1
+        output_tail = ""
+        while True:
+            chunk = process.stdout.read1(4096)
+            if not chunk:
+                break
+            last_activity[0] = time.time()
+            text = chunk.decode("utf-8", errors="ignore")
+            output_tail = (output_tail + text)[-4000:]
+            percent = parse_7z_progress(text)
+            if percent is not None and percent != last_percent:
+                last_percent = percent
+                self.signals.progress.emit(self.entry_id, self.archive_path, percent)
+        returncode = process.wait()
+        # Progress redraws use backspaces; keep only the readable lines.
+        lines = [line.strip() for line in re.split(r"[\r\n\b]+", output_tail)]
+        output = "\n".join(line for line in lines if line and not re.fullmatch(r"\d{1,3}%.*", line))
+        return returncode, output
+
+
+class ArchiveCheckSignals(QObject):
+    finished = pyqtSignal(str, int, str, str)
+
+
+class ArchiveCheckWorker(QRunnable):
+    def __init__(self, entry_id, link_index, path, password=""):
+        super().__init__()
+        self.entry_id = entry_id
+        self.link_index = link_index
+        self.path = path
+        self.password = password or ""
+        self.signals = ArchiveCheckSignals()
+
+    def run(self):
+        try:
+            reason = check_archive_volume(self.path, self.password)
+        except Exception as exc:
+            print(f"⚠️ No se pudo verificar {os.path.basename(self.path)}: {exc}")
+            reason = ""
+        self.signals.finished.emit(self.entry_id, self.link_index, self.path, reason)
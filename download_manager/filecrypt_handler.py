@@ -0,0 +1,191 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from config import CONFIG_PATH
+
+
+USER_AGENT = "Mozilla/5.0"
+FILECRYPT_HOSTS = {
+    "filecrypt.cc",
+    "www.filecrypt.cc",
+    "filecrypt.to",
+    "www.filecrypt.to",
+}
+FILECRYPT_RESOLVE_WORKERS = 6
+FILECRYPT_MAX_HOPS = 6
+FILECRYPT_CACHE_PATH = os.path.join(os.path.dirname(CONFIG_PATH), "cache", "filecrypt_links.json")
+FILECRYPT_CACHE_MAX_AGE_SECONDS = 24 * 60 * 60
+
+_CACHE_LOCK = threading.Lock()
+
+
+def is_filecrypt_url(url):
+    return (urlparse(url or "").hostname or "").lower() in FILECRYPT_HOSTS
+
+
+def is_filecrypt_link_url(url):
+    return is_filecrypt_url(url) and urlparse(url).path.lower().startswith("/link/")
+
+
+def is_meaningful_external_url(url):
+    if not url:
+        return False
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if not host or host in FILECRYPT_HOSTS:
+        return False
+    if parsed.path and parsed.path not in {"", "/"}:
+        return True
+    if parsed.query or parsed.fragment:
+        return True
+    return False
+
+
+def _html_redirect_candidates(html):
+    specific_patterns = [
+        r"""location(?:\.href)?\s*=\s*['"]([^'"]+)['"]""",
+        r"""window\.open\(['"]([^'"]+)['"]""",
+        r"""content=['"][^'"]*url=([^'">]+)""",
+    ]
+    for pattern in specific_patterns:
+        for match in re.finditer(pattern, html, re.IGNORECASE):
+            yield match.group(1)
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup.find_all(["a", "form", "iframe", "meta"]):
+        candidate = (
+            tag.get("href")
+            or tag.get("action")
+            or tag.get("src")
+            or tag.get("content")
+            or ""
+        )
+        if "url=" in candidate.lower():
+            parts = re.split(r"url=", candidate, flags=re.IGNORECASE)
+            candidate = parts[-1] if parts else candidate
+        yield candidate
+
+
+def extract_external_url_from_html(html):
+    if not html:
+        return ""
+    for candidate in _html_redirect_candidates(html):
+        if re.match(r"https?://", candidate, re.IGNORECASE) and is_meaningful_external_url(candidate):
+            return candidate
+    return ""
+
+
+def _extract_filecrypt_hop(html, base_url):
+    external_url = extract_external_url_from_html(html)
+    if external_url:
+        return external_url
+    # The /Link/ page usually bounces through an internal "Go" URL before
+    # the 302 to the mirror, so same-site script redirects are followed too.
+    for pattern in (r"""location(?:\.href)?\s*=\s*['"]([^'"]+)['"]""", r"""content=['"][^'"]*url=([^'">]+)"""):
+        match = re.search(pattern, html or "", re.IGNORECASE)
+        if match:
+            candidate = urljoin(base_url, match.group(1))
+            if is_filecrypt_url(candidate) and candidate != base_url:
+                return candidate
+    return ""
+
+
+def build_filecrypt_session(cookies=None, user_agent=None, pool_size=FILECRYPT_RESOLVE_WORKERS):
+    session = requests.Session()
+    session.headers.update({"User-Agent": user_agent or USER_AGENT})
+    for name, value in (cookies or {}).items():
+        session.cookies.set(name, value)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def resolve_filecrypt_link(link_url, session, referer=None):
+    url = link_url
+    headers = {"Referer": referer} if referer else {}
+    for _ in range(FILECRYPT_MAX_HOPS):
+        response = session.get(url, headers=headers, timeout=20, allow_redirects=False)
+        try:
+            location = response.headers.get("Location") or response.headers.get("location")
+            if response.is_redirect and location:
+                next_url = urljoin(url, location)
+            elif response.status_code == 200:
+                next_url = _extract_filecrypt_hop(response.text, url)
+            else:
+                return ""
+        finally:
+            response.close()
+
+        if is_meaningful_external_url(next_url):
+            return next_url
+        if not next_url or not is_filecrypt_url(next_url):
+            return ""
+        headers = {"Referer": url}
+        url = next_url
+    return ""
+
+
+def resolve_filecrypt_links(link_urls, session, referer=None, max_workers=FILECRYPT_RESOLVE_WORKERS):
+    link_urls = list(dict.fromkeys(link_urls))
+    if not link_urls:
+        return {}
+
+    def resolve(link_url):
+        try:
+            return resolve_filecrypt_link(link_url, session, referer=referer)
+        except Exception as exc:
+            print(f"❌ Error resolviendo enlace de Filecrypt {link_url}: {exc}")
+            return ""
+
+    with ThreadPoolExecutor(max_workers=min(max(1, max_workers), len(link_urls))) as executor:
+        return dict(zip(link_urls, executor.map(resolve, link_urls)))
+
+
+def _read_filecrypt_cache():
+    if not os.path.exists(FILECRYPT_CACHE_PATH):
+        return {}
+    try:
+        with open(FILECRYPT_CACHE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def load_cached_filecrypt_links(container_url):
+    with _CACHE_LOCK:
+        cached = _read_filecrypt_cache().get(container_url)
+    if not isinstance(cached, dict):
+        return None
+    if time.time() - float(cached.get("timestamp", 0) or 0) > FILECRYPT_CACHE_MAX_AGE_SECONDS:
+        return None
+    links = [link for link in cached.get("links", []) if is_meaningful_external_url(link)]
+    return links or None
+
+
+def store_cached_filecrypt_links(container_url, links):
+    with _CACHE_LOCK:
+        data = _read_filecrypt_cache()
+        now = time.time()
+        data = {
+            key: value
+            for key, value in data.items()
+            if isinstance(value, dict)
+            and now - float(value.get("timestamp", 0) or 0) <= FILECRYPT_CACHE_MAX_AGE_SECONDS
+        }
+        data[container_url] = {"timestamp": now, "links": list(links)}
+        os.makedirs(os.path.dirname(FILECRYPT_CACHE_PATH), exist_ok=True)
+        temp_path = f"{FILECRYPT_CACHE_PATH}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, FILECRYPT_CACHE_PATH)
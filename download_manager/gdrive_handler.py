@@ -1,9 +1,28 @@
+import json
+import os
 import re
-from urllib.parse import urlparse, parse_qs
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse
 import requests
+from bs4 import BeautifulSoup
 
 
 USER_AGENT = "Mozilla/5.0"
+GDRIVE_DOWNLOAD_URL = "https://drive.google.com/uc"
+GDRIVE_FOLDER_URL = "https://drive.google.com/drive/folders"
+GDRIVE_EMBEDDED_FOLDER_URL = "https://drive.google.com/embeddedfolderview"
+GDRIVE_FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+GDRIVE_CRAWL_WORKERS = 6
+# Both HTML listings stop after their first page; a full page means the
+# folder may hold more items than were listed.
+GDRIVE_LISTING_PAGE_SIZE = 50
+
+
+class GDriveListingTruncated(Exception):
+    def __init__(self, folder_id, count):
+        super().__init__(f"listado incompleto de la carpeta {folder_id} ({count} elementos)")
+        self.folder_id = folder_id
+        self.count = count
 
 
 def is_gdrive_url(url):
@@ -65,39 +84,262 @@ def _extract_filename_from_headers(headers):
         return match.group(1)
     return None
 
-def resolve_gdrive_file(url, session=None):
+def _is_html_response(response):
+    return (response.headers.get("content-type") or "").startswith("text/html")
+
+
+def _extract_confirm_download_url(html, file_id, response_cookies):
+    # Large files answer with a virus-scan warning page whose form carries
+    # the id/confirm/uuid fields needed for the real download request.
+    soup = BeautifulSoup(html or "", "html.parser")
+    form = soup.find("form", id="download-form") or next(
+        (
+            candidate
+            for candidate in soup.find_all("form")
+            if candidate.find("input", attrs={"name": "confirm"})
+        ),
+        None,
+    )
+    if form:
+        action = urljoin(GDRIVE_DOWNLOAD_URL, form.get("action") or GDRIVE_DOWNLOAD_URL)
+        params = {
+            field.get("name"): field.get("value", "")
+            for field in form.find_all("input")
+            if field.get("name") and (field.get("type") or "hidden").lower() == "hidden"
+        }
+        params.setdefault("id", file_id)
+        return f"{action}?{urlencode(params)}"
+
+    token = _get_confirm_token(html, response_cookies)
+    if token:
+        return f"{GDRIVE_DOWNLOAD_URL}?export=download&confirm={token}&id={file_id}"
+    return None
+
+
+def _extract_confirm_filename(html):
+    soup = BeautifulSoup(html or "", "html.parser")
+    name_tag = soup.select_one(".uc-name-size a") or soup.select_one(".uc-name-size")
+    if not name_tag:
+        return None
+    filename = re.sub(r"\s*\([^)]*\)\s*$", "", name_tag.get_text(" ", strip=True)).strip()
+    return filename or None
+
+
+def _response_total_size(response):
+    content_range = response.headers.get("content-range") or ""
+    match = re.search(r"/(\d+)$", content_range)
+    if match:
+        return int(match.group(1))
+    try:
+        return int(response.headers.get("content-length") or 0)
+    except ValueError:
+        return 0
+
+
+def resolve_gdrive_file(url, session=None, keep_response=False):
     file_id = parse_gdrive_file_id(url)
     if not file_id:
         return None
     session = session or requests.Session()
     headers = {"User-Agent": USER_AGENT}
 
-    download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
+    download_url = f"{GDRIVE_DOWNLOAD_URL}?export=download&id={file_id}"
+    confirm_filename = None
     response = session.get(download_url, headers=headers, timeout=20, stream=True)
-    content_type = response.headers.get("content-type", "")
-    filename = _extract_filename_from_headers(response.headers)
-    text = None
-
-    if content_type.startswith("text/html"):
-        text = response.text
-        token = _get_confirm_token(text, response.cookies)
-        if token:
-            download_url = (
-                f"https://drive.google.com/uc?export=download&confirm={token}&id={file_id}"
-            )
+    try:
+        response.raise_for_status()
+        if _is_html_response(response):
+            html = response.text
+            confirm_url = _extract_confirm_download_url(html, file_id, response.cookies)
+            response.close()
+            if not confirm_url:
+                return None
+            download_url = confirm_url
+            confirm_filename = _extract_confirm_filename(html)
+            if not keep_response:
+                return {
+                    "filename": confirm_filename or f"{file_id}.bin",
+                    "download_url": download_url,
+                    "cookies": session.cookies.get_dict(),
+                    "headers": headers,
+                    "size": 0,
+                }
+
             response = session.get(download_url, headers=headers, timeout=20, stream=True)
-            filename = filename or _extract_filename_from_headers(response.headers)
-    else:
+            response.raise_for_status()
+            if _is_html_response(response):
+                response.close()
+                return None
+
+        resolved = {
+            "filename": _extract_filename_from_headers(response.headers) or confirm_filename or f"{file_id}.bin",
+            "download_url": download_url,
+            "cookies": session.cookies.get_dict(),
+            "headers": headers,
+            "size": _response_total_size(response),
+        }
+        if keep_response:
+            resolved["response"] = response
+        else:
+            response.close()
+        return resolved
+    except Exception:
         response.close()
+        raise
+
+
+def _decode_js_string(value):
+    value = re.sub(r"\\x([0-9a-fA-F]{2})", r"\\u00\1", value or "")
+    value = value.replace("\\'", "'")
+    return json.loads(f'"{value}"')
 
-    if not filename:
-        filename = f"{file_id}.bin"
 
-    cookies = session.cookies.get_dict()
+def _parse_gdrive_folder_title(soup):
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    title = re.sub(r"\s+-\s+Google Drive$", "", title).strip()
+    return title or None
+
+
+def _extract_gdrive_folder_items(html):
+    soup = BeautifulSoup(html or "", "html.parser")
+    folder_name = _parse_gdrive_folder_title(soup)
+
+    for script in soup.find_all("script"):
+        content = script.string or script.get_text() or ""
+        if "_DRIVE_ivd" not in content:
+            continue
+        strings = re.findall(r"'((?:[^'\\]|\\.)*)'", content)
+        if len(strings) < 2:
+            continue
+        payload = json.loads(_decode_js_string(strings[1]))
+        if len(payload) > 1 and isinstance(payload[1], str) and payload[1]:
+            # A next-page token: the listing is only the first page.
+            raise GDriveListingTruncated(None, len(payload[0] or []))
+        items = []
+        for raw in (payload[0] if payload and payload[0] else []):
+            if not isinstance(raw, list) or len(raw) < 4 or not raw[0]:
+                continue
+            items.append({
+                "id": raw[0],
+                "name": raw[2] or raw[0],
+                "is_folder": raw[3] == GDRIVE_FOLDER_MIME_TYPE,
+            })
+        return folder_name, items
+    return folder_name, None
+
+
+def _extract_gdrive_embedded_folder_items(html):
+    soup = BeautifulSoup(html or "", "html.parser")
+    folder_name = _parse_gdrive_folder_title(soup)
+    items = []
+    for entry in soup.select("div.flip-entry"):
+        item_id = (entry.get("id") or "").replace("entry-", "", 1)
+        anchor = entry.find("a", href=True)
+        title_tag = entry.select_one(".flip-entry-title")
+        if not item_id or not anchor:
+            continue
+        items.append({
+            "id": item_id,
+            "name": title_tag.get_text(" ", strip=True) if title_tag else item_id,
+            "is_folder": "/folders/" in anchor["href"],
+        })
+    return folder_name, items
+
+
+def list_gdrive_folder(folder_id, session=None):
+    client = session or requests
+    headers = {"User-Agent": USER_AGENT}
+    response = client.get(f"{GDRIVE_FOLDER_URL}/{folder_id}", params={"hl": "en"}, headers=headers, timeout=20)
+    response.raise_for_status()
+    try:
+        folder_name, items = _extract_gdrive_folder_items(response.text)
+    except GDriveListingTruncated as exc:
+        raise GDriveListingTruncated(folder_id, exc.count) from None
+    if items is None:
+        response = client.get(GDRIVE_EMBEDDED_FOLDER_URL, params={"id": folder_id}, headers=headers, timeout=20)
+        response.raise_for_status()
+        embedded_name, items = _extract_gdrive_embedded_folder_items(response.text)
+        folder_name = folder_name or embedded_name
+    if len(items) >= GDRIVE_LISTING_PAGE_SIZE:
+        raise GDriveListingTruncated(folder_id, len(items))
+    return folder_name, items
+
+
+def _resolve_gdrive_folder_file(item, session):
+    resolved = resolve_gdrive_file(f"https://drive.google.com/file/d/{item['id']}/view", session=session)
+    if not resolved:
+        return None
     return {
-        "filename": filename,
-        "download_url": download_url,
-        "cookies": cookies,
-        "headers": headers,
+        "file_id": item["id"],
+        "filename": item["name"] or resolved["filename"],
+        "relative_path": item["relative_path"],
+        "download_url": resolved["download_url"],
+        "cookies": resolved["cookies"],
+        "headers": resolved["headers"],
     }
 
+
+def _incomplete_listing(listings, folder_name):
+    for pending in listings:
+        pending.cancel()
+    return {"folder_name": folder_name, "files": [], "failed": [], "truncated": True}
+
+
+def crawl_gdrive_folder(folder_id, session=None, max_workers=GDRIVE_CRAWL_WORKERS):
+    session = session or requests.Session()
+    folder_name = None
+    pending_files = []
+    failed_files = []
+    resolved_files = []
+    visited = {folder_id}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        listings = {executor.submit(list_gdrive_folder, folder_id, session): ""}
+        while listings:
+            done, _ = wait(listings.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                relative_path = listings.pop(future)
+                try:
+                    name, items = future.result()
+                except GDriveListingTruncated as exc:
+                    # Files past the first page would be dropped silently; the
+                    # caller falls back to downloading the whole folder.
+                    print(f"⚠️ Carpeta de Google Drive {relative_path or folder_id}: {exc}")
+                    return _incomplete_listing(listings, folder_name)
+                except Exception as exc:
+                    if not relative_path:
+                        raise
+                    # Same for a subfolder that cannot be listed: its whole subtree would be missing.
+                    print(f"❌ Error listando subcarpeta de Google Drive {relative_path}: {exc}")
+                    return _incomplete_listing(listings, folder_name)
+                if folder_name is None and not relative_path:
+                    folder_name = name
+                for item in items:
+                    if item["is_folder"]:
+                        if item["id"] in visited:
+                            continue
+                        visited.add(item["id"])
+                        child_path = os.path.join(relative_path, item["name"]) if relative_path else item["name"]
+                        listings[executor.submit(list_gdrive_folder, item["id"], session)] = child_path
+                    else:
+                        pending_files.append(dict(item, relative_path=relative_path))
+
+        resolutions = {executor.submit(_resolve_gdrive_folder_file, item, session): item for item in pending_files}
+        for future, item in resolutions.items():
+            try:
+                resolved = future.result()
+            except Exception as exc:
+                print(f"❌ Error resolviendo archivo de Google Drive {item['name']}: {exc}")
+                resolved = None
+            if resolved:
+                resolved_files.append(resolved)
+            else:
+                failed_files.append(item)
+
+    resolved_files.sort(key=lambda item: (item["relative_path"].lower(), item["filename"].lower()))
+    return {
+        "folder_name": folder_name,
+        "files": resolved_files,
+        "failed": failed_files,
+        "truncated": False,
+    }
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import re
+import zlib
+
+
+DEFAULT_HASH_ALGORITHMS = ("md5", "sha1", "sha256", "crc32")
+SUPPORTED_HASH_ALGORITHMS = ("md5", "sha1", "sha256", "sha512", "crc32")
+HASH_LENGTHS = {8: "crc32", 32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+HASH_FILE_EXTENSIONS = {".md5", ".sha1", ".sha256", ".sha512", ".sfv"}
+HASH_READ_SIZE = 4 * 1024 * 1024
+
+
+def normalize_expected_hashes(value):
+    if not isinstance(value, dict):
+        return {}
+    hashes = {}
+    for algorithm, digest in value.items():
+        algorithm = str(algorithm or "").lower().replace("-", "")
+        digest = str(digest or "").strip().lower()
+        if algorithm in SUPPORTED_HASH_ALGORITHMS and re.fullmatch(r"[0-9a-f]+", digest):
+            hashes[algorithm] = digest
+    return hashes
+
+
+class StreamHasher:
+    def __init__(self, algorithms=DEFAULT_HASH_ALGORITHMS):
+        self.algorithms = tuple(dict.fromkeys(
+            algorithm for algorithm in algorithms if algorithm in SUPPORTED_HASH_ALGORITHMS
+        ))
+        self.reset()
+
+    def reset(self):
+        self._digests = {
+            algorithm: hashlib.new(algorithm)
+            for algorithm in self.algorithms
+            if algorithm != "crc32"
+        }
+        self._crc32 = 0
+        self.size = 0
+
+    def update(self, chunk):
+        for digest in self._digests.values():
+            digest.update(chunk)
+        if "crc32" in self.algorithms:
+            self._crc32 = zlib.crc32(chunk, self._crc32)
+        self.size += len(chunk)
+
+    def update_from_file(self, path, length=None):
+        # Used when resuming: the bytes already on disk are hashed once so the
+        # digest still covers the whole file.
+        remaining = os.path.getsize(path) if length is None else length
+        with open(path, "rb") as fh:
+            while remaining > 0:
+                chunk = fh.read(min(HASH_READ_SIZE, remaining))
+                if not chunk:
+                    break
+                self.update(chunk)
+                remaining -= len(chunk)
+
+    def hexdigests(self):
+        hashes = {algorithm: digest.hexdigest() for algorithm, digest in self._digests.items()}
+        if "crc32" in self.algorithms:
+            hashes["crc32"] = f"{self._crc32 & 0xFFFFFFFF:08x}"
+        return hashes
+
+
+def hash_algorithms_for(expected_hashes=None):
+    return tuple(dict.fromkeys([*DEFAULT_HASH_ALGORITHMS, *normalize_expected_hashes(expected_hashes)]))
+
+
+def compare_hashes(computed, expected):
+    expected = normalize_expected_hashes(expected)
+    for algorithm, digest in expected.items():
+        actual = (computed or {}).get(algorithm)
+        if actual and actual.lower() != digest:
+            return f"{algorithm} no coincide ({actual} != {digest})"
+    return ""
+
+
+def is_hash_file(path):
+    return os.path.splitext(path or "")[1].lower() in HASH_FILE_EXTENSIONS
+
+
+def parse_published_hashes(text, extension=""):
+    # Accepts md5sum/sha*sum style lines ("<hash> *name") and SFV ("name <crc>").
+    hashes = {}
+    is_sfv = extension.lower() == ".sfv"
+    for raw_line in (text or "").splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith((";", "#")):
+            continue
+        if is_sfv:
+            match = re.match(r"^(?P<name>.+?)\s+(?P<hash>[0-9A-Fa-f]{8})$", line)
+        else:
+            match = re.match(r"^(?P<hash>[0-9A-Fa-f]+)\s+\*?(?P<name>.+)$", line)
+        if not match:
+            continue
+        digest = match.group("hash").lower()
+        algorithm = "crc32" if is_sfv else HASH_LENGTHS.get(len(digest))
+        if not algorithm:
+            continue
+        name = os.path.basename(match.group("name").strip().replace("\\", "/")).lower()
+        hashes.setdefault(name, {})[algorithm] = digest
+    return hashes
+
+
+def load_published_hashes(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as fh:
+        return parse_published_hashes(fh.read(), os.path.splitext(path)[1])
+
+
+def expected_hashes_for_link(entry, link):
+    expected = normalize_expected_hashes(link.get("expected_hashes"))
+    if not expected and len(entry.get("direct_links") or []) == 1:
+        expected = normalize_expected_hashes(entry.get("expected_hashes"))
+    return expected
+
+
+def stored_hashes_for(link, full_path):
+    # Hashes saved in the session are only trusted while the file keeps the
+    # size it had when they were computed.
+    hashes = link.get("hashes") or {}
+    if not hashes or not full_path or not os.path.exists(full_path):
+        return {}
+    if os.path.getsize(full_path) != int(link.get("hashed_size", -1) or 0):
+        return {}
+    return hashes
+
+
+def apply_published_hashes(entry, published):
+    updated = []
+    for link in entry.get("direct_links", []):
+        name = os.path.basename(link.get("path") or "").lower()
+        if name in published:
+            link["expected_hashes"] = dict(published[name])
+            updated.append(link)
+    return updated
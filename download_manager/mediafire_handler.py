@@ -0,0 +1,206 @@
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+USER_AGENT = "Mozilla/5.0"
+MEDIAFIRE_API_URL = "https://www.mediafire.com/api/1.5"
+MEDIAFIRE_CRAWL_WORKERS = 6
+MEDIAFIRE_LINKS_BATCH_SIZE = 100
+
+
+def is_mediafire_url(url):
+    return "mediafire.com" in (url or "")
+
+
+def parse_mediafire_folder_key(url):
+    match = re.search(r"/folder/([^/]+)", url or "")
+    return match.group(1) if match else None
+
+
+def parse_mediafire_folder_name(url):
+    match = re.search(r"/folder/[^/]+/([^/]+)", url or "")
+    if match:
+        return match.group(1).replace("_", " ")
+    return "Subcarpeta"
+
+
+def parse_mediafire_quickkey(url):
+    match = re.search(r"/file/([^/]+)", url or "")
+    if match:
+        return match.group(1)
+    match = re.search(r"/download/([^/]+)", url or "")
+    return match.group(1) if match else None
+
+
+def parse_mediafire_filename(url):
+    match = re.search(r"/file/[^/]+/([^/]+)/", url or "")
+    return match.group(1) if match else None
+
+
+def build_mediafire_file_url(quickkey, filename):
+    safe_name = (filename or "archivo").replace(" ", "_")
+    return f"https://www.mediafire.com/file/{quickkey}/{safe_name}/file"
+
+
+def build_mediafire_folder_url(folder_key, folder_name):
+    safe_name = (folder_name or "Subcarpeta").replace(" ", "_")
+    return f"https://www.mediafire.com/folder/{folder_key}/{safe_name}"
+
+
+def normalize_mediafire_items(value, key):
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        nested = value.get(key)
+        if isinstance(nested, list):
+            return nested
+        if isinstance(nested, dict):
+            return [nested]
+    return []
+
+
+def build_mediafire_session(pool_size=MEDIAFIRE_CRAWL_WORKERS):
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_mediafire_folder_items(folder_key, content_type, session=None):
+    client = session or requests
+    items = []
+    chunk = 1
+    more_chunks = True
+    while more_chunks:
+        params = {
+            "folder_key": folder_key,
+            "content_type": content_type,
+            "filter": "all",
+            "response_format": "json",
+            "chunk": chunk,
+        }
+        response = client.get(
+            f"{MEDIAFIRE_API_URL}/folder/get_content.php",
+            params=params,
+            timeout=30,
+            headers={"User-Agent": USER_AGENT},
+        )
+        response.raise_for_status()
+        data = response.json()
+        content = data.get("response", {}).get("folder_content", {})
+        raw = content.get(content_type)
+        items.extend(normalize_mediafire_items(raw, "file" if content_type == "files" else "folder"))
+        more_chunks = str(content.get("more_chunks", "")).lower() == "yes"
+        chunk += 1
+    return items
+
+
+def _normalize_mediafire_links(raw_links):
+    if isinstance(raw_links, dict):
+        if "quickkey" in raw_links or "normal_download" in raw_links or "direct_download" in raw_links:
+            return [raw_links]
+        return normalize_mediafire_items(raw_links, "link")
+    if isinstance(raw_links, list):
+        return [item for item in raw_links if isinstance(item, dict)]
+    return []
+
+
+def fetch_mediafire_direct_links(quickkeys, session=None):
+    # get_links.php accepts a comma separated list of quickkeys per call.
+    client = session or requests
+    quickkeys = [key for key in quickkeys if key]
+    if not quickkeys:
+        return {}
+
+    response = client.get(
+        f"{MEDIAFIRE_API_URL}/file/get_links.php",
+        params={
+            "quick_key": ",".join(quickkeys),
+            "link_type": "normal_download",
+            "response_format": "json",
+        },
+        timeout=30,
+        headers={"User-Agent": USER_AGENT},
+    )
+    response.raise_for_status()
+    links = _normalize_mediafire_links(response.json().get("response", {}).get("links"))
+
+    resolved = {}
+    for link in links:
+        direct_link = link.get("normal_download") or link.get("direct_download")
+        if not direct_link:
+            continue
+        quickkey = link.get("quickkey") or (quickkeys[0] if len(quickkeys) == 1 else "")
+        if quickkey:
+            resolved[quickkey] = direct_link
+    return resolved
+
+
+def _list_mediafire_folder(folder_key, relative_path, session):
+    files = fetch_mediafire_folder_items(folder_key, "files", session=session)
+    folders = fetch_mediafire_folder_items(folder_key, "folders", session=session)
+
+    file_items = []
+    for file_item in files:
+        quickkey = file_item.get("quickkey")
+        if not quickkey:
+            continue
+        file_items.append({
+            "quickkey": quickkey,
+            "filename": file_item.get("filename") or "archivo",
+            "relative_path": relative_path,
+            "size": int(file_item.get("size", 0) or 0),
+            "direct_link": "",
+        })
+
+    subfolders = []
+    for folder_item in folders:
+        sub_key = folder_item.get("folderkey")
+        if not sub_key:
+            continue
+        name = (folder_item.get("name") or "Subcarpeta").strip() or "Subcarpeta"
+        subfolders.append((sub_key, os.path.join(relative_path, name) if relative_path else name))
+    return file_items, subfolders
+
+
+def crawl_mediafire_folder(folder_key, session=None, max_workers=MEDIAFIRE_CRAWL_WORKERS):
+    session = session or build_mediafire_session(max_workers)
+    files = []
+    visited = {folder_key}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = {executor.submit(_list_mediafire_folder, folder_key, "", session)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                file_items, subfolders = future.result()
+                files.extend(file_items)
+                for sub_key, relative_path in subfolders:
+                    if sub_key in visited:
+                        continue
+                    visited.add(sub_key)
+                    pending.add(executor.submit(_list_mediafire_folder, sub_key, relative_path, session))
+
+        quickkeys = [item["quickkey"] for item in files]
+        batches = [
+            quickkeys[start:start + MEDIAFIRE_LINKS_BATCH_SIZE]
+            for start in range(0, len(quickkeys), MEDIAFIRE_LINKS_BATCH_SIZE)
+        ]
+        resolved = {}
+        for future in [executor.submit(fetch_mediafire_direct_links, batch, session) for batch in batches]:
+            try:
+                resolved.update(future.result())
+            except Exception as exc:
+                print(f"❌ Error resolviendo lote de MediaFire: {exc}")
+
+    for item in files:
+        item["direct_link"] = resolved.get(item["quickkey"], "")
+
+    files.sort(key=lambda item: (item["relative_path"].lower(), item["filename"].lower()))
+    return files
@@ -0,0 +1,155 @@
+import errno
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+
+PERMANENT = "permanent"
+EXPIRED = "expired"
+TRANSIENT = "transient"
+THROTTLED = "throttled"
+
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 300.0
+RETRY_MAX_ATTEMPTS = 10
+MAX_RETRY_AFTER = 3600.0
+
+PERMANENT_STATUS_CODES = {400, 404, 405, 410, 411, 414, 451, 501}
+EXPIRED_STATUS_CODES = {401, 403, 419, 440, 498}
+THROTTLED_STATUS_CODES = {429, 503, 509}
+TRANSIENT_STATUS_CODES = {408, 425}
+LOCAL_ERRNOS = {errno.ENOSPC, errno.EACCES, errno.EPERM, errno.EROFS, getattr(errno, "EDQUOT", errno.ENOSPC)}
+
+
+class DownloadError(Exception):
+    def __init__(self, kind, message, retry_after=None, status_code=None):
+        super().__init__(message)
+        self.kind = kind
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+def parse_retry_after(value, now=None):
+    value = (value or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        target = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return min(max(0.0, target - (time.time() if now is None else now)), MAX_RETRY_AFTER)
+
+
+def classify_status(status_code):
+    if status_code in THROTTLED_STATUS_CODES:
+        return THROTTLED
+    if status_code in EXPIRED_STATUS_CODES:
+        return EXPIRED
+    if status_code in PERMANENT_STATUS_CODES:
+        return PERMANENT
+    if status_code >= 500 or status_code in TRANSIENT_STATUS_CODES:
+        return TRANSIENT
+    return PERMANENT
+
+
+def error_for_response(response):
+    status_code = response.status_code
+    retry_after = parse_retry_after(response.headers.get("retry-after"))
+    kind = classify_status(status_code)
+    if retry_after is not None and kind == TRANSIENT:
+        kind = THROTTLED
+    return DownloadError(kind, f"HTTP {status_code}", retry_after=retry_after, status_code=status_code)
+
+
+def classify_exception(exc):
+    if isinstance(exc, DownloadError):
+        return exc.kind
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return error_for_response(exc.response).kind
+    if isinstance(exc, (requests.exceptions.InvalidURL, requests.exceptions.MissingSchema,
+                        requests.exceptions.InvalidSchema, requests.exceptions.TooManyRedirects)):
+        return PERMANENT
+    if isinstance(exc, OSError) and exc.errno in LOCAL_ERRNOS:
+        # Local I/O (disk full, permissions) will not be fixed by retrying soon.
+        return PERMANENT
+    return TRANSIENT
+
+
+def as_download_error(exc):
+    if isinstance(exc, DownloadError):
+        return exc
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return error_for_response(exc.response)
+    return DownloadError(classify_exception(exc), str(exc) or exc.__class__.__name__)
+
+
+class RetryPolicy:
+    def __init__(self, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY, max_attempts=RETRY_MAX_ATTEMPTS):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+
+    def should_retry(self, kind, attempt):
+        return kind in {TRANSIENT, THROTTLED} and attempt < self.max_attempts
+
+    def delay_for(self, attempt, retry_after=None):
+        # Capped exponential backoff with full jitter; a server-provided
+        # Retry-After is a lower bound.
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1))))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class RetryStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, url):
+        host = (urlparse(url or "").hostname or "").lower() or "?"
+        return self._hosts.setdefault(host, {"successes": 0, "retries": 0, "failures": 0, "kinds": {}})
+
+    def record_retry(self, url, kind):
+        with self._lock:
+            stats = self._host(url)
+            stats["retries"] += 1
+            stats["kinds"][kind] = stats["kinds"].get(kind, 0) + 1
+
+    def record_failure(self, url, kind):
+        with self._lock:
+            stats = self._host(url)
+            stats["failures"] += 1
+            stats["kinds"][kind] = stats["kinds"].get(kind, 0) + 1
+
+    def record_success(self, url):
+        with self._lock:
+            self._host(url)["successes"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {host: dict(stats, kinds=dict(stats["kinds"])) for host, stats in self._hosts.items()}
+
+    def summary_lines(self):
+        lines = []
+        for host, stats in sorted(self.snapshot().items()):
+            if not stats["retries"] and not stats["failures"]:
+                continue
+            kinds = ", ".join(f"{kind} {count}" for kind, count in sorted(stats["kinds"].items()))
+            lines.append(
+                f"{host}: {stats['successes']} ok, {stats['retries']} reintentos, "
+                f"{stats['failures']} fallos ({kinds})"
+            )
+        return lines
+
+
+RETRY_STATS = RetryStats()
@@ -5,17 +5,31 @@ import tempfile
 import threading
 import time
 import uuid
-from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 import requests
-from PyQt5.QtCore import QEventLoop
 
 from config import APPDATA, DEFAULT_CONFIG, load_config, normalize_path
 from download_manager.browser import UniversalDownloader
-from download_manager.direct_file import build_download_path, resolve_direct_filename
+from download_manager.direct_file import build_download_path, probe_direct_files
+from download_manager.disk import (
+    DISK_WAIT_POLL_SECONDS, clear_preallocated, discard_unknown_preallocation, disk_shortfall, format_size,
+    mark_preallocated, preallocate_file, remaining_bytes, volume_key,
+)
+from download_manager.retry import DEFAULT_RETRY_POLICY, RETRY_STATS, as_download_error
 from download_manager.torrent import Aria2Client, ensure_aria2_running
-from download_manager.window import ArchiveExtractWorker
+from download_manager.extraction import (
+    ArchiveExtractWorker, archive_volume_info, check_archive_volume, volume_download_order,
+)
+from download_manager.hashing import (
+    StreamHasher, apply_published_hashes, compare_hashes, expected_hashes_for_link, hash_algorithms_for,
+    is_hash_file, load_published_hashes, normalize_expected_hashes, stored_hashes_for,
+)
+from download_manager.workers import (
+    close_response, content_range_total, link_validators, range_was_ignored, response_validators, resume_headers,
+    validators_changed,
+)
 
 try:
     from tqdm import tqdm
@@ -30,6 +44,88 @@ DIRECT_EXTENSIONS = {
 }
 ARCHIVE_EXTENSIONS = {".zip", ".rar", ".7z"}
 SESSION_PATH = os.path.join(APPDATA, "MediaSearchPrototype", "download_state.json")
+MAX_CORRUPT_ARCHIVE_RETRIES = 2
+PIPELINE_TICK_SECONDS = 0.1
+DASHBOARD_REFRESH_SECONDS = 0.5
+SESSION_SAVE_INTERVAL_SECONDS = 2.0
+TORRENT_POLL_SECONDS = 1.0
+
+
+class TuiDashboard:
+    # Every bar is drawn from the pipeline loop in one pass; download threads
+    # only update counters on their link, so they never touch the terminal.
+    def __init__(self, refresh_seconds=DASHBOARD_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._bars = {}
+        self._summary = None
+        self._last_refresh = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def refresh(self, items, summary, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_seconds:
+            return
+        self._last_refresh = now
+
+        if self._summary is None:
+            self._summary = self._new_bar("Total", "B", 0)
+        self._update_bar(self._summary, summary)
+
+        seen = set()
+        for item in items:
+            seen.add(item["key"])
+            bar = self._bars.get(item["key"])
+            if bar is None:
+                bar = self._bars[item["key"]] = self._new_bar(item["label"], item.get("unit", "B"), self._free_position())
+            self._update_bar(bar, item)
+        for key in set(self._bars) - seen:
+            self._bars.pop(key).close()
+
+    def close(self):
+        for bar in self._bars.values():
+            bar.close()
+        self._bars.clear()
+        if self._summary is not None:
+            self._summary.close()
+            self._summary = None
+
+    def _free_position(self):
+        used = {bar.pos for bar in self._bars.values()}
+        position = 1
+        while position in used or -position in used:
+            position += 1
+        return position
+
+    def _new_bar(self, label, unit, position):
+        return tqdm(
+            total=None,
+            desc=label,
+            unit=unit or "it",
+            unit_scale=unit == "B",
+            unit_divisor=1024,
+            position=position,
+            leave=position == 0,
+            dynamic_ncols=True,
+        )
+
+    def _update_bar(self, bar, item):
+        total = item.get("total") or None
+        if bar.total != total:
+            bar.total = total
+        bar.set_postfix_str(item.get("postfix", ""), refresh=False)
+        delta = int(item.get("n", 0) or 0) - bar.n
+        if delta > 0:
+            bar.update(delta)
+        else:
+            if delta < 0:
+                bar.n = bar.last_print_n = int(item.get("n", 0) or 0)
+            bar.refresh()
 
 
 def run_tui_download_manager(app, entries):
@@ -54,6 +150,10 @@ class TuiDownloadManager:
         )
         self.password_hints_written = set()
         self._print_lock = threading.Lock()
+        self._active_links = {}
+        self._session_lock = threading.Lock()
+        self._session_dirty = False
+        self._last_session_save = 0.0
         self.entries = []
 
         self.load_session()
@@ -65,38 +165,287 @@ class TuiDownloadManager:
             return 0
 
         self.log(f"History entries: {len(self.entries)}")
-
-        regular_entries = []
-        torrent_entries = []
         for entry in self.entries:
             self.store_password_hint(entry)
-            if entry["download_type"] == "torrent":
-                torrent_entries.append(entry)
-            else:
-                regular_entries.append(entry)
-
-        failed = False
-
-        if regular_entries:
-            pending_regular = [entry for entry in regular_entries if entry.get("status") not in {"finished", "cancelled", "error"}]
-            if pending_regular:
-                self.log(f"Resolve regular entries: {len(pending_regular)}")
-            for entry in pending_regular:
-                if not entry.get("direct_links") and not self.resolve_entry(entry):
-                    failed = True
-            if not self.download_regular_entries(regular_entries):
-                failed = True
-
-        if torrent_entries:
-            pending_torrents = [entry for entry in torrent_entries if entry.get("status") != "finished"]
-            if pending_torrents:
-                self.log(f"Process torrent entries: {len(pending_torrents)}")
-            if pending_torrents and not self.download_torrent_entries(torrent_entries):
-                failed = True
 
+        failed = not self.run_pipeline(self.entries)
+
+        for line in RETRY_STATS.summary_lines():
+            self.log(f"[retry-stats] {line}")
         self.save_session_to_disk()
         return 1 if failed else 0
 
+    def run_pipeline(self, entries):
+        # Resolution, downloads, extraction and torrent polling all advance from
+        # this loop: a resolved entry starts downloading while the next one is
+        # still resolving, and finished entries extract while others download.
+        regular_entries = [entry for entry in entries if entry["download_type"] == "regular"]
+        torrent_entries = [entry for entry in entries if entry["download_type"] == "torrent" and entry.get("status") != "finished"]
+        self._regular_entries = regular_entries
+        self._resolve_queue = [
+            entry for entry in regular_entries
+            if entry.get("status") not in {"finished", "cancelled", "error"} and not entry.get("direct_links")
+        ]
+        self._direct_resolution = None
+        self._browser_resolution = None
+        self._download_futures = {}
+        self._extract_futures = {}
+        self._extract_attempted = set()
+        self._torrent_setup = None
+        self._torrent_client = None
+        self._torrent_gids = {}
+        self._last_torrent_poll = 0.0
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel_downloads) as download_pool, \
+                ThreadPoolExecutor(max_workers=1) as extract_pool, \
+                ThreadPoolExecutor(max_workers=2) as background_pool, \
+                TuiDashboard() as dashboard:
+            if torrent_entries:
+                self.log(f"Process torrent entries: {len(torrent_entries)}")
+                self._torrent_setup = background_pool.submit(self.add_torrent_entries, torrent_entries)
+            while True:
+                self.advance_resolutions(background_pool)
+                self.collect_downloads()
+                self.schedule_downloads(download_pool, regular_entries)
+                self.collect_extractions()
+                self.schedule_extractions(extract_pool, regular_entries)
+                self.poll_torrents()
+                dashboard.refresh(self.dashboard_items(), self.dashboard_summary(entries))
+                self.flush_session()
+                if self.pipeline_idle():
+                    break
+                self.pump_events(PIPELINE_TICK_SECONDS)
+            dashboard.refresh(self.dashboard_items(), self.dashboard_summary(entries), force=True)
+
+        self.flush_session(force=True)
+        return not any(entry.get("failed") for entry in entries)
+
+    def pump_events(self, duration):
+        # Keeps the embedded browser responsive while the loop waits.
+        deadline = time.monotonic() + duration
+        while True:
+            self.app.processEvents()
+            if time.monotonic() >= deadline:
+                return
+            time.sleep(0.01)
+
+    def pipeline_idle(self):
+        return not (
+            self._resolve_queue
+            or self._direct_resolution is not None
+            or self._browser_resolution is not None
+            or self._download_futures
+            or self._extract_futures
+            or self._torrent_setup is not None
+            or self._torrent_gids
+            or self.has_queued_links(self._regular_entries)
+        )
+
+    def advance_resolutions(self, background_pool):
+        if self._direct_resolution is not None and self._direct_resolution[0].done():
+            future, direct_entries = self._direct_resolution
+            self._direct_resolution = None
+            try:
+                future.result()
+            except Exception as exc:
+                for entry in direct_entries:
+                    self.fail_resolution(entry, f"probe failed: {exc}")
+
+        if self._direct_resolution is None:
+            direct_entries = [
+                entry for entry in self._resolve_queue
+                if self.is_direct_file_url(entry.get("url_original") or "")
+            ]
+            if direct_entries:
+                for entry in direct_entries:
+                    self._resolve_queue.remove(entry)
+                    entry["status"] = "resolving"
+                self._direct_resolution = (background_pool.submit(self.resolve_direct_entries, direct_entries), direct_entries)
+
+        if self._browser_resolution is not None and self._browser_resolution["results"] is not None:
+            self.finish_browser_resolution()
+        if self._browser_resolution is None and self._resolve_queue:
+            entry = self._resolve_queue.pop(0)
+            if entry.get("url_original"):
+                self.start_browser_resolution(entry)
+            else:
+                self.fail_resolution(entry, "Missing url.")
+
+    def resolve_direct_entries(self, entries):
+        probes = probe_direct_files([entry["url_original"] for entry in entries])
+        for entry in entries:
+            probe = probes[entry["url_original"]]
+            entry["direct_links"] = [{
+                "path": build_download_path(entry["path"], probe["filename"]),
+                "url": entry["url_original"],
+                "headers": {},
+                "cookies": {},
+                "status": "waiting",
+                "progress": 0,
+                "size": probe["size"],
+                "accept_ranges": probe["accept_ranges"],
+                "etag": probe.get("etag", ""),
+                "last_modified": probe.get("last_modified", ""),
+            }]
+            entry["direct_url"] = entry["url_original"]
+            entry["status"] = "waiting"
+            entry["error_text"] = ""
+        self.request_session_save()
+
+    def start_browser_resolution(self, entry):
+        entry["status"] = "resolving"
+        entry["error_text"] = ""
+        self.request_session_save()
+        downloader = UniversalDownloader([{
+            "url": entry["url_original"],
+            "path": entry["path"],
+            "password": entry["password"],
+            "title": entry["title"],
+        }])
+        resolution = {"entry": entry, "downloader": downloader, "results": None}
+
+        def _finish(results):
+            resolution["results"] = results or []
+
+        downloader.direct_links_ready.connect(_finish)
+        self._browser_resolution = resolution
+        downloader.start()
+
+    def finish_browser_resolution(self):
+        resolution, self._browser_resolution = self._browser_resolution, None
+        entry = resolution["entry"]
+        try:
+            resolution["downloader"].close()
+            resolution["downloader"].deleteLater()
+        except Exception:
+            pass
+
+        direct_links = self.convert_resolved_results(resolution["results"])
+        if not direct_links:
+            self.fail_resolution(entry, "No se pudieron obtener los enlaces directos.")
+            return
+
+        entry["direct_links"] = direct_links
+        entry["direct_url"] = direct_links[0]["url"] if len(direct_links) == 1 else ""
+        entry["status"] = "waiting"
+        entry["progress"] = 0
+        entry["error_text"] = ""
+        self.request_session_save()
+
+    def fail_resolution(self, entry, error_text):
+        entry["failed"] = True
+        entry["status"] = "error"
+        entry["error_text"] = error_text
+        self.request_session_save()
+        self.log(f"[error] resolve failed {entry['title']}: {error_text}")
+
+    def schedule_downloads(self, download_pool, regular_entries):
+        self.release_due_retries(regular_entries)
+        active_links = {id(link) for _, link in self._download_futures.values()}
+        for entry in regular_entries:
+            if entry.get("status") in {"finished", "cancelled", "resolving"}:
+                continue
+            direct_links = entry.get("direct_links", [])
+            for index in volume_download_order([link.get("path", "") for link in direct_links]):
+                if len(self._download_futures) >= self.max_parallel_downloads:
+                    return
+                link = direct_links[index]
+                if link.get("status") != "waiting" or id(link) in active_links:
+                    continue
+                target_path = self.absolute_download_path(link.get("path") or entry["path"])
+                if not self.has_disk_space_for(entry, link, target_path):
+                    continue
+                self._active_links[id(link)] = (link, target_path)
+                future = download_pool.submit(self.download_direct_link, entry, link)
+                self._download_futures[future] = (entry, link)
+                active_links.add(id(link))
+
+    def collect_downloads(self):
+        for future in [future for future in self._download_futures if future.done()]:
+            entry, link = self._download_futures.pop(future)
+            self._active_links.pop(id(link), None)
+            # The space this part reserved is settled: re-check parts waiting for disk.
+            for other_entry in self._regular_entries:
+                for other_link in other_entry.get("direct_links", []):
+                    other_link.pop("disk_check_at", None)
+            try:
+                ok = bool(future.result())
+            except Exception as exc:
+                self.log(f"[error] download crashed {entry['title']}: {exc}")
+                entry["failed"] = True
+                link["status"] = "error"
+                self.recompute_regular_status(entry)
+                self.request_session_save()
+                ok = False
+            if ok:
+                self.log(f"[done] {os.path.basename(link.get('path') or entry['title'])}")
+
+    def schedule_extractions(self, extract_pool, regular_entries):
+        if not self.auto_extract_archives:
+            return
+        for entry in regular_entries:
+            if entry["id"] in self._extract_attempted or entry.get("status") != "finished":
+                continue
+            if entry.get("failed") or entry.get("extract_status") == "done":
+                continue
+            self._extract_attempted.add(entry["id"])
+            self._extract_futures[extract_pool.submit(self.extract_entry, entry)] = entry
+
+    def collect_extractions(self):
+        for future in [future for future in self._extract_futures if future.done()]:
+            entry = self._extract_futures.pop(future)
+            try:
+                future.result()
+            except Exception as exc:
+                self.log(f"[error] extract crashed {entry['title']}: {exc}")
+                entry["failed"] = True
+                entry["extract_status"] = "error"
+                entry["extract_error"] = str(exc)
+                self.request_session_save()
+
+    def dashboard_items(self):
+        items = []
+        if self._browser_resolution is not None:
+            entry = self._browser_resolution["entry"]
+            items.append({"key": ("resolve", entry["id"]), "label": self.short_label(entry["title"]),
+                          "n": 0, "total": 0, "unit": "", "postfix": "resolving"})
+        for entry, link in list(self._download_futures.values()):
+            note = link.get("activity") or ""
+            items.append({
+                "key": ("link", id(link)),
+                "label": self.short_label(os.path.basename(link.get("path") or "") or entry["title"]),
+                "n": int(link.get("downloaded", 0) or 0),
+                "total": int(link.get("size", 0) or 0),
+                "unit": "B",
+                "postfix": note,
+            })
+        for entry in list(self._extract_futures.values()):
+            items.append({"key": ("extract", entry["id"]), "label": self.short_label(f"extract {entry['title']}"),
+                          "n": int(entry.get("extract_progress", 0) or 0), "total": 100, "unit": "%", "postfix": ""})
+        for entry_id in list(self._torrent_gids):
+            entry = self.entry_by_id(entry_id)
+            items.append({"key": ("torrent", entry_id), "label": self.short_label(entry["title"]),
+                          "n": int(entry.get("progress", 0) or 0), "total": 100, "unit": "%",
+                          "postfix": entry.get("speed_text", "")})
+        return items
+
+    def dashboard_summary(self, entries):
+        links = [link for entry in entries for link in entry.get("direct_links", [])]
+        done = sum(1 for entry in entries if entry.get("status") == "finished")
+        waiting = sum(1 for link in links if link.get("status") == "waiting")
+        retrying = sum(1 for link in links if link.get("status") == "retrying")
+        disk_waiting = sum(1 for link in links if link.get("status") == "waiting" and link.get("disk_wait"))
+        return {
+            "n": sum(int(link.get("downloaded", 0) or 0) if link.get("status") != "finished" else int(link.get("size", 0) or 0)
+                     for link in links),
+            "total": sum(int(link.get("size", 0) or 0) for link in links),
+            "postfix": (
+                f"{len(self._download_futures)} active, {waiting} queued ({disk_waiting} waiting for disk), "
+                f"{retrying} retrying, "
+                f"{len(self._extract_futures)} extracting, {done}/{len(entries)} done"
+            ),
+        }
+
     def load_session(self):
         if not os.path.exists(SESSION_PATH):
             return
@@ -140,7 +489,7 @@ class TuiDownloadManager:
 
         for link in raw_direct_links:
             child_status = link.get("status", "waiting")
-            if from_session and child_status in {"downloading", "resolving"}:
+            if from_session and child_status in {"downloading", "resolving", "retrying"}:
                 child_status = "waiting"
             direct_links.append({
                 "path": normalize_path(link.get("path") or path),
@@ -149,6 +498,15 @@ class TuiDownloadManager:
                 "cookies": link.get("cookies") or {},
                 "status": child_status,
                 "progress": int(link.get("progress", 0) or 0),
+                "size": int(link.get("size", 0) or 0),
+                "accept_ranges": bool(link.get("accept_ranges", False)),
+                "etag": link.get("etag", "") or "",
+                "last_modified": link.get("last_modified", "") or "",
+                "downloaded": int(link.get("downloaded", 0) or 0),
+                "preallocated": bool(link.get("preallocated", False)),
+                "hashes": link.get("hashes") or {},
+                "hashed_size": int(link.get("hashed_size", 0) or 0),
+                "expected_hashes": normalize_expected_hashes(link.get("expected_hashes")),
             })
 
         status = raw_entry.get("status") or "waiting"
@@ -166,6 +524,7 @@ class TuiDownloadManager:
             "progress": int(raw_entry.get("progress", 0) or 0),
             "direct_url": raw_entry.get("direct_url", "") or "",
             "direct_links": direct_links,
+            "expected_hashes": normalize_expected_hashes(raw_entry.get("expected_hashes") or raw_entry.get("hashes")),
             "torrent_gid": raw_entry.get("torrent_gid", "") or "",
             "torrent_hash": raw_entry.get("torrent_hash", "") or "",
             "speed_text": raw_entry.get("speed_text", "") or "",
@@ -199,9 +558,19 @@ class TuiDownloadManager:
                     "cookies": link.get("cookies") or {},
                     "status": link.get("status", "waiting"),
                     "progress": link.get("progress", 0),
+                    "size": link.get("size", 0),
+                    "accept_ranges": link.get("accept_ranges", False),
+                    "etag": link.get("etag", ""),
+                    "last_modified": link.get("last_modified", ""),
+                    "downloaded": link.get("downloaded", 0),
+                    "preallocated": link.get("preallocated", False),
+                    "hashes": link.get("hashes") or {},
+                    "hashed_size": link.get("hashed_size", 0),
+                    "expected_hashes": link.get("expected_hashes") or {},
                 }
                 for link in entry.get("direct_links", [])
             ],
+            "expected_hashes": entry.get("expected_hashes") or {},
             "torrent_gid": entry.get("torrent_gid", ""),
             "torrent_hash": entry.get("torrent_hash", ""),
             "speed_text": entry.get("speed_text", ""),
@@ -239,6 +608,22 @@ class TuiDownloadManager:
                 except OSError:
                     pass
 
+    def request_session_save(self):
+        with self._session_lock:
+            self._session_dirty = True
+
+    def flush_session(self, force=False):
+        # State changes only mark the session dirty; the pipeline loop writes
+        # it at most every few seconds instead of once per link update.
+        with self._session_lock:
+            if not self._session_dirty:
+                return
+            if not force and time.monotonic() - self._last_session_save < SESSION_SAVE_INTERVAL_SECONDS:
+                return
+            self._session_dirty = False
+            self._last_session_save = time.monotonic()
+        self.save_session_to_disk()
+
     def default_title(self, url, path):
         filename = os.path.basename(urlparse(url).path.rstrip("/"))
         if filename:
@@ -259,77 +644,6 @@ class TuiDownloadManager:
         with self._print_lock:
             tqdm.write(message)
 
-    def resolve_entry(self, entry):
-        if not entry.get("url_original"):
-            entry["failed"] = True
-            entry["status"] = "error"
-            entry["error_text"] = "Missing url."
-            self.save_session_to_disk()
-            self.log(f"[error] {entry['title']} missing url")
-            return False
-
-        if self.is_direct_file_url(entry["url_original"]):
-            filename = resolve_direct_filename(entry["url_original"])
-            entry["direct_links"] = [{
-                "path": build_download_path(entry["path"], filename),
-                "url": entry["url_original"],
-                "headers": {},
-                "cookies": {},
-                "status": "waiting",
-                "progress": 0,
-            }]
-            entry["direct_url"] = entry["url_original"]
-            entry["status"] = "waiting"
-            entry["error_text"] = ""
-            self.save_session_to_disk()
-            return True
-
-        entry["status"] = "resolving"
-        entry["error_text"] = ""
-        self.save_session_to_disk()
-        results = self.resolve_with_browser(entry)
-        direct_links = self.convert_resolved_results(results)
-        if not direct_links:
-            entry["failed"] = True
-            entry["status"] = "error"
-            entry["error_text"] = "No se pudieron obtener los enlaces directos."
-            self.save_session_to_disk()
-            self.log(f"[error] resolve failed {entry['title']}")
-            return False
-
-        entry["direct_links"] = direct_links
-        entry["direct_url"] = direct_links[0]["url"] if len(direct_links) == 1 else ""
-        entry["status"] = "waiting"
-        entry["progress"] = 0
-        entry["error_text"] = ""
-        self.save_session_to_disk()
-        return True
-
-    def resolve_with_browser(self, entry):
-        loop = QEventLoop()
-        holder = {"results": []}
-        downloader = UniversalDownloader([{
-            "url": entry["url_original"],
-            "path": entry["path"],
-            "password": entry["password"],
-            "title": entry["title"],
-        }])
-
-        def _finish(results):
-            holder["results"] = results or []
-            loop.quit()
-
-        downloader.direct_links_ready.connect(_finish)
-        downloader.start()
-        loop.exec_()
-        try:
-            downloader.close()
-            downloader.deleteLater()
-        except Exception:
-            pass
-        self.app.processEvents()
-        return holder["results"]
-
     def convert_resolved_results(self, results):
         direct_links = []
         for item in results or []:
@@ -337,14 +651,25 @@ class TuiDownloadManager:
                 path = normalize_path(item.get("path") or "")
                 url = item.get("url") or ""
                 if path and url:
-                    direct_links.append({
+                    link = {
                         "path": path,
                         "url": url,
                         "headers": item.get("headers") or {},
                         "cookies": item.get("cookies") or {},
                         "status": "waiting",
                         "progress": 0,
-                    })
+                    }
+                    if item.get("size"):
+                        link["size"] = int(item["size"])
+                        link["accept_ranges"] = bool(item.get("accept_ranges"))
+                    for key in ("etag", "last_modified"):
+                        if item.get(key):
+                            link[key] = item[key]
+                    if item.get("response") is not None:
+                        link["_response"] = item["response"]
+                    direct_links.append(link)
+                else:
+                    close_response(item.get("response"))
             elif isinstance(item, (tuple, list)) and len(item) >= 2:
                 path, url = item[0], item[1]
                 if path and url:
@@ -366,121 +691,281 @@ class TuiDownloadManager:
             return normalized
         return normalize_path(os.path.join(self.folder_path, normalized))
 
-    def download_regular_entries(self, regular_entries):
-        tasks = []
+    def download_direct_link(self, entry, link):
+        target_path = self.absolute_download_path(link.get("path") or entry["path"])
+        return self.download_with_retries(entry, link, target_path)
+
+    def download_with_retries(self, entry, link, target_path):
+        # One attempt per pool task: a failed part is parked as "retrying" and
+        # schedule_downloads submits it again once next_attempt_at has passed,
+        # so the backoff never holds a download slot.
+        ok = self.stream_direct_link(entry, link, target_path)
+        failure = link.pop("_last_failure", None)
+        if ok:
+            link.pop("retry_attempt", None)
+            RETRY_STATS.record_success(link.get("url"))
+            return True
+        if not failure:
+            return False
+        attempt = int(link.get("retry_attempt", 0) or 0) + 1
+        if not DEFAULT_RETRY_POLICY.should_retry(failure.kind, attempt):
+            RETRY_STATS.record_failure(link.get("url"), failure.kind)
+            return False
+
+        delay = DEFAULT_RETRY_POLICY.delay_for(attempt, failure.retry_after)
+        RETRY_STATS.record_retry(link.get("url"), failure.kind)
+        self.log(
+            f"[retry] {os.path.basename(target_path)}: {failure} ({failure.kind}), "
+            f"attempt {attempt}/{DEFAULT_RETRY_POLICY.max_attempts} in {delay:.0f}s"
+        )
+        link["retry_attempt"] = attempt
+        link["next_attempt_at"] = time.monotonic() + delay
+        link["status"] = "retrying"
+        entry["failed"] = False
+        self.recompute_regular_status(entry)
+        self.request_session_save()
+        return False
+
+    def release_due_retries(self, regular_entries):
+        now = time.monotonic()
         for entry in regular_entries:
-            if entry.get("failed") or entry.get("status") in {"finished", "cancelled", "error"}:
-                continue
             for link in entry.get("direct_links", []):
-                if link.get("status") == "waiting":
-                    tasks.append((entry, link))
-
-        if not tasks:
-            return not any(entry.get("failed") for entry in regular_entries)
-
-        results = []
-        with ThreadPoolExecutor(max_workers=self.max_parallel_downloads) as executor:
-            pending = {}
-            for position, (entry, link) in enumerate(tasks):
-                future = executor.submit(self.download_direct_link, entry, link, position)
-                pending[future] = entry
-
-            while pending:
-                done, _ = wait(pending.keys(), return_when=FIRST_COMPLETED)
-                self.app.processEvents()
-                for future in done:
-                    entry = pending.pop(future)
-                    ok = False
-                    try:
-                        ok = bool(future.result())
-                    except Exception as exc:
-                        self.log(f"[error] download crashed {entry['title']}: {exc}")
-                    results.append(ok)
-
-        if self.auto_extract_archives:
-            for entry in regular_entries:
-                if entry.get("failed") or entry.get("status") != "finished":
-                    continue
-                if entry.get("extract_status") == "done":
-                    continue
-                if not self.extract_entry(entry):
-                    results.append(False)
-
-        return all(results) if results else True
+                if link.get("status") == "retrying" and now >= link.get("next_attempt_at", 0):
+                    link.pop("next_attempt_at", None)
+                    link["status"] = "waiting"
+
+    def has_queued_links(self, regular_entries):
+        # Parts backing off or waiting for disk space keep the loop alive even
+        # when no download is running.
+        return any(
+            link.get("status") in {"waiting", "retrying"}
+            for entry in regular_entries
+            if entry.get("status") not in {"finished", "cancelled"}
+            for link in entry.get("direct_links", [])
+        )
 
-    def download_direct_link(self, entry, link, position):
+    def pending_disk_usage(self, volume):
+        reserved = sum(
+            remaining_bytes(link, path)
+            for link, path in list(self._active_links.values())
+            if volume_key(path) == volume
+        )
+        if not self.auto_extract_archives:
+            return reserved
+        for entry in self.entries:
+            if entry.get("download_type") != "regular" or entry.get("extract_status") == "done":
+                continue
+            for link in entry.get("direct_links", []):
+                path = self.absolute_download_path(link.get("path") or entry["path"])
+                if link.get("status") != "waiting" and archive_volume_info(path) and volume_key(path) == volume:
+                    reserved += int(link.get("size", 0) or 0)
+        return reserved
+
+    def has_disk_space_for(self, entry, link, target_path):
+        # Checked from the pipeline loop before a part is submitted, so a part
+        # short of space never holds a download slot. The check repeats every
+        # DISK_WAIT_POLL_SECONDS, or as soon as a download finishes.
+        if time.monotonic() < link.get("disk_check_at", 0):
+            return False
+        needed = remaining_bytes(link, target_path)
+        if self.auto_extract_archives and archive_volume_info(target_path):
+            needed += int(link.get("size", 0) or 0)
+        shortfall = disk_shortfall(target_path, needed, self.pending_disk_usage(volume_key(target_path)))
+        if not shortfall:
+            link.pop("disk_wait", None)
+            link.pop("disk_check_at", None)
+            return True
+        disk_wait = f"{format_size(shortfall)} short"
+        if link.get("disk_wait") != disk_wait:
+            self.log(f"[disk] waiting for disk space: {os.path.basename(target_path)} needs {format_size(shortfall)} more")
+            link["disk_wait"] = disk_wait
+        link["disk_check_at"] = time.monotonic() + DISK_WAIT_POLL_SECONDS
+        return False
+
+    def stream_direct_link(self, entry, link, target_path):
         url = link.get("url") or ""
-        target_path = self.absolute_download_path(link.get("path") or entry["path"])
         os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
         headers = dict(link.get("headers") or {})
         cookies = link.get("cookies") or {}
         link["status"] = "downloading"
         entry["status"] = "downloading"
         entry["error_text"] = ""
-        self.save_session_to_disk()
+        self.request_session_save()
+
+        resume_offset = int(link.get("downloaded", 0) or 0) if link.get("preallocated") else None
+        if discard_unknown_preallocation(target_path, resume_offset):
+            self.log(f"[retry] {self.short_label(entry['title'])}: preallocated file without checkpoint, restarting")
 
         existing_size = os.path.getsize(target_path) if os.path.exists(target_path) else 0
+        if not existing_size:
+            link["preallocated"] = False
+        elif link.get("preallocated"):
+            existing_size = min(existing_size, int(link.get("downloaded", 0) or 0))
+        resume_mode = "r+b" if link.get("preallocated") else "ab"
+        prepared_response = link.pop("_response", None)
         if existing_size:
-            headers["Range"] = f"bytes={existing_size}-"
+            close_response(prepared_response)
+            prepared_response = None
+            if existing_size == int(link.get("size", 0) or 0):
+                return self.finish_existing_link(entry, link, target_path)
+            headers.update(resume_headers(link_validators(link), existing_size))
 
         short_name = self.short_label(entry["title"])
-        with tqdm(
-            total=None,
-            desc=short_name,
-            unit="B",
-            unit_scale=True,
-            unit_divisor=1024,
-            position=position,
-            leave=True,
-            dynamic_ncols=True,
-        ) as bar:
-            if existing_size:
-                bar.update(existing_size)
-
-            try:
-                with requests.get(
-                    url,
-                    stream=True,
-                    headers=headers,
-                    cookies=cookies,
-                    timeout=30,
-                ) as response:
+        bad_reason = ""
+        restart = ""
+        expected_hashes = expected_hashes_for_link(entry, link)
+        hasher = StreamHasher(hash_algorithms_for(expected_hashes))
+        # The dashboard reads "downloaded" and "size"; this thread only updates them.
+        link["downloaded"] = existing_size
+        try:
+            with prepared_response or requests.get(
+                url,
+                stream=True,
+                headers=headers,
+                cookies=cookies,
+                timeout=30,
+            ) as response:
+                if existing_size and response.status_code == 416:
+                    if content_range_total(response) == existing_size:
+                        restart = "complete"
+                    else:
+                        restart = "range not satisfiable"
+                else:
                     response.raise_for_status()
+                    if range_was_ignored(response, existing_size):
+                        self.log(f"[retry] {short_name}: server ignored Range, restarting")
+                        existing_size = 0
+                        link["downloaded"] = 0
                     total_size = self.compute_total_size(response, existing_size)
-                    if total_size:
-                        bar.total = total_size
-                        bar.refresh()
-
-                    mode = "ab" if existing_size else "wb"
+                    validators = response_validators(response, total_size)
+                    if existing_size and validators_changed(link_validators(link), validators):
+                        restart = "remote file changed"
+                    link.update(validators)
+
+                if not restart:
+                    if existing_size:
+                        link["activity"] = "hashing"
+                        hasher.update_from_file(target_path, existing_size)
+                        link["activity"] = ""
+
+                    mode = resume_mode if existing_size else "wb"
                     with open(target_path, mode) as fh:
+                        if mode == "wb" and total_size:
+                            mark_preallocated(target_path)
+                            preallocate_file(fh, total_size)
+                            link["preallocated"] = True
+                        elif mode == "r+b":
+                            fh.seek(existing_size)
+                        written = existing_size
                         for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
                             if not chunk:
                                 continue
                             fh.write(chunk)
-                            bar.update(len(chunk))
-                            if bar.total:
-                                link["progress"] = int((bar.n / bar.total) * 100)
-                            entry["progress"] = self.entry_progress(entry)
-
-                if bar.total and bar.n < bar.total:
-                    bar.total = bar.n
-                    bar.refresh()
-                link["status"] = "finished"
-                link["progress"] = 100
-                entry["error_text"] = ""
-                self.recompute_regular_status(entry)
-                self.save_session_to_disk()
-                return True
-            except Exception as exc:
-                bar.set_postfix_str("error")
-                self.log(f"[error] {entry['title']}: {exc}")
-                entry["failed"] = True
-                link["status"] = "error"
-                entry["status"] = "error"
-                entry["error_text"] = "La descarga no se pudo completar."
-                self.recompute_regular_status(entry)
-                self.save_session_to_disk()
-                return False
+                            hasher.update(chunk)
+                            written += len(chunk)
+                            link["downloaded"] = written
+                            if total_size:
+                                link["progress"] = int((written / total_size) * 100)
+                        if link.get("preallocated"):
+                            fh.truncate(written)
+                            link["preallocated"] = False
+                            clear_preallocated(target_path)
+                    entry["progress"] = self.entry_progress(entry)
+
+            if not restart:
+                link["hashes"] = hasher.hexdigests()
+                link["hashed_size"] = os.path.getsize(target_path)
+                link["activity"] = "verifying"
+                if expected_hashes:
+                    bad_reason = compare_hashes(link["hashes"], expected_hashes)
+                elif self.auto_extract_archives and archive_volume_info(target_path):
+                    bad_reason = check_archive_volume(target_path, entry.get("password", ""))
+                link["activity"] = ""
+                if not bad_reason:
+                    link["status"] = "finished"
+                    link["progress"] = 100
+                    entry["error_text"] = ""
+                    self.recompute_regular_status(entry)
+                    self.request_session_save()
+        except Exception as exc:
+            link["_last_failure"] = as_download_error(exc)
+            link["activity"] = ""
+            self.log(f"[error] {entry['title']}: {exc}")
+            entry["failed"] = True
+            link["status"] = "error"
+            entry["status"] = "error"
+            entry["error_text"] = "La descarga no se pudo completar."
+            self.recompute_regular_status(entry)
+            self.request_session_save()
+            return False
+
+        if restart == "complete":
+            return self.finish_existing_link(entry, link, target_path)
+        if restart:
+            self.log(f"[retry] {short_name}: {restart}, restarting")
+            os.remove(target_path)
+            link["preallocated"] = False
+            return self.stream_direct_link(entry, link, target_path)
+        if bad_reason:
+            return self.retry_bad_volume(entry, link, target_path, bad_reason)
+        if is_hash_file(target_path):
+            return self.apply_hash_file(entry, target_path)
+        return True
+
+    def finish_existing_link(self, entry, link, target_path):
+        self.log(f"[skip] {os.path.basename(target_path)} already complete")
+        reason = compare_hashes(stored_hashes_for(link, target_path), expected_hashes_for_link(entry, link))
+        if reason:
+            return self.retry_bad_volume(entry, link, target_path, reason)
+        link["status"] = "finished"
+        link["progress"] = 100
+        entry["progress"] = self.entry_progress(entry)
+        self.recompute_regular_status(entry)
+        self.request_session_save()
+        return True
+
+    def apply_hash_file(self, entry, hash_path):
+        try:
+            updated = apply_published_hashes(entry, load_published_hashes(hash_path))
+        except OSError as exc:
+            self.log(f"[error] read {os.path.basename(hash_path)}: {exc}")
+            return True
+        ok = True
+        for link in updated:
+            if link.get("status") != "finished":
+                continue
+            full_path = self.absolute_download_path(link.get("path") or entry["path"])
+            reason = compare_hashes(stored_hashes_for(link, full_path), link["expected_hashes"])
+            if reason:
+                ok = self.retry_bad_volume(entry, link, full_path, reason) and ok
+        return ok
+
+    def retry_bad_volume(self, entry, link, target_path, reason):
+        filename = os.path.basename(target_path)
+        try:
+            os.remove(target_path)
+        except OSError as exc:
+            self.log(f"[error] delete {filename}: {exc}")
+
+        retry_count = int(link.get("integrity_retry_count", 0) or 0) + 1
+        link["integrity_retry_count"] = retry_count
+        link["progress"] = 0
+        link["hashes"] = {}
+        link["downloaded"] = 0
+        link["preallocated"] = False
+        if retry_count > MAX_CORRUPT_ARCHIVE_RETRIES:
+            self.log(f"[error] {filename} still damaged: {reason}")
+            entry["failed"] = True
+            link["status"] = "error"
+            entry["status"] = "error"
+            entry["error_text"] = f"{filename} está dañado: {reason}"
+            self.recompute_regular_status(entry)
+            self.request_session_save()
+            return False
+
+        self.log(f"[retry] {filename} damaged ({reason}), downloading it again ({retry_count}/{MAX_CORRUPT_ARCHIVE_RETRIES})")
+        link["status"] = "waiting"
+        return self.stream_direct_link(entry, link, target_path)
 
     def compute_total_size(self, response, existing_size):
         content_range = response.headers.get("Content-Range", "")
@@ -524,23 +1009,26 @@ class TuiDownloadManager:
         self.log(f"Extract {entry['title']}")
         entry["extract_status"] = "running"
         entry["extract_error"] = ""
-        self.save_session_to_disk()
+        self.request_session_save()
         worker = ArchiveExtractWorker(entry["id"], archive_path, os.path.dirname(archive_path), entry.get("password", ""))
         holder = {"ok": False, "error": ""}
 
-        def _finish(_, ok, error_text):
+        def _finish(_, __, ok, error_text):
             holder["ok"] = bool(ok)
             holder["error"] = error_text or ""
 
+        def _progress(_, __, percent):
+            entry["extract_progress"] = percent
+
+        worker.signals.progress.connect(_progress)
         worker.signals.finished.connect(_finish)
         worker.run()
-        self.app.processEvents()
         if not holder["ok"]:
             self.log(f"[error] extract failed {entry['title']}: {holder['error'] or 'unknown'}")
             entry["failed"] = True
             entry["extract_status"] = "error"
             entry["extract_error"] = holder["error"] or "Unknown extract error."
-            self.save_session_to_disk()
+            self.request_session_save()
             return False
 
         entry["extract_status"] = "done"
@@ -554,9 +1042,9 @@ class TuiDownloadManager:
                         self.log(f"[error] delete archive {os.path.basename(path)}: {exc}")
                         entry["failed"] = True
                         entry["extract_error"] = str(exc)
-                        self.save_session_to_disk()
+                        self.request_session_save()
                         return False
-        self.save_session_to_disk()
+        self.request_session_save()
         return True
 
     def archive_paths_for_entry(self, entry):
@@ -594,21 +1082,21 @@ class TuiDownloadManager:
                     return path
         return sorted(paths)[0] if paths else ""
 
-    def download_torrent_entries(self, entries):
+    def add_torrent_entries(self, entries):
+        # Runs on a background thread: starting aria2 and fetching .torrent
+        # files must not hold up the regular downloads.
         if not ensure_aria2_running(self.folder_path, background=False):
             for entry in entries:
                 entry["failed"] = True
                 entry["status"] = "error"
                 entry["error_text"] = "No se pudo iniciar Aria2."
-            self.save_session_to_disk()
+            self.request_session_save()
             self.log("[error] aria2 not running")
-            return False
+            return {}
 
         client = Aria2Client()
         gids = {}
         for entry in entries:
-            if entry.get("status") == "finished":
-                continue
             gid = entry.get("torrent_gid") or self.add_torrent_entry(client, entry)
             if not gid:
                 entry["failed"] = True
@@ -619,78 +1107,55 @@ class TuiDownloadManager:
             entry["status"] = "waiting"
             entry["error_text"] = ""
             gids[entry["id"]] = gid
-        self.save_session_to_disk()
+        self.request_session_save()
+        return gids
 
-        if not gids:
-            return False
+    def poll_torrents(self):
+        if self._torrent_setup is not None and self._torrent_setup.done():
+            try:
+                self._torrent_gids = self._torrent_setup.result()
+            except Exception as exc:
+                self.log(f"[error] torrent setup failed: {exc}")
+                self._torrent_gids = {}
+            self._torrent_setup = None
+            self._torrent_client = Aria2Client() if self._torrent_gids else None
+        if not self._torrent_gids or time.monotonic() - self._last_torrent_poll < TORRENT_POLL_SECONDS:
+            return
+        self._last_torrent_poll = time.monotonic()
 
-        bars = {}
-        positions = {entry_id: idx for idx, entry_id in enumerate(gids.keys())}
-        try:
-            for entry_id in gids:
-                entry = self.entry_by_id(entry_id)
-                bars[entry_id] = tqdm(
-                    total=100,
-                    desc=self.short_label(entry["title"]),
-                    unit="%",
-                    position=positions[entry_id],
-                    leave=True,
-                    dynamic_ncols=True,
-                )
-
-            pending = set(gids.keys())
-            while pending:
-                self.app.processEvents()
-                time.sleep(1)
-                finished_now = []
-                for entry_id in list(pending):
-                    entry = self.entry_by_id(entry_id)
-                    status = client.get_download_status(gids[entry_id])
-                    if not status:
-                        bars[entry_id].set_postfix_str("missing")
-                        entry["failed"] = True
-                        entry["status"] = "error"
-                        entry["error_text"] = "Torrent no encontrado en Aria2."
-                        finished_now.append(entry_id)
-                        continue
-
-                    percent = int(status.progress * 100) if status.total_size else 0
-                    bar = bars[entry_id]
-                    bar.n = max(0, min(100, percent))
-                    postfix = self.format_speed(status.dlspeed)
-                    if postfix:
-                        bar.set_postfix_str(postfix)
-                    bar.refresh()
-
-                    entry["progress"] = percent
-                    entry["speed_text"] = postfix
-                    if status.state in {"downloading", "queuedDL", "pausedDL"}:
-                        entry["status"] = "downloading"
-
-                    if status.state == "error":
-                        entry["failed"] = True
-                        entry["status"] = "error"
-                        entry["error_text"] = "Torrent con error."
-                        finished_now.append(entry_id)
-                    elif status.state == "uploading":
-                        bar.n = 100
-                        bar.refresh()
-                        entry["status"] = "finished"
-                        entry["progress"] = 100
-                        entry["speed_text"] = ""
-                        entry["error_text"] = ""
-                        finished_now.append(entry_id)
-
-                if finished_now:
-                    self.save_session_to_disk()
-                for entry_id in finished_now:
-                    pending.discard(entry_id)
-        finally:
-            for bar in bars.values():
-                bar.close()
+        for entry_id, gid in list(self._torrent_gids.items()):
+            entry = self.entry_by_id(entry_id)
+            status = self._torrent_client.get_download_status(gid)
+            if not status:
+                entry["failed"] = True
+                entry["status"] = "error"
+                entry["error_text"] = "Torrent no encontrado en Aria2."
+                self.log(f"[error] torrent missing {entry['title']}")
+                self._torrent_gids.pop(entry_id)
+                self.request_session_save()
+                continue
 
-        self.save_session_to_disk()
-        return not any(entry.get("failed") for entry in entries)
+            percent = int(status.progress * 100) if status.total_size else 0
+            entry["progress"] = max(0, min(100, percent))
+            entry["speed_text"] = self.format_speed(status.dlspeed)
+            if status.state in {"downloading", "queuedDL", "pausedDL"}:
+                entry["status"] = "downloading"
+
+            if status.state == "error":
+                entry["failed"] = True
+                entry["status"] = "error"
+                entry["error_text"] = "Torrent con error."
+                self.log(f"[error] torrent failed {entry['title']}")
+            elif status.state == "uploading":
+                entry["status"] = "finished"
+                entry["progress"] = 100
+                entry["speed_text"] = ""
+                entry["error_text"] = ""
+                self.log(f"[done] {entry['title']}")
+            else:
+                continue
+            self._torrent_gids.pop(entry_id)
+            self.request_session_save()
 
     def add_torrent_entry(self, client, entry):
         target_dir = self.absolute_download_path(entry["path"])
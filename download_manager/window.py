@@ -1,7 +1,5 @@
 import json
 import os
-import re
-import shutil
 import subprocess
 import tempfile
 import uuid
@@ -14,40 +12,43 @@ from PyQt5.QtWidgets import (
 )
 
 from config import APPDATA, DEFAULT_CONFIG, load_config, normalize_path
+from download_manager.async_engine import (
+    ENGINE_ASYNCIO, AsyncDownloadJob, available_async_backend, get_async_engine, shutdown_async_engine,
+)
 from download_manager.browser import UniversalDownloader
 from download_manager.dialogs import LinkInputWindow, SettingsDialog, apply_settings
+from download_manager.disk import (
+    DISK_WAIT_POLL_SECONDS, disk_shortfall, format_size, remaining_bytes, volume_key,
+)
+from download_manager.extraction import (
+    EXTRACT_THREAD_POOL, ArchiveCheckWorker, ArchiveExtractWorker, archive_volume_info, check_archive_volume,
+    group_archive_sets, volume_download_order,
+)
+from download_manager.hashing import (
+    apply_published_hashes, compare_hashes, expected_hashes_for_link, is_hash_file, load_published_hashes,
+    normalize_expected_hashes, stored_hashes_for,
+)
+from download_manager.retry import DEFAULT_RETRY_POLICY, EXPIRED, RETRY_STATS, TRANSIENT
 from download_manager.torrent import Aria2Client, TorrentUpdater, ensure_aria2_running
 from download_manager.torrent_queue import TorrentProcessor
-from download_manager.workers import DownloadSignals, FileDownloader
+from download_manager.workers import DownloadSignals, FileDownloader, close_response, link_validators
 
 
 SESSION_PATH = os.path.join(APPDATA, "MediaSearchPrototype", "download_state.json")
-ARCHIVE_EXTENSIONS = {".zip", ".rar", ".7z"}
 MAX_RESOLUTION_RETRIES = 3
 MAX_CORRUPT_ARCHIVE_RETRIES = 2
 CORRUPT_ARCHIVE_PATTERNS = (
     "can not open file as archive",
+    "can not open the file as archive",
     "cannot open file as archive",
     "is not archive",
     "not a valid archive",
+    "crc failed",
+    "data error",
+    "unexpected end of archive",
 )
 
 
-def find_7z_executable():
-    candidates = [
-        shutil.which("7z"),
-        shutil.which("7z.exe"),
-        r"C:\Program Files\WinRAR\WinRAR.exe",
-        r"C:\Program Files\WinRAR\Rar.exe",
-        r"C:\Program Files\7-Zip\7z.exe",
-        r"C:\Program Files (x86)\7-Zip\7z.exe",
-    ]
-    for candidate in candidates:
-        if candidate and os.path.exists(candidate):
-            return candidate
-    return ""
-
-
 class DownloadType(Enum):
     NORMAL = 0
     TORRENT = 1
@@ -71,48 +72,6 @@ class TorrentCancelWorker(QRunnable):
             self.signals.finished.emit(self.gid, False, str(exc))
 
 
-class ArchiveExtractSignals(QObject):
-    finished = pyqtSignal(str, bool, str)
-
-
-class ArchiveExtractWorker(QRunnable):
-    def __init__(self, entry_id, archive_path, output_dir, password=""):
-        super().__init__()
-        self.entry_id = entry_id
-        self.archive_path = archive_path
-        self.output_dir = output_dir
-        self.password = password or ""
-        self.signals = ArchiveExtractSignals()
-
-    def run(self):
-        exe_path = find_7z_executable()
-        if not exe_path:
-            self.signals.finished.emit(self.entry_id, False, "No se encontró 7z.exe")
-            return
-
-        try:
-            os.makedirs(self.output_dir, exist_ok=True)
-            exe_name = os.path.basename(exe_path).lower()
-            if exe_name in {"winrar.exe", "rar.exe"}:
-                output_target = self.output_dir
-                if not output_target.endswith(os.sep):
-                    output_target += os.sep
-                command = [exe_path, "x", self.archive_path, output_target, "-y"]
-                command.append(f"-p{self.password}" if self.password else "-p-")
-            else:
-                command = [exe_path, "x", self.archive_path, f"-o{self.output_dir}", "-y"]
-                if self.password:
-                    command.append(f"-p{self.password}")
-            result = subprocess.run(command, capture_output=True, text=True, timeout=1800)
-            if result.returncode != 0:
-                error_text = (result.stderr or result.stdout or "Error extrayendo archivo").strip()
-                self.signals.finished.emit(self.entry_id, False, error_text)
-                return
-            self.signals.finished.emit(self.entry_id, True, "")
-        except Exception as exc:
-            self.signals.finished.emit(self.entry_id, False, str(exc))
-
-
 class DownloadWindow(QWidget):
     def __init__(self, download_entries):
         super().__init__()
@@ -137,12 +96,15 @@ class DownloadWindow(QWidget):
             "download_manager_mode",
             DEFAULT_CONFIG["download_manager_mode"],
         )
+        self.download_engine = self.config.get("download_engine", DEFAULT_CONFIG["download_engine"])
+        self._async_engine_warned = False
         QThreadPool.globalInstance().setMaxThreadCount(self.max_parallel_downloads)
 
         self.downloaders = []
         self.active_resolutions = {}
         self.active_file_downloads = {}
         self.active_extractions = {}
+        self.active_archive_checks = {}
         self.worker_context = {}
         self.pending_torrent_entries = set()
         self.saved_password_hints = set()
@@ -193,6 +155,9 @@ class DownloadWindow(QWidget):
         self.session_save_timer = QTimer(self)
         self.session_save_timer.setSingleShot(True)
         self.session_save_timer.timeout.connect(self.save_session_to_disk)
+        self.disk_wait_timer = QTimer(self)
+        self.disk_wait_timer.setInterval(DISK_WAIT_POLL_SECONDS * 1000)
+        self.disk_wait_timer.timeout.connect(self.queue_scheduler)
 
         self.load_session()
         if download_entries:
@@ -252,7 +217,8 @@ class DownloadWindow(QWidget):
 
         for link in raw_direct_links:
             child_status = link.get("status", "waiting")
-            if from_session and child_status in {"downloading", "resolving"}:
+            # A part saved mid-verification was never confirmed, so it is checked again.
+            if from_session and child_status in {"downloading", "resolving", "retrying", "expired", "verifying"}:
                 child_status = "waiting"
             direct_links.append({
                 "path": normalize_path(link.get("path") or path),
@@ -261,6 +227,15 @@ class DownloadWindow(QWidget):
                 "cookies": link.get("cookies") or {},
                 "status": child_status,
                 "progress": int(link.get("progress", 0) or 0),
+                "size": int(link.get("size", 0) or 0),
+                "accept_ranges": bool(link.get("accept_ranges", False)),
+                "etag": link.get("etag", "") or "",
+                "last_modified": link.get("last_modified", "") or "",
+                "downloaded": int(link.get("downloaded", 0) or 0),
+                "preallocated": bool(link.get("preallocated", False)),
+                "hashes": link.get("hashes") or {},
+                "hashed_size": int(link.get("hashed_size", 0) or 0),
+                "expected_hashes": normalize_expected_hashes(link.get("expected_hashes")),
             })
 
         status = raw_entry.get("status") or "waiting"
@@ -278,12 +253,14 @@ class DownloadWindow(QWidget):
             "progress": int(raw_entry.get("progress", 0) or 0),
             "direct_url": raw_entry.get("direct_url", "") or "",
             "direct_links": direct_links,
+            "expected_hashes": normalize_expected_hashes(raw_entry.get("expected_hashes") or raw_entry.get("hashes")),
             "torrent_gid": raw_entry.get("torrent_gid", "") or "",
             "torrent_hash": raw_entry.get("torrent_hash", "") or "",
             "speed_text": raw_entry.get("speed_text", "") or "",
             "error_text": raw_entry.get("error_text", "") or "",
             "extract_status": raw_entry.get("extract_status", "") or "",
             "extract_error": raw_entry.get("extract_error", "") or "",
+            "extracted_archives": list(raw_entry.get("extracted_archives") or []),
             "resolution_retry_count": int(raw_entry.get("resolution_retry_count", 0) or 0),
             "archive_retry_count": int(raw_entry.get("archive_retry_count", 0) or 0),
         }
@@ -332,15 +309,26 @@ class DownloadWindow(QWidget):
                     "cookies": link.get("cookies") or {},
                     "status": link.get("status", "waiting"),
                     "progress": link.get("progress", 0),
+                    "size": link.get("size", 0),
+                    "accept_ranges": link.get("accept_ranges", False),
+                    "etag": link.get("etag", ""),
+                    "last_modified": link.get("last_modified", ""),
+                    "downloaded": link.get("downloaded", 0),
+                    "preallocated": link.get("preallocated", False),
+                    "hashes": link.get("hashes") or {},
+                    "hashed_size": link.get("hashed_size", 0),
+                    "expected_hashes": link.get("expected_hashes") or {},
                 }
                 for link in entry.get("direct_links", [])
             ],
+            "expected_hashes": entry.get("expected_hashes") or {},
             "torrent_gid": entry.get("torrent_gid", ""),
             "torrent_hash": entry.get("torrent_hash", ""),
             "speed_text": entry.get("speed_text", ""),
             "error_text": entry.get("error_text", ""),
             "extract_status": entry.get("extract_status", ""),
             "extract_error": entry.get("extract_error", ""),
+            "extracted_archives": entry.get("extracted_archives", []),
             "resolution_retry_count": entry.get("resolution_retry_count", 0),
             "archive_retry_count": entry.get("archive_retry_count", 0),
         }
@@ -392,11 +380,69 @@ class DownloadWindow(QWidget):
             if entry["status"] == "waiting" and not entry.get("torrent_gid") and entry_id not in self.pending_torrent_entries:
                 self.enqueue_torrent_entry(entry)
 
+        for entry_id in list(self.entry_order):
+            entry = self.entries.get(entry_id)
+            if entry and "pending_archive_retry" in entry and not self.entry_has_active_workers(entry_id):
+                self.retry_corrupt_archive_download(entry, entry.get("extract_error", ""))
+
         while self.count_regular_slots_in_use() < self.max_parallel_downloads:
             if not self.start_next_regular_work():
                 break
+        if any(self.entries[entry_id].get("disk_wait") for entry_id in self.entry_order):
+            if not self.disk_wait_timer.isActive():
+                self.disk_wait_timer.start()
+        else:
+            self.disk_wait_timer.stop()
         self.maybe_handle_completion_action()
 
+    def pending_disk_usage(self, volume):
+        # Bytes already promised on a volume: what active downloads still have
+        # to write plus the estimated output of archives not extracted yet.
+        reserved = 0
+        for worker_index, (entry_id, link_index) in list(self.worker_context.items()):
+            entry = self.entries.get(entry_id)
+            if not entry or worker_index not in self.active_file_downloads:
+                continue
+            link = entry["direct_links"][link_index]
+            full_path = self.absolute_download_path(link.get("path") or entry["path"])
+            if volume_key(full_path) == volume:
+                reserved += remaining_bytes(link, full_path)
+
+        if not self.auto_extract_archives:
+            return reserved
+        for entry_id in self.entry_order:
+            entry = self.entries.get(entry_id)
+            if not entry or entry["download_type"] != "regular" or entry.get("extract_status") == "done":
+                continue
+            extracted = set(entry.get("extracted_archives") or [])
+            for archive_set in self.archive_sets_for_entry(entry):
+                if archive_set["first"] in extracted or volume_key(archive_set["first"]) != volume:
+                    continue
+                for link in entry.get("direct_links", []):
+                    full_path = self.absolute_download_path(link.get("path") or entry["path"])
+                    if full_path in archive_set["volumes"] and link.get("status") != "waiting":
+                        reserved += int(link.get("size", 0) or 0)
+        return reserved
+
+    def has_disk_space_for(self, entry, link_index):
+        link = entry["direct_links"][link_index]
+        full_path = self.absolute_download_path(link.get("path") or entry["path"])
+        needed = remaining_bytes(link, full_path)
+        if self.auto_extract_archives and archive_volume_info(full_path):
+            needed += int(link.get("size", 0) or 0)
+        shortfall = disk_shortfall(full_path, needed, self.pending_disk_usage(volume_key(full_path)))
+        if not shortfall:
+            if entry.pop("disk_wait", None):
+                self.update_entry_visual(entry)
+            return True
+
+        disk_wait = f"faltan {format_size(shortfall)}"
+        if entry.get("disk_wait") != disk_wait:
+            print(f"💾 Sin espacio para {os.path.basename(full_path)}: {disk_wait}")
+            entry["disk_wait"] = disk_wait
+            self.update_entry_visual(entry)
+        return False
+
     def count_regular_slots_in_use(self):
         return len(self.active_resolutions) + len(self.active_file_downloads)
 
@@ -407,11 +453,13 @@ class DownloadWindow(QWidget):
                 continue
             if entry["status"] in {"finished", "cancelled", "error"}:
                 continue
-            if entry_id in self.active_resolutions:
+            if entry_id in self.active_resolutions or "pending_archive_retry" in entry:
                 continue
 
             link_index = self.next_waiting_direct_link(entry)
             if link_index is not None:
+                if not self.has_disk_space_for(entry, link_index):
+                    continue
                 self.start_direct_download(entry, link_index)
                 return True
 
@@ -453,9 +501,11 @@ class DownloadWindow(QWidget):
             pass
 
         if not entry or entry["status"] == "cancelled":
+            self.release_prepared_responses(self.convert_resolved_results(results))
             self.queue_scheduler()
             return
         if active_downloader is None and entry["status"] != "resolving":
+            self.release_prepared_responses(self.convert_resolved_results(results))
             self.queue_scheduler()
             return
 
@@ -470,6 +520,7 @@ class DownloadWindow(QWidget):
             self.queue_scheduler()
             return
 
+        self.carry_over_link_state(entry.pop("_previous_links", None), direct_links)
         entry["direct_links"] = direct_links
         entry["direct_url"] = direct_links[0]["url"] if len(direct_links) == 1 else ""
         entry["status"] = "waiting"
@@ -489,14 +540,25 @@ class DownloadWindow(QWidget):
                 path = item.get("path", "")
                 url = item.get("url", "")
                 if path and url:
-                    direct_links.append({
+                    link = {
                         "path": path,
                         "url": url,
                         "headers": item.get("headers") or {},
                         "cookies": item.get("cookies") or {},
                         "status": "waiting",
                         "progress": 0,
-                    })
+                    }
+                    if item.get("size"):
+                        link["size"] = int(item["size"])
+                        link["accept_ranges"] = bool(item.get("accept_ranges"))
+                    for key in ("etag", "last_modified"):
+                        if item.get(key):
+                            link[key] = item[key]
+                    if item.get("response") is not None:
+                        link["_response"] = item["response"]
+                    direct_links.append(link)
+                else:
+                    close_response(item.get("response"))
             elif isinstance(item, (tuple, list)) and len(item) >= 2:
                 path, url = item[0], item[1]
                 if path and url:
@@ -510,9 +572,14 @@ class DownloadWindow(QWidget):
                     })
         return direct_links
 
+    def release_prepared_responses(self, direct_links):
+        for link in direct_links or []:
+            close_response(link.pop("_response", None))
+
     def next_waiting_direct_link(self, entry):
-        for index, link in enumerate(entry.get("direct_links", [])):
-            if link.get("status") == "waiting":
+        direct_links = entry.get("direct_links", [])
+        for index in volume_download_order([link.get("path", "") for link in direct_links]):
+            if direct_links[index].get("status") == "waiting":
                 return index
         return None
 
@@ -526,6 +593,9 @@ class DownloadWindow(QWidget):
             self.request_session_save()
             return
 
+        # A file already complete on disk (e.g. restored session) still goes
+        # through the worker: it skips the request but hashes the file, so the
+        # expected hashes are verified on this path too.
         worker_index = self._next_worker_index
         self._next_worker_index += 1
 
@@ -537,20 +607,42 @@ class DownloadWindow(QWidget):
 
         signals = DownloadSignals()
         signals.progress.connect(self.update_progress)
+        signals.hashed.connect(self.on_direct_download_hashed)
+        signals.validated.connect(self.on_direct_download_validated)
+        signals.checkpoint.connect(self.on_direct_download_checkpoint)
+        signals.failed.connect(self.on_direct_download_failed)
         signals.cancelled.connect(self.on_direct_download_cancelled)
         signals.finished.connect(self.on_direct_download_finished)
 
-        thread = FileDownloader(
+        downloader_class = AsyncDownloadJob if self.uses_async_engine() else FileDownloader
+        thread = downloader_class(
             link["url"],
             full_path,
             worker_index,
             signals,
             headers=link.get("headers") or {},
             cookies=link.get("cookies") or {},
+            response=link.pop("_response", None),
+            expected_hashes=expected_hashes_for_link(entry, link),
+            validators=link_validators(link),
+            resume_offset=int(link.get("downloaded", 0) or 0) if link.get("preallocated") else None,
         )
         self.active_file_downloads[worker_index] = thread
         self.worker_context[worker_index] = (entry["id"], link_index)
-        QThreadPool.globalInstance().start(thread)
+        if downloader_class is AsyncDownloadJob:
+            get_async_engine().submit(thread)
+        else:
+            QThreadPool.globalInstance().start(thread)
+
+    def uses_async_engine(self):
+        if self.download_engine != ENGINE_ASYNCIO:
+            return False
+        if available_async_backend():
+            return True
+        if not self._async_engine_warned:
+            self._async_engine_warned = True
+            print("⚠️ Motor asyncio sin aiohttp ni httpx instalados, usando hilos")
+        return False
 
     def enqueue_torrent_entry(self, entry):
         self.clear_empty_state()
@@ -639,6 +731,47 @@ class DownloadWindow(QWidget):
         self.update_entry_visual(entry)
         self.request_session_save()
 
+    def active_direct_link(self, worker_index):
+        context = self.worker_context.get(worker_index)
+        entry = self.entries.get(context[0]) if context else None
+        if not entry:
+            return None, None
+        try:
+            return entry, entry["direct_links"][context[1]]
+        except IndexError:
+            return None, None
+
+    def on_direct_download_validated(self, worker_index, validators):
+        entry, link = self.active_direct_link(worker_index)
+        if not link:
+            return
+        link["etag"] = validators.get("etag", "")
+        link["last_modified"] = validators.get("last_modified", "")
+        if validators.get("size"):
+            link["size"] = int(validators["size"])
+        self.request_session_save()
+
+    def on_direct_download_checkpoint(self, worker_index, checkpoint):
+        entry, link = self.active_direct_link(worker_index)
+        if not link:
+            return
+        link["downloaded"] = int(checkpoint.get("downloaded", 0) or 0)
+        link["preallocated"] = bool(checkpoint.get("preallocated"))
+        self.request_session_save()
+
+    def on_direct_download_failed(self, worker_index, failure):
+        entry, link = self.active_direct_link(worker_index)
+        if link:
+            link["_last_failure"] = dict(failure or {})
+
+    def on_direct_download_hashed(self, worker_index, hashes):
+        entry, link = self.active_direct_link(worker_index)
+        if not link:
+            return
+        full_path = self.absolute_download_path(link.get("path") or entry["path"])
+        link["hashes"] = dict(hashes or {})
+        link["hashed_size"] = os.path.getsize(full_path) if os.path.exists(full_path) else 0
+
     def on_direct_download_finished(self, worker_index, success):
         thread = self.active_file_downloads.pop(worker_index, None)
         context = self.worker_context.pop(worker_index, None)
@@ -651,7 +784,9 @@ class DownloadWindow(QWidget):
         if not entry:
             self.queue_scheduler()
             return
+        self.finish_direct_link(entry, link_index, success)
 
+    def finish_direct_link(self, entry, link_index, success):
         try:
             link = entry["direct_links"][link_index]
         except IndexError:
@@ -659,12 +794,30 @@ class DownloadWindow(QWidget):
             return
 
         if success:
-            link["status"] = "finished"
             link["progress"] = 100
             entry["error_text"] = ""
+            link.pop("retry_attempt", None)
+            RETRY_STATS.record_success(link.get("url"))
+            full_path = self.absolute_download_path(link.get("path") or entry["path"])
+            expected_hashes = expected_hashes_for_link(entry, link)
+            hash_mismatch = compare_hashes(stored_hashes_for(link, full_path), expected_hashes)
+            if hash_mismatch:
+                self.requeue_bad_volume(entry, link, hash_mismatch)
+                success = False
+            elif expected_hashes and stored_hashes_for(link, full_path):
+                # A matching published hash already proves the part is intact.
+                link["status"] = "finished"
+            elif self.auto_extract_archives and archive_volume_info(full_path):
+                # The part only counts as finished once its archive check passes.
+                link["status"] = "verifying"
+                self.start_archive_check(entry, link_index, full_path)
+            else:
+                link["status"] = "finished"
+            if is_hash_file(full_path) and link["status"] == "finished":
+                self.apply_hash_file(entry, full_path)
         else:
-            link["status"] = "error"
-            entry["error_text"] = "La descarga no se pudo completar."
+            self.handle_download_failure(entry, link)
+        self.maybe_refresh_expired_links(entry)
 
         self.recompute_regular_status(entry)
         self.update_entry_visual(entry)
@@ -674,6 +827,97 @@ class DownloadWindow(QWidget):
         self.maybe_handle_completion_action()
         self.queue_scheduler()
 
+    def handle_download_failure(self, entry, link):
+        failure = link.pop("_last_failure", None) or {"kind": TRANSIENT, "message": ""}
+        kind = failure.get("kind") or TRANSIENT
+        message = failure.get("message") or ""
+        filename = os.path.basename(link.get("path") or "")
+        attempt = int(link.get("retry_attempt", 0) or 0) + 1
+
+        if kind == EXPIRED and self.can_refresh_links(entry):
+            # The host rejected a link that worked before: ask for fresh links
+            # once the rest of the entry settles.
+            RETRY_STATS.record_retry(link.get("url"), kind)
+            link["status"] = "expired"
+            print(f"🔑 {filename}: enlace caducado ({message}), se volverá a resolver")
+            return
+
+        if DEFAULT_RETRY_POLICY.should_retry(kind, attempt):
+            delay = DEFAULT_RETRY_POLICY.delay_for(attempt, failure.get("retry_after"))
+            RETRY_STATS.record_retry(link.get("url"), kind)
+            link["retry_attempt"] = attempt
+            link["status"] = "retrying"
+            entry["retry_wait"] = f"intento {attempt}/{DEFAULT_RETRY_POLICY.max_attempts}"
+            print(
+                f"🔁 {filename}: {message} ({kind}); reintento {attempt}/"
+                f"{DEFAULT_RETRY_POLICY.max_attempts} en {delay:.0f}s"
+            )
+            QTimer.singleShot(
+                int(delay * 1000),
+                lambda entry_id=entry["id"], retry_link=link: self.release_retrying_link(entry_id, retry_link),
+            )
+            return
+
+        RETRY_STATS.record_failure(link.get("url"), kind)
+        link["status"] = "error"
+        entry["error_text"] = f"La descarga no se pudo completar ({message})." if message else "La descarga no se pudo completar."
+        for line in RETRY_STATS.summary_lines():
+            print(f"📊 {line}")
+
+    def release_retrying_link(self, entry_id, link):
+        entry = self.entries.get(entry_id)
+        if not entry or link not in entry.get("direct_links", []) or link.get("status") != "retrying":
+            return
+        link["status"] = "waiting"
+        if not any(item.get("status") == "retrying" for item in entry["direct_links"]):
+            entry.pop("retry_wait", None)
+        self.recompute_regular_status(entry)
+        self.update_entry_visual(entry)
+        self.queue_scheduler()
+
+    def can_refresh_links(self, entry):
+        if int(entry.get("link_refresh_count", 0) or 0) >= MAX_RESOLUTION_RETRIES:
+            return False
+        # A plain direct URL has nothing to resolve again.
+        return entry.get("url_original") not in {link.get("url") for link in entry.get("direct_links", [])}
+
+    def maybe_refresh_expired_links(self, entry):
+        direct_links = entry.get("direct_links", [])
+        if not any(link.get("status") == "expired" for link in direct_links):
+            return
+        if any(context[0] == entry["id"] for context in self.worker_context.values()):
+            return
+        if any(key[0] == entry["id"] for key in self.active_archive_checks):
+            return
+        entry["link_refresh_count"] = int(entry.get("link_refresh_count", 0) or 0) + 1
+        entry["_previous_links"] = direct_links
+        entry["direct_links"] = []
+        entry["direct_url"] = ""
+        self.release_prepared_responses(direct_links)
+        if not self.retry_resolution(entry):
+            entry["direct_links"] = entry.pop("_previous_links")
+            for link in entry["direct_links"]:
+                if link.get("status") == "expired":
+                    link["status"] = "error"
+            entry["error_text"] = "Los enlaces caducaron y no se pudieron renovar."
+
+    def carry_over_link_state(self, previous_links, direct_links):
+        previous_by_path = {
+            self.absolute_download_path(link.get("path", "")): link for link in previous_links or []
+        }
+        for link in direct_links:
+            old = previous_by_path.get(self.absolute_download_path(link.get("path", "")))
+            if not old:
+                continue
+            for key in ("hashes", "hashed_size", "expected_hashes", "downloaded", "preallocated", "etag", "last_modified"):
+                if old.get(key) and not link.get(key):
+                    link[key] = old[key]
+            if not link.get("size") and old.get("size"):
+                link["size"] = old["size"]
+            if old.get("status") == "finished":
+                link["status"] = "finished"
+                link["progress"] = 100
+
     def on_direct_download_cancelled(self, worker_index):
         self.active_file_downloads.pop(worker_index, None)
         context = self.worker_context.pop(worker_index, None)
@@ -694,7 +938,7 @@ class DownloadWindow(QWidget):
             return
 
         self.recompute_regular_status(entry)
-        if entry.get("extract_status") == "running":
+        if entry.get("extract_status") == "running" and not self.entry_has_active_extraction(entry_id):
             entry["extract_status"] = ""
         self.update_entry_visual(entry)
         self.request_session_save()
@@ -741,6 +985,7 @@ class DownloadWindow(QWidget):
                 self.request_session_save()
             return
 
+        self.release_prepared_responses(entry.get("direct_links"))
         for link in entry.get("direct_links", []):
             if link.get("status") not in {"finished", "cancelled"}:
                 link["status"] = "cancelled"
@@ -781,6 +1026,7 @@ class DownloadWindow(QWidget):
         entry = self.entries.pop(entry_id, None)
         if not entry:
             return
+        self.release_prepared_responses(entry.get("direct_links"))
 
         if entry_id in self.entry_order:
             self.entry_order.remove(entry_id)
@@ -827,56 +1073,214 @@ class DownloadWindow(QWidget):
             return
         if not self.auto_extract_archives:
             return
-        if entry.get("status") != "finished":
-            return
-        if entry["id"] in self.active_extractions:
+        if entry.get("status") in {"cancelled", "error"}:
             return
-        if entry.get("extract_status") == "done":
+        if entry.get("extract_status") in {"done", "error"} or "pending_archive_retry" in entry:
             return
 
-        archive_path = self.find_extractable_archive(entry)
-        if not archive_path:
-            return
+        # Each archive set is unpacked as soon as all of its volumes are on
+        # disk, while the rest of the entry keeps downloading.
+        extracted = entry.setdefault("extracted_archives", [])
+        for archive_set in self.archive_sets_for_entry(entry):
+            archive_path = archive_set["first"]
+            if not archive_set["ready"] or archive_path in extracted:
+                continue
+            if (entry["id"], archive_path) in self.active_extractions:
+                continue
 
-        entry["extract_status"] = "running"
-        entry["extract_error"] = ""
-        self.request_session_save()
+            entry["extract_status"] = "running"
+            entry["extract_error"] = ""
+            output_dir = os.path.dirname(archive_path) or self.absolute_download_path(entry.get("path", ""))
+            worker = ArchiveExtractWorker(entry["id"], archive_path, output_dir, entry.get("password", ""))
+            worker.signals.progress.connect(self.on_extraction_progress)
+            worker.signals.finished.connect(self.on_extraction_finished)
+            self.active_extractions[(entry["id"], archive_path)] = {"worker": worker, "progress": 0}
+            EXTRACT_THREAD_POOL.start(worker)
+            self.update_entry_visual(entry)
+            self.request_session_save()
+
+        self.update_extraction_state(entry)
+
+    def archive_sets_for_entry(self, entry):
+        items = []
+        for link in entry.get("direct_links", []):
+            full_path = self.absolute_download_path(link.get("path") or entry.get("path", ""))
+            ready = link.get("status") == "finished" and bool(full_path) and os.path.exists(full_path)
+            items.append((full_path, ready))
+        return group_archive_sets(items)
+
+    def entry_has_active_extraction(self, entry_id):
+        return any(key[0] == entry_id for key in self.active_extractions)
+
+    def update_extraction_state(self, entry):
+        archive_sets = self.archive_sets_for_entry(entry)
+        if not archive_sets:
+            return
+        extracted = entry.get("extracted_archives", [])
+        active_progress = [
+            state["progress"]
+            for key, state in self.active_extractions.items()
+            if key[0] == entry["id"]
+        ]
+        done_count = sum(1 for archive_set in archive_sets if archive_set["first"] in extracted)
+        entry["extract_progress"] = int((done_count * 100 + sum(active_progress)) / len(archive_sets))
+        if (
+            entry.get("status") == "finished"
+            and not active_progress
+            and done_count == len(archive_sets)
+            and entry.get("extract_status") != "done"
+        ):
+            entry["extract_status"] = "done"
+            entry["extract_error"] = ""
+            entry["archive_retry_count"] = 0
+            print(f"✅ Extraído: {entry['title']}")
+            self.update_entry_visual(entry)
+            self.request_session_save()
 
-        output_dir = os.path.dirname(archive_path) or self.absolute_download_path(entry.get("path", ""))
-        worker = ArchiveExtractWorker(entry["id"], archive_path, output_dir, entry.get("password", ""))
-        worker.signals.finished.connect(self.on_extraction_finished)
-        self.active_extractions[entry["id"]] = worker
-        QThreadPool.globalInstance().start(worker)
+    def on_extraction_progress(self, entry_id, archive_path, percent):
+        state = self.active_extractions.get((entry_id, archive_path))
+        entry = self.entries.get(entry_id)
+        if not state or not entry:
+            return
+        state["progress"] = percent
+        self.update_extraction_state(entry)
+        self.update_entry_visual(entry)
 
-    def on_extraction_finished(self, entry_id, ok, error_text):
-        self.active_extractions.pop(entry_id, None)
+    def on_extraction_finished(self, entry_id, archive_path, ok, error_text):
+        self.active_extractions.pop((entry_id, archive_path), None)
         entry = self.entries.get(entry_id)
         if not entry:
             return
 
         if ok:
-            entry["extract_status"] = "done"
-            entry["extract_error"] = ""
-            entry["archive_retry_count"] = 0
+            entry.setdefault("extracted_archives", []).append(archive_path)
             if self.delete_archive_after_extract:
                 delete_errors = []
-                for archive_path in self.archive_paths_for_entry(entry):
-                    if archive_path and os.path.exists(archive_path):
+                archive_set = next(
+                    (item for item in self.archive_sets_for_entry(entry) if item["first"] == archive_path),
+                    None,
+                )
+                for volume_path in (archive_set["volumes"] if archive_set else [archive_path]):
+                    if volume_path and os.path.exists(volume_path):
                         try:
-                            os.remove(archive_path)
+                            os.remove(volume_path)
                         except Exception as exc:
-                            delete_errors.append(f"{os.path.basename(archive_path)}: {exc}")
+                            delete_errors.append(f"{os.path.basename(volume_path)}: {exc}")
                 if delete_errors:
                     entry["extract_error"] = "No se pudieron eliminar algunos comprimidos: " + "; ".join(delete_errors)
-            print(f"✅ Extraído: {entry['title']}")
+            print(f"✅ Extraído: {os.path.basename(archive_path)}")
+            if not self.entry_has_active_extraction(entry_id) and entry.get("status") != "finished":
+                entry["extract_status"] = ""
+            self.update_extraction_state(entry)
         else:
-            if self.retry_corrupt_archive_download(entry, error_text):
+            if self.retry_corrupt_archive_download(entry, error_text, archive_path):
                 return
             entry["extract_status"] = "error"
             entry["extract_error"] = error_text
             print(f"❌ Error extrayendo {entry['title']}: {error_text}")
+        self.update_entry_visual(entry)
+        self.request_session_save()
+        self.maybe_handle_completion_action()
+        self.queue_scheduler()
+
+    def start_archive_check(self, entry, link_index, full_path):
+        worker = ArchiveCheckWorker(entry["id"], link_index, full_path, entry.get("password", ""))
+        worker.signals.finished.connect(self.on_archive_check_finished)
+        self.active_archive_checks[(entry["id"], link_index)] = worker
+        EXTRACT_THREAD_POOL.start(worker)
+
+    def on_archive_check_finished(self, entry_id, link_index, full_path, reason):
+        self.active_archive_checks.pop((entry_id, link_index), None)
+        entry = self.entries.get(entry_id)
+        if not entry:
+            return
+        try:
+            link = entry["direct_links"][link_index]
+        except IndexError:
+            return
+        if link.get("status") != "verifying":
+            return
+        if self.absolute_download_path(link.get("path") or entry["path"]) != full_path:
+            return
+
+        if reason:
+            self.requeue_bad_volume(entry, link, reason)
+        else:
+            link["status"] = "finished"
+        self.maybe_refresh_expired_links(entry)
+        self.recompute_regular_status(entry)
+        self.update_entry_visual(entry)
         self.request_session_save()
+        if not reason:
+            self.maybe_queue_extraction(entry)
         self.maybe_handle_completion_action()
+        self.queue_scheduler()
+
+    def requeue_bad_volume(self, entry, link, reason):
+        full_path = self.absolute_download_path(link.get("path") or entry["path"])
+        filename = os.path.basename(full_path)
+        if full_path and os.path.exists(full_path):
+            try:
+                os.remove(full_path)
+            except OSError as exc:
+                print(f"⚠ No se pudo eliminar archivo corrupto {full_path}: {exc}")
+
+        retry_count = int(link.get("integrity_retry_count", 0) or 0) + 1
+        link["integrity_retry_count"] = retry_count
+        link["progress"] = 0
+        link["hashes"] = {}
+        link["downloaded"] = 0
+        link["preallocated"] = False
+        if retry_count > MAX_CORRUPT_ARCHIVE_RETRIES:
+            link["status"] = "error"
+            entry["error_text"] = f"{filename} está dañado: {reason}"
+            print(f"❌ {filename} sigue dañado tras {MAX_CORRUPT_ARCHIVE_RETRIES} reintentos: {reason}")
+            return
+        link["status"] = "waiting"
+        entry["error_text"] = (
+            f"{filename} está dañado ({reason}). Reintentando "
+            f"({retry_count}/{MAX_CORRUPT_ARCHIVE_RETRIES})..."
+        )
+        print(f"⚠ {filename} dañado: {reason}. Volviendo a descargar solo esa parte.")
+
+    def apply_hash_file(self, entry, hash_path):
+        try:
+            published = load_published_hashes(hash_path)
+        except OSError as exc:
+            print(f"⚠ No se pudo leer {hash_path}: {exc}")
+            return
+        updated = apply_published_hashes(entry, published)
+        if updated:
+            print(f"🔐 {len(updated)} hashes publicados cargados desde {os.path.basename(hash_path)}")
+        for link in updated:
+            if link.get("status") not in {"finished", "verifying"}:
+                continue
+            # Parts that finished earlier are checked against the hashes kept in
+            # the session, without reading them again.
+            full_path = self.absolute_download_path(link.get("path") or entry["path"])
+            reason = compare_hashes(stored_hashes_for(link, full_path), link["expected_hashes"])
+            if reason:
+                self.requeue_bad_volume(entry, link, reason)
+
+    def requeue_bad_volumes_for_set(self, entry, archive_path=None):
+        requeued = False
+        for archive_set in self.archive_sets_for_entry(entry):
+            if archive_path and archive_set["first"] != archive_path:
+                continue
+            for link in entry.get("direct_links", []):
+                full_path = self.absolute_download_path(link.get("path") or entry["path"])
+                if full_path not in archive_set["volumes"] or link.get("status") != "finished":
+                    continue
+                stored_hashes = stored_hashes_for(link, full_path)
+                expected_hashes = expected_hashes_for_link(entry, link)
+                if stored_hashes and expected_hashes:
+                    reason = compare_hashes(stored_hashes, expected_hashes)
+                else:
+                    reason = check_archive_volume(full_path, entry.get("password", ""), deep=False)
+                if reason:
+                    self.requeue_bad_volume(entry, link, reason)
+                    requeued = True
+        return requeued
 
     def retry_resolution(self, entry):
         retry_count = int(entry.get("resolution_retry_count", 0) or 0)
@@ -899,20 +1303,44 @@ class DownloadWindow(QWidget):
         normalized_error = (error_text or "").lower()
         return any(pattern in normalized_error for pattern in CORRUPT_ARCHIVE_PATTERNS)
 
-    def retry_corrupt_archive_download(self, entry, error_text):
+    def retry_corrupt_archive_download(self, entry, error_text, archive_path=None):
         if not self.is_corrupt_archive_error(error_text):
             return False
+        pending_archive = entry.pop("pending_archive_retry", "")
+        archive_path = archive_path or pending_archive or None
+
+        # Prefer re-downloading only the volumes that fail the header check.
+        if self.requeue_bad_volumes_for_set(entry, archive_path):
+            entry["extract_status"] = ""
+            entry["extract_error"] = ""
+            self.recompute_regular_status(entry)
+            self.update_entry_visual(entry)
+            self.request_session_save()
+            self.queue_scheduler()
+            return True
 
         retry_count = int(entry.get("archive_retry_count", 0) or 0)
         if retry_count >= MAX_CORRUPT_ARCHIVE_RETRIES:
             return False
 
-        for archive_path in self.archive_paths_for_entry(entry):
-            if archive_path and os.path.exists(archive_path):
+        # Other sets may still be downloading or extracting into the links that
+        # are dropped below; no new parts start and run_scheduler retries once
+        # the entry is idle.
+        if self.entry_has_active_workers(entry["id"]):
+            print(f"⚠ Archivo invalido para {entry['title']}. Se reintentara al terminar las demas partes.")
+            entry["pending_archive_retry"] = archive_path or ""
+            entry["extract_status"] = "error"
+            entry["extract_error"] = error_text
+            self.update_entry_visual(entry)
+            self.request_session_save()
+            return True
+
+        for volume_path in self.failed_archive_volumes(entry, archive_path):
+            if volume_path and os.path.exists(volume_path):
                 try:
-                    os.remove(archive_path)
+                    os.remove(volume_path)
                 except OSError as exc:
-                    print(f"⚠ No se pudo eliminar archivo corrupto {archive_path}: {exc}")
+                    print(f"⚠ No se pudo eliminar archivo corrupto {volume_path}: {exc}")
 
         entry["archive_retry_count"] = retry_count + 1
         entry["resolution_retry_count"] = 0
@@ -926,6 +1354,7 @@ class DownloadWindow(QWidget):
         )
         entry["extract_status"] = ""
         entry["extract_error"] = ""
+        entry["extracted_archives"] = []
         self.update_entry_visual(entry)
         self.request_session_save()
         self.queue_scheduler()
@@ -935,53 +1364,28 @@ class DownloadWindow(QWidget):
         )
         return True
 
-    def find_extractable_archive(self, entry):
-        absolute_paths = self.archive_paths_for_entry(entry)
-        if not absolute_paths:
-            return ""
-
-        multipart = [path for path in absolute_paths if self.is_multipart_archive(path)]
-        if multipart:
-            first_part = self.find_first_archive_part(multipart)
-            return first_part or ""
-
-        for path in absolute_paths:
-            if self.is_extractable_archive(path):
-                return path
-        return ""
-
-    def archive_paths_for_entry(self, entry):
-        direct_links = entry.get("direct_links", [])
-        if not direct_links:
-            return []
-
-        if any(link.get("status") != "finished" for link in direct_links):
-            return []
-
-        absolute_paths = []
-        for link in direct_links:
-            full_path = self.absolute_download_path(link.get("path") or entry.get("path", ""))
-            if full_path and os.path.exists(full_path):
-                absolute_paths.append(full_path)
-        return absolute_paths
-
-    def is_extractable_archive(self, file_path):
-        lower_path = file_path.lower()
-        return os.path.splitext(lower_path)[1] in ARCHIVE_EXTENSIONS or bool(re.search(r"\.part\d+\.(rar|7z|zip)$", lower_path))
-
-    def is_multipart_archive(self, file_path):
-        return ".part" in os.path.basename(file_path).lower()
-
-    def find_first_archive_part(self, paths):
-        patterns = (
-            r"\.part0*1\.(rar|7z|zip)$",
-            r"\.part1\.(rar|7z|zip)$",
+    def failed_archive_volumes(self, entry, archive_path=None):
+        # The volumes of the set that failed, or of every set not extracted yet
+        # when the failing one is unknown (an error restored from the session).
+        extracted = set(entry.get("extracted_archives") or [])
+        volumes = []
+        for archive_set in self.archive_sets_for_entry(entry):
+            if archive_path and archive_set["first"] != archive_path:
+                continue
+            if not archive_path and archive_set["first"] in extracted:
+                continue
+            volumes.extend(archive_set["volumes"])
+        if archive_path and not volumes:
+            volumes.append(archive_path)
+        return volumes
+
+    def entry_has_active_workers(self, entry_id):
+        return (
+            entry_id in self.active_resolutions
+            or any(context[0] == entry_id for context in self.worker_context.values())
+            or any(key[0] == entry_id for key in self.active_archive_checks)
+            or self.entry_has_active_extraction(entry_id)
         )
-        for pattern in patterns:
-            for path in sorted(paths):
-                if re.search(pattern, path.lower()):
-                    return path
-        return sorted(paths)[0] if paths else ""
 
     # Window and UI helpers
     def on_torrent_cancel_finished(self, gid, ok, error_text):
@@ -1174,7 +1578,11 @@ class DownloadWindow(QWidget):
             item["resume_button"].hide()
             item["delete_button"].setEnabled(False)
             item["delete_button"].hide()
-            item["bar"].hide()
+            if entry["status"] == "finished" and entry.get("extract_status") == "running":
+                item["bar"].setValue(int(entry.get("extract_progress", 0) or 0))
+                item["bar"].show()
+            else:
+                item["bar"].hide()
         else:
             item["cancel_button"].setEnabled(True)
             item["cancel_button"].show()
@@ -1200,7 +1608,13 @@ class DownloadWindow(QWidget):
                 return f"Descargando torrent: {title}{speed_text}"
             return f"En espera: {title}"
 
+        extract_text = ""
+        if entry.get("extract_status") == "running":
+            extract_text = f" (extrayendo {int(entry.get('extract_progress', 0) or 0)}%)"
+
         if status == "finished":
+            if extract_text:
+                return f"Extrayendo: {title}{extract_text}"
             return f"✅ Completado: {title}"
         if status == "cancelled":
             return f"⏹ Cancelado: {title}"
@@ -1209,8 +1623,12 @@ class DownloadWindow(QWidget):
         if status == "resolving":
             return f"Resolviendo: {title}"
         if status == "downloading":
-            return f"Descargando: {title}"
-        return f"En espera: {title}"
+            return f"Descargando: {title}{extract_text}"
+        if entry.get("disk_wait"):
+            return f"💾 Esperando espacio en disco: {title} ({entry['disk_wait']})"
+        if entry.get("retry_wait") and any(link.get("status") == "retrying" for link in entry.get("direct_links", [])):
+            return f"🔁 Reintentando: {title} ({entry['retry_wait']})"
+        return f"En espera: {title}{extract_text}"
 
     def entry_progress(self, entry):
         if entry["download_type"] == "torrent":
@@ -1237,13 +1655,13 @@ class DownloadWindow(QWidget):
             return
 
         statuses = {link.get("status", "waiting") for link in direct_links}
-        if "downloading" in statuses:
+        if statuses & {"downloading", "verifying"}:
             entry["status"] = "downloading"
         elif statuses == {"finished"}:
             entry["status"] = "finished"
         elif statuses <= {"cancelled"}:
             entry["status"] = "cancelled"
-        elif "waiting" in statuses:
+        elif statuses & {"waiting", "retrying", "expired"}:
             entry["status"] = "waiting"
         elif "error" in statuses:
             entry["status"] = "error"
@@ -1291,6 +1709,7 @@ class DownloadWindow(QWidget):
                 self.delete_archive_after_extract,
                 self.max_parallel_downloads,
                 self.download_manager_mode,
+                self.download_engine,
             ) = apply_settings()
             self.folder_path = normalize_path(self.folder_path)
             QThreadPool.globalInstance().setMaxThreadCount(self.max_parallel_downloads)
@@ -1419,6 +1838,8 @@ class DownloadWindow(QWidget):
     def has_active_work(self):
         if self.active_file_downloads or self.active_resolutions or self.pending_torrent_entries:
             return True
+        if any("pending_archive_retry" in entry for entry in self.entries.values()):
+            return True
         return any(
             entry["status"] in {"downloading", "resolving"}
             for entry in self.entries.values()
@@ -1484,6 +1905,7 @@ class DownloadWindow(QWidget):
                 continue
             if entry["status"] in {"downloading", "resolving"}:
                 entry["status"] = "waiting"
+            self.release_prepared_responses(entry.get("direct_links"))
             for link in entry.get("direct_links", []):
                 if link.get("status") == "downloading":
                     link["status"] = "waiting"
@@ -1528,12 +1950,16 @@ class DownloadWindow(QWidget):
         self.prepare_session_for_shutdown()
         self.save_session_to_disk()
         QThreadPool.globalInstance().clear()
+        shutdown_async_engine()
 
     def closeEvent(self, event):
         if not self._closing and not self.confirm_close_if_needed():
             event.ignore()
             return
 
+        for line in RETRY_STATS.summary_lines():
+            print(f"📊 {line}")
+
         self.shutdown_app()
         event.accept()
 
@@ -1,21 +1,97 @@
-import os, requests, time
+import os, re, requests
 from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
 from config import DEFAULT_CONFIG, load_config
+from download_manager.disk import clear_preallocated, discard_unknown_preallocation, mark_preallocated, preallocate_file
+from download_manager.hashing import StreamHasher, hash_algorithms_for
+from download_manager.retry import TRANSIENT, DownloadError, as_download_error, error_for_response
 
 
-MAX_RETRIES = 100
-RETRY_DELAY = 3
+MAX_CLEAN_RESTARTS = 3
 CHUNK_SIZE = 8192
 
 
+def close_response(response):
+    if response is None:
+        return
+    try:
+        response.close()
+    except Exception:
+        pass
+
+
+def content_range_total(response):
+    match = re.search(r"/(\d+)\s*$", response.headers.get("content-range") or "")
+    return int(match.group(1)) if match else 0
+
+
+def response_validators(response, total_length=0):
+    return {
+        "etag": response.headers.get("etag") or "",
+        "last_modified": response.headers.get("last-modified") or "",
+        "size": int(total_length or 0),
+    }
+
+
+def validators_changed(stored, remote):
+    for key in ("etag", "last_modified", "size"):
+        if (stored or {}).get(key) and remote.get(key) and stored[key] != remote[key]:
+            return True
+    return False
+
+
+def link_validators(link):
+    return {
+        "etag": link.get("etag", "") or "",
+        "last_modified": link.get("last_modified", "") or "",
+        "size": int(link.get("size", 0) or 0),
+    }
+
+
+def resume_headers(validators, offset):
+    headers = {"Range": f"bytes={offset}-"}
+    # Weak ETags are not allowed in If-Range; Last-Modified is the fallback.
+    etag = (validators or {}).get("etag") or ""
+    if_range = etag if etag and not etag.startswith("W/") else (validators or {}).get("last_modified")
+    if if_range:
+        headers["If-Range"] = if_range
+    return headers
+
+
+def response_total_length(response, downloaded=0):
+    total_length = content_range_total(response)
+    if not total_length and response.headers.get("content-length"):
+        total_length = int(response.headers["content-length"]) + downloaded
+    return total_length
+
+
+def failure_payload(error):
+    return {
+        "kind": error.kind,
+        "message": str(error),
+        "retry_after": error.retry_after,
+        "status_code": error.status_code,
+    }
+
+
+def range_was_ignored(response, requested_offset):
+    # A 200 to a Range request means the server sent the whole file again;
+    # appending it would corrupt the part already on disk.
+    return requested_offset > 0 and getattr(response, "status_code", 206) == 200
+
+
 class DownloadSignals(QObject):
     progress = pyqtSignal(int, int)
+    hashed = pyqtSignal(int, object)
+    validated = pyqtSignal(int, object)
+    checkpoint = pyqtSignal(int, object)
+    failed = pyqtSignal(int, object)
     finished = pyqtSignal(int, bool)
     cancelled = pyqtSignal(int)
 
 
 class FileDownloader(QRunnable):
-    def __init__(self, url, filename, index, signals, headers=None, cookies=None):
+    def __init__(self, url, filename, index, signals, headers=None, cookies=None, response=None, expected_hashes=None,
+                 validators=None, resume_offset=None):
         super().__init__()
         self.url = url
         self.filename = filename
@@ -23,6 +99,12 @@ class FileDownloader(QRunnable):
         self.signals = signals
         self.headers = headers or {}
         self.cookies = cookies or {}
+        self.response = response
+        self.hasher = StreamHasher(hash_algorithms_for(expected_hashes))
+        self.validators = dict(validators or {})
+        # Set while the file is preallocated: its size is then the total, and
+        # this offset is where the downloaded bytes end.
+        self.resume_offset = resume_offset
         self._cancelled = False
 
         QThreadPool.globalInstance().setMaxThreadCount(
@@ -32,54 +114,142 @@ class FileDownloader(QRunnable):
     def cancel(self):
         self._cancelled = True
 
+    def take_prepared_response(self):
+        response, self.response = self.response, None
+        return response
+
+    def emit_checkpoint(self, downloaded):
+        self.signals.checkpoint.emit(self.index, {
+            "downloaded": downloaded,
+            "preallocated": self.resume_offset is not None,
+        })
+
+    def finish_existing_file(self):
+        print(f"✅ {os.path.basename(self.filename)} ya estaba completo")
+        self.hasher.reset()
+        self.hasher.update_from_file(self.filename)
+        self.signals.progress.emit(self.index, 100)
+        self.signals.hashed.emit(self.index, self.hasher.hexdigests())
+        self.signals.finished.emit(self.index, True)
+
     def run(self):
-        for attempt in range(1, MAX_RETRIES + 1):
+        # One attempt per run: on errors the worker reports the classified
+        # failure and frees its thread, and the caller schedules the retry.
+        # The loop only covers clean restarts (remote file changed, bad range).
+        for _ in range(MAX_CLEAN_RESTARTS):
             if self._cancelled:
+                close_response(self.take_prepared_response())
                 return
             try:
                 downloaded = 0
                 mode = "wb"
+                self.hasher.reset()
                 headers = dict(self.headers)
+                prepared_response = self.take_prepared_response()
+
+                if discard_unknown_preallocation(self.filename, self.resume_offset):
+                    print(f"[{self.index}] Archivo preasignado sin punto de control, reiniciando {os.path.basename(self.filename)}")
 
                 if os.path.exists(self.filename):
+                    close_response(prepared_response)
+                    prepared_response = None
                     downloaded = os.path.getsize(self.filename)
-                    headers["Range"] = f"bytes={downloaded}-"
-                    mode = "ab"
+                    if self.resume_offset is not None:
+                        downloaded = min(downloaded, self.resume_offset)
+                    remote_size = int(self.validators.get("size") or 0)
+                    if remote_size and downloaded == remote_size:
+                        self.finish_existing_file()
+                        return
+                    headers.update(resume_headers(self.validators, downloaded))
+                    mode = "ab" if self.resume_offset is None else "r+b"
+                else:
+                    self.resume_offset = None
 
-                with requests.get(
+                with prepared_response or requests.get(
                     self.url,
                     stream=True,
                     headers=headers,
                     cookies=self.cookies,
                     timeout=15,
                 ) as response:
-                    total_length = response.headers.get("content-length")
-                    if total_length is None:
-                        total_length = 0
-                    else:
-                        total_length = int(total_length) + downloaded
+                    if downloaded and response.status_code == 416:
+                        if content_range_total(response) == downloaded:
+                            self.finish_existing_file()
+                            return
+                        print(f"[{self.index}] Rango inválido, reiniciando {os.path.basename(self.filename)}")
+                        os.remove(self.filename)
+                        self.resume_offset = None
+                        continue
+                    if response.status_code >= 400:
+                        raise error_for_response(response)
+                    if range_was_ignored(response, downloaded):
+                        print(f"[{self.index}] El servidor ignoró el Range, reiniciando {os.path.basename(self.filename)}")
+                        downloaded = 0
+                        mode = "wb"
+
+                    total_length = response_total_length(response, downloaded)
+
+                    validators = response_validators(response, total_length)
+                    if downloaded and validators_changed(self.validators, validators):
+                        print(f"[{self.index}] El archivo remoto cambió, reiniciando {os.path.basename(self.filename)}")
+                        os.remove(self.filename)
+                        self.resume_offset = None
+                        continue
+                    self.validators = validators
+                    self.signals.validated.emit(self.index, validators)
+                    if downloaded:
+                        self.hasher.update_from_file(self.filename, downloaded)
 
                     dir_path = os.path.dirname(self.filename)
                     if dir_path:
                         os.makedirs(dir_path, exist_ok=True)
 
                     with open(self.filename, mode) as f:
+                        if mode == "wb" and total_length:
+                            mark_preallocated(self.filename)
+                            preallocate_file(f, total_length)
+                            self.resume_offset = 0
+                            self.emit_checkpoint(0)
+                        elif mode == "r+b":
+                            f.seek(downloaded)
+
+                        last_percent = -1
                         for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
                             if self._cancelled:
+                                self.emit_checkpoint(downloaded)
                                 self.signals.cancelled.emit(self.index)
                                 return
                             if chunk:
                                 f.write(chunk)
+                                self.hasher.update(chunk)
                                 downloaded += len(chunk)
+                                if self.resume_offset is not None:
+                                    self.resume_offset = downloaded
                                 if total_length:
                                     percent = int((downloaded / total_length) * 100)
                                     self.signals.progress.emit(self.index, percent)
+                                    if percent != last_percent:
+                                        last_percent = percent
+                                        self.emit_checkpoint(downloaded)
+
+                        if self.resume_offset is not None:
+                            # A short stream must not leave the preallocated tail behind.
+                            f.truncate(downloaded)
+                            self.resume_offset = None
+                            self.emit_checkpoint(downloaded)
+                            clear_preallocated(self.filename)
 
+                self.signals.hashed.emit(self.index, self.hasher.hexdigests())
                 self.signals.finished.emit(self.index, True)
                 return
             except Exception as exc:
-                print(f"[{self.index}] Error en intento {attempt}: {exc}")
-                if attempt < MAX_RETRIES:
-                    time.sleep(RETRY_DELAY * attempt)
-                else:
-                    self.signals.finished.emit(self.index, False)
+                error = as_download_error(exc)
+                print(f"[{self.index}] Error ({error.kind}): {error}")
+                if self.resume_offset is not None:
+                    self.emit_checkpoint(self.resume_offset)
+                self.signals.failed.emit(self.index, failure_payload(error))
+                self.signals.finished.emit(self.index, False)
+                return
+
+        self.signals.failed.emit(self.index, failure_payload(DownloadError(TRANSIENT, "Demasiados reinicios")))
+        self.signals.finished.emit(self.index, False)
@@ -1,6 +1,7 @@
+import concurrent.futures, threading, time
 from functools import partial
-import requests
 from bs4 import BeautifulSoup
+from media_search import http_client, source_cache
 
 
 ANITECA_BASE_URL = "https://aniteca.net/aniapi/api"
@@ -16,40 +17,87 @@ ANITECA_HEADERS = {
     "Referer": "https://aniteca.net/",
 }
 
+_EXTRACTED_LINKS = {}
+_EXTRACT_LOCKS = {}
+_EXTRACT_LOCKS_LOCK = threading.Lock()
+ANITECA_CHAPTER_WORKERS = 6
+ANITECA_LINK_CACHE_TTL_SECONDS = 30 * 60
+X1337_DETAIL_CACHE_TTL_SECONDS = 6 * 60 * 60
+X1337_MAX_RESULTS = 100
+X1337_DETAIL_WORKERS = 8
+X1337_SEARCH_DEADLINE_SECONDS = 20
+
 
 def _post_aniteca_json(endpoint, payload, session=None, timeout=10):
-    client = session or requests
-    response = client.post(f"{ANITECA_BASE_URL}/{endpoint}", json=payload, headers=ANITECA_HEADERS, timeout=timeout)
+    url = f"{ANITECA_BASE_URL}/{endpoint}"
+    if session is None:
+        response = http_client.post(url, json=payload, headers=ANITECA_HEADERS, timeout=timeout)
+    else:
+        response = session.post(url, json=payload, headers=ANITECA_HEADERS, timeout=timeout)
     response.raise_for_status()
     return response.json()
 
 
-def search_aniteca(query, session=None):
+def get_aniteca_chapter_results(anime, session=None):
+    results = []
+    for ep in get_chapter_links(anime["id"], anime["numepisodios"], session=session):
+        deferred_link = partial(extract_direct_link, ep["servername"], ep["online_id"], session=session)
+        results.append({
+            "title": anime["nombre"],
+            "chapter": ep["capitulo"],
+            "chapters": anime["numepisodios"],
+            "url_type": ep["servername"],
+            "url": deferred_link,
+            "resolucion": ep["resolucion"],
+            "idioma": ep["idioma"],
+            "subtitulo": ep["subtitulo"],
+            "fansub": ep["fansub"],
+            "format": ep["format"],
+            "password": ep["password"],
+        })
+    return results
+
+
+def _build_aniteca_series_result(anime, session=None):
+    # Placeholder the selector expands on demand; chapters are only listed
+    # when the series is opened or checked.
+    return {
+        "title": anime["nombre"],
+        "chapter": None,
+        "chapters": anime["numepisodios"],
+        "url_type": "Aniteca",
+        "url": f"aniteca:{anime['id']}",
+        "group": f"{anime['nombre']} ({anime['numepisodios']} capítulos)",
+        "load_children": partial(get_aniteca_chapter_results, anime, session=session),
+        "resolucion": None,
+        "idioma": None,
+        "subtitulo": None,
+        "fansub": None,
+        "format": None,
+        "password": None,
+    }
+
+
+def search_aniteca(query, session=None, lazy=False):
     results = []
     try:
         animes = search_aniteca_api(query, session=session)
-        for anime in animes:
-            episodios = get_chapter_links(anime["id"], anime["numepisodios"], session=session)
-            for ep in episodios:
-                deferred_link = partial(extract_direct_link, ep["servername"], ep["online_id"], session=session)
-                results.append({
-                    "title": anime["nombre"],
-                    "chapter": ep["capitulo"],
-                    "chapters": anime["numepisodios"],
-                    "url_type": ep["servername"],
-                    "url": deferred_link,
-                    "resolucion": ep["resolucion"],
-                    "idioma": ep["idioma"],
-                    "subtitulo": ep["subtitulo"],
-                    "fansub": ep["fansub"],
-                    "format": ep["format"],
-                    "password": ep["password"],
-                })
+        if lazy:
+            return [_build_aniteca_series_result(anime, session=session) for anime in animes]
+        if not animes:
+            return results
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(ANITECA_CHAPTER_WORKERS, len(animes))) as executor:
+            for chapter_results in executor.map(lambda anime: get_aniteca_chapter_results(anime, session=session), animes):
+                results.extend(chapter_results)
     except Exception as exc:
         print(f"[Aniteca] Error: {exc}")
     return results
 
 
+def search_aniteca_series(query, session=None):
+    return search_aniteca(query, session=session, lazy=True)
+
+
 def search_aniteca_api(query, session=None):
     payload = {
         "perpage": 100,
@@ -118,7 +166,27 @@ def get_chapter_links(anime_id, ultimocap, session=None):
     return links
 
 
+def _extract_lock(key):
+    with _EXTRACT_LOCKS_LOCK:
+        return _EXTRACT_LOCKS.setdefault(key, threading.Lock())
+
+
 def extract_direct_link(server, online_id, session=None):
+    # One extractkey call per online_id: concurrent requests for the same id
+    # wait for the first one, and found links are reused for a while.
+    key = (server, online_id)
+    with _extract_lock(key):
+        cached = _EXTRACTED_LINKS.get(key)
+        if cached and time.time() - cached[0] <= ANITECA_LINK_CACHE_TTL_SECONDS:
+            return cached[1]
+
+        link = _request_direct_link(server, online_id, session=session)
+        if link:
+            _EXTRACTED_LINKS[key] = (time.time(), link)
+        return link
+
+
+def _request_direct_link(server, online_id, session=None):
     payload = {
         "server": server,
         "id": online_id,
@@ -140,11 +208,27 @@ def extract_direct_link(server, online_id, session=None):
     return None
 
 
+def _build_torrent_result(title, magnet):
+    return {
+        "title": title,
+        "chapter": None,
+        "chapters": None,
+        "url_type": "torrent",
+        "url": magnet,
+        "resolucion": None,
+        "idioma": None,
+        "subtitulo": None,
+        "fansub": None,
+        "format": None,
+        "password": None,
+    }
+
+
 def search_nyaa(query):
     results = []
     try:
         url = f"https://nyaa.si/?f=0&c=1_0&q={query.replace(' ', '+')}&s=seeders&o=desc"
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, timeout=10)
         soup = BeautifulSoup(response.text, "html.parser")
         rows = soup.select("tr.success") + soup.select("tr.default")
         for row in rows:
@@ -156,61 +240,65 @@ def search_nyaa(query):
                         break
             magnet_tag = row.select_one("td.text-center a[href^='magnet:?']")
             if title_tag and magnet_tag:
-                results.append({
-                    "title": title_tag["title"],
-                    "chapter": None,
-                    "chapters": None,
-                    "url_type": "torrent",
-                    "url": magnet_tag["href"],
-                    "resolucion": None,
-                    "idioma": None,
-                    "subtitulo": None,
-                    "fansub": None,
-                    "format": None,
-                    "password": None,
-                })
+                results.append(_build_torrent_result(title_tag["title"], magnet_tag["href"]))
     except Exception as exc:
         print(f"[Nyaa] Error: {exc}")
     return results
 
 
-def search_1337x(query):
-    results = []
+def _get_1337x_magnet(detail_url, headers):
+    def extract_magnet():
+        html = source_cache.cached_text(
+            "1337x",
+            detail_url,
+            X1337_DETAIL_CACHE_TTL_SECONDS,
+            lambda: http_client.get(detail_url, headers=headers, timeout=10).text,
+            validate=lambda text: "magnet:?" in text,
+        )
+        magnet_tag = BeautifulSoup(html, "html.parser").select_one("a[href^='magnet:?']")
+        return magnet_tag["href"] if magnet_tag else None
+
+    return source_cache.cached_json("1337x_magnet", detail_url, X1337_DETAIL_CACHE_TTL_SECONDS, extract_magnet)
+
+
+def search_1337x(query, on_results=None):
+    # Magnet lookups run in a bounded pool under one deadline; on_results gets
+    # each row as it arrives and the return value keeps the search order.
     headers = {"User-Agent": "Mozilla/5.0"}
     try:
         url = f"https://1337x.to/search/{query.replace(' ', '%20')}/1/"
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         soup = BeautifulSoup(response.text, "html.parser")
-        entries = soup.select("td.coll-1.name")
-        for entry in entries[:100]:
-            link = entry.select_one("a:nth-of-type(2)")
-            if not link:
-                continue
+    except Exception as exc:
+        print(f"[1337x] Error: {exc}")
+        return []
 
-            title = link.text.strip()
-            detail_url = "https://1337x.to" + link["href"]
+    candidates = []
+    for entry in soup.select("td.coll-1.name")[:X1337_MAX_RESULTS]:
+        link = entry.select_one("a:nth-of-type(2)")
+        if link:
+            candidates.append((link.text.strip(), "https://1337x.to" + link["href"]))
+    if not candidates:
+        return []
+
+    found = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(X1337_DETAIL_WORKERS, len(candidates)))
+    future_map = {executor.submit(_get_1337x_magnet, detail_url, headers): position for position, (_, detail_url) in enumerate(candidates)}
+    try:
+        for future in concurrent.futures.as_completed(future_map, timeout=X1337_SEARCH_DEADLINE_SECONDS):
+            position = future_map[future]
             try:
-                detail_response = requests.get(detail_url, headers=headers, timeout=10)
-                detail_soup = BeautifulSoup(detail_response.text, "html.parser")
-                magnet_tag = detail_soup.select_one("a[href^='magnet:?']")
-                if not magnet_tag:
-                    continue
-
-                results.append({
-                    "title": title,
-                    "chapter": None,
-                    "chapters": None,
-                    "url_type": "torrent",
-                    "url": magnet_tag["href"],
-                    "resolucion": None,
-                    "idioma": None,
-                    "subtitulo": None,
-                    "fansub": None,
-                    "format": None,
-                    "password": None,
-                })
+                magnet = future.result()
             except Exception as exc:
                 print(f"[1337x detail] Error: {exc}")
-    except Exception as exc:
-        print(f"[1337x] Error: {exc}")
-    return results
+                continue
+            if not magnet:
+                continue
+            found[position] = _build_torrent_result(candidates[position][0], magnet)
+            if on_results:
+                on_results([found[position]])
+    except concurrent.futures.TimeoutError:
+        print(f"[1337x] Tiempo agotado: {len(found)}/{len(candidates)} magnets en {X1337_SEARCH_DEADLINE_SECONDS}s")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [found[position] for position in sorted(found)]
@@ -0,0 +1,139 @@
+import os, random, threading, time
+
+
+CATALOG_SCHEDULER_TICK_SECONDS = 60
+CATALOG_REFRESH_JITTER = 0.1
+CATALOG_RETRY_SECONDS = 15 * 60
+CATALOG_MAX_RETRY_SECONDS = 6 * 60 * 60
+
+STATE_IDLE = "idle"
+STATE_REFRESHING = "refreshing"
+STATE_ERROR = "error"
+
+
+def _cache_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class CatalogScheduler:
+    # sources: name -> {"label", "ttl", "refresh": callable(force_refresh) -> bool,
+    # "cache_path": callable() -> path}. Searches keep reading the stale cache
+    # while the refresh runs in its own thread.
+    def __init__(self, sources, jitter=CATALOG_REFRESH_JITTER, clock=time.time):
+        self.sources = sources
+        self.jitter = jitter
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.states = {}
+        for name, source in sources.items():
+            refreshed_at = _cache_mtime(source["cache_path"]())
+            self.states[name] = {
+                "state": STATE_IDLE,
+                "refreshed_at": refreshed_at,
+                "next_refresh_at": self._next_refresh_at(name, refreshed_at),
+                "error": "",
+                "failures": 0,
+            }
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop_event.is_set()
+
+    def _next_refresh_at(self, name, refreshed_at):
+        if refreshed_at is None:
+            return 0
+        ttl = self.sources[name]["ttl"]
+        return refreshed_at + ttl * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def start(self, tick_seconds=CATALOG_SCHEDULER_TICK_SECONDS):
+        if self.running:
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, args=(tick_seconds,), name="catalog-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self, tick_seconds):
+        while not self._stop_event.is_set():
+            self.tick()
+            self._stop_event.wait(tick_seconds)
+
+    def tick(self):
+        now = self.clock()
+        with self.lock:
+            due = [name for name, state in self.states.items() if state["state"] != STATE_REFRESHING and state["next_refresh_at"] <= now]
+        for name in due:
+            self.request_refresh(name)
+        return due
+
+    def request_refresh(self, name, wait=False):
+        with self.lock:
+            state = self.states.get(name)
+            if state is None or state["state"] == STATE_REFRESHING:
+                return False
+            state["state"] = STATE_REFRESHING
+            state["error"] = ""
+        thread = threading.Thread(target=self._refresh, args=(name,), name=f"catalog-refresh-{name}", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def refresh_if_due(self, name):
+        # Searches on a stale cache come through here, so they respect the
+        # backoff after a failed refresh instead of starting one per query.
+        with self.lock:
+            state = self.states.get(name)
+            if state is None or state["next_refresh_at"] > self.clock():
+                return False
+        return self.request_refresh(name)
+
+    def _retry_delay(self, name, failures):
+        delay = CATALOG_RETRY_SECONDS * 2 ** max(0, failures - 1)
+        return min(delay, CATALOG_MAX_RETRY_SECONDS, self.sources[name]["ttl"])
+
+    def _refresh(self, name):
+        source = self.sources[name]
+        try:
+            ok = source["refresh"](force_refresh=True)
+            error = "" if ok else "sin respuesta"
+        except Exception as exc:
+            ok = False
+            error = str(exc)
+
+        now = self.clock()
+        with self.lock:
+            state = self.states[name]
+            state["state"] = STATE_IDLE if ok else STATE_ERROR
+            state["error"] = error
+            if ok:
+                state["failures"] = 0
+                state["refreshed_at"] = _cache_mtime(source["cache_path"]()) or now
+                # Counted from the attempt: a refresh that left an old cache in
+                # place must not be due again on the next tick.
+                state["next_refresh_at"] = self._next_refresh_at(name, now)
+            else:
+                state["failures"] += 1
+                state["next_refresh_at"] = now + self._retry_delay(name, state["failures"])
+
+    def snapshot(self):
+        now = self.clock()
+        with self.lock:
+            return [
+                {
+                    "name": name,
+                    "label": self.sources[name]["label"],
+                    "state": state["state"],
+                    "age_seconds": None if state["refreshed_at"] is None else max(0, now - state["refreshed_at"]),
+                    "error": state["error"],
+                }
+                for name, state in self.states.items()
+            ]
@@ -1,9 +1,11 @@
-import concurrent.futures, difflib, json, os, re, time
+import concurrent.futures, difflib, json, os, re, threading, time
 from urllib.parse import parse_qs, urljoin, urlparse
 
-import requests
 from bs4 import BeautifulSoup
 from config import CONFIG_PATH
+from media_search import http_client, source_cache
+from media_search.catalog_scheduler import CatalogScheduler
+from media_search.search_index import CANDIDATE_POOL_SIZE, get_search_index
 
 
 ELAMIGOS_HOST = "elamigos.site"
@@ -23,10 +25,32 @@ FITGIRL_USER_AGENT = "Mozilla/5.0"
 FITGIRL_INDEX_CACHE_PATH = os.path.join(ELAMIGOS_CACHE_DIR, "fitgirl_index.json")
 FITGIRL_INDEX_MAX_PAGES = 300
 FITGIRL_INDEX_BATCH_SIZE = 12
+FITGIRL_INDEX_STATE_PATH = os.path.join(ELAMIGOS_CACHE_DIR, "fitgirl_index_state.json")
+FITGIRL_INCREMENTAL_MAX_PAGES = 20
+FITGIRL_FULL_CRAWL_INTERVAL_SECONDS = 7 * 24 * 60 * 60
 STEAMRIP_HOME_URL = "https://steamrip.com/"
 STEAMRIP_GAMES_LIST_URL = urljoin(STEAMRIP_HOME_URL, "games-list/")
 STEAMRIP_USER_AGENT = "Mozilla/5.0"
 STEAMRIP_GAMES_LIST_CACHE_PATH = os.path.join(ELAMIGOS_CACHE_DIR, "steamrip_games_list.html")
+PARSED_CATALOG_VERSION = 1
+DETAIL_FETCH_WORKERS = 6
+# Cloudflare/DDoS-Guard interstitials come back as 200 pages.
+CHALLENGE_PAGE_MARKERS = ("challenge-platform", "cf-browser-verification", "<title>just a moment", "attention required! | cloudflare", "ddos-guard")
+DETAIL_CACHE_TTL_SECONDS = {
+    "elamigos": 24 * 60 * 60,
+    "fitgirl": 12 * 60 * 60,
+    "steamrip": 24 * 60 * 60,
+}
+
+CATALOG_TTL_SECONDS = {
+    "elamigos": ELAMIGOS_CACHE_MAX_AGE_SECONDS,
+    "fitgirl": ELAMIGOS_CACHE_MAX_AGE_SECONDS,
+    "steamrip": 12 * 60 * 60,
+}
+
+_PARSED_CATALOGS = {}
+_PARSED_CATALOGS_LOCK = threading.Lock()
+_CATALOG_SCHEDULER = None
 
 
 def _normalize_search_text(text):
@@ -66,6 +90,63 @@ def _dedupe_results(results):
     return unique
 
 
+def _is_detail_page(html):
+    lowered = (html or "").lower()
+    return bool(lowered.strip()) and not any(marker in lowered for marker in CHALLENGE_PAGE_MARKERS)
+
+
+def _fetch_detail_html(source, detail_url, user_agent):
+    def fetch():
+        response = http_client.get(detail_url, headers={"User-Agent": user_agent}, timeout=20)
+        response.raise_for_status()
+        return response.text
+
+    return source_cache.cached_text(source, detail_url, DETAIL_CACHE_TTL_SECONDS[source], fetch, validate=_is_detail_page)
+
+
+def _cached_detail_links(source, detail_url, game_title, parse):
+    def compute():
+        links = parse(detail_url, game_title)
+        if not links:
+            # The stored page yielded nothing; fetch it again next time.
+            source_cache.forget_text(source, detail_url)
+        return links
+
+    return source_cache.cached_json(f"{source}_detail", f"{detail_url}\n{game_title}", DETAIL_CACHE_TTL_SECONDS[source], compute)
+
+
+def _fetch_candidate_details(label, candidates, extract_links, on_results=None):
+    # Detail pages are fetched concurrently (http_client limits each host);
+    # on_results gets every new batch as soon as its candidate resolves, the
+    # return value keeps candidate rank order.
+    links_by_position = {}
+    streamed_urls = set()
+    if not candidates:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(DETAIL_FETCH_WORKERS, len(candidates))) as executor:
+        future_map = {
+            executor.submit(extract_links, entry["detail_url"], entry["title"]): position
+            for position, entry in enumerate(candidates)
+        }
+        for future in concurrent.futures.as_completed(future_map):
+            position = future_map[future]
+            try:
+                links = future.result()
+            except Exception as exc:
+                print(f"[{label} detail] Error con {candidates[position]['detail_url']}: {exc}")
+                continue
+            links_by_position[position] = links
+            batch = [link for link in links if link["url"] not in streamed_urls]
+            streamed_urls.update(link["url"] for link in batch)
+            if on_results and batch:
+                on_results(_dedupe_results(batch))
+
+    results = []
+    for position in sorted(links_by_position):
+        results.extend(links_by_position[position])
+    return _dedupe_results(results)
+
+
 def _build_download_result(title, url_type, url, mirror_host=None):
     return {
         "title": title,
@@ -83,11 +164,29 @@ def _build_download_result(title, url_type, url, mirror_host=None):
     }
 
 
-def _pick_candidates(query, entries, max_candidates):
+def _search_index_path(source):
+    return os.path.join(ELAMIGOS_CACHE_DIR, f"{source}_search_index.json")
+
+
+def _index_catalog(source, entries):
+    # Catalogs that fit in one candidate pool are cheaper to score directly.
+    if not source or len(entries) <= CANDIDATE_POOL_SIZE:
+        return None
+    return get_search_index(_search_index_path(source), entries)
+
+
+def _candidate_pool(query, entries, source=None):
+    index = _index_catalog(source, entries)
+    if index is None:
+        return entries
+    return index.candidates(entries, _normalize_search_text(query))
+
+
+def _pick_candidates(query, entries, max_candidates, source=None):
     normalized_query = _normalize_search_text(query)
     query_tokens = set(normalized_query.split())
     scored = []
-    for entry in entries:
+    for entry in _candidate_pool(query, entries, source):
         score = _score_match(query, entry["title"], entry["normalized_title"])
         if score >= 0.45:
             scored.append((score, entry))
@@ -106,57 +205,175 @@ def _pick_candidates(query, entries, max_candidates):
     return strong_candidates[:max_candidates] if strong_candidates else [entry for _, entry in scored[:max_candidates]]
 
 
+def _cache_is_fresh(path, catalog):
+    return os.path.exists(path) and time.time() - os.path.getmtime(path) <= CATALOG_TTL_SECONDS[catalog]
+
+
+def _write_cache_text(path, text):
+    # Background refreshes replace caches that searches may be reading.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", errors="ignore") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _cache_is_usable(path, catalog):
+    # Stale-while-revalidate: with the scheduler running, an expired cache is
+    # still served and the refresh happens in the background.
+    if _cache_is_fresh(path, catalog):
+        return True
+    scheduler = _CATALOG_SCHEDULER
+    if scheduler is None or not scheduler.running or not os.path.exists(path):
+        return False
+    scheduler.refresh_if_due(catalog)
+    return True
+
+
+def _raw_cache_key(raw_path):
+    try:
+        stat = os.stat(raw_path)
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _parsed_catalog_path(source):
+    return os.path.join(ELAMIGOS_CACHE_DIR, f"{source}_catalog.json")
+
+
+def _remembered_catalog_entries(source, raw_path):
+    key = _raw_cache_key(raw_path)
+    with _PARSED_CATALOGS_LOCK:
+        cached = _PARSED_CATALOGS.get(source)
+    if key is not None and cached and cached[0] == (raw_path, key):
+        return cached[1]
+    return None
+
+
+def _remember_catalog_entries(source, raw_path, entries):
+    key = _raw_cache_key(raw_path)
+    if key is None:
+        return
+    with _PARSED_CATALOGS_LOCK:
+        _PARSED_CATALOGS[source] = ((raw_path, key), entries)
+
+
+def _cached_catalog_entries(source, raw_path):
+    entries = _remembered_catalog_entries(source, raw_path)
+    if entries is not None:
+        return entries
+
+    key = _raw_cache_key(raw_path)
+    if key is None:
+        return None
+    try:
+        with open(_parsed_catalog_path(source), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != PARSED_CATALOG_VERSION or payload.get("source_key") != key:
+        return None
+
+    entries = [
+        {"title": title, "normalized_title": normalized_title, "detail_url": detail_url}
+        for title, normalized_title, detail_url in payload.get("entries") or []
+    ]
+    _remember_catalog_entries(source, raw_path, entries)
+    return entries
+
+
+def _store_catalog_entries(source, raw_path, entries):
+    key = _raw_cache_key(raw_path)
+    if key is None:
+        return
+    _remember_catalog_entries(source, raw_path, entries)
+    payload = {
+        "version": PARSED_CATALOG_VERSION,
+        "source_key": key,
+        "entries": [[entry["title"], entry["normalized_title"], entry["detail_url"]] for entry in entries],
+    }
+    path = _parsed_catalog_path(source)
+    try:
+        _write_cache_text(path, json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+    except OSError as exc:
+        print(f"[Catálogo] No se pudo guardar {os.path.basename(path)}: {exc}")
+
+
+def _load_catalog_entries(source, catalog, raw_path, load_raw, parse, force_refresh=False):
+    # Parsed entries are keyed by the raw cache file's mtime and size, so
+    # they are reused until the loader downloads a new copy.
+    if not force_refresh and _cache_is_usable(raw_path, catalog):
+        entries = _cached_catalog_entries(source, raw_path)
+        if entries is not None:
+            return entries
+
+    raw = load_raw(force_refresh=force_refresh)
+    entries = _cached_catalog_entries(source, raw_path)
+    if entries is None:
+        entries = parse(raw)
+        _store_catalog_entries(source, raw_path, entries)
+    return entries
+
+
+def _load_elamigos_raw_entries(force_refresh=False):
+    return _load_catalog_entries("elamigos_raw", "elamigos", ELAMIGOS_RAW_INDEX_PATH, _load_elamigos_raw_index, _extract_elamigos_raw_index_entries, force_refresh)
+
+
+def _load_elamigos_home_entries(force_refresh=False):
+    return _load_catalog_entries("elamigos_home", "elamigos", ELAMIGOS_INDEX_CACHE_PATH, _load_elamigos_index_html, _extract_elamigos_index_entries, force_refresh)
+
+
+def _load_steamrip_entries(force_refresh=False):
+    return _load_catalog_entries("steamrip", "steamrip", STEAMRIP_GAMES_LIST_CACHE_PATH, _load_steamrip_games_list, _extract_steamrip_index_entries, force_refresh)
+
+
 def _fetch_elamigos_homepage():
-    response = requests.get(ELAMIGOS_HOME_URL, headers={"User-Agent": ELAMIGOS_USER_AGENT}, timeout=20)
+    response = http_client.get(ELAMIGOS_HOME_URL, headers={"User-Agent": ELAMIGOS_USER_AGENT}, timeout=20)
     response.raise_for_status()
     return response.text
 
 
 def _fetch_elamigos_raw_index():
-    response = requests.get(ELAMIGOS_RAW_INDEX_URL, headers={"User-Agent": ELAMIGOS_USER_AGENT}, timeout=20)
+    response = http_client.get(ELAMIGOS_RAW_INDEX_URL, headers={"User-Agent": ELAMIGOS_USER_AGENT}, timeout=20)
     response.raise_for_status()
     return response.text
 
 
 def _load_elamigos_raw_index(force_refresh=False):
     os.makedirs(ELAMIGOS_CACHE_DIR, exist_ok=True)
-    if not force_refresh and os.path.exists(ELAMIGOS_RAW_INDEX_PATH):
-        age = time.time() - os.path.getmtime(ELAMIGOS_RAW_INDEX_PATH)
-        if age <= ELAMIGOS_CACHE_MAX_AGE_SECONDS:
-            with open(ELAMIGOS_RAW_INDEX_PATH, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read()
+    if not force_refresh and _cache_is_usable(ELAMIGOS_RAW_INDEX_PATH, "elamigos"):
+        with open(ELAMIGOS_RAW_INDEX_PATH, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
 
     try:
         raw_text = _fetch_elamigos_raw_index()
     except Exception:
-        if os.path.exists(ELAMIGOS_RAW_INDEX_PATH):
+        # A forced refresh is the scheduler's: it must see the failure, not
+        # the stale copy, or it would treat the catalog as refreshed.
+        if not force_refresh and os.path.exists(ELAMIGOS_RAW_INDEX_PATH):
             with open(ELAMIGOS_RAW_INDEX_PATH, "r", encoding="utf-8", errors="ignore") as f:
                 return f.read()
         raise
 
-    with open(ELAMIGOS_RAW_INDEX_PATH, "w", encoding="utf-8", errors="ignore") as f:
-        f.write(raw_text)
+    _write_cache_text(ELAMIGOS_RAW_INDEX_PATH, raw_text)
     return raw_text
 
 
 def _load_elamigos_index_html(force_refresh=False):
     os.makedirs(ELAMIGOS_CACHE_DIR, exist_ok=True)
-    if not force_refresh and os.path.exists(ELAMIGOS_INDEX_CACHE_PATH):
-        age = time.time() - os.path.getmtime(ELAMIGOS_INDEX_CACHE_PATH)
-        if age <= ELAMIGOS_CACHE_MAX_AGE_SECONDS:
-            with open(ELAMIGOS_INDEX_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read()
+    if not force_refresh and _cache_is_usable(ELAMIGOS_INDEX_CACHE_PATH, "elamigos"):
+        with open(ELAMIGOS_INDEX_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
 
     try:
         html = _fetch_elamigos_homepage()
     except Exception:
-        if os.path.exists(ELAMIGOS_INDEX_CACHE_PATH):
+        if not force_refresh and os.path.exists(ELAMIGOS_INDEX_CACHE_PATH):
             with open(ELAMIGOS_INDEX_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
                 return f.read()
         raise
 
-    with open(ELAMIGOS_INDEX_CACHE_PATH, "w", encoding="utf-8", errors="ignore") as f:
-        f.write(html)
+    _write_cache_text(ELAMIGOS_INDEX_CACHE_PATH, html)
     return html
 
 
@@ -232,9 +449,11 @@ def _clean_elamigos_release_title(text, fallback_title):
 
 
 def _extract_elamigos_detail_links(detail_url, game_title):
-    response = requests.get(detail_url, headers={"User-Agent": ELAMIGOS_USER_AGENT}, timeout=20)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
+    return _cached_detail_links("elamigos", detail_url, game_title, _parse_elamigos_detail_links)
+
+
+def _parse_elamigos_detail_links(detail_url, game_title):
+    soup = BeautifulSoup(_fetch_detail_html("elamigos", detail_url, ELAMIGOS_USER_AGENT), "html.parser")
 
     results = []
     seen = set()
@@ -277,44 +496,48 @@ def _extract_elamigos_detail_links(detail_url, game_title):
     return results
 
 
-def search_elamigos(query, force_refresh=False, max_candidates=6):
+def search_elamigos(query, force_refresh=False, max_candidates=6, on_results=None):
+    source = "elamigos_raw"
     try:
-        entries = _extract_elamigos_raw_index_entries(_load_elamigos_raw_index(force_refresh=force_refresh))
+        entries = _load_elamigos_raw_entries(force_refresh=force_refresh)
     except Exception:
-        entries = _extract_elamigos_index_entries(_load_elamigos_index_html(force_refresh=force_refresh))
+        source = "elamigos_home"
+        entries = _load_elamigos_home_entries(force_refresh=force_refresh)
 
     if not entries:
         print("[ElAmigos] Índice remoto/caché vacío.")
         return []
 
-    results = []
-    for entry in _pick_candidates(query, entries, max_candidates):
+    candidates = []
+    homepage_entries = None
+    for entry in _pick_candidates(query, entries, max_candidates, source=source):
         try:
             detail_url = entry.get("detail_url")
             if not detail_url:
-                homepage_entries = _extract_elamigos_index_entries(_load_elamigos_index_html(force_refresh=force_refresh))
+                if homepage_entries is None:
+                    homepage_entries = _load_elamigos_home_entries(force_refresh=force_refresh)
                 detail_candidates = []
-                for homepage_entry in homepage_entries:
+                for homepage_entry in _candidate_pool(entry["title"], homepage_entries, "elamigos_home"):
                     score = _score_match(entry["title"], homepage_entry["title"], homepage_entry["normalized_title"])
                     if score >= 0.45:
                         detail_candidates.append((score, homepage_entry))
                 detail_candidates.sort(key=lambda item: item[0], reverse=True)
                 detail_url = detail_candidates[0][1]["detail_url"] if detail_candidates else None
             if detail_url:
-                results.extend(_extract_elamigos_detail_links(detail_url, entry["title"]))
+                candidates.append({**entry, "detail_url": detail_url})
         except Exception as exc:
             print(f"[ElAmigos detail] Error con {entry.get('detail_url') or entry['title']}: {exc}")
 
-    return _dedupe_results(results)
+    return _fetch_candidate_details("ElAmigos", candidates, _extract_elamigos_detail_links, on_results)
 
 
 def warm_elamigos_cache(force_refresh=False):
     try:
-        _load_elamigos_raw_index(force_refresh=force_refresh)
+        _index_catalog("elamigos_raw", _load_elamigos_raw_entries(force_refresh=force_refresh))
         return True
     except Exception:
         try:
-            _load_elamigos_index_html(force_refresh=force_refresh)
+            _index_catalog("elamigos_home", _load_elamigos_home_entries(force_refresh=force_refresh))
             return True
         except Exception as exc:
             print(f"[ElAmigos preload] Error: {exc}")
@@ -326,29 +549,26 @@ def _clean_steamrip_title(text):
 
 
 def _fetch_steamrip_games_list():
-    response = requests.get(STEAMRIP_GAMES_LIST_URL, headers={"User-Agent": STEAMRIP_USER_AGENT}, timeout=20)
+    response = http_client.get(STEAMRIP_GAMES_LIST_URL, headers={"User-Agent": STEAMRIP_USER_AGENT}, timeout=20)
     response.raise_for_status()
     return response.text
 
 
 def _load_steamrip_games_list(force_refresh=False):
     os.makedirs(ELAMIGOS_CACHE_DIR, exist_ok=True)
-    if not force_refresh and os.path.exists(STEAMRIP_GAMES_LIST_CACHE_PATH):
-        age = time.time() - os.path.getmtime(STEAMRIP_GAMES_LIST_CACHE_PATH)
-        if age <= ELAMIGOS_CACHE_MAX_AGE_SECONDS:
-            with open(STEAMRIP_GAMES_LIST_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read()
+    if not force_refresh and _cache_is_usable(STEAMRIP_GAMES_LIST_CACHE_PATH, "steamrip"):
+        with open(STEAMRIP_GAMES_LIST_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
 
     try:
         html = _fetch_steamrip_games_list()
     except Exception:
-        if os.path.exists(STEAMRIP_GAMES_LIST_CACHE_PATH):
+        if not force_refresh and os.path.exists(STEAMRIP_GAMES_LIST_CACHE_PATH):
             with open(STEAMRIP_GAMES_LIST_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
                 return f.read()
         raise
 
-    with open(STEAMRIP_GAMES_LIST_CACHE_PATH, "w", encoding="utf-8", errors="ignore") as f:
-        f.write(html)
+    _write_cache_text(STEAMRIP_GAMES_LIST_CACHE_PATH, html)
     return html
 
 
@@ -445,9 +665,12 @@ def _steamrip_label_from_anchor(anchor, href):
 
 
 def _extract_steamrip_detail_links(detail_url, game_title):
-    response = requests.get(detail_url, headers={"User-Agent": STEAMRIP_USER_AGENT}, timeout=20)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
+    return _cached_detail_links("steamrip", detail_url, game_title, _parse_steamrip_detail_links)
+
+
+def _parse_steamrip_detail_links(detail_url, game_title):
+    html = _fetch_detail_html("steamrip", detail_url, STEAMRIP_USER_AGENT)
+    soup = BeautifulSoup(html, "html.parser")
 
     article = soup.select_one("article") or soup
     results = []
@@ -468,7 +691,7 @@ def _extract_steamrip_detail_links(detail_url, game_title):
         return results
 
     current_label = None
-    for raw_line in response.text.splitlines():
+    for raw_line in html.splitlines():
         line = _clean_steamrip_title(raw_line).strip("* ")
         if not line:
             continue
@@ -493,9 +716,9 @@ def _extract_steamrip_detail_links(detail_url, game_title):
     return results
 
 
-def search_steamrip(query, force_refresh=False, max_candidates=6):
+def search_steamrip(query, force_refresh=False, max_candidates=6, on_results=None):
     try:
-        entries = _extract_steamrip_index_entries(_load_steamrip_games_list(force_refresh=force_refresh))
+        entries = _load_steamrip_entries(force_refresh=force_refresh)
     except Exception as exc:
         print(f"[SteamRIP] Error cargando índice: {exc}")
         return []
@@ -504,19 +727,13 @@ def search_steamrip(query, force_refresh=False, max_candidates=6):
         print("[SteamRIP] Índice remoto/caché vacío.")
         return []
 
-    results = []
-    for entry in _pick_candidates(query, entries, max_candidates):
-        try:
-            results.extend(_extract_steamrip_detail_links(entry["detail_url"], entry["title"]))
-        except Exception as exc:
-            print(f"[SteamRIP detail] Error con {entry['detail_url']}: {exc}")
-
-    return _dedupe_results(results)
+    candidates = _pick_candidates(query, entries, max_candidates, source="steamrip")
+    return _fetch_candidate_details("SteamRIP", candidates, _extract_steamrip_detail_links, on_results)
 
 
 def warm_steamrip_cache(force_refresh=False):
     try:
-        _load_steamrip_games_list(force_refresh=force_refresh)
+        _index_catalog("steamrip", _load_steamrip_entries(force_refresh=force_refresh))
         return True
     except Exception as exc:
         print(f"[SteamRIP preload] Error: {exc}")
@@ -524,7 +741,7 @@ def warm_steamrip_cache(force_refresh=False):
 
 
 def _fetch_fitgirl_index_page(page):
-    response = requests.get(
+    response = http_client.get(
         FITGIRL_AZ_URL,
         params={"lcp_page0": page},
         headers={"User-Agent": FITGIRL_USER_AGENT},
@@ -619,14 +836,45 @@ def _deserialize_fitgirl_index_entries(payload):
     return entries
 
 
-def _load_fitgirl_index(force_refresh=False):
-    os.makedirs(ELAMIGOS_CACHE_DIR, exist_ok=True)
-    if not force_refresh and os.path.exists(FITGIRL_INDEX_CACHE_PATH):
-        age = time.time() - os.path.getmtime(FITGIRL_INDEX_CACHE_PATH)
-        if age <= ELAMIGOS_CACHE_MAX_AGE_SECONDS:
-            with open(FITGIRL_INDEX_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
-                return _deserialize_fitgirl_index_entries(json.load(f))
+def _fetch_fitgirl_recent_page(page, validators=None):
+    headers = {"User-Agent": FITGIRL_USER_AGENT}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    url = FITGIRL_HOME_URL if page == 1 else urljoin(FITGIRL_HOME_URL, f"page/{page}/")
+    response = http_client.get(url, headers=headers, timeout=20)
+    if response.status_code == 304:
+        return None, dict(validators or {})
+    response.raise_for_status()
+    return response.text, {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+
+def _read_fitgirl_index_cache():
+    try:
+        with open(FITGIRL_INDEX_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
+            return _deserialize_fitgirl_index_entries(json.load(f))
+    except (OSError, ValueError):
+        return None
 
+
+def _read_fitgirl_index_state():
+    try:
+        with open(FITGIRL_INDEX_STATE_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _write_fitgirl_index(entries, state):
+    _write_cache_text(FITGIRL_INDEX_CACHE_PATH, json.dumps(_serialize_fitgirl_index_entries(entries), ensure_ascii=False, separators=(",", ":")))
+    with open(FITGIRL_INDEX_STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    _remember_catalog_entries("fitgirl", FITGIRL_INDEX_CACHE_PATH, entries)
+
+
+def _crawl_fitgirl_index():
     entries = []
     seen = set()
     for start_page in range(1, FITGIRL_INDEX_MAX_PAGES + 1, FITGIRL_INDEX_BATCH_SIZE):
@@ -652,15 +900,66 @@ def _load_fitgirl_index(force_refresh=False):
                 entries.append(entry)
         if not batch_has_entries:
             break
+    return entries
+
+
+def _refresh_fitgirl_index(entries, state):
+    # The A-Z list is alphabetical, so new releases are found on the
+    # chronological front page instead, walking back until a known repack
+    # shows up. Returns None when the gap is too large to bridge.
+    known = {entry["detail_url"] for entry in entries}
+    added = []
+    for page in range(1, FITGIRL_INCREMENTAL_MAX_PAGES + 1):
+        html, validators = _fetch_fitgirl_recent_page(page, state if page == 1 else None)
+        if html is None:
+            return entries
+        if page == 1:
+            state.update(validators)
+
+        page_entries = _extract_fitgirl_search_entries(html)
+        fresh_entries = [entry for entry in page_entries if entry["detail_url"] not in known]
+        for entry in fresh_entries:
+            known.add(entry["detail_url"])
+            added.append(entry)
+        if len(fresh_entries) < len(page_entries):
+            if added:
+                print(f"[FitGirl index] {len(added)} repacks nuevos")
+            return added + entries
+    return None
+
+
+def _load_fitgirl_index(force_refresh=False):
+    os.makedirs(ELAMIGOS_CACHE_DIR, exist_ok=True)
+    if not force_refresh and _cache_is_usable(FITGIRL_INDEX_CACHE_PATH, "fitgirl"):
+        entries = _remembered_catalog_entries("fitgirl", FITGIRL_INDEX_CACHE_PATH)
+        if entries is None:
+            with open(FITGIRL_INDEX_CACHE_PATH, "r", encoding="utf-8", errors="ignore") as f:
+                entries = _deserialize_fitgirl_index_entries(json.load(f))
+            _remember_catalog_entries("fitgirl", FITGIRL_INDEX_CACHE_PATH, entries)
+        return entries
 
-    with open(FITGIRL_INDEX_CACHE_PATH, "w", encoding="utf-8") as f:
-        json.dump(_serialize_fitgirl_index_entries(entries), f, ensure_ascii=False, separators=(",", ":"))
+    previous = _read_fitgirl_index_cache()
+    state = _read_fitgirl_index_state()
+    entries = None
+    if previous and time.time() - float(state.get("full_crawl_at") or 0) < FITGIRL_FULL_CRAWL_INTERVAL_SECONDS:
+        try:
+            entries = _refresh_fitgirl_index(previous, state)
+        except Exception as exc:
+            print(f"[FitGirl index] Error actualizando índice: {exc}")
+            if force_refresh:
+                raise
+            return previous
+    if entries is None:
+        entries = _crawl_fitgirl_index()
+        state = {"full_crawl_at": time.time()}
+
+    _write_fitgirl_index(entries, state)
     return entries
 
 
 def warm_fitgirl_cache(force_refresh=False):
     try:
-        _load_fitgirl_index(force_refresh=force_refresh)
+        _index_catalog("fitgirl", _load_fitgirl_index(force_refresh=force_refresh))
         return True
     except Exception as exc:
         print(f"[FitGirl preload] Error: {exc}")
@@ -668,7 +967,7 @@ def warm_fitgirl_cache(force_refresh=False):
 
 
 def _fetch_fitgirl_search_page(query):
-    response = requests.get(FITGIRL_SEARCH_URL, params={"s": query}, headers={"User-Agent": FITGIRL_USER_AGENT}, timeout=20)
+    response = http_client.get(FITGIRL_SEARCH_URL, params={"s": query}, headers={"User-Agent": FITGIRL_USER_AGENT}, timeout=20)
     response.raise_for_status()
     return response.text
 
@@ -826,17 +1125,21 @@ def _extract_fitgirl_torrent_links(soup, game_title):
 
 
 def _extract_fitgirl_detail_links(detail_url, game_title):
-    response = requests.get(detail_url, headers={"User-Agent": FITGIRL_USER_AGENT}, timeout=20)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
+    return _cached_detail_links("fitgirl", detail_url, game_title, _parse_fitgirl_detail_links)
+
+
+def _parse_fitgirl_detail_links(detail_url, game_title):
+    soup = BeautifulSoup(_fetch_detail_html("fitgirl", detail_url, FITGIRL_USER_AGENT), "html.parser")
     return _extract_fitgirl_direct_links(soup, game_title) + _extract_fitgirl_torrent_links(soup, game_title)
 
 
-def search_fitgirl(query, force_refresh=False, max_candidates=6):
+def search_fitgirl(query, force_refresh=False, max_candidates=6, on_results=None):
+    source = "fitgirl"
     try:
         entries = _load_fitgirl_index(force_refresh=force_refresh)
     except Exception as exc:
         print(f"[FitGirl index] Error cargando índice: {exc}")
+        source = None
         try:
             entries = _extract_fitgirl_search_entries(_fetch_fitgirl_search_page(query))
         except Exception as search_exc:
@@ -845,14 +1148,27 @@ def search_fitgirl(query, force_refresh=False, max_candidates=6):
     if not entries:
         return []
 
-    results = []
-    for entry in _pick_candidates(query, entries, max_candidates):
-        try:
-            results.extend(_extract_fitgirl_detail_links(entry["detail_url"], entry["title"]))
-        except Exception as exc:
-            print(f"[FitGirl detail] Error con {entry['detail_url']}: {exc}")
+    candidates = _pick_candidates(query, entries, max_candidates, source=source)
+    return _fetch_candidate_details("FitGirl", candidates, _extract_fitgirl_detail_links, on_results)
 
-    return _dedupe_results(results)
+
+def _elamigos_catalog_path():
+    return ELAMIGOS_RAW_INDEX_PATH if os.path.exists(ELAMIGOS_RAW_INDEX_PATH) else ELAMIGOS_INDEX_CACHE_PATH
+
+
+def get_catalog_scheduler():
+    global _CATALOG_SCHEDULER
+    if _CATALOG_SCHEDULER is None:
+        _CATALOG_SCHEDULER = CatalogScheduler({
+            "elamigos": {"label": "ElAmigos", "ttl": CATALOG_TTL_SECONDS["elamigos"], "refresh": warm_elamigos_cache, "cache_path": _elamigos_catalog_path},
+            "fitgirl": {"label": "FitGirl", "ttl": CATALOG_TTL_SECONDS["fitgirl"], "refresh": warm_fitgirl_cache, "cache_path": lambda: FITGIRL_INDEX_CACHE_PATH},
+            "steamrip": {"label": "SteamRIP", "ttl": CATALOG_TTL_SECONDS["steamrip"], "refresh": warm_steamrip_cache, "cache_path": lambda: STEAMRIP_GAMES_LIST_CACHE_PATH},
+        })
+    return _CATALOG_SCHEDULER
+
+
+def start_catalog_scheduler():
+    return get_catalog_scheduler().start()
 
 
 __all__ = [
@@ -863,4 +1179,6 @@ __all__ = [
     "warm_steamrip_cache",
     "search_fitgirl",
     "warm_fitgirl_cache",
+    "get_catalog_scheduler",
+    "start_catalog_scheduler",
 ]
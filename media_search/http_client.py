@@ -0,0 +1,254 @@
+import json, threading, time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from media_search import source_cache
+
+
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_MAXSIZE = 8
+HOST_MAX_CONCURRENT = 4
+HOST_MIN_INTERVAL_SECONDS = 0.2
+DEFAULT_TIMEOUT_SECONDS = 20
+HTTP_MAX_RETRIES = 3
+HTTP_RETRY_BASE_DELAY = 1.0
+HTTP_MAX_RETRY_DELAY = 30.0
+
+# host -> (tokens per second, burst). Jikan allows 3 requests per second and
+# 60 per minute, one token per second with a burst of 3 stays under both.
+HOST_RATE_LIMITS = {
+    "api.jikan.moe": (1.0, 3),
+    "api.vndb.org": (3.0, 5),
+    "api.rawg.io": (4.0, 8),
+}
+
+HOST_SOURCES = {
+    "api.jikan.moe": "Jikan",
+    "myanimelist.net": "MyAnimeList",
+    "cdn.myanimelist.net": "MyAnimeList",
+    "api.themoviedb.org": "TMDb",
+    "image.tmdb.org": "TMDb",
+    "api.rawg.io": "RAWG",
+    "media.rawg.io": "RAWG",
+    "api.vndb.org": "VNDB",
+    "nyaa.si": "Nyaa",
+    "1337x.to": "1337x",
+    "aniteca.net": "Aniteca",
+    "elamigos.site": "ElAmigos",
+    "fitgirl-repacks.site": "FitGirl",
+    "steamrip.com": "SteamRIP",
+}
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+class HostLimiter:
+    # At most max_concurrent requests per host, and request starts spaced by
+    # min_interval so a burst of detail pages does not hammer one site.
+    def __init__(self, max_concurrent=HOST_MAX_CONCURRENT, min_interval=HOST_MIN_INTERVAL_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def _host_state(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = {"semaphore": threading.Semaphore(self.max_concurrent), "next_start": 0.0}
+            return self.hosts[host]
+
+    @contextmanager
+    def slot(self, host):
+        state = self._host_state(host)
+        state["semaphore"].acquire()
+        try:
+            with self.lock:
+                now = time.monotonic()
+                start_at = max(now, state["next_start"])
+                state["next_start"] = start_at + self.min_interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            yield
+        finally:
+            state["semaphore"].release()
+
+
+HOST_LIMITER = HostLimiter()
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(capacity)
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+_BUCKETS = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def _bucket(host):
+    limit = HOST_RATE_LIMITS.get(host)
+    if limit is None:
+        return None
+    with _BUCKETS_LOCK:
+        if host not in _BUCKETS:
+            _BUCKETS[host] = TokenBucket(*limit)
+        return _BUCKETS[host]
+
+
+class SourceStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources = {}
+
+    def _source(self, source):
+        return self._sources.setdefault(source, {
+            "requests": 0, "errors": 0, "retries": 0, "cache_hits": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+        })
+
+    def record_request(self, source, elapsed, ok):
+        with self._lock:
+            stats = self._source(source)
+            stats["requests"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    def record_retry(self, source):
+        with self._lock:
+            self._source(source)["retries"] += 1
+
+    def record_cache_hit(self, source):
+        with self._lock:
+            self._source(source)["cache_hits"] += 1
+
+    def reset(self):
+        with self._lock:
+            self._sources.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                source: dict(stats, avg_seconds=stats["total_seconds"] / stats["requests"] if stats["requests"] else 0.0)
+                for source, stats in self._sources.items()
+            }
+
+    def summary_lines(self):
+        lines = []
+        for source, stats in sorted(self.snapshot().items()):
+            lines.append(
+                f"{source}: {stats['requests']} peticiones, {stats['cache_hits']} desde caché, "
+                f"{stats['retries']} reintentos, {stats['errors']} errores, "
+                f"media {stats['avg_seconds'] * 1000:.0f} ms, máx {stats['max_seconds'] * 1000:.0f} ms"
+            )
+        return lines
+
+
+SOURCE_STATS = SourceStats()
+
+
+def get_session():
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _SESSION = session
+        return _SESSION
+
+
+def source_for_url(url):
+    host = (urlparse(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return HOST_SOURCES.get(host, host or "?")
+
+
+def _retry_delay(response, attempt):
+    value = (response.headers.get("Retry-After") or "").strip()
+    if value.isdigit():
+        return min(float(value), HTTP_MAX_RETRY_DELAY)
+    return min(HTTP_RETRY_BASE_DELAY * 2 ** attempt, HTTP_MAX_RETRY_DELAY)
+
+
+def request(method, url, **kwargs):
+    # Every source request goes through here: shared pooled session, per-host
+    # concurrency and rate limits, a default timeout and backoff on 429.
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT_SECONDS)
+    host = (urlparse(url).netloc or "").lower()
+    source = source_for_url(url)
+    bucket = _bucket((urlparse(url).hostname or "").lower())
+    attempt = 0
+    while True:
+        if bucket is not None:
+            bucket.acquire()
+        started = time.monotonic()
+        try:
+            with HOST_LIMITER.slot(host):
+                response = get_session().request(method, url, **kwargs)
+        except requests.RequestException:
+            SOURCE_STATS.record_request(source, time.monotonic() - started, False)
+            raise
+        SOURCE_STATS.record_request(source, time.monotonic() - started, response.status_code < 400)
+        if response.status_code != 429 or attempt >= HTTP_MAX_RETRIES:
+            return response
+        delay = _retry_delay(response, attempt)
+        print(f"[HTTP] {source} respondió 429, reintentando en {delay:.1f}s")
+        SOURCE_STATS.record_retry(source)
+        response.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def get_text(url, ttl, params=None, **kwargs):
+    # Successful GET bodies are kept in the on-disk source cache for ttl
+    # seconds, keyed by the full URL including the query string.
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    source = source_for_url(full_url)
+    fetched = []
+
+    def fetch():
+        response = get(full_url, **kwargs)
+        response.raise_for_status()
+        fetched.append(True)
+        return response.text
+
+    text = source_cache.cached_text("http", full_url, ttl, fetch)
+    if not fetched:
+        SOURCE_STATS.record_cache_hit(source)
+    return text
+
+
+def get_json(url, ttl, params=None, **kwargs):
+    return json.loads(get_text(url, ttl, params=params, **kwargs))
@@ -0,0 +1,111 @@
+import heapq, json, os, threading, zlib
+from collections import defaultdict
+
+
+SEARCH_INDEX_VERSION = 1
+CANDIDATE_POOL_SIZE = 200
+
+_INDEX_CACHE = {}
+_INDEX_CACHE_LOCK = threading.Lock()
+
+
+def text_trigrams(normalized_text):
+    padded = f" {normalized_text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def catalog_signature(entries):
+    # Changes whenever the catalog gains, loses or reorders titles, which is
+    # all the postings depend on.
+    checksum = 0
+    for entry in entries:
+        checksum = zlib.crc32(f"{entry['normalized_title']}\n{entry.get('detail_url') or ''}\n".encode("utf-8"), checksum)
+    return f"{len(entries)}:{checksum:08x}"
+
+
+class SearchIndex:
+    def __init__(self, signature, tokens, trigrams):
+        self.signature = signature
+        self.tokens = tokens
+        self.trigrams = trigrams
+
+    @classmethod
+    def build(cls, entries):
+        tokens = defaultdict(list)
+        trigrams = defaultdict(list)
+        for position, entry in enumerate(entries):
+            normalized_title = entry["normalized_title"]
+            for token in set(normalized_title.split()):
+                tokens[token].append(position)
+            for gram in text_trigrams(normalized_title):
+                trigrams[gram].append(position)
+        return cls(catalog_signature(entries), dict(tokens), dict(trigrams))
+
+    def candidate_positions(self, normalized_query, limit=CANDIDATE_POOL_SIZE):
+        # Cheap pre-ranking: every shared token counts one point and the
+        # trigram overlap adds up to one more, so titles containing the query
+        # (or all its words) come first and typos still match on trigrams.
+        scores = defaultdict(float)
+        for token in set(normalized_query.split()):
+            for position in self.tokens.get(token, ()):
+                scores[position] += 1.0
+        grams = text_trigrams(normalized_query)
+        weight = 1.0 / max(len(grams), 1)
+        for gram in grams:
+            for position in self.trigrams.get(gram, ()):
+                scores[position] += weight
+        return [position for position, _ in heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))]
+
+    def candidates(self, entries, normalized_query, limit=CANDIDATE_POOL_SIZE):
+        # Catalog order, so ties in the re-ranking resolve like a full scan.
+        return [entries[position] for position in sorted(self.candidate_positions(normalized_query, limit))]
+
+    def to_payload(self):
+        return {
+            "version": SEARCH_INDEX_VERSION,
+            "signature": self.signature,
+            "tokens": self.tokens,
+            "trigrams": self.trigrams,
+        }
+
+    @classmethod
+    def from_payload(cls, payload):
+        if not isinstance(payload, dict) or payload.get("version") != SEARCH_INDEX_VERSION:
+            return None
+        return cls(payload.get("signature") or "", payload.get("tokens") or {}, payload.get("trigrams") or {})
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_payload(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_payload(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+
+def get_search_index(path, entries):
+    # Memory first, then the index saved next to the catalog cache; it is only
+    # rebuilt (and saved again) when the catalog no longer matches it.
+    signature = catalog_signature(entries)
+    with _INDEX_CACHE_LOCK:
+        index = _INDEX_CACHE.get(path)
+    if index is not None and index.signature == signature:
+        return index
+
+    index = SearchIndex.load(path)
+    if index is None or index.signature != signature:
+        index = SearchIndex.build(entries)
+        try:
+            index.save(path)
+        except OSError as exc:
+            print(f"[Índice] No se pudo guardar {os.path.basename(path)}: {exc}")
+    with _INDEX_CACHE_LOCK:
+        _INDEX_CACHE[path] = index
+    return index
@@ -0,0 +1,192 @@
+import hashlib, json, os, threading, time
+
+from config import CONFIG_PATH
+
+
+SOURCE_CACHE_DIR = os.path.join(os.path.dirname(CONFIG_PATH), "cache", "sources")
+SOURCE_CACHE_VERSION = 1
+SOURCE_CACHE_MEMORY_ENTRIES = 512
+SOURCE_CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+SOURCE_CACHE_PRUNE_INTERVAL_SECONDS = 6 * 60 * 60
+SOURCE_CACHE_GRACE_SECONDS = 10 * 60
+
+_MEMORY = {}
+_MEMORY_LOCK = threading.Lock()
+_MISSING = object()
+_PRUNE_THREAD = None
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+def _iter_files(root):
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            yield os.path.join(dirpath, name)
+
+
+def _remember(memory_key, stored):
+    # Plain dicts keep insertion order: re-inserting marks an entry as most
+    # recently used and the first key is the one evicted.
+    with _MEMORY_LOCK:
+        _MEMORY.pop(memory_key, None)
+        _MEMORY[memory_key] = stored
+        while len(_MEMORY) > SOURCE_CACHE_MEMORY_ENTRIES:
+            del _MEMORY[next(iter(_MEMORY))]
+
+
+def _blob_path(content_hash):
+    return os.path.join(SOURCE_CACHE_DIR, "blobs", content_hash[:2], content_hash)
+
+
+def _response_entry_path(namespace, url):
+    return os.path.join(SOURCE_CACHE_DIR, "responses", namespace, f"{_digest(url)}.json")
+
+
+def _json_entry_path(namespace, key):
+    return os.path.join(SOURCE_CACHE_DIR, "results", namespace, f"{_digest(key)}.json")
+
+
+def cached_text(namespace, url, ttl, fetch, validate=None):
+    # Bodies are stored once under their sha256; per-URL entries only point
+    # at a body and remember when it was fetched. validate() can refuse to
+    # store pages such as error or challenge screens.
+    entry_path = _response_entry_path(namespace, url)
+    entry = _read_json(entry_path)
+    if isinstance(entry, dict) and time.time() - float(entry.get("stored_at") or 0) <= ttl:
+        try:
+            with open(_blob_path(entry.get("sha256") or ""), "rb") as f:
+                return f.read().decode("utf-8")
+        except OSError:
+            pass
+
+    text = fetch()
+    if validate is not None and not validate(text):
+        return text
+    body = text.encode("utf-8")
+    content_hash = hashlib.sha256(body).hexdigest()
+    try:
+        if not os.path.exists(_blob_path(content_hash)):
+            _write_atomic(_blob_path(content_hash), body)
+        entry = {"url": url, "sha256": content_hash, "stored_at": time.time(), "ttl": ttl}
+        _write_atomic(entry_path, json.dumps(entry).encode("utf-8"))
+    except OSError as exc:
+        print(f"[Caché] No se pudo guardar {url}: {exc}")
+    return text
+
+
+def forget_text(namespace, url):
+    _remove(_response_entry_path(namespace, url))
+
+
+def cached_json(namespace, key, ttl, compute):
+    # Extracted results are returned as fresh copies, callers may annotate
+    # them. None and empty results mean "nothing found" and are not cached,
+    # one bad parse must not hide a title's links for the whole TTL.
+    now = time.time()
+    memory_key = (namespace, key)
+    with _MEMORY_LOCK:
+        stored = _MEMORY.get(memory_key)
+    if stored is None:
+        entry = _read_json(_json_entry_path(namespace, key))
+        if isinstance(entry, dict) and entry.get("version") == SOURCE_CACHE_VERSION and "value" in entry:
+            stored = (float(entry.get("stored_at") or 0), json.dumps(entry["value"]))
+    if stored is not None:
+        _remember(memory_key, stored)
+    value = _MISSING
+    if stored is not None and now - stored[0] <= ttl:
+        value = json.loads(stored[1])
+    if value is not _MISSING:
+        return value
+
+    value = compute()
+    if not value:
+        return value
+    encoded = json.dumps(value, ensure_ascii=False)
+    _remember(memory_key, (now, encoded))
+    payload = {"version": SOURCE_CACHE_VERSION, "key": key, "stored_at": now, "ttl": ttl, "value": value}
+    try:
+        _write_atomic(_json_entry_path(namespace, key), json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    except OSError as exc:
+        print(f"[Caché] No se pudo guardar {namespace}: {exc}")
+    return json.loads(encoded)
+
+
+def prune_source_cache(now=None):
+    # Drops expired response/result entries, then every blob no remaining
+    # response points at. Fresh files are left alone: a blob is written just
+    # before its entry, and .tmp files may still be renamed into place.
+    now = time.time() if now is None else now
+    removed = 0
+    referenced = set()
+    for kind in ("responses", "results"):
+        for path in _iter_files(os.path.join(SOURCE_CACHE_DIR, kind)):
+            entry = _read_json(path)
+            if not isinstance(entry, dict):
+                try:
+                    expired = now - os.path.getmtime(path) > SOURCE_CACHE_GRACE_SECONDS
+                except OSError:
+                    continue
+            else:
+                ttl = entry.get("ttl", SOURCE_CACHE_MAX_AGE_SECONDS)
+                expired = now - float(entry.get("stored_at") or 0) > min(float(ttl), SOURCE_CACHE_MAX_AGE_SECONDS)
+            if expired:
+                removed += _remove(path)
+            elif kind == "responses" and isinstance(entry, dict):
+                referenced.add(entry.get("sha256"))
+
+    for path in _iter_files(os.path.join(SOURCE_CACHE_DIR, "blobs")):
+        if os.path.basename(path) in referenced:
+            continue
+        try:
+            if now - os.path.getmtime(path) <= SOURCE_CACHE_GRACE_SECONDS:
+                continue
+        except OSError:
+            continue
+        removed += _remove(path)
+    return removed
+
+
+def _prune_loop():
+    while True:
+        try:
+            removed = prune_source_cache()
+            if removed:
+                print(f"[Caché] {removed} archivos caducados eliminados")
+        except Exception as exc:
+            print(f"[Caché] Error limpiando caché: {exc}")
+        time.sleep(SOURCE_CACHE_PRUNE_INTERVAL_SECONDS)
+
+
+def start_pruning():
+    global _PRUNE_THREAD
+    with _MEMORY_LOCK:
+        if _PRUNE_THREAD is None:
+            _PRUNE_THREAD = threading.Thread(target=_prune_loop, name="source-cache-prune", daemon=True)
+            _PRUNE_THREAD.start()
+    return _PRUNE_THREAD
@@ -1,9 +1,10 @@
 from urllib.parse import parse_qs, urlparse
 
-import requests
+from media_search import http_client
 
 
 TMDB_API_KEY = "TU_API_KEY_AQUI"
+TMDB_CACHE_TTL_SECONDS = 60 * 60
 
 
 def normalize_trailer_url(url):
@@ -37,8 +38,7 @@ def search_tmdb(query):
         "language": "es-ES",
         "include_adult": False,
     }
-    response = requests.get(url, params=params)
-    items = response.json().get("results", [])
+    items = http_client.get_json(url, TMDB_CACHE_TTL_SECONDS, params=params, timeout=10).get("results", [])
     return [{
         "source": "TMDb",
         "title": item.get("title") or item.get("name"),
@@ -6,19 +6,20 @@ from PyQt5.QtWidgets import (
     QLabel, QListWidgetItem, QTextEdit, QPushButton,
     QMessageBox, QTreeWidget, QTreeWidgetItem
 )
-from PyQt5.QtGui import QMovie, QPixmap
+from PyQt5.QtGui import QIcon, QMovie, QPixmap
 from PyQt5.QtCore import Qt, QTimer, QSize, QThreadPool, pyqtSignal
-from media_search.anime_sources import search_aniteca, search_1337x, search_nyaa
+from media_search.anime_sources import search_aniteca_series, search_1337x, search_nyaa
 from media_search.game_sources import (
     RAWG_API_KEY,
     search_elamigos,
     search_fitgirl,
     search_steamrip,
-    warm_elamigos_cache,
-    warm_fitgirl_cache,
-    warm_steamrip_cache,
+    get_catalog_scheduler,
+    start_catalog_scheduler,
 )
 from config import DEFAULT_CONFIG, load_config
+from media_search import source_cache
+from media_search.http_client import SOURCE_STATS
 from media_search.dialogs import MEDIA_CATEGORY_PATHS, MediaPathsDialog, TrailerWindow
 from media_search.sources import (
     normalize_trailer_url,
@@ -30,6 +31,11 @@ from media_search.workers import (
 )
 
 logger = logging.getLogger("media_search")
+CATALOG_STATUS_REFRESH_MS = 5000
+SITE_SEARCH_TIMEOUT_MS = 60000
+SITE_SEARCH_TIMEOUTS_MS = {"Nyaa": 20000, "1337x": 35000}
+LINK_RESOLVE_MAX_THREADS = 4
+LAZY_CHILDREN_ROLE = Qt.UserRole + 1
 
 
 def sanitize_folder_name(name):
@@ -37,10 +43,47 @@ def sanitize_folder_name(name):
     cleaned = re.sub(r"\s+", " ", cleaned).strip().rstrip(".")
     return cleaned or "Descarga"
 
+
+def format_catalog_age(age_seconds):
+    if age_seconds is None:
+        return "sin caché"
+    if age_seconds < 60:
+        return "ahora"
+    if age_seconds < 60 * 60:
+        return f"hace {int(age_seconds // 60)} min"
+    if age_seconds < 24 * 60 * 60:
+        return f"hace {int(age_seconds // 3600)} h"
+    return f"hace {int(age_seconds // 86400)} d"
+
+
+def format_catalog_status(snapshot):
+    parts = []
+    for source in snapshot:
+        if source["state"] == "refreshing":
+            status = "actualizando…"
+        elif source["state"] == "error":
+            status = f"error ({format_catalog_age(source['age_seconds'])})"
+        else:
+            status = format_catalog_age(source["age_seconds"])
+        parts.append(f"{source['label']}: {status}")
+    return "Catálogos: " + " · ".join(parts)
+
+def sort_site_results(results):
+    return sorted(
+        results,
+        key=lambda x: (
+            x.get("title").lower(),
+            x.get("url_type").lower(),
+            (x.get("fansub") or "").lower(),
+            int(x.get("resolucion") or 0),
+            int(x.get("chapter") or 0)
+        )
+    )
+
 class MultiChoiceDownloader(QWidget):
     selection_ready = pyqtSignal(list)
 
-    def __init__(self, results_dict, title, download_path):
+    def __init__(self, results_dict, title, download_path, pending_sources=()):
         super().__init__()
         self.setWindowTitle(title)
         self.setGeometry(300, 300, 600, 400)
@@ -48,6 +91,10 @@ class MultiChoiceDownloader(QWidget):
         self.download_path = os.path.join(download_path, sanitize_folder_name(title))
         self.selected_links = []
         self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(LINK_RESOLVE_MAX_THREADS)
+        self.source_groups = {}
+        self.lazy_loads = 0
+        self.confirm_pending = False
 
         self.layout = QVBoxLayout()
         label = QLabel("Selecciona los enlaces para descargar")
@@ -55,54 +102,19 @@ class MultiChoiceDownloader(QWidget):
         self.tree_widget = QTreeWidget()
         self.tree_widget.setHeaderHidden(True)
         self.tree_widget.itemChanged.connect(self.handle_item_changed)
+        self.tree_widget.itemExpanded.connect(self.load_lazy_children)
+        self.spinner_movie = QMovie("spinner.gif")
+        self.spinner_movie.setScaledSize(QSize(16, 16))
+        self.spinner_movie.frameChanged.connect(self.update_spinners)
 
+        for source in pending_sources:
+            self.source_group(source)["state"] = "loading"
+            self.update_group_text(source)
         for source, results in results_dict.items():
-            group_name=f"{source}"
-            if source=="Nyaa" or source=="1337x":
-                group_name+=f" - torrents"
-            group_item = QTreeWidgetItem([group_name])
-            group_item.setFlags(group_item.flags() & ~Qt.ItemIsSelectable)
-            self.tree_widget.addTopLevelItem(group_item)
-
-            aux={}
-            for result in results:
-                # Si los campos vienen vacíos, intento parsear el title plano
-                if not any([result.get("fansub"), result.get("resolucion"), result.get("chapter")]):
-                    parsed = self.parse_release_name(result["title"])
-                    for k, v in parsed.items():
-                        if v and not result.get(k):
-                            result[k] = v
-
-                item_text = self.build_item_text(result)
-                subgroup_text = self.build_subgroup_text(result)
-
-                if subgroup_text and subgroup_text not in aux:
-                    subgroup_item = QTreeWidgetItem([subgroup_text])
-                    subgroup_item.setFlags(subgroup_item.flags() | Qt.ItemIsUserCheckable)
-                    subgroup_item.setCheckState(0, Qt.Unchecked)
-                    subgroup_item.setExpanded(True)
-                    aux[subgroup_text] = subgroup_item
-                    group_item.addChild(aux[subgroup_text])
-
-                password = result.get("password")
-
-                child_item = QTreeWidgetItem([item_text])
-                child_item.setFlags(child_item.flags() | Qt.ItemIsUserCheckable)
-                child_item.setCheckState(0, Qt.Unchecked)
-                child_item.setData(0, Qt.UserRole, {
-                    "title": item_text,
-                    "url": result["url"],
-                    "password": password or "",
-                    "path": self.download_path,
-                })
-                if password:
-                    child_item.setToolTip(0, f"Contrasena: {password}")
-
-                if subgroup_text in aux:
-                    aux[subgroup_text].addChild(child_item)
-                else:
-                    group_item.addChild(child_item)
-            group_item.setExpanded(True)
+            self.add_results(source, results)
+            self.finish_source(source)
+        if pending_sources:
+            self.spinner_movie.start()
 
         self.layout.addWidget(self.tree_widget)
         self.btn_confirm = QPushButton("Descargar seleccionados")
@@ -110,6 +122,115 @@ class MultiChoiceDownloader(QWidget):
         self.layout.addWidget(self.btn_confirm)
         self.setLayout(self.layout)
 
+    def source_group(self, source):
+        if source not in self.source_groups:
+            group_item = QTreeWidgetItem([source])
+            group_item.setFlags(group_item.flags() & ~Qt.ItemIsSelectable)
+            self.tree_widget.addTopLevelItem(group_item)
+            group_item.setExpanded(True)
+            self.source_groups[source] = {"item": group_item, "aux": {}, "urls": set(), "count": 0, "state": "done"}
+        return self.source_groups[source]
+
+    def update_group_text(self, source):
+        group = self.source_groups[source]
+        group_name = f"{source}"
+        if source == "Nyaa" or source == "1337x":
+            group_name += " - torrents"
+        status = {
+            "loading": f"buscando… {group['count']}" if group["count"] else "buscando…",
+            "timeout": "tiempo agotado",
+        }.get(group["state"])
+        if status is None and not group["count"]:
+            status = "sin resultados"
+        group["item"].setText(0, f"{group_name} ({status})" if status else group_name)
+
+    def update_spinners(self, _frame=None):
+        icon = QIcon(self.spinner_movie.currentPixmap())
+        for group in self.source_groups.values():
+            if group["state"] == "loading":
+                group["item"].setIcon(0, icon)
+
+    def add_results(self, source, results):
+        group = self.source_group(source)
+        for result in results:
+            if result["url"] in group["urls"]:
+                continue
+            group["urls"].add(result["url"])
+            group["count"] += 1
+            self.add_result_item(group["item"], group["aux"], result)
+        self.update_group_text(source)
+
+    def finish_source(self, source, results=None, timed_out=False):
+        group = self.source_group(source)
+        if group["state"] == "timeout":
+            return
+        if results is not None:
+            self.add_results(source, sort_site_results(results))
+        group["state"] = "timeout" if timed_out else "done"
+        group["item"].setIcon(0, QIcon())
+        self.update_group_text(source)
+        if not any(item["state"] == "loading" for item in self.source_groups.values()):
+            self.spinner_movie.stop()
+
+    def result_count(self):
+        return sum(group["count"] for group in self.source_groups.values())
+
+    def is_loading(self, source):
+        return self.source_groups.get(source, {}).get("state") == "loading"
+
+    def add_placeholder_item(self, parent, text):
+        placeholder = QTreeWidgetItem([text])
+        placeholder.setFlags(placeholder.flags() & ~Qt.ItemIsUserCheckable)
+        parent.addChild(placeholder)
+        return placeholder
+
+    def add_result_item(self, group_item, aux, result):
+        if result.get("load_children"):
+            series_item = QTreeWidgetItem([result.get("group") or result["title"]])
+            series_item.setFlags(series_item.flags() | Qt.ItemIsUserCheckable)
+            series_item.setCheckState(0, Qt.Unchecked)
+            series_item.setData(0, LAZY_CHILDREN_ROLE, result["load_children"])
+            self.add_placeholder_item(series_item, "Expandir para ver capítulos")
+            group_item.addChild(series_item)
+            return
+
+        # Si los campos vienen vacíos, intento parsear el title plano
+        if not any([result.get("fansub"), result.get("resolucion"), result.get("chapter")]):
+            parsed = self.parse_release_name(result["title"])
+            for k, v in parsed.items():
+                if v and not result.get(k):
+                    result[k] = v
+
+        item_text = self.build_item_text(result)
+        subgroup_text = self.build_subgroup_text(result)
+
+        if subgroup_text and subgroup_text not in aux:
+            subgroup_item = QTreeWidgetItem([subgroup_text])
+            subgroup_item.setFlags(subgroup_item.flags() | Qt.ItemIsUserCheckable)
+            subgroup_item.setCheckState(0, Qt.Unchecked)
+            subgroup_item.setExpanded(True)
+            aux[subgroup_text] = subgroup_item
+            group_item.addChild(aux[subgroup_text])
+
+        password = result.get("password")
+
+        child_item = QTreeWidgetItem([item_text])
+        child_item.setFlags(child_item.flags() | Qt.ItemIsUserCheckable)
+        child_item.setCheckState(0, Qt.Unchecked)
+        child_item.setData(0, Qt.UserRole, {
+            "title": item_text,
+            "url": result["url"],
+            "password": password or "",
+            "path": self.download_path,
+        })
+        if password:
+            child_item.setToolTip(0, f"Contrasena: {password}")
+
+        if subgroup_text in aux:
+            aux[subgroup_text].addChild(child_item)
+        else:
+            group_item.addChild(child_item)
+
     def build_item_text(self, result):
         raw_title = (result.get("title") or "").strip()
         release_name = self.parse_release_name(raw_title)
@@ -194,33 +315,76 @@ class MultiChoiceDownloader(QWidget):
         return data
     
     def handle_item_changed(self, item, column):
+        if item.checkState(0) == Qt.Checked and item.data(0, LAZY_CHILDREN_ROLE):
+            item.setExpanded(True)
         if item.childCount() > 0:
             state = item.checkState(0)
             for i in range(item.childCount()):
                 child = item.child(i)
-                child.setCheckState(0, state)
+                if child.flags() & Qt.ItemIsUserCheckable:
+                    child.setCheckState(0, state)
+
+    def load_lazy_children(self, item):
+        loader = item.data(0, LAZY_CHILDREN_ROLE)
+        if not loader:
+            return
+        item.setData(0, LAZY_CHILDREN_ROLE, None)
+        placeholder = item.child(0)
+        placeholder.setText(0, "Cargando capítulos…")
+        title = item.text(0)
+
+        def load(_query):
+            try:
+                return loader()
+            except Exception as exc:
+                print(f"❌ Error cargando capítulos de {title}: {exc}")
+                return []
+
+        self.lazy_loads += 1
+        worker = SiteSearchWorker(title, load, "")
+        worker.signals.result_ready.connect(lambda _name, results: self.add_lazy_children(item, placeholder, results))
+        self.thread_pool.start(worker)
+
+    def add_lazy_children(self, item, placeholder, results):
+        item.removeChild(placeholder)
+        aux = {}
+        for result in sort_site_results(results):
+            self.add_result_item(item, aux, result)
+        if not results:
+            self.add_placeholder_item(item, "Sin capítulos")
+        if item.checkState(0) == Qt.Checked:
+            self.handle_item_changed(item, 0)
+        self.lazy_loads -= 1
+        if not self.lazy_loads and self.confirm_pending:
+            self.confirm_pending = False
+            self.btn_confirm.setEnabled(True)
+            self.btn_confirm.setText("Descargar seleccionados")
+            self.confirm_selection()
+
+    def iter_checked_links(self, item):
+        for i in range(item.childCount()):
+            child = item.child(i)
+            if child.childCount() > 0:
+                yield from self.iter_checked_links(child)
+            elif child.checkState(0) == Qt.Checked and child.data(0, Qt.UserRole) is not None:
+                yield child
 
     def confirm_selection(self):
+        if self.lazy_loads:
+            # A checked series only has its chapters once its load finishes;
+            # the confirmation continues from add_lazy_children.
+            self.confirm_pending = True
+            self.btn_confirm.setEnabled(False)
+            self.btn_confirm.setText("Cargando capítulos…")
+            return
         self.selected_links = []
         self.pending = 0
         self.results_temp = []
-        top_level_count = self.tree_widget.topLevelItemCount()
         index = 0
-        for i in range(top_level_count):
-            group_item = self.tree_widget.topLevelItem(i)
-            for j in range(group_item.childCount()):
-                child = group_item.child(j)
-
-                if child.childCount() > 0:
-                    for k in range(child.childCount()):
-                        grandchild = child.child(k)
-                        if grandchild.checkState(0) == Qt.Checked:
-                            self.pending += self.procesar_item_si_valido(grandchild, index)
-                            index += 1
-                else:
-                    if child.checkState(0) == Qt.Checked:
-                        self.pending += self.procesar_item_si_valido(child, index)
-                        index += 1
+        for child in self.iter_checked_links(self.tree_widget.invisibleRootItem()):
+            started = self.procesar_item_si_valido(child, index)
+            self.pending += started
+            index += started
         if self.pending == 0:
             print(self.results_temp)
             print(self.selected_links)
@@ -298,6 +462,9 @@ class MediaSearchUI(QWidget):
         self.paths_button.clicked.connect(self.open_paths_dialog)
         top_layout.addWidget(self.paths_button)
         top_layout.addStretch(1)
+        self.catalog_status_label = QLabel()
+        self.catalog_status_label.setStyleSheet("color: gray;")
+        top_layout.addWidget(self.catalog_status_label)
         self.category = "games"
         self.category_combo.setCurrentIndex(next(index for index, (_label, value) in enumerate(self.category_options) if value == self.category))
         layout.addLayout(top_layout)
@@ -407,6 +574,9 @@ class MediaSearchUI(QWidget):
         }
         self.settings_dialog = None
         self.update_search_placeholder()
+        self.catalog_status_timer = QTimer(self)
+        self.catalog_status_timer.timeout.connect(self.update_catalog_status)
+        self.catalog_status_timer.start(CATALOG_STATUS_REFRESH_MS)
         QTimer.singleShot(0, self.preload_download_sources)
 
     def load_download_paths(self, config):
@@ -439,14 +609,20 @@ class MediaSearchUI(QWidget):
             self.search_bar.setPlaceholderText(placeholder)
 
     def preload_download_sources(self):
-        def warmup(_query):
-            warm_elamigos_cache()
-            warm_fitgirl_cache()
-            warm_steamrip_cache()
-            return []
+        start_catalog_scheduler()
+        source_cache.start_pruning()
+        self.update_catalog_status()
 
-        worker = SiteSearchWorker("_startup_elamigos_cache", warmup, "")
-        QThreadPool.globalInstance().start(worker)
+    def update_catalog_status(self):
+        snapshot = get_catalog_scheduler().snapshot()
+        self.catalog_status_label.setText(format_catalog_status(snapshot))
+        errors = [f"{source['label']}: {source['error']}" for source in snapshot if source["error"]]
+        self.catalog_status_label.setToolTip("\n".join(errors))
+
+    def closeEvent(self, event):
+        for line in SOURCE_STATS.summary_lines():
+            print(f"📊 {line}")
+        super().closeEvent(event)
 
     def current_download_path(self):
         return self.download_paths.get(self.category) or DEFAULT_CONFIG[self.category_path_keys[self.category]]
@@ -912,11 +1088,18 @@ class MediaSearchUI(QWidget):
     def download_item(self):
         if not self.current_item:
             return
-        title = re.sub(r"\s*\([^)]*\)\s*$", "", self.current_item.data(Qt.UserRole)['title']).strip()
-        logger.info("UI download_item: source=%s title=%r", (self.current_item.data(Qt.UserRole) or {}).get("source"), title)
+        item_data = self.current_item.data(Qt.UserRole) or {}
+        title = re.sub(r"\s*\([^)]*\)\s*$", "", item_data['title']).strip()
+        logger.info("UI download_item: source=%s title=%r", item_data.get("source"), title)
         if title in self.active_downloads:
             print(f"⏳ Ya se está buscando: {title}")
             return
+
+        item_category = self.category_for_item(item_data)
+        config_key, label = MEDIA_CATEGORY_PATHS[item_category]
+        download_path = self.download_paths.get(item_category) or DEFAULT_CONFIG[config_key]
+        if not self.ensure_download_path(download_path, f"Carpeta de descarga ({label})"):
+            return
         self.active_downloads.add(title)
 
         print(f"📥 Buscar para descarga: {title}")
@@ -924,62 +1107,12 @@ class MediaSearchUI(QWidget):
         self.spinner_movie.start()
         self.download_button.setEnabled(False)
         self.download_button.setText(f"Buscando y cargando enlaces...")
-        
-        self.results_dict = {}
+
         self.total_links_found[title] = 0
         self.update_download_label()
 
-        def update_results(site_name, results):
-            if results:
-                sorted_results = sorted(
-                    results,
-                    key=lambda x: (
-                        x.get("title").lower(),
-                        x.get("url_type").lower(),
-                        (x.get("fansub") or "").lower(),
-                        int(x.get("resolucion") or 0),
-                        int(x.get("chapter") or 0)
-                    )
-                )
-                self.results_dict[site_name] = sorted_results
-                self.total_links_found[title] += len(sorted_results)
-
-            self.pending_sites.discard(site_name)
-            self.update_download_label()
-
-            if not self.pending_sites:
-                QTimer.singleShot(5000, lambda: self.remove_download_entry(title)) 
-                self.spinner_movie.stop()
-                self.spinner_details.setVisible(False)
-                self.active_downloads.discard(title)
-
-                if self.results_dict:
-                    item_category = self.category_for_item(self.current_item.data(Qt.UserRole) or {})
-                    config_key, label = MEDIA_CATEGORY_PATHS[item_category]
-                    download_path = self.download_paths.get(item_category) or DEFAULT_CONFIG[config_key]
-                    if not self.ensure_download_path(download_path, f"Carpeta de descarga ({label})"):
-                        self.download_button.setEnabled(True)
-                        return
-
-                    selector_window = MultiChoiceDownloader(self.results_dict, title, download_path)
-                    self.selector_windows[title] = selector_window
-                    selector_window.show()
-
-                    def handle_selection(entries):
-                        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json", encoding="utf-8") as f:
-                            json.dump(entries, f, indent=2, ensure_ascii=False)
-                            json_path = f.name
-                        subprocess.Popen(["python", "download_manager.py", json_path])
-                        selector_window.close()
-                        del self.selector_windows[title]
-
-                    selector_window.selection_ready.connect(handle_selection)
-                else:
-                    QMessageBox.information(self, "Sin resultados", f"No se encontraron descargas para: {title}")
-
-        pool = QThreadPool.globalInstance()
-        sources = [("Aniteca", search_aniteca), ("Nyaa", search_nyaa), ("1337x", search_1337x)]
-        current_source = (self.current_item.data(Qt.UserRole) or {}).get("source", "")
+        sources = [("Aniteca", search_aniteca_series), ("Nyaa", search_nyaa), ("1337x", search_1337x)]
+        current_source = item_data.get("source", "")
         if current_source == "RAWG":
             sources = [("ElAmigos", search_elamigos), ("FitGirl", search_fitgirl), ("SteamRIP", search_steamrip)]
         elif current_source == "VNDB":
@@ -990,12 +1123,61 @@ class MediaSearchUI(QWidget):
                 ("FitGirl", search_fitgirl),
                 ("SteamRIP", search_steamrip),
             ]
-        self.pending_sites = {name for name, _ in sources}
+        pending_sites = {name for name, _ in sources}
+
+        # The selector opens right away; each source fills its own group as
+        # batches arrive and is closed by its final list or its timeout.
+        selector_window = MultiChoiceDownloader({}, title, download_path, pending_sources=[name for name, _ in sources])
+        self.selector_windows[title] = selector_window
+        selector_window.show()
+
+        def handle_selection(entries):
+            with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, ensure_ascii=False)
+                json_path = f.name
+            subprocess.Popen(["python", "download_manager.py", json_path])
+            selector_window.close()
+            self.selector_windows.pop(title, None)
+
+        selector_window.selection_ready.connect(handle_selection)
+
+        def add_partial_results(site_name, batch):
+            if not selector_window.is_loading(site_name):
+                return
+            selector_window.add_results(site_name, batch)
+            self.total_links_found[title] = selector_window.result_count()
+            self.update_download_label()
 
+        def finish_site(site_name, results=None, timed_out=False):
+            if site_name not in pending_sites:
+                return
+            pending_sites.discard(site_name)
+            if timed_out:
+                print(f"⌛ {site_name} no respondió a tiempo: {title}")
+            selector_window.finish_source(site_name, results or [], timed_out=timed_out)
+            self.total_links_found[title] = selector_window.result_count()
+            self.update_download_label()
+            if pending_sites:
+                return
+
+            QTimer.singleShot(5000, lambda: self.remove_download_entry(title))
+            self.spinner_movie.stop()
+            self.spinner_details.setVisible(False)
+            self.active_downloads.discard(title)
+            if not selector_window.result_count():
+                selector_window.close()
+                self.selector_windows.pop(title, None)
+                QMessageBox.information(self, "Sin resultados", f"No se encontraron descargas para: {title}")
+
+        pool = QThreadPool.globalInstance()
+        streaming_sources = {search_elamigos, search_fitgirl, search_steamrip, search_1337x}
         for name, func in sources:
-            worker = SiteSearchWorker(name, func, title)
-            worker.signals.result_ready.connect(update_results)
+            worker = SiteSearchWorker(name, func, title, stream=func in streaming_sources)
+            worker.signals.partial_results.connect(add_partial_results)
+            worker.signals.result_ready.connect(lambda site_name, results: finish_site(site_name, results))
             pool.start(worker)
+            timeout_ms = SITE_SEARCH_TIMEOUTS_MS.get(name, SITE_SEARCH_TIMEOUT_MS)
+            QTimer.singleShot(timeout_ms, lambda name=name: finish_site(name, timed_out=True))
 
     def open_mods(self):
         if not self.current_item:
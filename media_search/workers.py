@@ -6,16 +6,20 @@ import os
 import re
 import shutil
 import subprocess
-import requests
 from bs4 import BeautifulSoup
 from PyQt5.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QImage, QPixmap
 from config import CONFIG_PATH
+from media_search import http_client
 
 
 IMAGE_CACHE_DIR = os.path.join(os.path.dirname(CONFIG_PATH), "image_cache")
 VNDB_API_URL = "https://api.vndb.org/kana/vn"
 VNDB_RESULTS_PER_PAGE = 20
+JIKAN_CACHE_TTL_SECONDS = 60 * 60
+RAWG_CACHE_TTL_SECONDS = 60 * 60
+MAL_DETAILS_CACHE_TTL_SECONDS = 24 * 60 * 60
+METADATA_TIMEOUT_SECONDS = 15
 logger = logging.getLogger("media_search")
 
 
@@ -71,7 +75,7 @@ class ImageLoaderWorker(QRunnable):
                     img_data = f.read()
             else:
                 logger.debug("ImageLoaderWorker: downloading %s", self.image_url)
-                response = requests.get(self.image_url, timeout=10)
+                response = http_client.get(self.image_url, timeout=10)
                 response.raise_for_status()
                 img_data = response.content
                 with open(cache_path, "wb") as f:
@@ -108,8 +112,13 @@ class FullDetailsWorker(QRunnable):
         full_description = None
         trailer_url = None
         try:
-            resp = requests.get(self.url, headers={"User-Agent": "Mozilla/5.0"})
-            soup = BeautifulSoup(resp.text, "html.parser")
+            page = http_client.get_text(
+                self.url,
+                MAL_DETAILS_CACHE_TTL_SECONDS,
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=METADATA_TIMEOUT_SECONDS,
+            )
+            soup = BeautifulSoup(page, "html.parser")
             second_title_tag = soup.select_one("p[class='title-english title-inherit']")
             if second_title_tag:
                 second_title = second_title_tag.get_text(strip=True)
@@ -127,19 +136,24 @@ class FullDetailsWorker(QRunnable):
 
 class SiteSearchWorkerSignals(QObject):
     result_ready = pyqtSignal(str, list)
+    partial_results = pyqtSignal(str, list)
 
 
 class SiteSearchWorker(QRunnable):
-    def __init__(self, site_name, search_func, query):
+    def __init__(self, site_name, search_func, query, stream=False):
         super().__init__()
         self.site_name = site_name
         self.search_func = search_func
         self.query = query
+        self.stream = stream
         self.signals = SiteSearchWorkerSignals()
 
     def run(self):
         logger.debug("SiteSearchWorker: %s query=%r", self.site_name, self.query)
-        results = self.search_func(self.query)
+        if self.stream:
+            results = self.search_func(self.query, on_results=lambda batch: self.signals.partial_results.emit(self.site_name, batch))
+        else:
+            results = self.search_func(self.query)
         logger.debug("SiteSearchWorker: %s results=%s", self.site_name, len(results) if isinstance(results, list) else "n/a")
         self.signals.result_ready.emit(self.site_name, results)
 
@@ -202,7 +216,7 @@ def search_vndb_visual_novels(query, page=1):
 
     try:
         logger.info("VNDB search start: query=%r page=%s", query, page)
-        response = requests.post(
+        response = http_client.post(
             VNDB_API_URL,
             json=payload,
             headers={
@@ -260,13 +274,17 @@ def search_jikan_mal(query, cat, page=1):
     if cat not in ["anime", "manga"]:
         print("Categoría no válida. Usa 'anime' o 'manga'.")
         return {"items": [], "page": page, "last_page": 1, "total": 0}
-    url = f"https://api.jikan.moe/v4/{cat}?q={query}&limit=25&page={page}"
+    url = f"https://api.jikan.moe/v4/{cat}"
 
     try:
         logger.info("Jikan search start: category=%s query=%r page=%s", cat, query, page)
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        response.raise_for_status()
-        data = response.json()
+        data = http_client.get_json(
+            url,
+            JIKAN_CACHE_TTL_SECONDS,
+            params={"q": query, "limit": 25, "page": page},
+            headers={"User-Agent": "Mozilla/5.0"},
+            timeout=METADATA_TIMEOUT_SECONDS,
+        )
     except Exception as exc:
         logger.exception("Jikan search failed: category=%s query=%r page=%s", cat, query, page)
         print("[MyAnimeList/Jikan] Error:", exc)
@@ -364,9 +382,7 @@ class GameSearchWorker(QRunnable):
 
         try:
             logger.info("RAWG search start: query=%r page=%s", self.query, self.page)
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            payload = response.json()
+            payload = http_client.get_json(url, RAWG_CACHE_TTL_SECONDS, params=params, timeout=10)
             data = payload.get("results", [])
         except Exception as exc:
             logger.exception("RAWG search failed: query=%r page=%s", self.query, self.page)
@@ -428,18 +444,14 @@ class GameDetailsWorker(QRunnable):
         try:
             logger.debug("RAWG details start: game_id=%s", self.game_id)
             details_url = f"https://api.rawg.io/api/games/{self.game_id}"
-            details_response = requests.get(details_url, params={"key": self.api_key}, timeout=10)
-            details_response.raise_for_status()
-            details = details_response.json()
+            details = http_client.get_json(details_url, RAWG_CACHE_TTL_SECONDS, params={"key": self.api_key}, timeout=10)
 
             raw_description = details.get("description") or ""
             if raw_description:
                 description = BeautifulSoup(raw_description, "html.parser").get_text("\n", strip=True)
             if details.get("movies_count", 0) > 0:
                 movies_url = f"https://api.rawg.io/api/games/{self.game_id}/movies"
-                movies_response = requests.get(movies_url, params={"key": self.api_key}, timeout=10)
-                movies_response.raise_for_status()
-                movies = movies_response.json().get("results", [])
+                movies = http_client.get_json(movies_url, RAWG_CACHE_TTL_SECONDS, params={"key": self.api_key}, timeout=10).get("results", [])
                 for movie in movies:
                     movie_data = movie.get("data") or {}
                     trailer_url = movie_data.get("480")
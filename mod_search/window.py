@@ -1783,6 +1783,7 @@ class ModSearchWindow(QWidget):
             "version": version_id,
             "source": "modrinth",
             "filename": filename,
+            "hashes": (option.get("file") or {}).get("hashes") or {},
         }
 
     def add_cart_items(self, items):
@@ -2057,6 +2058,7 @@ class ModSearchWindow(QWidget):
                 "url": item["url"],
                 "path": mods_path,
                 "title": item.get("title") or item.get("filename") or item.get("mod_id") or "Mod",
+                "hashes": item.get("hashes") or {},
             }
             for item in self.cart_items
             if item.get("url")
@@ -1,6 +1,15 @@
+import pytest
+
+from media_search import source_cache
 from media_search.anime_sources import search_1337x, search_nyaa
 
 
+@pytest.fixture(autouse=True)
+def isolated_source_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(source_cache, "SOURCE_CACHE_DIR", str(tmp_path / "sources"))
+    monkeypatch.setattr(source_cache, "_MEMORY", {})
+
+
 class FakeResponse:
     def __init__(self, text):
         self.text = text
@@ -25,7 +34,7 @@ def test_search_nyaa_extracts_torrent_rows(monkeypatch):
         assert "nyaa.si" in url
         return FakeResponse(html)
 
-    monkeypatch.setattr("media_search.anime_sources.requests.get", fake_get)
+    monkeypatch.setattr("media_search.anime_sources.http_client.get", fake_get)
 
     results = search_nyaa("anime pack")
 
@@ -59,14 +68,19 @@ def test_search_1337x_extracts_magnets(monkeypatch):
     """
     detail_html = '<a href="magnet:?xt=urn:btih:1337x1">magnet</a>'
 
+    detail_requests = []
+
     def fake_get(url, headers, timeout):
         if "search" in url:
             return FakeResponse(search_html)
+        detail_requests.append(url)
         return FakeResponse(detail_html)
 
-    monkeypatch.setattr("media_search.anime_sources.requests.get", fake_get)
+    monkeypatch.setattr("media_search.anime_sources.http_client.get", fake_get)
 
     results = search_1337x("test game")
+    assert search_1337x("test game") == results
+    assert detail_requests == ["https://1337x.to/torrent/1/test-game"]
 
     assert results == [
         {
@@ -83,3 +97,35 @@ def test_search_1337x_extracts_magnets(monkeypatch):
             "password": None,
         }
     ]
+
+
+def test_search_1337x_fetches_magnets_concurrently_within_deadline(monkeypatch):
+    import time
+    from media_search import anime_sources
+
+    rows = "".join(
+        f'<tr><td class="coll-1 name"><a href="/cat">cat</a><a href="/torrent/{number}/game-{number}">Game {number}</a></td></tr>'
+        for number in range(6)
+    )
+    delays = {0: 0.3, 1: 0.1, 2: 0.2, 3: 0.1, 4: 0.2, 5: 3.0}
+
+    def fake_get(url, headers, timeout):
+        if "search" in url:
+            return FakeResponse(f"<table>{rows}</table>")
+        number = int(url.split("/")[-2])
+        time.sleep(delays[number])
+        if number == 5:
+            return FakeResponse("<html>still loading</html>")
+        return FakeResponse(f'<a href="magnet:?xt=urn:btih:{number}">magnet</a>')
+
+    monkeypatch.setattr("media_search.anime_sources.http_client.get", fake_get)
+    monkeypatch.setattr(anime_sources, "X1337_SEARCH_DEADLINE_SECONDS", 1)
+    streamed = []
+
+    started = time.monotonic()
+    results = search_1337x("game", on_results=lambda batch: streamed.append((time.monotonic() - started, batch[0]["title"])))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.5
+    assert [result["title"] for result in results] == ["Game 0", "Game 1", "Game 2", "Game 3", "Game 4"]
+    assert streamed[0][0] < 0.3 and len(streamed) == 5
@@ -116,3 +116,53 @@ def test_search_aniteca_builds_deferred_links():
     assert item["url_type"] == "1fichier"
     assert callable(item["url"])
     assert item["url"]() == "https://1fichier.test/file.mkv"
+
+
+def test_search_aniteca_lazy_lists_series_without_chapters():
+    session = FakeSession([
+        {"data": [{"anime_id": 42, "nombre": "Test Anime", "numepisodios": "1"}]},
+        {"data": [{
+            "numcap": 1,
+            "servername": "mediafire",
+            "online_id": "online-1",
+            "password": "",
+            "format": "mkv",
+            "resol": 1080,
+            "idiomas": [],
+            "subtitulos": [],
+            "fansubs": [],
+        }]},
+    ])
+
+    results = anime_sources.search_aniteca("test anime", session=session, lazy=True)
+
+    assert [result["url"] for result in results] == ["aniteca:42"]
+    assert len(session.calls) == 1
+    chapters = results[0]["load_children"]()
+    assert [chapter["chapter"] for chapter in chapters] == [1]
+    assert session.calls[1]["url"].endswith("/getchapters")
+
+
+def test_extract_direct_link_reuses_one_request_per_online_id(monkeypatch):
+    import threading
+
+    monkeypatch.setattr(anime_sources, "_EXTRACTED_LINKS", {})
+    calls = []
+    gate = threading.Event()
+
+    def fake_post(endpoint, payload, session=None, timeout=10):
+        calls.append(payload["id"])
+        gate.wait(1)
+        return {"data2": f"https://mediafire.test/{payload['id']}.zip"}
+
+    monkeypatch.setattr(anime_sources, "_post_aniteca_json", fake_post)
+    links = []
+    threads = [threading.Thread(target=lambda: links.append(anime_sources.extract_direct_link("mediafire", "same-id"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["same-id"]
+    assert links == ["https://mediafire.test/same-id.zip"] * 4
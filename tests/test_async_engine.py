@@ -0,0 +1,107 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+from PyQt5.QtWidgets import QApplication
+
+from download_manager import async_engine, workers
+
+
+BODY = bytes(range(256)) * 4096
+# Kept alive for the whole session: a collected QCoreApplication takes the
+# global QThreadPool down with it.
+QT_APP = []
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(BODY) - 1}/{len(BODY)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(BODY) - start))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(BODY[start:])
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/file.bin"
+    server.shutdown()
+    server.server_close()
+
+
+def wait_with_events(event, timeout):
+    # Signals from the loop thread reach these slots as queued Qt calls,
+    # exactly like in the window, so the test has to pump the event loop.
+    if QCoreApplication.instance() is None:
+        QT_APP.append(QApplication([]))
+    app = QCoreApplication.instance()
+    deadline = time.monotonic() + timeout
+    while not event.is_set() and time.monotonic() < deadline:
+        app.processEvents()
+        event.wait(0.01)
+    return event.is_set()
+
+
+def available_backends():
+    return [backend for backend, module in (("aiohttp", async_engine.aiohttp), ("httpx", async_engine.httpx)) if module]
+
+
+@pytest.mark.parametrize("backend", available_backends() or [pytest.param("", marks=pytest.mark.skip)])
+def test_async_engine_downloads_and_resumes_many_files(tmp_path, server_url, backend):
+    engine = async_engine.AsyncDownloadEngine(backend)
+    done = threading.Event()
+    results = {}
+    targets = [tmp_path / f"file{index}.bin" for index in range(20)]
+    targets[0].write_bytes(BODY[:1000])
+
+    def on_finished(index, ok):
+        results[index] = ok
+        if len(results) == len(targets):
+            done.set()
+
+    hashes = {}
+    signals = workers.DownloadSignals()
+    signals.hashed.connect(lambda index, digests: hashes.__setitem__(index, digests))
+    signals.finished.connect(on_finished)
+    try:
+        for index, target in enumerate(targets):
+            validators = {"etag": '"v1"', "last_modified": "", "size": len(BODY)} if index == 0 else None
+            engine.submit(async_engine.AsyncDownloadJob(server_url, str(target), index, signals, validators=validators))
+        assert wait_with_events(done, 30)
+    finally:
+        engine.shutdown()
+
+    assert all(results.values())
+    assert all(target.read_bytes() == BODY for target in targets)
+    assert hashes[0]["sha256"] == hashlib.sha256(BODY).hexdigest()
+
+
+@pytest.mark.parametrize("backend", available_backends() or [pytest.param("", marks=pytest.mark.skip)])
+def test_async_engine_reports_cancellation(tmp_path, server_url, backend):
+    engine = async_engine.AsyncDownloadEngine(backend)
+    cancelled = threading.Event()
+    signals = workers.DownloadSignals()
+    signals.cancelled.connect(lambda index: cancelled.set())
+    job = async_engine.AsyncDownloadJob(server_url, str(tmp_path / "file.bin"), 1, signals)
+    try:
+        job.cancel()
+        engine.submit(job)
+        assert wait_with_events(cancelled, 10)
+    finally:
+        engine.shutdown()
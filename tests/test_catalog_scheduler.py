@@ -0,0 +1,145 @@
+import os
+import time
+
+from media_search import game_sources
+from media_search.catalog_scheduler import CATALOG_RETRY_SECONDS, CatalogScheduler
+from media_search.window import format_catalog_status
+
+
+def _source(label, path, ttl, refresh):
+    return {"label": label, "ttl": ttl, "refresh": refresh, "cache_path": lambda: str(path)}
+
+
+def test_scheduler_refreshes_due_catalogs_in_background(tmp_path):
+    fresh_path = tmp_path / "fresh.html"
+    stale_path = tmp_path / "stale.html"
+    fresh_path.write_text("fresh", encoding="utf-8")
+    stale_path.write_text("stale", encoding="utf-8")
+    os.utime(stale_path, (time.time() - 7200, time.time() - 7200))
+    refreshed = []
+
+    def refresh_stale(force_refresh=False):
+        refreshed.append(force_refresh)
+        stale_path.write_text("new", encoding="utf-8")
+        return True
+
+    def refresh_missing(force_refresh=False):
+        raise RuntimeError("offline")
+
+    scheduler = CatalogScheduler({
+        "fresh": _source("Fresh", fresh_path, 3600, lambda force_refresh=False: refreshed.append("fresh")),
+        "stale": _source("Stale", stale_path, 3600, refresh_stale),
+        "missing": _source("Missing", tmp_path / "missing.html", 3600, refresh_missing),
+    })
+
+    due = scheduler.tick()
+    for name in due:
+        while scheduler.states[name]["state"] == "refreshing":
+            time.sleep(0.01)
+    states = {source["name"]: source for source in scheduler.snapshot()}
+
+    assert sorted(due) == ["missing", "stale"]
+    assert refreshed == [True]
+    assert states["stale"]["state"] == "idle" and states["stale"]["age_seconds"] < 60
+    assert states["missing"]["state"] == "error" and states["missing"]["error"] == "offline"
+    assert scheduler.tick() == []
+    assert 3600 * 0.9 <= scheduler.states["stale"]["next_refresh_at"] - scheduler.states["stale"]["refreshed_at"] <= 3600 * 1.1
+
+
+def test_search_serves_stale_catalog_while_scheduler_refreshes(monkeypatch, tmp_path):
+    list_path = tmp_path / "steamrip_games_list.html"
+    list_path.write_text('<a href="https://steamrip.com/test-game-free-download/">Test Game</a>', encoding="utf-8")
+    os.utime(list_path, (time.time() - 2 * game_sources.ELAMIGOS_CACHE_MAX_AGE_SECONDS,) * 2)
+    requested = []
+
+    class RunningScheduler:
+        running = True
+
+        def refresh_if_due(self, name):
+            requested.append(name)
+
+    monkeypatch.setattr(game_sources, "ELAMIGOS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(game_sources, "STEAMRIP_GAMES_LIST_CACHE_PATH", str(list_path))
+    monkeypatch.setattr(game_sources, "_PARSED_CATALOGS", {})
+    monkeypatch.setattr(game_sources, "_CATALOG_SCHEDULER", RunningScheduler())
+    monkeypatch.setattr(game_sources, "_fetch_steamrip_games_list", lambda: (_ for _ in ()).throw(AssertionError("blocking refresh")))
+    monkeypatch.setattr(
+        game_sources,
+        "_extract_steamrip_detail_links",
+        lambda detail_url, game_title: [game_sources._build_download_result(game_title, "GOFILE", f"{detail_url}download", "gofile.io")],
+    )
+
+    results = game_sources.search_steamrip("test game")
+
+    assert results[0]["title"] == "Test Game"
+    assert requested and set(requested) == {"steamrip"}
+
+
+def test_format_catalog_status_shows_state_and_age():
+    text = format_catalog_status([
+        {"label": "ElAmigos", "state": "idle", "age_seconds": 2 * 3600 + 5, "error": ""},
+        {"label": "FitGirl", "state": "refreshing", "age_seconds": None, "error": ""},
+        {"label": "SteamRIP", "state": "error", "age_seconds": 300, "error": "offline"},
+    ])
+
+    assert text == "Catálogos: ElAmigos: hace 2 h · FitGirl: actualizando… · SteamRIP: error (hace 5 min)"
+
+
+def test_scheduler_backs_off_after_failures_and_unchanged_caches(tmp_path):
+    now = [100000.0]
+    path = tmp_path / "catalog.html"
+    path.write_text("old", encoding="utf-8")
+    os.utime(path, (now[0] - 7200, now[0] - 7200))
+    outcomes = [False, False, True]
+
+    scheduler = CatalogScheduler(
+        {"site": _source("Site", path, 3600, lambda force_refresh=False: outcomes.pop(0))},
+        jitter=0,
+        clock=lambda: now[0],
+    )
+    delays = []
+    for _ in range(3):
+        scheduler.request_refresh("site", wait=True)
+        delays.append(scheduler.states["site"]["next_refresh_at"] - now[0])
+
+    assert delays == [CATALOG_RETRY_SECONDS, 2 * CATALOG_RETRY_SECONDS, 3600]
+    assert scheduler.tick() == []
+
+
+def test_searches_do_not_restart_a_refresh_that_just_failed(tmp_path):
+    now = [100000.0]
+    path = tmp_path / "catalog.html"
+    path.write_text("old", encoding="utf-8")
+    os.utime(path, (now[0] - 7200, now[0] - 7200))
+    calls = []
+
+    def refresh(force_refresh=False):
+        calls.append(force_refresh)
+        return False
+
+    scheduler = CatalogScheduler({"site": _source("Site", path, 3600, refresh)}, jitter=0, clock=lambda: now[0])
+    assert scheduler.refresh_if_due("site")
+    while scheduler.states["site"]["state"] == "refreshing":
+        time.sleep(0.01)
+
+    assert scheduler.refresh_if_due("site") is False
+    now[0] += CATALOG_RETRY_SECONDS
+    assert scheduler.refresh_if_due("site")
+    while scheduler.states["site"]["state"] == "refreshing":
+        time.sleep(0.01)
+    assert len(calls) == 2
+
+
+def test_forced_refresh_reports_network_failure_despite_stale_cache(monkeypatch, tmp_path):
+    list_path = tmp_path / "steamrip_games_list.html"
+    list_path.write_text('<a href="https://steamrip.com/test-game-free-download/">Test Game</a>', encoding="utf-8")
+    os.utime(list_path, (time.time() - 8 * 3600,) * 2)
+    monkeypatch.setattr(game_sources, "ELAMIGOS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(game_sources, "STEAMRIP_GAMES_LIST_CACHE_PATH", str(list_path))
+    monkeypatch.setattr(game_sources, "_PARSED_CATALOGS", {})
+    monkeypatch.setattr(game_sources, "_fetch_steamrip_games_list", lambda: (_ for _ in ()).throw(RuntimeError("offline")))
+
+    assert game_sources._cache_is_fresh(str(list_path), "steamrip")
+    assert not game_sources._cache_is_fresh(str(list_path), "elamigos")
+    assert game_sources.warm_steamrip_cache(force_refresh=True) is False
+    assert game_sources.warm_steamrip_cache() is True
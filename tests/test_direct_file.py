@@ -0,0 +1,101 @@
+import threading
+
+from download_manager import direct_file
+
+
+class FakeResponse:
+    def __init__(self, url, status_code, headers):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+
+    def close(self):
+        return None
+
+
+class FakeProbeSession:
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def head(self, url, allow_redirects, timeout, headers):
+        with self._lock:
+            self.calls.append(("HEAD", url))
+        if "attachment" in url:
+            return FakeResponse(url, 200, {
+                "Content-Disposition": 'attachment; filename="Game Setup.exe"',
+                "Content-Length": "4096",
+                "Accept-Ranges": "bytes",
+                "ETag": '"abc"',
+            })
+        return FakeResponse(url, 405, {})
+
+    def get(self, url, stream, allow_redirects, timeout, headers):
+        with self._lock:
+            self.calls.append(("GET", url, headers.get("Range")))
+        return FakeResponse(f"{url}?signed=1", 206, {"Content-Range": "bytes 0-0/1024"})
+
+
+def test_probe_direct_files_batches_urls_and_reuses_cache(monkeypatch):
+    monkeypatch.setattr(direct_file, "_PROBE_CACHE", {})
+    session = FakeProbeSession()
+    urls = [
+        "https://files.example/attachment",
+        "https://files.example/pub/Part%201.rar",
+        "https://files.example/attachment",
+    ]
+
+    probes = direct_file.probe_direct_files(urls, max_workers=2, session=session)
+
+    assert probes["https://files.example/attachment"] == {
+        "final_url": "https://files.example/attachment",
+        "filename": "Game Setup.exe",
+        "size": 4096,
+        "accept_ranges": True,
+        "etag": '"abc"',
+        "last_modified": "",
+    }
+    assert probes["https://files.example/pub/Part%201.rar"]["filename"] == "Part 1.rar"
+    assert probes["https://files.example/pub/Part%201.rar"]["size"] == 1024
+    assert probes["https://files.example/pub/Part%201.rar"]["accept_ranges"] is True
+    assert ("GET", "https://files.example/pub/Part%201.rar", "bytes=0-0") in session.calls
+    assert len(session.calls) == 3
+
+    direct_file.probe_direct_files(urls[:2], session=session)
+    assert len(session.calls) == 3
+
+
+def test_probe_direct_files_does_not_cache_failed_or_expired_probes(monkeypatch):
+    monkeypatch.setattr(direct_file, "_PROBE_CACHE", {})
+    session = FakeProbeSession()
+    failing = {"https://files.example/down"}
+    original_get = session.get
+
+    def get(url, stream, allow_redirects, timeout, headers):
+        if url in failing:
+            with session._lock:
+                session.calls.append(("GET", url, headers.get("Range")))
+            raise ConnectionError("reset")
+        return original_get(url, stream, allow_redirects, timeout, headers)
+
+    session.get = get
+    url = "https://files.example/down"
+
+    failed = direct_file.probe_direct_files([url], session=session)
+    failing.clear()
+    recovered = direct_file.probe_direct_files([url], session=session)
+    monkeypatch.setattr(direct_file, "DIRECT_PROBE_CACHE_TTL_SECONDS", -1)
+    direct_file.probe_direct_files([url], session=session)
+
+    assert failed[url]["size"] == 0
+    assert recovered[url]["size"] == 1024
+    assert [call[0] for call in session.calls] == ["HEAD", "GET", "HEAD", "GET", "HEAD", "GET"]
+
+
+def test_probe_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(direct_file, "_PROBE_CACHE", {})
+    monkeypatch.setattr(direct_file, "DIRECT_PROBE_CACHE_MAX_ENTRIES", 2)
+
+    direct_file.probe_direct_files([f"https://files.example/attachment/{number}" for number in range(3)], session=FakeProbeSession())
+
+    assert list(direct_file._PROBE_CACHE) == ["https://files.example/attachment/1", "https://files.example/attachment/2"]
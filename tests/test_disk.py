@@ -0,0 +1,31 @@
+from download_manager import disk
+
+
+def test_remaining_bytes_counts_only_unwritten_unallocated_space(tmp_path):
+    part = tmp_path / "game.part1.rar"
+    part.write_bytes(b"x" * 300)
+
+    assert disk.remaining_bytes({"size": 1000}, str(part)) == 700
+    assert disk.remaining_bytes({"size": 1000, "preallocated": True}, str(part)) == 0
+    assert disk.remaining_bytes({"size": 0}, str(part)) == 0
+    assert disk.remaining_bytes({"size": 1000}, str(tmp_path / "missing.bin")) == 1000
+
+
+def test_disk_shortfall_includes_reserved_space_and_margin(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk, "free_space", lambda path: 10_000)
+    target = str(tmp_path / "new" / "folder" / "file.bin")
+
+    assert disk.disk_shortfall(target, 4_000, reserved=5_000, margin=500) == 0
+    assert disk.disk_shortfall(target, 4_000, reserved=6_000, margin=500) == 500
+    assert disk.disk_shortfall(target, 0, reserved=50_000) == 0
+    assert disk.existing_parent(target) == str(tmp_path)
+
+
+def test_preallocate_file_reserves_full_size(tmp_path):
+    target = tmp_path / "file.bin"
+    with open(target, "wb") as fh:
+        disk.preallocate_file(fh, 4096)
+        fh.write(b"head")
+
+    assert target.stat().st_size == 4096
+    assert target.read_bytes()[:4] == b"head"
@@ -0,0 +1,71 @@
+import requests
+
+from benchmarks import download_benchmark
+from benchmarks.http_server import LocalFileServer, file_bytes, file_etag, served_file
+from download_manager.direct_file import probe_direct_file
+
+
+def test_local_server_serves_ranges_names_and_failures():
+    spec = served_file("data.bin", 300000, content_disposition="Juego Setup.exe",
+                       fail_statuses=[503], retry_after="1")
+    with LocalFileServer([spec]) as server:
+        url = server.url("data.bin")
+        throttled = requests.get(url, timeout=5)
+        probe = probe_direct_file(url)
+        ranged = requests.get(url, headers={"Range": "bytes=1000-", "If-Range": file_etag(spec)}, timeout=5)
+        stale = requests.get(url, headers={"Range": "bytes=1000-", "If-Range": '"old"'}, timeout=5)
+        past_end = requests.get(url, headers={"Range": "bytes=300000-"}, timeout=5)
+
+    assert throttled.status_code == 503 and throttled.headers["Retry-After"] == "1"
+    assert probe["filename"] == "Juego Setup.exe" and probe["size"] == 300000
+    assert ranged.status_code == 206 and ranged.content == file_bytes(spec, 1000)
+    assert stale.status_code == 200 and len(stale.content) == 300000
+    assert past_end.status_code == 416
+
+
+def test_worker_engines_resume_after_disconnects(tmp_path):
+    for engine in download_benchmark.ENGINES:
+        specs = download_benchmark.build_specs(3, 400000, flaky=2)
+        folder = tmp_path / engine
+        folder.mkdir()
+        with LocalFileServer(specs) as server:
+            result = download_benchmark.run_worker_driver(server, specs, str(folder), engine, max_parallel=2)
+            ranged = [request for request in server.requests if request["range"]]
+
+        assert result["resume_ok"]
+        assert result["requests"] == 5
+        assert len(ranged) == 2 and all(request["if_range"] for request in ranged)
+
+
+def test_tui_download_path_resumes_after_disconnect(tmp_path, monkeypatch):
+    monkeypatch.setattr("download_manager.retry.DEFAULT_RETRY_POLICY.base_delay", 0.01)
+    specs = download_benchmark.build_specs(2, 300000, flaky=1)
+    with LocalFileServer(specs) as server:
+        result = download_benchmark.run_tui_driver(server, specs, str(tmp_path), max_parallel=2)
+        ranged = [request for request in server.requests if request["range"]]
+
+    assert result["resume_ok"]
+    assert len(ranged) == 1
+
+
+def test_window_scheduler_respects_parallel_slots(tmp_path, monkeypatch):
+    monkeypatch.setattr("download_manager.retry.DEFAULT_RETRY_POLICY.base_delay", 0.01)
+    specs = download_benchmark.build_specs(5, 200000, bandwidth=2000000, flaky=1)
+    with LocalFileServer(specs) as server:
+        result = download_benchmark.run_window_driver(server, specs, str(tmp_path), max_parallel=2)
+
+        assert server.peak_streams == 2
+    assert result["resume_ok"]
+    assert result["ui_busy_s"] is not None
+
+
+def test_regressions_flag_slow_or_broken_runs():
+    results = [
+        {"driver": "worker", "engine": "threads", "mb_s": 50.0, "cpu_s_per_gib": 4.0, "ui_busy_s": 0.1, "resume_ok": True},
+        {"driver": "window", "engine": "asyncio", "mb_s": 5.0, "cpu_s_per_gib": 9.0, "ui_busy_s": 2.0, "resume_ok": False},
+    ]
+
+    problems = download_benchmark.regressions(results, min_mb_s=10, max_cpu_s_per_gib=8, max_ui_busy_s=1)
+
+    assert len(problems) == 4
+    assert all(problem.startswith("window/asyncio") for problem in problems)
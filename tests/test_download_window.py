@@ -0,0 +1,79 @@
+import os
+
+from benchmarks import download_benchmark
+
+
+def test_cancelling_a_verifying_part_keeps_it_resumable(tmp_path):
+    from download_manager.window import DownloadWindow
+
+    download_benchmark.ensure_app()
+    folder = str(tmp_path)
+    with download_benchmark.isolated_state(folder, max_parallel=1):
+        window = DownloadWindow([])
+        try:
+            window.load_entries([{
+                "title": "parte.bin",
+                "url": "http://127.0.0.1:9/parte.bin",
+                "path": folder,
+                "download_type": "regular",
+                "direct_links": [{"path": os.path.join(folder, "parte.bin"), "url": "http://127.0.0.1:9/parte.bin"}],
+            }])
+            entry_id, entry = next(iter(window.entries.items()))
+            link = entry["direct_links"][0]
+            link["status"] = "verifying"
+
+            window.cancel_entry(entry_id)
+            cancelled = link["status"]
+            window.resume_entry(entry_id)
+        finally:
+            window.shutdown_app()
+            window.deleteLater()
+
+    assert cancelled == "cancelled"
+    assert link["status"] != "finished"
+
+
+def test_corrupt_archive_retry_waits_for_other_parts_and_deletes_the_failing_set(tmp_path):
+    from download_manager.window import DownloadWindow
+
+    download_benchmark.ensure_app()
+    folder = str(tmp_path)
+    names = ["A.part1.rar", "A.part2.rar", "B.part1.rar"]
+    for name in names:
+        (tmp_path / name).write_bytes(b"Rar!\x1a\x07\x00" + b"\x00" * 64)
+    with download_benchmark.isolated_state(folder, max_parallel=1):
+        window = DownloadWindow([])
+        try:
+            window.load_entries([{
+                "title": "A",
+                "url": "http://127.0.0.1:9/A",
+                "path": folder,
+                "download_type": "regular",
+                "direct_links": [
+                    {"path": os.path.join(folder, name), "url": f"http://127.0.0.1:9/{name}",
+                     "status": "downloading" if name == "B.part1.rar" else "finished"}
+                    for name in names
+                ],
+            }])
+            entry_id, entry = next(iter(window.entries.items()))
+            window.max_parallel_downloads = 0
+            window.worker_context[99] = (entry_id, 2)
+
+            deferred = window.retry_corrupt_archive_download(
+                entry, "CRC Failed in A", os.path.join(folder, "A.part1.rar")
+            )
+            links_while_busy = len(entry["direct_links"])
+            kept_while_busy = sorted(os.listdir(folder))
+
+            window.worker_context.clear()
+            window.run_scheduler()
+        finally:
+            window.shutdown_app()
+            window.deleteLater()
+
+    assert deferred
+    assert links_while_busy == 3
+    assert {"A.part1.rar", "A.part2.rar"} <= set(kept_while_busy)
+    assert entry["direct_links"] == [] and entry["archive_retry_count"] == 1
+    assert "pending_archive_retry" not in entry
+    assert sorted(name for name in os.listdir(folder) if name.endswith(".rar")) == ["B.part1.rar"]
@@ -0,0 +1,123 @@
+import os
+import zipfile
+
+import pytest
+
+from download_manager import extraction
+
+
+def test_group_archive_sets_waits_for_every_volume_of_a_set():
+    items = [
+        ("/dl/Game.part2.rar", True),
+        ("/dl/Game.part1.rar", True),
+        ("/dl/Game.part3.rar", False),
+        ("/dl/Bonus.zip", True),
+        ("/dl/Music.7z.002", True),
+        ("/dl/Music.7z.001", True),
+        ("/dl/readme.txt", True),
+    ]
+
+    sets = {os.path.basename(item["first"]): item for item in extraction.group_archive_sets(items)}
+
+    assert set(sets) == {"Game.part1.rar", "Bonus.zip", "Music.7z.001"}
+    assert sets["Game.part1.rar"]["ready"] is False
+    assert sets["Game.part1.rar"]["volumes"] == ["/dl/Game.part1.rar", "/dl/Game.part2.rar", "/dl/Game.part3.rar"]
+    assert sets["Bonus.zip"]["ready"] is True
+    assert sets["Music.7z.001"]["ready"] is True
+
+
+def test_group_archive_sets_needs_first_volume_on_disk():
+    sets = extraction.group_archive_sets([("/dl/Old.r00", True), ("/dl/Old.r01", True)])
+
+    assert sets[0]["ready"] is False
+
+
+def test_volume_download_order_prioritizes_first_parts_per_set():
+    paths = [
+        "A.part10.rar",
+        "A.part2.rar",
+        "A.part1.rar",
+        "notes.txt",
+        "B.part2.rar",
+        "B.part1.rar",
+    ]
+
+    order = [paths[index] for index in extraction.volume_download_order(paths)]
+
+    assert order == ["A.part1.rar", "A.part2.rar", "A.part10.rar", "B.part1.rar", "B.part2.rar", "notes.txt"]
+
+
+def test_parse_7z_progress_reads_last_percentage_of_redraw():
+    assert extraction.parse_7z_progress("\b\b\b\b  7% 2 - a.bin\b\b\b\b 12% 3 - b.bin") == 12
+    assert extraction.parse_7z_progress("Everything is Ok") is None
+
+
+def test_extract_zip_native_streams_members_with_progress(tmp_path):
+    archive_path = tmp_path / "Bonus.zip"
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("Bonus/readme.txt", "hola" * 100)
+        archive.writestr("Bonus/data/level.bin", b"\x00" * 5000)
+    output_dir = tmp_path / "out"
+    progress = []
+
+    extraction.extract_zip_native(str(archive_path), str(output_dir), progress_callback=progress.append)
+
+    assert (output_dir / "Bonus" / "readme.txt").read_text() == "hola" * 100
+    assert (output_dir / "Bonus" / "data" / "level.bin").stat().st_size == 5000
+    assert progress[-1] == 100
+    assert progress == sorted(progress)
+
+
+def test_extract_zip_native_rejects_paths_outside_output(tmp_path):
+    archive_path = tmp_path / "evil.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("../escape.txt", "x")
+
+    with pytest.raises(ValueError):
+        extraction.extract_zip_native(str(archive_path), str(tmp_path / "out"))
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def test_native_backend_leaves_multivolume_sets_to_external_tool(tmp_path):
+    (tmp_path / "Split.z01").write_bytes(b"")
+
+    assert extraction.native_backend_for(str(tmp_path / "Bonus.zip")) == "zip"
+    assert extraction.native_backend_for(str(tmp_path / "Split.zip")) == ""
+    assert extraction.native_backend_for(str(tmp_path / "Game.part1.zip")) == ""
+    assert extraction.native_backend_for(str(tmp_path / "Game.rar")) == ""
+
+
+def test_password_candidates_merge_entry_password_and_hints_file(tmp_path):
+    (tmp_path / "__passwords__.txt").write_text("[Juego]\nclave1\n\n[Otro]\nsecreto\n", encoding="utf-8")
+
+    assert extraction.password_candidates(" secreto ", str(tmp_path)) == ["secreto", "clave1"]
+
+
+def test_check_archive_volume_flags_html_pages_and_bad_headers(tmp_path):
+    html_part = tmp_path / "Game.part2.rar"
+    html_part.write_bytes(b"<!DOCTYPE html><html><body>File not found</body></html>")
+    good_part = tmp_path / "Game.part1.rar"
+    good_part.write_bytes(b"Rar!\x1a\x07\x01\x00" + b"\x00" * 32)
+    bad_part = tmp_path / "Game.part3.rar"
+    bad_part.write_bytes(b"\x00" * 64)
+    continuation = tmp_path / "Music.7z.002"
+    continuation.write_bytes(b"\x13\x37" * 32)
+
+    assert "HTML" in extraction.check_archive_volume(str(html_part), deep=False)
+    assert extraction.check_archive_volume(str(good_part), deep=False) == ""
+    assert extraction.check_archive_volume(str(bad_part), deep=False) == "cabecera de comprimido inválida"
+    assert extraction.check_archive_volume(str(continuation), deep=False) == ""
+
+
+def test_check_archive_volume_detects_zip_crc_damage(tmp_path):
+    archive_path = tmp_path / "Bonus.zip"
+    payload = b"0123456789" * 100
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr("data.bin", payload)
+    raw = bytearray(archive_path.read_bytes())
+    offset = raw.index(payload)
+    raw[offset] ^= 0xFF
+    archive_path.write_bytes(bytes(raw))
+
+    assert extraction.check_archive_volume(str(archive_path), deep=False) == ""
+    assert extraction.check_archive_volume(str(archive_path)) == "CRC inválido en data.bin"
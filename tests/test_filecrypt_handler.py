@@ -0,0 +1,68 @@
+import threading
+
+from download_manager import filecrypt_handler
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, text=""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+        self.is_redirect = status_code in {301, 302, 303, 307, 308}
+
+    def close(self):
+        return None
+
+
+class FakeFileCryptSession:
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers, timeout, allow_redirects):
+        with self._lock:
+            self.requests.append((url, headers.get("Referer")))
+        code = url.rsplit("/", 1)[-1].split(".")[0]
+        if "/Link/" in url:
+            if code == "DEAD01":
+                return FakeResponse(404)
+            return FakeResponse(200, text=f"<script>top.location.href = '/index.php?Action=Go&id={code}';</script>")
+        code = url.rsplit("=", 1)[-1]
+        return FakeResponse(302, {"Location": f"https://rapidgator.net/file/{code.lower()}"})
+
+
+def test_resolve_filecrypt_links_follows_go_redirects_in_parallel():
+    session = FakeFileCryptSession()
+    links = [
+        "https://filecrypt.cc/Link/ABC123.html",
+        "https://filecrypt.cc/Link/DEF456.html",
+        "https://filecrypt.cc/Link/DEAD01.html",
+    ]
+
+    targets = filecrypt_handler.resolve_filecrypt_links(
+        links,
+        session,
+        referer="https://filecrypt.cc/Container/XYZ.html",
+        max_workers=3,
+    )
+
+    assert targets == {
+        "https://filecrypt.cc/Link/ABC123.html": "https://rapidgator.net/file/abc123",
+        "https://filecrypt.cc/Link/DEF456.html": "https://rapidgator.net/file/def456",
+        "https://filecrypt.cc/Link/DEAD01.html": "",
+    }
+    assert ("https://filecrypt.cc/index.php?Action=Go&id=ABC123", "https://filecrypt.cc/Link/ABC123.html") in session.requests
+
+
+def test_filecrypt_link_cache_round_trip_and_expiry(monkeypatch, tmp_path):
+    monkeypatch.setattr(filecrypt_handler, "FILECRYPT_CACHE_PATH", str(tmp_path / "cache" / "filecrypt_links.json"))
+    container = "https://filecrypt.cc/Container/XYZ.html"
+    links = ["https://rapidgator.net/file/abc123", "https://rapidgator.net/file/def456"]
+
+    filecrypt_handler.store_cached_filecrypt_links(container, links)
+
+    assert filecrypt_handler.load_cached_filecrypt_links(container) == links
+    assert filecrypt_handler.load_cached_filecrypt_links("https://filecrypt.cc/Container/OTHER.html") is None
+
+    monkeypatch.setattr(filecrypt_handler, "FILECRYPT_CACHE_MAX_AGE_SECONDS", -1)
+    assert filecrypt_handler.load_cached_filecrypt_links(container) is None
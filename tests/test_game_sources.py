@@ -1,5 +1,24 @@
 from media_search import game_sources
 import json
+import os
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_catalog_cache(monkeypatch, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(game_sources, "ELAMIGOS_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(game_sources, "ELAMIGOS_INDEX_CACHE_PATH", str(cache_dir / "elamigos_home.html"))
+    monkeypatch.setattr(game_sources, "ELAMIGOS_RAW_INDEX_PATH", str(cache_dir / "ElAmigosReleases-RAW.txt"))
+    monkeypatch.setattr(game_sources, "STEAMRIP_GAMES_LIST_CACHE_PATH", str(cache_dir / "steamrip_games_list.html"))
+    monkeypatch.setattr(game_sources, "FITGIRL_INDEX_CACHE_PATH", str(cache_dir / "fitgirl_index.json"))
+    monkeypatch.setattr(game_sources, "FITGIRL_INDEX_STATE_PATH", str(cache_dir / "fitgirl_index_state.json"))
+    monkeypatch.setattr(game_sources, "_PARSED_CATALOGS", {})
+    monkeypatch.setattr(game_sources.source_cache, "SOURCE_CACHE_DIR", str(cache_dir / "sources"))
+    monkeypatch.setattr(game_sources.source_cache, "_MEMORY", {})
+    return cache_dir
 
 
 def test_search_elamigos_uses_best_match(monkeypatch):
@@ -165,3 +184,188 @@ def test_load_fitgirl_index_skips_empty_intermediate_pages(monkeypatch, tmp_path
         ["Test Game 1", "https://fitgirl-repacks.site/test-game-1/"],
         ["Test Game 3", "https://fitgirl-repacks.site/test-game-3/"],
     ]
+
+
+def test_steamrip_catalog_is_parsed_once_per_cache_file(monkeypatch, isolated_catalog_cache):
+    list_path = isolated_catalog_cache / "steamrip_games_list.html"
+    list_path.write_text('<a href="https://steamrip.com/test-game-free-download/">Test Game</a>', encoding="utf-8")
+    parses = []
+    original_extract = game_sources._extract_steamrip_index_entries
+    monkeypatch.setattr(game_sources, "_extract_steamrip_index_entries", lambda html: parses.append(True) or original_extract(html))
+    monkeypatch.setattr(
+        game_sources,
+        "_extract_steamrip_detail_links",
+        lambda detail_url, game_title: [game_sources._build_download_result(game_title, "GOFILE", f"{detail_url}download", "gofile.io")],
+    )
+
+    first = game_sources.search_steamrip("test game")
+    second = game_sources.search_steamrip("test game")
+    monkeypatch.setattr(game_sources, "_PARSED_CATALOGS", {})
+    from_disk = game_sources.search_steamrip("test game")
+    list_path.write_text('<a href="https://steamrip.com/new-game-free-download/">New Game</a>', encoding="utf-8")
+    stat = os.stat(list_path)
+    os.utime(list_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    changed = game_sources.search_steamrip("new game")
+
+    assert first == second == from_disk
+    assert changed[0]["title"] == "New Game"
+    assert len(parses) == 2
+
+
+def test_search_elamigos_parses_homepage_once_for_all_candidates(monkeypatch):
+    monkeypatch.setattr(game_sources, "_load_elamigos_raw_index", lambda force_refresh=False: "Test Game ElAmigos\nTest Game Deluxe ElAmigos")
+    html_loads = []
+
+    def load_homepage(force_refresh=False):
+        html_loads.append(force_refresh)
+        return """
+        <h3><a href="/data/test-game">Test Game Download</a></h3>
+        <h3><a href="/data/test-game-deluxe">Test Game Deluxe Download</a></h3>
+        """
+
+    monkeypatch.setattr(game_sources, "_load_elamigos_index_html", load_homepage)
+    monkeypatch.setattr(
+        game_sources,
+        "_extract_elamigos_detail_links",
+        lambda detail_url, game_title: [game_sources._build_download_result(game_title, "DDOWNLOAD", f"{detail_url}/mirror", "ddownload.com")],
+    )
+
+    results = game_sources.search_elamigos("test game")
+
+    assert [result["url"] for result in results] == [
+        "https://elamigos.site/data/test-game/mirror",
+        "https://elamigos.site/data/test-game-deluxe/mirror",
+    ]
+    assert len(html_loads) == 1
+
+
+def _fitgirl_front_page(*slugs):
+    return "".join(
+        f'<article class="post category-lossless-repack"><h1 class="entry-title">'
+        f'<a href="https://fitgirl-repacks.site/{slug}/">{slug.replace("-", " ").title()}</a></h1></article>'
+        for slug in slugs
+    )
+
+
+def _write_fitgirl_cache(cache_dir, slugs, state):
+    (cache_dir / "fitgirl_index.json").write_text(
+        json.dumps([[slug.replace("-", " ").title(), f"https://fitgirl-repacks.site/{slug}/"] for slug in slugs]),
+        encoding="utf-8",
+    )
+    (cache_dir / "fitgirl_index_state.json").write_text(json.dumps(state), encoding="utf-8")
+
+
+def test_load_fitgirl_index_merges_new_releases_until_known_entry(monkeypatch, isolated_catalog_cache):
+    _write_fitgirl_cache(isolated_catalog_cache, ["alpha-game", "beta-game"], {"full_crawl_at": game_sources.time.time(), "etag": '"v1"'})
+    pages = {1: _fitgirl_front_page("new-game", "newer-game"), 2: _fitgirl_front_page("third-game", "alpha-game"), 3: _fitgirl_front_page("beta-game")}
+    fetched = []
+
+    def fetch_recent(page, validators=None):
+        fetched.append((page, dict(validators or {})))
+        return pages[page], {"etag": '"v2"', "last_modified": None}
+
+    monkeypatch.setattr(game_sources, "_fetch_fitgirl_recent_page", fetch_recent)
+    monkeypatch.setattr(game_sources, "_crawl_fitgirl_index", lambda: (_ for _ in ()).throw(AssertionError("full crawl")))
+
+    entries = game_sources._load_fitgirl_index(force_refresh=True)
+    state = json.loads((isolated_catalog_cache / "fitgirl_index_state.json").read_text(encoding="utf-8"))
+
+    assert [entry["title"] for entry in entries] == ["New Game", "Newer Game", "Third Game", "Alpha Game", "Beta Game"]
+    assert [page for page, _ in fetched] == [1, 2]
+    assert fetched[0][1]["etag"] == '"v1"' and fetched[1][1] == {}
+    assert state["etag"] == '"v2"'
+
+
+def test_load_fitgirl_index_sends_conditional_request(monkeypatch, isolated_catalog_cache):
+    _write_fitgirl_cache(isolated_catalog_cache, ["alpha-game"], {
+        "full_crawl_at": game_sources.time.time(),
+        "etag": '"v1"',
+        "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+    })
+    requests_sent = []
+
+    class NotModified:
+        status_code = 304
+        headers = {}
+
+    monkeypatch.setattr(game_sources.http_client, "get", lambda url, headers=None, timeout=None: requests_sent.append(headers) or NotModified())
+
+    entries = game_sources._load_fitgirl_index(force_refresh=True)
+
+    assert [entry["title"] for entry in entries] == ["Alpha Game"]
+    assert len(requests_sent) == 1
+    assert requests_sent[0]["If-None-Match"] == '"v1"'
+    assert requests_sent[0]["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+def test_search_fitgirl_fetches_details_concurrently_and_streams_batches(monkeypatch):
+    slugs = ["test-game", "test-game-deluxe", "test-game-2", "test-game-3"]
+    monkeypatch.setattr(
+        game_sources,
+        "_load_fitgirl_index",
+        lambda force_refresh=False: [
+            {"title": slug.replace("-", " ").title(), "normalized_title": slug.replace("-", " "), "detail_url": f"https://fitgirl-repacks.site/{slug}/"}
+            for slug in slugs
+        ],
+    )
+    delays = {"test-game": 0.3, "test-game-deluxe": 0.05, "test-game-2": 0.2, "test-game-3": 0.1}
+
+    def extract_links(detail_url, game_title):
+        slug = detail_url.rstrip("/").rsplit("/", 1)[-1]
+        game_sources.time.sleep(delays[slug])
+        return [game_sources._build_download_result(game_title, "FuckingFast", f"{detail_url}download", "fuckingfast.co")]
+
+    monkeypatch.setattr(game_sources, "_extract_fitgirl_detail_links", extract_links)
+    batches = []
+
+    started = game_sources.time.monotonic()
+    results = game_sources.search_fitgirl("test game", on_results=batches.append)
+    elapsed = game_sources.time.monotonic() - started
+
+    assert elapsed < 0.5
+    assert [result["title"] for result in results] == ["Test Game", "Test Game Deluxe", "Test Game 2", "Test Game 3"]
+    assert [batch[0]["title"] for batch in batches] == ["Test Game Deluxe", "Test Game 3", "Test Game 2", "Test Game"]
+
+
+def test_detail_links_are_cached_per_source(monkeypatch):
+    fetched = []
+
+    class DetailResponse:
+        text = '<article><a href="https://gofile.io/d/abc">GOFILE</a></article>'
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(game_sources.http_client, "get", lambda url, headers=None, timeout=None: fetched.append(url) or DetailResponse())
+
+    first = game_sources._extract_steamrip_detail_links("https://steamrip.com/test-game-free-download/", "Test Game")
+    second = game_sources._extract_steamrip_detail_links("https://steamrip.com/test-game-free-download/", "Test Game")
+    monkeypatch.setattr(game_sources.source_cache, "_MEMORY", {})
+    other_title = game_sources._extract_steamrip_detail_links("https://steamrip.com/test-game-free-download/", "Test Game Deluxe")
+
+    assert first == second and first[0]["url"] == "https://gofile.io/d/abc"
+    assert other_title[0]["title"] == "Test Game Deluxe"
+    assert fetched == ["https://steamrip.com/test-game-free-download/"]
+
+
+def test_detail_pages_without_links_are_fetched_again(monkeypatch):
+    pages = [
+        "<html><head><title>Just a moment...</title></head><body>challenge-platform</body></html>",
+        "<html><body><article>Loading</article></body></html>",
+        '<html><body><article><a href="https://gofile.io/d/abc">GOFILE</a></article></body></html>',
+    ]
+    fetched = []
+
+    class DetailResponse:
+        def __init__(self, text):
+            self.text = text
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(game_sources.http_client, "get", lambda url, headers=None, timeout=None: fetched.append(url) or DetailResponse(pages.pop(0)))
+
+    results = [game_sources._extract_steamrip_detail_links("https://steamrip.com/test-game-free-download/", "Test Game") for _ in range(4)]
+
+    assert [len(links) for links in results] == [0, 0, 1, 1]
+    assert len(fetched) == 3
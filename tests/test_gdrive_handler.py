@@ -0,0 +1,176 @@
+import pytest
+
+from download_manager import gdrive_handler
+
+
+CONFIRM_HTML = """
+<html><body>
+  <span class="uc-name-size"><a href="/open?id=abc">Big Game.zip</a> (19G)</span>
+  <form id="download-form" action="https://drive.usercontent.google.com/download" method="get">
+    <input type="hidden" name="id" value="abc">
+    <input type="hidden" name="export" value="download">
+    <input type="hidden" name="confirm" value="t">
+    <input type="hidden" name="uuid" value="u-1">
+  </form>
+</body></html>
+"""
+
+
+class FakeResponse:
+    def __init__(self, headers, text=""):
+        self.headers = headers
+        self.text = text
+        self.cookies = {}
+        self.closed = False
+
+    def raise_for_status(self):
+        return None
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.urls = []
+        self.cookies = self
+
+    def get_dict(self):
+        return {"NID": "cookie"}
+
+    def get(self, url, headers, timeout, stream):
+        self.urls.append(url)
+        return self.responses.pop(0)
+
+
+def test_resolve_gdrive_file_uses_confirm_form_without_extra_request():
+    confirm_page = FakeResponse({"content-type": "text/html; charset=utf-8"}, CONFIRM_HTML)
+    session = FakeSession([confirm_page])
+
+    resolved = gdrive_handler.resolve_gdrive_file("https://drive.google.com/file/d/abc/view", session=session)
+
+    assert confirm_page.closed
+    assert len(session.urls) == 1
+    assert resolved["filename"] == "Big Game.zip"
+    assert resolved["download_url"].startswith("https://drive.usercontent.google.com/download?")
+    assert "confirm=t" in resolved["download_url"]
+    assert "uuid=u-1" in resolved["download_url"]
+    assert resolved["cookies"] == {"NID": "cookie"}
+
+
+def test_resolve_gdrive_file_keeps_open_stream_for_downloader():
+    confirm_page = FakeResponse({"content-type": "text/html"}, CONFIRM_HTML)
+    file_response = FakeResponse({
+        "content-type": "application/zip",
+        "content-length": "2048",
+        "content-disposition": "attachment; filename=\"Big Game.zip\"",
+    })
+    session = FakeSession([confirm_page, file_response])
+
+    resolved = gdrive_handler.resolve_gdrive_file(
+        "https://drive.google.com/file/d/abc/view",
+        session=session,
+        keep_response=True,
+    )
+
+    assert confirm_page.closed
+    assert not file_response.closed
+    assert resolved["response"] is file_response
+    assert resolved["size"] == 2048
+    assert resolved["filename"] == "Big Game.zip"
+
+
+def test_resolve_gdrive_file_rejects_html_without_confirm_form():
+    page = FakeResponse({"content-type": "text/html"}, "<html><body>Quota exceeded</body></html>")
+    session = FakeSession([page])
+
+    assert gdrive_handler.resolve_gdrive_file("https://drive.google.com/file/d/abc/view", session=session) is None
+    assert page.closed
+
+
+def _folder_page(title, entries):
+    rows = ",".join(
+        f'[\\x22{item_id}\\x22,[\\x22parent\\x22],\\x22{name}\\x22,\\x22{mime}\\x22]'
+        for item_id, name, mime in entries
+    )
+    return (
+        f"<html><head><title>{title} - Google Drive</title></head><body>"
+        f"<script>window['_DRIVE_ivd'] = '[[{rows}]]';</script>"
+        "</body></html>"
+    )
+
+
+class FakeFolderSession:
+    def __init__(self, pages):
+        self.pages = pages
+        self.cookies = self
+
+    def get_dict(self):
+        return {}
+
+    def get(self, url, headers, timeout, params=None, stream=False):
+        if "/drive/folders/" in url:
+            return FakeResponse({"content-type": "text/html"}, self.pages[url.rsplit("/", 1)[-1]])
+        if "id=broken" in url:
+            return FakeResponse({"content-type": "text/html"}, "<html>Quota exceeded</html>")
+        return FakeResponse({"content-type": "application/octet-stream"})
+
+
+def test_crawl_gdrive_folder_lists_tree_and_resolves_each_file():
+    folder_mime = gdrive_handler.GDRIVE_FOLDER_MIME_TYPE
+    session = FakeFolderSession({
+        "root": _folder_page("Juego", [
+            ("f1", "part1.rar", "application/x-rar"),
+            ("sub", "Extras", folder_mime),
+        ]),
+        "sub": _folder_page("Extras", [
+            ("f2", "Canción.zip", "application/zip"),
+            ("broken", "gone.zip", "application/zip"),
+        ]),
+    })
+
+    result = gdrive_handler.crawl_gdrive_folder("root", session=session, max_workers=2)
+
+    assert result["folder_name"] == "Juego"
+    assert [(item["relative_path"], item["filename"]) for item in result["files"]] == [
+        ("", "part1.rar"),
+        ("Extras", "Canción.zip"),
+    ]
+    assert result["files"][0]["download_url"].endswith("id=f1")
+    assert [(item["id"], item["relative_path"]) for item in result["failed"]] == [("broken", "Extras")]
+
+
+def test_crawl_gdrive_folder_reports_truncated_listing():
+    folder_mime = gdrive_handler.GDRIVE_FOLDER_MIME_TYPE
+    session = FakeFolderSession({
+        "root": _folder_page("Juego", [("f0", "part0.rar", "application/x-rar"), ("big", "Big", folder_mime)]),
+        "big": _folder_page("Big", [(f"f{number}", f"part{number}.rar", "application/x-rar") for number in range(1, 61)]),
+    })
+
+    result = gdrive_handler.crawl_gdrive_folder("root", session=session, max_workers=2)
+
+    assert result["truncated"]
+    assert result["files"] == [] and result["failed"] == []
+
+
+def test_crawl_gdrive_folder_reports_unlisted_subfolder_as_incomplete():
+    folder_mime = gdrive_handler.GDRIVE_FOLDER_MIME_TYPE
+    session = FakeFolderSession({
+        "root": _folder_page("Juego", [("f0", "part0.rar", "application/x-rar"), ("gone", "Extras", folder_mime)]),
+    })
+
+    result = gdrive_handler.crawl_gdrive_folder("root", session=session, max_workers=2)
+
+    assert result["truncated"]
+    assert result["files"] == [] and result["failed"] == []
+
+
+def test_list_gdrive_folder_detects_next_page_token():
+    page = _folder_page("Juego", [("f1", "part1.rar", "application/x-rar")]).replace("]]';", "],\\x22token\\x22]';")
+    session = FakeFolderSession({"root": page})
+
+    with pytest.raises(gdrive_handler.GDriveListingTruncated) as exc_info:
+        gdrive_handler.list_gdrive_folder("root", session=session)
+
+    assert exc_info.value.folder_id == "root"
@@ -0,0 +1,62 @@
+import hashlib
+import zlib
+
+from download_manager import hashing
+
+
+def test_stream_hasher_matches_hashlib_and_resumes_from_disk(tmp_path):
+    data = b"0123456789" * 1000
+    part = tmp_path / "part.bin"
+    part.write_bytes(data[:4000])
+
+    hasher = hashing.StreamHasher(hashing.hash_algorithms_for())
+    hasher.update_from_file(str(part))
+    hasher.update(data[4000:])
+    digests = hasher.hexdigests()
+
+    assert digests["md5"] == hashlib.md5(data).hexdigest()
+    assert digests["sha1"] == hashlib.sha1(data).hexdigest()
+    assert digests["sha256"] == hashlib.sha256(data).hexdigest()
+    assert digests["crc32"] == f"{zlib.crc32(data):08x}"
+    assert hasher.size == len(data)
+
+
+def test_parse_published_hashes_reads_md5sum_and_sfv():
+    md5_text = (
+        "; generated by fitgirl\n"
+        "0123456789abcdef0123456789ABCDEF *fg-01.bin\n"
+        "ffffffffffffffffffffffffffffffffffffffff  Setup/fg-02.bin\n"
+    )
+    sfv_text = "fg-01.bin DEADBEEF\n"
+
+    assert hashing.parse_published_hashes(md5_text, ".md5") == {
+        "fg-01.bin": {"md5": "0123456789abcdef0123456789abcdef"},
+        "fg-02.bin": {"sha1": "f" * 40},
+    }
+    assert hashing.parse_published_hashes(sfv_text, ".sfv") == {"fg-01.bin": {"crc32": "deadbeef"}}
+
+
+def test_stored_hashes_are_checked_without_rehashing(tmp_path):
+    part = tmp_path / "game.part1.rar"
+    part.write_bytes(b"rar data")
+    link = {
+        "path": "game.part1.rar",
+        "hashes": {"md5": hashlib.md5(b"rar data").hexdigest()},
+        "hashed_size": len(b"rar data"),
+    }
+    entry = {"direct_links": [link, {"path": "game.part2.rar"}]}
+
+    updated = hashing.apply_published_hashes(entry, {"game.part1.rar": {"md5": "0" * 32}})
+    stored = hashing.stored_hashes_for(link, str(part))
+
+    assert updated == [link]
+    assert hashing.compare_hashes(stored, link["expected_hashes"]).startswith("md5 no coincide")
+
+    part.write_bytes(b"rar data, now longer")
+    assert hashing.stored_hashes_for(link, str(part)) == {}
+
+
+def test_single_link_entry_uses_entry_hashes():
+    entry = {"expected_hashes": {"SHA-512": "AB" * 64}, "direct_links": [{"path": "mod.jar"}]}
+
+    assert hashing.expected_hashes_for_link(entry, entry["direct_links"][0]) == {"sha512": "ab" * 64}
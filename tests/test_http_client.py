@@ -0,0 +1,106 @@
+import threading
+import time
+
+from media_search import http_client, source_cache
+from media_search.http_client import HostLimiter, SourceStats, TokenBucket
+
+
+def test_host_limiter_caps_concurrency_and_spaces_request_starts():
+    limiter = HostLimiter(max_concurrent=2, min_interval=0.05)
+    lock = threading.Lock()
+    active = []
+    peak = []
+    starts = {"a.example": [], "b.example": []}
+
+    def request(host):
+        with limiter.slot(host):
+            with lock:
+                starts[host].append(time.monotonic())
+                active.append(host)
+                peak.append(active.count(host))
+            time.sleep(0.1)
+            with lock:
+                active.remove(host)
+
+    threads = [threading.Thread(target=request, args=(host,)) for host in ["a.example"] * 4 + ["b.example"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    a_starts = sorted(starts["a.example"])
+    assert max(peak) == 2
+    assert all(later - earlier >= 0.045 for earlier, later in zip(a_starts, a_starts[1:]))
+    assert starts["b.example"][0] - a_starts[0] < 0.05
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+
+def test_token_bucket_allows_burst_then_waits_for_refill():
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(round(seconds, 3))
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=1.0, capacity=3, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        bucket.acquire()
+
+    assert waits == [1.0, 1.0]
+
+
+def test_get_retries_429_and_records_source_stats(monkeypatch):
+    session = FakeSession([
+        FakeResponse(429, headers={"Retry-After": "0"}),
+        FakeResponse(200, '{"data": []}'),
+    ])
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+    monkeypatch.setattr(http_client, "SOURCE_STATS", SourceStats())
+    monkeypatch.setattr(http_client, "_BUCKETS", {})
+
+    response = http_client.get("https://api.jikan.moe/v4/anime", params={"q": "test"})
+
+    stats = http_client.SOURCE_STATS.snapshot()["Jikan"]
+    assert response.status_code == 200
+    assert len(session.calls) == 2
+    assert session.calls[0][2]["timeout"] == http_client.DEFAULT_TIMEOUT_SECONDS
+    assert stats["requests"] == 2 and stats["retries"] == 1 and stats["errors"] == 1
+
+
+def test_get_json_serves_repeated_requests_from_disk_cache(monkeypatch, tmp_path):
+    session = FakeSession([FakeResponse(200, '{"results": [1]}')])
+    monkeypatch.setattr(source_cache, "SOURCE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(http_client, "get_session", lambda: session)
+    monkeypatch.setattr(http_client, "SOURCE_STATS", SourceStats())
+
+    first = http_client.get_json("https://api.themoviedb.org/3/search/multi", 3600, params={"query": "dune"})
+    second = http_client.get_json("https://api.themoviedb.org/3/search/multi", 3600, params={"query": "dune"})
+
+    stats = http_client.SOURCE_STATS.snapshot()["TMDb"]
+    assert first == second == {"results": [1]}
+    assert session.calls[0][1] == "https://api.themoviedb.org/3/search/multi?query=dune"
+    assert stats["requests"] == 1 and stats["cache_hits"] == 1
@@ -0,0 +1,84 @@
+import threading
+
+from download_manager import mediafire_handler
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+class FakeMediaFireSession:
+    def __init__(self, folders):
+        self.folders = folders
+        self.link_calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params, timeout, headers):
+        if url.endswith("/folder/get_content.php"):
+            folder = self.folders[params["folder_key"]]
+            content_type = params["content_type"]
+            key = "file" if content_type == "files" else "folder"
+            return FakeResponse({
+                "response": {
+                    "folder_content": {
+                        content_type: {key: folder.get(content_type, [])},
+                        "more_chunks": "no",
+                    }
+                }
+            })
+
+        quickkeys = params["quick_key"].split(",")
+        with self._lock:
+            self.link_calls.append(quickkeys)
+        return FakeResponse({
+            "response": {
+                "links": [
+                    {"quickkey": key, "normal_download": f"https://download.mediafire.com/{key}"}
+                    for key in quickkeys
+                    if key != "missing"
+                ]
+            }
+        })
+
+
+def test_crawl_mediafire_folder_flattens_tree_and_batches_links(monkeypatch):
+    session = FakeMediaFireSession({
+        "root": {
+            "files": [{"quickkey": "a1", "filename": "part1.rar"}],
+            "folders": [{"folderkey": "sub", "name": "Extras"}],
+        },
+        "sub": {
+            "files": [
+                {"quickkey": "b1", "filename": "bonus.zip"},
+                {"quickkey": "missing", "filename": "gone.zip"},
+            ],
+            "folders": [],
+        },
+    })
+    monkeypatch.setattr(mediafire_handler, "MEDIAFIRE_LINKS_BATCH_SIZE", 2)
+
+    files = mediafire_handler.crawl_mediafire_folder("root", session=session, max_workers=2)
+
+    assert [(item["relative_path"], item["filename"], item["direct_link"]) for item in files] == [
+        ("", "part1.rar", "https://download.mediafire.com/a1"),
+        ("Extras", "bonus.zip", "https://download.mediafire.com/b1"),
+        ("Extras", "gone.zip", ""),
+    ]
+    assert sorted(len(batch) for batch in session.link_calls) == [1, 2]
+
+
+def test_fetch_mediafire_direct_links_accepts_single_link_dict():
+    class SingleLinkSession:
+        def get(self, url, params, timeout, headers):
+            return FakeResponse({"response": {"links": {"normal_download": "https://download.mediafire.com/x"}}})
+
+    resolved = mediafire_handler.fetch_mediafire_direct_links(["x"], session=SingleLinkSession())
+
+    assert resolved == {"x": "https://download.mediafire.com/x"}
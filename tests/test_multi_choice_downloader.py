@@ -0,0 +1,122 @@
+from benchmarks import download_benchmark
+from media_search.window import MultiChoiceDownloader
+
+
+def _result(title, url, url_type="DDOWNLOAD"):
+    return {"title": title, "url": url, "url_type": url_type, "chapter": None, "resolucion": None, "fansub": None}
+
+
+def _group_texts(selector):
+    return {source: group["item"].text(0) for source, group in selector.source_groups.items()}
+
+
+def test_selector_streams_batches_per_source(tmp_path):
+    download_benchmark.ensure_app()
+    selector = MultiChoiceDownloader({}, "Test Game", str(tmp_path), pending_sources=["ElAmigos", "FitGirl", "1337x"])
+
+    selector.add_results("ElAmigos", [_result("Test Game", "https://a.example/1")])
+    loading = _group_texts(selector)
+    selector.finish_source("ElAmigos", [_result("Test Game", "https://a.example/1"), _result("Test Game", "https://a.example/2")])
+    selector.finish_source("FitGirl", [])
+    selector.finish_source("1337x", timed_out=True)
+    selector.finish_source("1337x", [_result("Test Game", "magnet:?xt=late", "torrent")])
+
+    assert loading == {"ElAmigos": "ElAmigos (buscando… 1)", "FitGirl": "FitGirl (buscando…)", "1337x": "1337x - torrents (buscando…)"}
+    assert _group_texts(selector) == {"ElAmigos": "ElAmigos", "FitGirl": "FitGirl (sin resultados)", "1337x": "1337x - torrents (tiempo agotado)"}
+    assert selector.result_count() == 2
+    assert not selector.is_loading("ElAmigos")
+    assert selector.spinner_movie.state() == selector.spinner_movie.NotRunning
+
+
+def test_selector_loads_series_chapters_when_checked(tmp_path):
+    import time
+    from PyQt5.QtCore import Qt
+
+    app = download_benchmark.ensure_app()
+    loads = []
+
+    def load_children():
+        loads.append(True)
+        return [
+            {"title": "Test Anime", "url": lambda: "https://mediafire.test/2.mkv", "url_type": "mediafire", "chapter": 2, "chapters": 2, "resolucion": 720, "fansub": "Fansub"},
+            {"title": "Test Anime", "url": lambda: "https://mediafire.test/1.mkv", "url_type": "mediafire", "chapter": 1, "chapters": 2, "resolucion": 720, "fansub": "Fansub"},
+        ]
+
+    selector = MultiChoiceDownloader({}, "Test Anime", str(tmp_path), pending_sources=["Aniteca"])
+    selector.finish_source("Aniteca", [{
+        "title": "Test Anime", "url": "aniteca:42", "url_type": "Aniteca", "group": "Test Anime (2 capítulos)",
+        "load_children": load_children, "chapter": None, "resolucion": None, "fansub": None,
+    }])
+    series_item = selector.source_groups["Aniteca"]["item"].child(0)
+    assert not loads
+
+    series_item.setCheckState(0, Qt.Checked)
+    deadline = time.monotonic() + 5
+    while series_item.child(0).text(0) != "[mediafire] | Fansub | 720p" and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+    checked = [item.data(0, Qt.UserRole)["title"] for item in selector.iter_checked_links(selector.tree_widget.invisibleRootItem())]
+    assert loads == [True]
+    assert series_item.isExpanded()
+    assert checked == ["Test Anime 1/2", "Test Anime 2/2"]
+
+
+def test_selector_skips_lazy_placeholders_when_confirming(tmp_path):
+    import time
+    from PyQt5.QtCore import Qt
+
+    app = download_benchmark.ensure_app()
+    selector = MultiChoiceDownloader({}, "Test Anime", str(tmp_path), pending_sources=["Aniteca"])
+    selector.finish_source("Aniteca", [
+        {
+            "title": "Test Anime", "url": "aniteca:42", "url_type": "Aniteca", "group": "Test Anime (1 capítulos)",
+            "load_children": lambda: [], "chapter": None, "resolucion": None, "fansub": None,
+        },
+        _result("Test Anime 01", "https://mediafire.test/01.mkv", "mediafire"),
+    ])
+    group_item = selector.source_groups["Aniteca"]["item"]
+    placeholder = group_item.child(0).child(0)
+    emitted = []
+    selector.selection_ready.connect(emitted.append)
+
+    group_item.setCheckState(0, Qt.Checked)
+    selector.confirm_selection()
+    deadline = time.monotonic() + 5
+    while not emitted and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+    assert not placeholder.flags() & Qt.ItemIsUserCheckable
+    assert [link["url"] for link in emitted[0]] == ["https://mediafire.test/01.mkv"]
+
+
+def test_selector_waits_for_checked_series_before_confirming(tmp_path):
+    import time
+    from PyQt5.QtCore import Qt
+
+    app = download_benchmark.ensure_app()
+
+    def load_children():
+        time.sleep(0.3)
+        return [_result("Test Anime 01", "https://mediafire.test/01.mkv", "mediafire")]
+
+    selector = MultiChoiceDownloader({}, "Test Anime", str(tmp_path), pending_sources=["Aniteca"])
+    selector.finish_source("Aniteca", [{
+        "title": "Test Anime", "url": "aniteca:42", "url_type": "Aniteca", "group": "Test Anime (1 capítulos)",
+        "load_children": load_children, "chapter": None, "resolucion": None, "fansub": None,
+    }])
+    emitted = []
+    selector.selection_ready.connect(emitted.append)
+
+    selector.source_groups["Aniteca"]["item"].child(0).setCheckState(0, Qt.Checked)
+    selector.confirm_selection()
+    waiting = not selector.btn_confirm.isEnabled()
+    deadline = time.monotonic() + 5
+    while not emitted and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+    assert waiting
+    assert [link["url"] for link in emitted[0]] == ["https://mediafire.test/01.mkv"]
+    assert selector.btn_confirm.isEnabled()
@@ -0,0 +1,61 @@
+import errno
+
+import requests
+
+from download_manager import retry
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+
+
+def test_status_codes_are_classified_by_what_a_retry_can_fix():
+    assert retry.error_for_response(FakeResponse(404)).kind == retry.PERMANENT
+    assert retry.error_for_response(FakeResponse(403)).kind == retry.EXPIRED
+    assert retry.error_for_response(FakeResponse(502)).kind == retry.TRANSIENT
+    throttled = retry.error_for_response(FakeResponse(429, {"Retry-After": "120"}))
+    assert (throttled.kind, throttled.retry_after) == (retry.THROTTLED, 120.0)
+    assert retry.error_for_response(FakeResponse(500, {"Retry-After": "5"})).kind == retry.THROTTLED
+
+
+def test_exceptions_are_classified():
+    assert retry.classify_exception(requests.ConnectionError("reset")) == retry.TRANSIENT
+    assert retry.classify_exception(requests.exceptions.MissingSchema("x")) == retry.PERMANENT
+    assert retry.classify_exception(OSError(errno.ENOSPC, "No space left")) == retry.PERMANENT
+    assert retry.classify_exception(TimeoutError("read timed out")) == retry.TRANSIENT
+
+
+def test_retry_after_accepts_http_dates():
+    assert retry.parse_retry_after("Wed, 21 Oct 2015 07:28:30 GMT", now=1445412480.0) == 30.0
+    assert retry.parse_retry_after("soon") is None
+
+
+def test_backoff_is_capped_jittered_and_respects_retry_after(monkeypatch):
+    policy = retry.RetryPolicy(base_delay=2, max_delay=60, max_attempts=5)
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: high)
+
+    assert [policy.delay_for(attempt) for attempt in range(1, 8)] == [2, 4, 8, 16, 32, 60, 60]
+    assert policy.delay_for(1, retry_after=90) == 90
+    assert policy.should_retry(retry.TRANSIENT, 4)
+    assert not policy.should_retry(retry.TRANSIENT, 5)
+    assert not policy.should_retry(retry.PERMANENT, 1)
+
+
+def test_retry_stats_are_grouped_per_host():
+    stats = retry.RetryStats()
+    stats.record_retry("https://cdn.example.com/a.rar", retry.THROTTLED)
+    stats.record_retry("https://cdn.example.com/b.rar", retry.TRANSIENT)
+    stats.record_success("https://cdn.example.com/a.rar")
+    stats.record_success("https://other.example.com/c.rar")
+
+    assert stats.snapshot()["cdn.example.com"] == {
+        "successes": 1,
+        "retries": 2,
+        "failures": 0,
+        "kinds": {retry.THROTTLED: 1, retry.TRANSIENT: 1},
+    }
+    assert stats.summary_lines() == [
+        "cdn.example.com: 1 ok, 2 reintentos, 0 fallos (throttled 1, transient 1)"
+    ]
@@ -0,0 +1,56 @@
+import random
+
+from media_search import game_sources, search_index
+from media_search.search_index import SearchIndex, get_search_index
+
+
+WORDS = ["dark", "souls", "elden", "ring", "halo", "infinite", "forza", "horizon", "space", "marine",
+         "total", "war", "warhammer", "legend", "zelda", "call", "duty", "resident", "evil", "village"]
+
+
+def _catalog(size=3000):
+    rng = random.Random(7)
+    entries = []
+    for number in range(size):
+        title = " ".join(rng.sample(WORDS, rng.randint(2, 4))).title() + f" {number}"
+        entries.append({"title": title, "normalized_title": game_sources._normalize_search_text(title), "detail_url": f"https://example.com/{number}/"})
+    entries.append({"title": "Elden Ring Shadow of the Erdtree", "normalized_title": "elden ring shadow of the erdtree", "detail_url": "https://example.com/erdtree/"})
+    return entries
+
+
+def _brute_force(query, entries, max_candidates):
+    return game_sources._pick_candidates(query, entries, max_candidates)
+
+
+def test_indexed_candidates_match_full_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(game_sources, "ELAMIGOS_CACHE_DIR", str(tmp_path))
+    entries = _catalog()
+
+    for query in ["elden ring shadow", "halo infinite", "warhammer space marine", "Zelda"]:
+        indexed = game_sources._pick_candidates(query, entries, 6, source="fitgirl")
+        assert indexed == _brute_force(query, entries, 6), query
+
+    # Typos only need the best fuzzy hit; low-scoring noise may fall outside the pool.
+    assert game_sources._pick_candidates("shadow erdtre", entries, 6, source="fitgirl")[0]["detail_url"] == "https://example.com/erdtree/"
+
+    assert (tmp_path / "fitgirl_search_index.json").exists()
+
+
+def test_search_index_is_reused_from_disk_until_catalog_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "_INDEX_CACHE", {})
+    path = str(tmp_path / "catalog_search_index.json")
+    entries = _catalog(500)
+    built = get_search_index(path, entries)
+    builds = []
+    original_build = SearchIndex.build.__func__
+    monkeypatch.setattr(SearchIndex, "build", classmethod(lambda cls, items: builds.append(len(items)) or original_build(cls, items)))
+
+    monkeypatch.setattr(search_index, "_INDEX_CACHE", {})
+    loaded = get_search_index(path, entries)
+    grown = entries + [{"title": "New Game", "normalized_title": "new game", "detail_url": "https://example.com/new/"}]
+    changed = get_search_index(path, grown)
+
+    assert loaded.signature == built.signature
+    assert loaded.candidate_positions("elden ring") == built.candidate_positions("elden ring")
+    assert builds == [len(grown)]
+    assert changed.candidates(grown, "new game", 1)[0]["title"] == "New Game"
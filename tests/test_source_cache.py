@@ -0,0 +1,81 @@
+import os
+import time
+
+from media_search import source_cache
+
+
+def _isolate(monkeypatch, tmp_path):
+    monkeypatch.setattr(source_cache, "SOURCE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(source_cache, "_MEMORY", {})
+
+
+def test_cached_text_stores_bodies_by_content_and_honours_ttl(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path)
+    fetches = []
+
+    def fetch(body):
+        def run():
+            fetches.append(body)
+            return body
+        return run
+
+    first = source_cache.cached_text("site", "https://a.example/1", 60, fetch("<html>same</html>"))
+    again = source_cache.cached_text("site", "https://a.example/1", 60, fetch("<html>changed</html>"))
+    mirror = source_cache.cached_text("site", "https://a.example/mirror", 60, fetch("<html>same</html>"))
+    expired = source_cache.cached_text("site", "https://a.example/1", -1, fetch("<html>changed</html>"))
+    source_cache.cached_text("site", "https://a.example/error", 60, fetch("blocked"), validate=lambda text: "html" in text)
+    source_cache.cached_text("site", "https://a.example/error", 60, fetch("blocked"), validate=lambda text: "html" in text)
+
+    blobs = [name for _, _, names in os.walk(tmp_path / "blobs") for name in names]
+    assert first == again == mirror == "<html>same</html>"
+    assert expired == "<html>changed</html>"
+    assert fetches == ["<html>same</html>", "<html>same</html>", "<html>changed</html>", "blocked", "blocked"]
+    assert len(blobs) == 2
+
+
+def test_cached_json_returns_copies_and_persists(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path)
+    computed = []
+
+    def compute():
+        computed.append(True)
+        return [{"title": "Test Game", "url": "https://host.example/file"}]
+
+    first = source_cache.cached_json("detail", "key", 60, compute)
+    first[0]["title"] = "changed by caller"
+    monkeypatch.setattr(source_cache, "_MEMORY", {})
+    second = source_cache.cached_json("detail", "key", 60, compute)
+    missing = [source_cache.cached_json("magnet", "none", 60, lambda: computed.append(False)) for _ in range(2)]
+
+    assert second == [{"title": "Test Game", "url": "https://host.example/file"}]
+    assert computed == [True, False, False]
+    assert missing == [None, None]
+
+
+def test_cached_json_skips_empty_results_and_caps_memory(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(source_cache, "SOURCE_CACHE_MEMORY_ENTRIES", 2)
+    computed = []
+
+    empty = [source_cache.cached_json("detail", "empty", 60, lambda: computed.append("empty") or []) for _ in range(2)]
+    for key in ["a", "b", "a", "c"]:
+        source_cache.cached_json("detail", key, 60, lambda: [key])
+
+    assert empty == [[], []]
+    assert computed == ["empty", "empty"]
+    assert list(source_cache._MEMORY) == [("detail", "a"), ("detail", "c")]
+
+
+def test_prune_drops_expired_entries_and_orphan_blobs(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path)
+    source_cache.cached_text("site", "https://a.example/old", 60, lambda: "<html>old</html>")
+    source_cache.cached_text("site", "https://a.example/new", 3600, lambda: "<html>new</html>")
+    source_cache.cached_json("detail", "old", 60, lambda: ["old"])
+    later = time.time() + 600
+
+    removed = source_cache.prune_source_cache(now=later + source_cache.SOURCE_CACHE_GRACE_SECONDS)
+
+    files = sorted(os.path.relpath(path, tmp_path).split(os.sep)[0] for path in source_cache._iter_files(str(tmp_path)))
+    assert removed == 3
+    assert files == ["blobs", "responses"]
+    assert source_cache.cached_text("site", "https://a.example/new", 3600, lambda: "refetched") == "<html>new</html>"
@@ -0,0 +1,134 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from benchmarks import download_benchmark
+from benchmarks.http_server import LocalFileServer, file_sha256, served_file
+from download_manager import tui
+from download_manager.retry import THROTTLED, DownloadError
+
+
+class SlowBrowserResolver(QObject):
+    direct_links_ready = pyqtSignal(list)
+    results = []
+    started = []
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = items
+
+    def start(self):
+        SlowBrowserResolver.started.append(self.items[0]["url"])
+        QTimer.singleShot(400, lambda: self.direct_links_ready.emit(list(SlowBrowserResolver.results)))
+
+    def close(self):
+        pass
+
+
+def test_pipeline_downloads_resolved_entries_while_others_resolve(tmp_path, monkeypatch):
+    app = download_benchmark.ensure_app()
+    hosted = served_file("hosted.bin", 200000)
+    direct = served_file("direct.zip", 300000, content_disposition="direct.zip")
+    finished_at = {}
+    saves = []
+
+    with LocalFileServer([hosted, direct]) as server, download_benchmark.isolated_state(str(tmp_path)):
+        SlowBrowserResolver.results = [{"type": "direct", "path": str(tmp_path / "hosted.bin"), "url": server.url("hosted.bin")}]
+        monkeypatch.setattr(tui, "UniversalDownloader", SlowBrowserResolver)
+        manager = tui.TuiDownloadManager(app, [
+            {"title": "Hosted", "url": "https://host.example/page", "path": str(tmp_path)},
+            {"title": "Direct", "url": server.url("direct.zip"), "path": str(tmp_path)},
+        ])
+        original_stream = manager.stream_direct_link
+
+        def stream_and_record(entry, link, target_path):
+            ok = original_stream(entry, link, target_path)
+            finished_at[entry["title"]] = len(SlowBrowserResolver.started), manager._browser_resolution is None
+            return ok
+
+        monkeypatch.setattr(manager, "stream_direct_link", stream_and_record)
+        monkeypatch.setattr(manager, "save_session_to_disk", lambda: saves.append(True))
+        ok = manager.run_pipeline(manager.entries)
+
+    assert ok
+    assert finished_at["Direct"] == (1, False)
+    assert file_sha256(hosted) == download_benchmark.sha256_of(tmp_path / "hosted.bin")
+    assert file_sha256(direct) == download_benchmark.sha256_of(tmp_path / "direct.zip")
+    assert all(entry["status"] == "finished" for entry in manager.entries)
+    assert len(saves) <= 3
+
+
+def test_flush_session_is_rate_limited(tmp_path, monkeypatch):
+    with download_benchmark.isolated_state(str(tmp_path)):
+        manager = tui.TuiDownloadManager(download_benchmark.ensure_app(), [])
+        saves = []
+        monkeypatch.setattr(manager, "save_session_to_disk", lambda: saves.append(True))
+
+        for _ in range(50):
+            manager.request_session_save()
+            manager.flush_session()
+        manager.request_session_save()
+        manager.flush_session(force=True)
+        manager.flush_session(force=True)
+
+    assert len(saves) == 2
+
+
+def test_retry_backoff_frees_the_download_slot(tmp_path, monkeypatch):
+    calls = []
+
+    with download_benchmark.isolated_state(str(tmp_path), max_parallel=1):
+        manager = tui.TuiDownloadManager(download_benchmark.ensure_app(), [
+            {"title": title, "url": f"http://127.0.0.1:9/{title}.bin", "path": str(tmp_path), "download_type": "regular",
+             "direct_links": [{"path": str(tmp_path / f"{title}.bin"), "url": f"http://127.0.0.1:9/{title}.bin"}]}
+            for title in ("A", "B")
+        ])
+
+        def fake_stream(entry, link, target_path):
+            calls.append((entry["title"], time.monotonic()))
+            if len(calls) == 1:
+                link["_last_failure"] = DownloadError(THROTTLED, "HTTP 503", retry_after=0.5)
+                link["status"] = "error"
+                return False
+            link["status"] = "finished"
+            manager.recompute_regular_status(entry)
+            return True
+
+        monkeypatch.setattr(manager, "stream_direct_link", fake_stream)
+        monkeypatch.setattr(manager, "save_session_to_disk", lambda: None)
+        ok = manager.run_pipeline(manager.entries)
+
+    assert ok
+    assert [title for title, _ in calls] == ["A", "B", "A"]
+    assert calls[1][1] - calls[0][1] < 0.4
+    assert calls[2][1] - calls[0][1] >= 0.5
+    assert all(entry["status"] == "finished" for entry in manager.entries)
+
+
+def test_parts_waiting_for_disk_space_do_not_hold_download_slots(tmp_path, monkeypatch):
+    calls = []
+
+    with download_benchmark.isolated_state(str(tmp_path), max_parallel=1):
+        manager = tui.TuiDownloadManager(download_benchmark.ensure_app(), [
+            {"title": title, "url": f"http://127.0.0.1:9/{title}.bin", "path": str(tmp_path), "download_type": "regular",
+             "direct_links": [{"path": str(tmp_path / f"{title}.bin"), "url": f"http://127.0.0.1:9/{title}.bin"}]}
+            for title in ("A", "B")
+        ])
+
+        def fake_shortfall(path, needed, reserved):
+            return 1024 if path.endswith("A.bin") and "B" not in calls else 0
+
+        def fake_stream(entry, link, target_path):
+            calls.append(entry["title"])
+            link["status"] = "finished"
+            manager.recompute_regular_status(entry)
+            return True
+
+        monkeypatch.setattr(tui, "disk_shortfall", fake_shortfall)
+        monkeypatch.setattr(manager, "stream_direct_link", fake_stream)
+        monkeypatch.setattr(manager, "save_session_to_disk", lambda: None)
+        ok = manager.run_pipeline(manager.entries)
+
+    assert ok
+    assert calls == ["B", "A"]
+    assert all(entry["status"] == "finished" for entry in manager.entries)
@@ -0,0 +1,194 @@
+import hashlib
+import os
+
+from requests.structures import CaseInsensitiveDict
+
+from download_manager import disk, workers
+
+
+class FakeStream:
+    def __init__(self, status_code, headers, body=b""):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+def run_downloader(target, responses, monkeypatch, validators=None, resume_offset=None, checkpoints=None):
+    requested = []
+
+    def fake_get(url, stream, headers, cookies, timeout):
+        requested.append(dict(headers))
+        return responses.pop(0)
+
+    monkeypatch.setattr(workers.requests, "get", fake_get)
+    signals = workers.DownloadSignals()
+    events = {"hashed": [], "validated": [], "finished": []}
+    signals.hashed.connect(lambda index, hashes: events["hashed"].append(hashes))
+    signals.validated.connect(lambda index, data: events["validated"].append(data))
+    signals.finished.connect(lambda index, ok: events["finished"].append(ok))
+    if checkpoints is not None:
+        signals.checkpoint.connect(lambda index, data: checkpoints.append(data))
+
+    workers.FileDownloader(
+        "https://example.com/file.bin",
+        str(target),
+        1,
+        signals,
+        validators=validators,
+        resume_offset=resume_offset,
+    ).run()
+    return requested, events
+
+
+def test_file_downloader_restarts_when_range_is_ignored(tmp_path, monkeypatch):
+    body = b"complete file" * 100
+    target = tmp_path / "file.bin"
+    target.write_bytes(b"stale prefix")
+
+    requested, events = run_downloader(
+        target,
+        [FakeStream(200, {"Content-Length": str(len(body))}, body)],
+        monkeypatch,
+    )
+
+    assert requested[0]["Range"] == "bytes=12-"
+    assert target.read_bytes() == body
+    assert events["hashed"][0]["sha256"] == hashlib.sha256(body).hexdigest()
+    assert events["finished"] == [True]
+
+
+def test_file_downloader_resumes_with_if_range_and_hashes_whole_file(tmp_path, monkeypatch):
+    body = b"0123456789" * 50
+    target = tmp_path / "file.bin"
+    target.write_bytes(body[:100])
+    headers = {"Content-Range": f"bytes 100-499/{len(body)}", "ETag": '"v1"'}
+
+    requested, events = run_downloader(
+        target,
+        [FakeStream(206, headers, body[100:])],
+        monkeypatch,
+        validators={"etag": '"v1"', "last_modified": "", "size": len(body)},
+    )
+
+    assert requested[0]["If-Range"] == '"v1"'
+    assert target.read_bytes() == body
+    assert events["validated"] == [{"etag": '"v1"', "last_modified": "", "size": len(body)}]
+    assert events["hashed"][0]["md5"] == hashlib.md5(body).hexdigest()
+
+
+def test_file_downloader_restarts_when_remote_file_changed(tmp_path, monkeypatch):
+    new_body = b"new release" * 40
+    target = tmp_path / "file.bin"
+    target.write_bytes(b"old release part")
+
+    requested, events = run_downloader(
+        target,
+        [
+            FakeStream(206, {"Content-Range": "bytes 16-99/100", "ETag": '"v2"'}, b"x" * 84),
+            FakeStream(200, {"Content-Length": str(len(new_body)), "ETag": '"v2"'}, new_body),
+        ],
+        monkeypatch,
+        validators={"etag": 'W/"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT", "size": 100},
+    )
+
+    assert requested[0]["If-Range"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert "Range" not in requested[1]
+    assert target.read_bytes() == new_body
+    assert events["finished"] == [True]
+
+
+def test_file_downloader_skips_network_when_local_size_matches(tmp_path, monkeypatch):
+    target = tmp_path / "file.bin"
+    target.write_bytes(b"a" * 64)
+
+    requested, events = run_downloader(target, [], monkeypatch, validators={"size": 64})
+
+    assert requested == []
+    assert events["finished"] == [True]
+    assert events["hashed"][0]["sha256"] == hashlib.sha256(b"a" * 64).hexdigest()
+
+
+def test_file_downloader_preallocates_and_resumes_from_checkpoint(tmp_path, monkeypatch):
+    body = b"abcdefghij" * 40
+    target = tmp_path / "file.bin"
+    target.write_bytes(body[:150] + b"\0" * (len(body) - 150))
+    checkpoints = []
+
+    requested, events = run_downloader(
+        target,
+        [FakeStream(206, {"Content-Range": f"bytes 150-399/{len(body)}"}, body[150:])],
+        monkeypatch,
+        validators={"size": len(body)},
+        resume_offset=150,
+        checkpoints=checkpoints,
+    )
+
+    assert requested[0]["Range"] == "bytes=150-"
+    assert target.read_bytes() == body
+    assert checkpoints[-1] == {"downloaded": len(body), "preallocated": False}
+    assert events["hashed"][0]["md5"] == hashlib.md5(body).hexdigest()
+
+
+def test_file_downloader_preallocates_fresh_download(tmp_path, monkeypatch):
+    body = b"z" * 1000
+    target = tmp_path / "file.bin"
+    checkpoints = []
+
+    run_downloader(
+        target,
+        [FakeStream(200, {"Content-Length": "1200"}, body)],
+        monkeypatch,
+        checkpoints=checkpoints,
+    )
+
+    assert checkpoints[0] == {"downloaded": 0, "preallocated": True}
+    assert target.read_bytes() == body
+
+
+def test_file_downloader_reports_classified_failure_without_retrying(tmp_path, monkeypatch):
+    target = tmp_path / "file.bin"
+    failures = []
+    monkeypatch.setattr(workers.requests, "get", lambda url, stream, headers, cookies, timeout: FakeStream(
+        503, {"Retry-After": "30"}, b"<html>busy</html>"
+    ))
+    signals = workers.DownloadSignals()
+    finished = []
+    signals.failed.connect(lambda index, failure: failures.append(failure))
+    signals.finished.connect(lambda index, ok: finished.append(ok))
+
+    workers.FileDownloader("https://example.com/file.bin", str(target), 1, signals).run()
+
+    assert failures == [{"kind": "throttled", "message": "HTTP 503", "retry_after": 30.0, "status_code": 503}]
+    assert finished == [False]
+    assert not target.exists()
+
+
+def test_file_downloader_restarts_preallocated_file_without_checkpoint(tmp_path, monkeypatch):
+    # Crash after preallocation, before the session saved the checkpoint: the
+    # file already has the remote size but holds only zeros.
+    body = b"q" * 500
+    target = tmp_path / "file.bin"
+    target.write_bytes(b"\0" * len(body))
+    disk.mark_preallocated(str(target))
+
+    requested, events = run_downloader(
+        target,
+        [FakeStream(200, {"Content-Length": str(len(body))}, body)],
+        monkeypatch,
+        validators={"size": len(body)},
+    )
+
+    assert "Range" not in requested[0]
+    assert target.read_bytes() == body
+    assert events["hashed"][0]["sha256"] == hashlib.sha256(body).hexdigest()
+    assert not os.path.exists(disk.preallocation_marker_path(str(target)))